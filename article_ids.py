@@ -0,0 +1,246 @@
+"""CSC111 Winter 2021 Final Project: Article Identity
+
+Module Description
+===============================
+
+This module contains the functions that put Wikipedia article urls and titles in canonical
+form, and the ArticleTable class, which gives every article a single integer id however its
+url is written.
+
+The same article can be linked as Leading_sire_in_Great_Britain_%26_Ireland, as
+Leading_sire_in_Great_Britain_&_Ireland, with a #section, or through a redirect such as
+Leading_sire_in_Great_Britain_and_Ireland. Canonical urls decode and re-encode the title the
+way MediaWiki does and drop the fragment, and the redirects recorded in the table (which
+wikipedia_html_parsers learns from downloaded pages and keeps in the page cache) map every
+alias to the article it leads to. The redirects are shared by the whole process through the
+table returned by get_article_table, and every graph gives its vertices ids in a table of its
+own that follows them, so an article is only stored once.
+
+Copyright and Usage Information
+===============================
+
+This file is provided solely for the personal and private use of Faizah Sayyid, Tina Zhang,
+Poorvi Sharma, and Courtney Amm (students at the University of Toronto St. George campus).
+All forms of distribution of this code, whether as given or with any changes, are expressly
+prohibited.
+
+This file is Copyright (c) 2021 Faizah Sayyid, Tina Zhang, Poorvi Sharma, Courtney Amm.
+"""
+from __future__ import annotations
+import functools
+import threading
+import urllib.parse
+from typing import Optional
+
+# The prefix of every Wikipedia article url
+WIKI_PREFIX = 'https://en.wikipedia.org/wiki/'
+
+# The prefix of an article url that isn't sent over https
+_HTTP_WIKI_PREFIX = 'http://en.wikipedia.org/wiki/'
+
+# The characters MediaWiki leaves unencoded in article urls
+_URL_SAFE_CHARACTERS = ";@$!*(),/~:"
+
+# The maximum number of redirects followed when resolving an article
+MAX_REDIRECT_HOPS = 5
+
+# The number of canonical urls remembered by canonical_url (the same links appear on many
+# articles, so most of them are looked up again)
+CANONICAL_URL_CACHE_SIZE = 64 * 1024
+
+
+def normalize_title(title: str) -> str:
+    """Return <title> in the form MediaWiki stores it: underscores as spaces, runs of
+    whitespace collapsed, and the first letter capitalized.
+
+    >>> normalize_title(' cade_(horse) ')
+    'Cade (horse)'
+    """
+    title = ' '.join(title.replace('_', ' ').split())
+    return title[:1].upper() + title[1:]
+
+
+def title_to_url(title: str) -> str:
+    """Return the url of the article called <title>, encoded the way Wikipedia links are.
+
+    >>> title_to_url('Leading sire in Great Britain & Ireland')
+    'https://en.wikipedia.org/wiki/Leading_sire_in_Great_Britain_%26_Ireland'
+    """
+    return WIKI_PREFIX + urllib.parse.quote(title.replace(' ', '_'), safe=_URL_SAFE_CHARACTERS)
+
+
+def url_to_title(url: str) -> str:
+    """Return the normalized title of the article at <url>.
+
+    >>> url_to_title('https://en.wikipedia.org/wiki/Leading_sire_in_Great_Britain_%26_Ireland')
+    'Leading sire in Great Britain & Ireland'
+    """
+    return normalize_title(urllib.parse.unquote(url.replace(WIKI_PREFIX, '').split('#')[0]))
+
+
+def is_article_url(url: str) -> bool:
+    """Return whether <url> is the url of an English Wikipedia article (over http or https).
+
+    >>> is_article_url('http://en.wikipedia.org/wiki/Cade_(horse)')
+    True
+    >>> is_article_url('http://127.0.0.1:8000/wiki/Cade_(horse)')
+    False
+    """
+    return url.startswith(WIKI_PREFIX) or url.startswith(_HTTP_WIKI_PREFIX)
+
+
+@functools.lru_cache(maxsize=CANONICAL_URL_CACHE_SIZE)
+def canonical_url(url: str) -> str:
+    """Return the canonical form of the article url <url>: over https, without a fragment,
+    and with its title normalized and encoded the way Wikipedia links are.
+
+    Urls that aren't English Wikipedia articles only lose their fragment.
+
+    >>> canonical_url('http://en.wikipedia.org/wiki/leading_sire_in_Great_Britain_&_Ireland#1')
+    'https://en.wikipedia.org/wiki/Leading_sire_in_Great_Britain_%26_Ireland'
+    >>> canonical_url('https://en.wikipedia.org/wiki/Caf%c3%a9') == \\
+    ...     canonical_url('https://en.wikipedia.org/wiki/Café')
+    True
+    """
+    if not is_article_url(url):
+        return urllib.parse.urldefrag(url)[0]
+
+    if url.startswith(_HTTP_WIKI_PREFIX):
+        url = WIKI_PREFIX + url[len(_HTTP_WIKI_PREFIX):]
+    return title_to_url(url_to_title(url))
+
+
+class ArticleTable:
+    """A table giving every article one integer id.
+
+    Ids are handed out in order, starting from 0, to the canonical url of each article an
+    alias doesn't redirect away from. A table can share its redirects with another one, and
+    can be shared by the threads of a concurrent build.
+
+    >>> table = ArticleTable()
+    >>> table.article_id('https://en.wikipedia.org/wiki/Cade_(horse)')
+    0
+    >>> table.add_redirect('https://en.wikipedia.org/wiki/Cade_horse',
+    ...                    'https://en.wikipedia.org/wiki/Cade_(horse)')
+    >>> table.article_id('https://en.wikipedia.org/wiki/cade_horse#Stud_career')
+    0
+    >>> table.url(0), table.title(0)
+    ('https://en.wikipedia.org/wiki/Cade_(horse)', 'Cade (horse)')
+    >>> other = ArticleTable(table)
+    >>> other.article_id('https://en.wikipedia.org/wiki/Matchem')
+    0
+    >>> other.resolve('https://en.wikipedia.org/wiki/Cade_horse')
+    'https://en.wikipedia.org/wiki/Cade_(horse)'
+    """
+    # Private Instance Attributes:
+    #     - _ids:
+    #         maps the canonical url of every article in the table to its id
+    #     - _urls:
+    #         the canonical url of each article, by id
+    #     - _redirects:
+    #         maps the canonical url of every known alias to the canonical url it redirects to
+    #         (the same dict as in the tables this table shares its redirects with)
+    #     - _lock:
+    #         a lock so the table can be shared by the threads of a concurrent build (the same
+    #         lock as in the tables this table shares its redirects with)
+    _ids: dict[str, int]
+    _urls: list[str]
+    _redirects: dict[str, str]
+    _lock: threading.Lock
+
+    def __init__(self, shared: Optional[ArticleTable] = None) -> None:
+        """Initialize an empty table.
+
+        If a <shared> table is given, the two tables share their redirects: a redirect
+        recorded in either one is known to both. Otherwise, no redirects are known yet.
+        """
+        self._ids = {}
+        self._urls = []
+        if shared is None:
+            self._redirects = {}
+            self._lock = threading.Lock()
+        else:
+            self._redirects = shared._redirects
+            self._lock = shared._lock
+
+    def resolve(self, url: str) -> str:
+        """Return the canonical url of the article <url> leads to, following the redirects
+        known to this table."""
+        url = canonical_url(url)
+        for _ in range(MAX_REDIRECT_HOPS):
+            target = self._redirects.get(url)
+            if target is None or target == url:
+                break
+            url = target
+        return url
+
+    def add_redirect(self, url: str, target: str) -> None:
+        """Record that the article at <url> redirects to the article at <target>."""
+        url, target = canonical_url(url), canonical_url(target)
+        if url != target:
+            with self._lock:
+                self._redirects[url] = target
+
+    def redirects(self) -> dict[str, str]:
+        """Return a copy of the redirects known to this table, mapping the canonical url of
+        every known alias to the canonical url it redirects to."""
+        with self._lock:
+            return dict(self._redirects)
+
+    def article_id(self, url: str) -> int:
+        """Return the id of the article <url> leads to, giving it a new id if it doesn't
+        have one yet."""
+        url = self.resolve(url)
+        article_id = self._ids.get(url)
+        if article_id is None:
+            with self._lock:
+                article_id = self._ids.setdefault(url, len(self._urls))
+                if article_id == len(self._urls):
+                    self._urls.append(url)
+        return article_id
+
+    def url(self, article_id: int) -> str:
+        """Return the canonical url of the article with the given id."""
+        return self._urls[article_id]
+
+    def title(self, article_id: int) -> str:
+        """Return the title of the article with the given id."""
+        url = self._urls[article_id]
+        return url_to_title(url) if is_article_url(url) else url
+
+    def __contains__(self, url: str) -> bool:
+        """Return whether the article <url> leads to has an id."""
+        return self.resolve(url) in self._ids
+
+    def __len__(self) -> int:
+        """Return the number of articles with an id."""
+        return len(self._urls)
+
+
+# The table holding the redirects known to this process, which the parsers record the
+# redirects they find in, and which the tables of the graphs share
+_article_table = ArticleTable()
+
+
+def get_article_table() -> ArticleTable:
+    """Return the table holding the redirects known to this process (graphs give their
+    vertices ids in tables of their own, which share these redirects)."""
+    return _article_table
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
+
+    import python_ta.contracts
+
+    python_ta.contracts.check_all_contracts()
+
+    import python_ta
+
+    python_ta.check_all(config={
+        'extra-imports': ['functools', 'threading', 'urllib.parse'],
+        'allowed-io': [],
+        'max-line-length': 100,
+        'disable': ['E1136']
+    })
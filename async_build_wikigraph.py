@@ -0,0 +1,251 @@
+"""CSC111 Winter 2021 Final Project: Building the WikiGraph on an Event Loop
+
+Module Description
+===============================
+
+This module contains asyncio counterparts of build_wikigraph and build_weighted_wikigraph.
+
+The articles are downloaded with non-blocking HTTP requests over the persistent connections of
+the HTTPTransport every other download goes through, so a single thread can run many crawls at
+the same time. The number of downloads in flight is bounded by a semaphore (which can be
+shared between crawls), and cancelling a crawl's task cancels its downloads too.
+
+The crawls leave their connections open in the transport's pool, where the other crawls on
+the same event loop keep using them: call get_transport().async_close() once every crawl on
+the loop has finished (before the loop itself finishes) to close them.
+
+The breadth-first search itself is the one in build_wikigraph, and the pages are parsed with
+the same link extractor as get_adjacent_urls, so the graphs returned are the same as the ones
+the synchronous builders return.
+
+Copyright and Usage Information
+===============================
+
+This file is provided solely for the personal and private use of Faizah Sayyid, Tina Zhang,
+Poorvi Sharma, and Courtney Amm (students at the University of Toronto St. George campus).
+All forms of distribution of this code, whether as given or with any changes, are expressly
+prohibited.
+
+This file is Copyright (c) 2021 Faizah Sayyid, Tina Zhang, Poorvi Sharma, Courtney Amm.
+"""
+from __future__ import annotations
+import asyncio
+import functools
+import urllib.error
+from typing import Awaitable, Callable, Optional
+
+from build_wikigraph import _add_edges_weights_to_graph, _crawl_steps, start_crawl
+from crawl_state import CrawlState
+from weighted_wikigraph_class import WeightedWikiGraph
+from wikigraph import WikiGraph
+from wikipedia_html_parsers import SCOPE_PAGE, get_page_cache, get_transport, \
+    parse_adjacent_urls, parse_adjacent_urls_weighted, resolve_url, store_page
+
+# The default maximum number of downloads in flight for one crawl
+DEFAULT_MAX_IN_FLIGHT = 8
+
+# The default number of seconds to wait for a single download
+DEFAULT_TIMEOUT = 30.0
+
+
+async def async_fetch_html(url: str, timeout: float = DEFAULT_TIMEOUT) -> str:
+    """Return the html code of <url>, downloading it without blocking the event loop
+    only if it isn't in the page cache.
+
+    The page is downloaded through the same transport (and its pool of persistent
+    connections) as every other download in wikipedia_html_parsers, and the page cache is
+    read and written in the event loop's default executor, since sqlite blocks.
+
+    Raise a urllib.error.HTTPError if the page can't be downloaded, and an
+    asyncio.TimeoutError if it takes longer than <timeout> seconds.
+    """
+    loop = asyncio.get_running_loop()
+    url = resolve_url(url)
+    cache = await loop.run_in_executor(None, get_page_cache)
+    if cache is not None:
+        html = await loop.run_in_executor(None, cache.get, url)
+        if html is not None:
+            return html
+
+    html = (await asyncio.wait_for(get_transport().async_get(url), timeout)).decode()
+    await loop.run_in_executor(None, store_page, url, html)
+    return html
+
+
+async def async_get_adjacent_urls(url: str, scope: str = SCOPE_PAGE) -> list[str]:
+    """Return a list of all wikipedia pages that are adjacent to <url>, linked from the part
+    of its page called <scope>, like get_adjacent_urls."""
+    try:
+        html = await async_fetch_html(url)
+    except urllib.error.HTTPError:
+        return []
+
+    # (parsed in the event loop's default executor, so the other downloads keep going)
+    return await asyncio.get_running_loop().run_in_executor(None, parse_adjacent_urls,
+                                                            resolve_url(url), html, scope)
+
+
+async def async_get_adjacent_urls_weighted(url: str, scope: str = SCOPE_PAGE) -> list:
+    """Return a list in where each element is in the format ((link, name) weight)
+    for each wikipedia page that is adjacent to <url>, like get_adjacent_urls_weighted.
+    """
+    try:
+        html = await async_fetch_html(url)
+    except urllib.error.HTTPError:
+        return []
+
+    return await asyncio.get_running_loop().run_in_executor(None, parse_adjacent_urls_weighted,
+                                                            resolve_url(url), html, scope)
+
+
+class _AsyncPrefetcher:
+    """Downloads the neighbours of the articles at the front of a BFS queue as concurrent
+    tasks on the event loop.
+
+    Instance Attributes:
+        - window: the number of queued articles downloaded ahead of the current one
+
+    Representation Invariants:
+        - self.window >= 0
+    """
+    window: int
+
+    # Private Instance Attributes:
+    #     - _fetch:
+    #         the coroutine function that returns the neighbours of an article url
+    #     - _semaphore:
+    #         bounds the number of downloads in flight
+    #     - _pending:
+    #         maps each article url that is being (or has been) downloaded to its task
+    _fetch: Callable[[str], Awaitable[list]]
+    _semaphore: asyncio.Semaphore
+    _pending: dict[str, asyncio.Task]
+
+    def __init__(self, fetch: Callable[[str], Awaitable[list]], window: int,
+                 semaphore: asyncio.Semaphore) -> None:
+        """Initialize a prefetcher that awaits <fetch> while holding <semaphore>."""
+        self.window = window
+        self._fetch = fetch
+        self._semaphore = semaphore
+        self._pending = {}
+
+    async def _bounded_fetch(self, url: str) -> list:
+        """Return the neighbours of <url>, waiting for a free slot in the semaphore first."""
+        async with self._semaphore:
+            return await self._fetch(url)
+
+    async def fetch(self, url: str, upcoming: list[str]) -> list:
+        """Return the neighbours of <url>, and start downloading the <upcoming> articles
+        that will be needed next.
+        """
+        for next_url in [url] + upcoming:
+            if next_url not in self._pending:
+                self._pending[next_url] = asyncio.ensure_future(self._bounded_fetch(next_url))
+
+        return await self._pending.pop(url)
+
+    async def shutdown(self) -> None:
+        """Cancel every download that is still in flight."""
+        for task in self._pending.values():
+            task.cancel()
+        await asyncio.gather(*self._pending.values(), return_exceptions=True)
+        self._pending = {}
+
+
+async def async_build_wikigraph(starting_url: str, num_sources: int, sources_per_page: int,
+                                max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+                                semaphore: Optional[asyncio.Semaphore] = None,
+                                stop: Optional[asyncio.Event] = None,
+                                scope: str = SCOPE_PAGE) -> WikiGraph:
+    """Return the same Graph as
+    build_wikigraph(starting_url, num_sources, sources_per_page, scope=scope), downloading
+    the articles on the event loop.
+
+    At most <max_in_flight> articles are downloaded at the same time, unless a <semaphore> is
+    given, in which case it bounds the downloads instead (share one semaphore between crawls to
+    bound all of them together).
+
+    If <stop> is given and gets set, the crawl stops and the graph found so far is returned.
+    Cancelling the task running this crawl cancels all of its downloads.
+    """
+    state = start_crawl(starting_url, num_sources, sources_per_page, False, scope=scope)
+    return await _async_run_crawl(state, max_in_flight, semaphore, stop)
+
+
+async def async_build_weighted_wikigraph(starting_url: str, num_sources: int,
+                                         sources_per_page: int,
+                                         max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+                                         semaphore: Optional[asyncio.Semaphore] = None,
+                                         stop: Optional[asyncio.Event] = None,
+                                         scope: str = SCOPE_PAGE) -> WeightedWikiGraph:
+    """Return the same Weighted Graph as
+    build_weighted_wikigraph(starting_url, num_sources, sources_per_page, scope=scope),
+    downloading the articles on the event loop.
+
+    <max_in_flight>, <semaphore> and <stop> are used as in async_build_wikigraph.
+    """
+    state = start_crawl(starting_url, num_sources, sources_per_page, True, scope=scope)
+    return await _async_run_crawl(state, max_in_flight, semaphore, stop)
+
+
+async def _async_run_crawl(state: CrawlState, max_in_flight: int,
+                           semaphore: Optional[asyncio.Semaphore],
+                           stop: Optional[asyncio.Event]) -> WikiGraph:
+    """Run the crawl <state> like build_wikigraph.run_crawl, downloading the articles on the
+    event loop, and return the graph built.
+
+    <max_in_flight>, <semaphore> and <stop> are used as in async_build_wikigraph.
+    """
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(max_in_flight)
+    fetch = async_get_adjacent_urls_weighted if state.weighted else async_get_adjacent_urls
+    if state.scope != SCOPE_PAGE:
+        fetch = functools.partial(fetch, scope=state.scope)
+    prefetcher = _AsyncPrefetcher(fetch, max(max_in_flight - 1, 0), semaphore)
+
+    steps = _crawl_steps(state, None, prefetcher.window, None)
+    try:
+        # answer each request of the crawl for the neighbours of an article (see
+        # build_wikigraph._crawl_steps), stopping between two articles once <stop> is set
+        request, neighbours, error = None, None, None
+        while request is not None or stop is None or not stop.is_set():
+            try:
+                request = steps.send(neighbours) if error is None else steps.throw(error)
+            except StopIteration:
+                break
+            neighbours, error = None, None
+
+            if request is not None:
+                try:
+                    neighbours = await prefetcher.fetch(*request)
+                except Exception as fetch_error:
+                    error = fetch_error
+    finally:
+        steps.close()
+        await prefetcher.shutdown()
+
+    # add all the edges and weights to the weighted graph
+    if state.weighted:
+        _add_edges_weights_to_graph(state.edges_to_weights, state.graph)
+
+    return state.graph
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
+
+    import python_ta.contracts
+
+    python_ta.contracts.check_all_contracts()
+
+    import python_ta
+
+    python_ta.check_all(config={
+        'extra-imports': ['asyncio', 'functools', 'urllib.error', 'build_wikigraph',
+                          'crawl_state', 'weighted_wikigraph_class', 'wikigraph',
+                          'wikipedia_html_parsers'],
+        'allowed-io': [],
+        'max-line-length': 100,
+        'disable': ['E1136']
+    })
@@ -0,0 +1,370 @@
+"""CSC111 Winter 2021 Final Project: Benchmarks
+
+Module Description
+===============================
+
+This module times the link extractors of wikipedia_html_parsers against each other, and
+the single-pass title counting used for weighted links against calling str.count once per
+link, on a made-up page about the size of a long Wikipedia article (and on every article in
+the page cache, if there are any), checking that they give the same results.
+
+It also measures the memory taken by each edge of a large made-up WikiGraph and
+WeightedWikiGraph, before and after they are frozen, times loading the graph file of the
+weighted graph, and times the centralities of graph_centrality on made-up graphs of 10^5 and
+10^6 edges (against computing PageRank one vertex at a time, on the smaller one) and the
+shortest path queries of weighted_paths, with and without landmarks.
+
+Run it with:
+
+    python benchmarks.py
+
+Copyright and Usage Information
+===============================
+
+This file is provided solely for the personal and private use of Faizah Sayyid, Tina Zhang,
+Poorvi Sharma, and Courtney Amm (students at the University of Toronto St. George campus).
+All forms of distribution of this code, whether as given or with any changes, are expressly
+prohibited.
+
+This file is Copyright (c) 2021 Faizah Sayyid, Tina Zhang, Poorvi Sharma, Courtney Amm.
+"""
+from __future__ import annotations
+import gc
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable
+from article_ids import canonical_url
+from frozen_wikigraph import load_wikigraph, save_wikigraph
+from graph_centrality import GraphMatrix, betweenness_centrality, degree_centrality, \
+    eigenvector_centrality, pagerank, DEFAULT_DAMPING, DEFAULT_TOLERANCE
+from weighted_paths import PathFinder
+from weighted_wikigraph_class import WeightedWikiGraph
+from wikigraph import WikiGraph
+from wikipedia_html_parsers import WikipediaArticleParser, count_titles, \
+    extract_article_links, get_page_cache, get_title
+
+# The url of the made-up article
+BENCHMARK_URL = 'https://en.wikipedia.org/wiki/Benchmark'
+
+# The number of times each way is timed on each page
+REPEATS = 5
+
+# The number of vertices and edges of the made-up graphs
+GRAPH_VERTICES = 100_000
+GRAPH_EDGES = 500_000
+
+# The numbers of edges of the made-up graphs the centralities are timed on (each with a
+# fifth as many vertices)
+CENTRALITY_EDGES = (100_000, 1_000_000)
+
+# The number of source articles betweenness centrality is estimated from
+BETWEENNESS_SAMPLES = 16
+
+# The number of random pairs of articles the path benchmark finds shortest paths between
+PATH_QUERIES = 20
+
+# The number of nearest articles the path benchmark asks for
+NEAREST_ARTICLES = 10
+
+
+def make_article_html(num_paragraphs: int = 1500, seed: int = 111) -> str:
+    """Return the html code of a made-up article laid out like a Wikipedia article, with
+    <num_paragraphs> paragraphs of linked text (1500 paragraphs is about 2 MB).
+    """
+    rng = random.Random(seed)
+    titles = [f'Topic_{n}' for n in range(3000)] + ['Help:Contents', 'File:Map.svg',
+                                                    'Category:Things', 'Main_Page']
+
+    # ACCUMULATOR pieces collects the parts of the page
+    pieces = ['<!DOCTYPE html><html><head><title>Benchmark - Wikipedia</title>',
+              '<script>var config = {"wgPageName": "Benchmark", "wgLinks": ',
+              '"<a href=\'/wiki/Not_A_Link\'>"};</script>',
+              '<style>.mw-parser-output a.external { background: none; }</style></head>',
+              '<body><div id="content" class="mw-body" role="main">']
+    for i in range(num_paragraphs):
+        pieces.append(f'<!-- paragraph {i} --><p>')
+        for _ in range(rng.randint(4, 10)):
+            title = rng.choice(titles)
+            pieces.append(f'Some <b>text</b> about <a href="/wiki/{title}" '
+                          f'title="{title.replace("_", " ")}">{title}</a>, with a '
+                          f'reference.<sup id="cite_ref-{i}" class="reference">'
+                          f'<a href="#cite_note-{i}">[{i}]</a></sup> ')
+        pieces.append('</p>\n')
+    pieces.append('</div></body></html>')
+    return ''.join(pieces)
+
+
+def html_parser_links(url: str, html: str) -> list[str]:
+    """Return the links WikipediaArticleParser finds in the <html> code of <url>."""
+    parser = WikipediaArticleParser(url)
+    parser.feed(html)
+    return parser.articles
+
+
+def best_time(function: Callable[[Any, Any], Any], first: Any, second: Any) -> float:
+    """Return the fastest of REPEATS runs of function(<first>, <second>), in seconds."""
+    best = None
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        function(first, second)
+        seconds = time.perf_counter() - start
+        best = seconds if best is None else min(best, seconds)
+    return best
+
+
+def benchmark_page(url: str, html: str) -> dict[str, float]:
+    """Return the time each extractor takes on the <html> code of <url>, in seconds, after
+    checking that they all find the same links."""
+    expected = html_parser_links(url, html)
+    raw = html.encode()
+    assert extract_article_links(url, html) == expected
+    assert extract_article_links(url, raw) == expected
+
+    return {'html.parser': best_time(html_parser_links, url, html),
+            'fast (str)': best_time(extract_article_links, url, html),
+            'fast (bytes)': best_time(extract_article_links, url, raw)}
+
+
+def str_count_titles(html: str, titles: list[str]) -> dict[str, int]:
+    """Return a dict mapping each of the <titles> to the number of times it appears in
+    <html>, scanning the page once per title."""
+    return {title: html.count(title) for title in titles}
+
+
+def benchmark_counts(url: str, html: str) -> dict[str, float]:
+    """Return the time each way of counting the titles of the links on the <html> code of
+    <url> takes, in seconds, after checking that they give the same counts."""
+    titles = [get_title(link) for link in extract_article_links(url, html)]
+    assert count_titles(html, titles) == str_count_titles(html, titles)
+
+    return {'str.count': best_time(str_count_titles, html, titles),
+            'count_titles': best_time(count_titles, html, titles)}
+
+
+def print_results(name: str, size: int, results: dict[str, float]) -> None:
+    """Print the times in <results> for the page called <name> of <size> bytes, with the
+    speed-up of each way over the first one."""
+    print(f'{name} ({size / 1e6:.2f} MB)')
+    baseline = next(iter(results.values()))
+    for extractor, seconds in results.items():
+        speed_up = baseline / seconds
+        print(f'    {extractor:<18}{seconds * 1000:9.1f} ms {speed_up:8.1f}x')
+
+
+def make_graph(graph_class: type, names: list[str], urls: list[str],
+               edges: set[tuple[int, int]]) -> WikiGraph:
+    """Return a new <graph_class> with a vertex for each of the <names> (with the url in the
+    same position of <urls>) and an edge (of weight 1.0) for each pair of indices in
+    <edges>."""
+    graph = graph_class()
+    for name, url in zip(names, urls):
+        graph.add_vertex(name, url)
+    for i, j in edges:
+        graph.add_edge(names[i], names[j])
+    return graph
+
+
+def make_graph_data(num_vertices: int, num_edges: int) -> tuple[list, list, set]:
+    """Return the interned names and urls of <num_vertices> made-up articles (whose canonical
+    urls are cached), and <num_edges> random edges between them as pairs of indices."""
+    rng = random.Random(111)
+    names = [sys.intern(f'Topic {n}') for n in range(num_vertices)]
+    urls = [sys.intern(f'{BENCHMARK_URL}/Topic_{n}') for n in range(num_vertices)]
+    for url in urls:
+        canonical_url(url)
+    edges = set()
+    while len(edges) < num_edges:
+        i, j = rng.randrange(num_vertices), rng.randrange(num_vertices)
+        if i != j:
+            edges.add((min(i, j), max(i, j)))
+    return names, urls, edges
+
+
+def traced_bytes(function: Callable[[], Any]) -> tuple[Any, int]:
+    """Return what function() returns, with the number of bytes allocated by it that are
+    still in use once it returns."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        result = function()
+        gc.collect()
+        return result, tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+
+
+def benchmark_graph_memory(num_vertices: int = GRAPH_VERTICES,
+                           num_edges: int = GRAPH_EDGES) -> dict[str, float]:
+    """Return the number of bytes each edge of a made-up graph with <num_vertices> vertices
+    and <num_edges> edges takes, for each kind of graph, before and after it is frozen.
+
+    The names and urls of the vertices are made, interned and put in canonical form before
+    measuring, so only the memory of the graphs themselves (article tables included) is
+    counted.
+    """
+    names, urls, edges = make_graph_data(num_vertices, num_edges)
+
+    # ACCUMULATOR results maps the name of each graph to its bytes per edge
+    results = {}
+    for graph_class in (WikiGraph, WeightedWikiGraph):
+        graph, graph_bytes = traced_bytes(lambda c=graph_class: make_graph(c, names, urls, edges))
+        frozen, frozen_bytes = traced_bytes(graph.freeze)
+        assert frozen.to_cytoscape() == graph.to_cytoscape()
+
+        results[graph_class.__name__] = graph_bytes / num_edges
+        results[graph_class.__name__ + ' (frozen)'] = frozen_bytes / num_edges
+        del graph, frozen
+    return results
+
+
+def benchmark_graph_file(num_vertices: int = GRAPH_VERTICES,
+                         num_edges: int = GRAPH_EDGES) -> tuple[int, dict[str, float]]:
+    """Return the size in bytes of the graph file of a made-up WeightedWikiGraph with
+    <num_vertices> vertices and <num_edges> edges, and the time it takes to load it with
+    and without memory-mapping it, in seconds."""
+    names, urls, edges = make_graph_data(num_vertices, num_edges)
+    graph = make_graph(WeightedWikiGraph, names, urls, edges)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'benchmark.wikigraph')
+        save_wikigraph(graph, path)
+        assert load_wikigraph(path).get_neighbours(names[0]) == graph.get_neighbours(names[0])
+
+        return os.path.getsize(path), {'read': best_time(load_wikigraph, path, False),
+                                       'memory-mapped': best_time(load_wikigraph, path, True)}
+
+
+def python_pagerank(graph: WeightedWikiGraph, _: Any = None) -> dict[str, float]:
+    """Return the weighted PageRank of every vertex of <graph>, computed one vertex at a time
+    over the vertices' neighbours (with the same damping and tolerance as pagerank)."""
+    vertices = [graph.get_vertex(name) for name in graph.get_all_vertices()]
+    n = len(vertices)
+    strengths = {v: sum(v.neighbours.values()) for v in vertices}
+    scores = {v: 1.0 / n for v in vertices}
+    while True:
+        dangling = sum(scores[v] for v in vertices if strengths[v] == 0)
+        jumps = DEFAULT_DAMPING * dangling / n + (1.0 - DEFAULT_DAMPING) / n
+        new_scores = {v: jumps for v in vertices}
+        for v in vertices:
+            if strengths[v] > 0:
+                share = DEFAULT_DAMPING * scores[v] / strengths[v]
+                for u, weight in v.neighbours.items():
+                    new_scores[u] += share * weight
+        change = sum(abs(new_scores[v] - scores[v]) for v in vertices)
+        scores = new_scores
+        if change < n * DEFAULT_TOLERANCE:
+            return {v.name: score for v, score in scores.items()}
+
+
+def benchmark_centrality(num_edges: int) -> tuple[int, dict[str, float]]:
+    """Return the size in bytes of the GraphMatrix of a made-up WeightedWikiGraph with
+    <num_edges> edges (and a fifth as many vertices), and the time building it and computing
+    each centrality with it takes, in seconds, after the time computing PageRank one vertex
+    at a time takes (which is checked against the vectorized version).
+    """
+    names, urls, edges = make_graph_data(num_edges // 5, num_edges)
+    graph = make_graph(WeightedWikiGraph, names, urls, edges)
+    matrix = GraphMatrix(graph.freeze())
+
+    expected = python_pagerank(graph)
+    actual = pagerank(matrix)
+    assert all(abs(actual[name] - expected[name]) < 1e-9 for name in expected)
+
+    # ACCUMULATOR results maps the name of each centrality to its time
+    results = {'pagerank (python)': best_time(python_pagerank, graph, None)}
+    results['matrix'] = best_time(lambda g, _: GraphMatrix(g.freeze()), graph, None)
+    results['pagerank'] = best_time(lambda m, _: pagerank(m), matrix, None)
+    results['degree'] = best_time(lambda m, _: degree_centrality(m), matrix, None)
+    results['eigenvector'] = best_time(lambda m, _: eigenvector_centrality(m), matrix, None)
+    results['betweenness'] = best_time(betweenness_centrality, matrix, BETWEENNESS_SAMPLES)
+    size = sum(array.nbytes for array in (matrix.offsets, matrix.rows, matrix.columns,
+                                          matrix.weights))
+    return size, results
+
+
+def benchmark_paths(num_vertices: int = GRAPH_VERTICES,
+                    num_edges: int = GRAPH_EDGES) -> tuple[int, dict[str, float]]:
+    """Return the size in bytes of the frozen adjacency of a made-up WeightedWikiGraph (with
+    random edge weights), and the average time finding a shortest path between random
+    articles takes, in seconds, without and with landmarks, then the average time finding
+    the nearest articles to them takes and the time building the PathFinder takes.
+    """
+    names, urls, edges = make_graph_data(num_vertices, num_edges)
+    rng = random.Random(111)
+    graph = WeightedWikiGraph()
+    for name, url in zip(names, urls):
+        graph.add_vertex(name, url)
+    for i, j in edges:
+        graph.add_edge(names[i], names[j], rng.choice([0, 1, 2, 5, 20]))
+    pairs = [tuple(rng.sample(names, 2)) for _ in range(PATH_QUERIES)]
+
+    start = time.perf_counter()
+    finder = PathFinder(graph)
+    build_time = time.perf_counter() - start
+    for name1, name2 in pairs:
+        assert abs(finder.distance(name1, name2) - graph.weighted_distance(name1, name2)) < 1e-9
+
+    queries = {'path (dijkstra)': lambda: [graph.shortest_path(*pair) for pair in pairs],
+               'path (landmarks)': lambda: [finder.shortest_path(*pair) for pair in pairs],
+               'nearest': lambda: [finder.nearest(name, NEAREST_ARTICLES)
+                                   for name, _ in pairs]}
+    # ACCUMULATOR results maps the name of each query to its average time
+    results = {}
+    for label, query in queries.items():
+        start = time.perf_counter()
+        query()
+        results[label] = (time.perf_counter() - start) / PATH_QUERIES
+    results['path finder'] = build_time
+    size = sum(len(array) * array.itemsize for array in finder.graph.adjacency())
+    return size, results
+
+
+def print_memory(num_edges: int, results: dict[str, float]) -> None:
+    """Print the bytes per edge in <results> for graphs with <num_edges> edges."""
+    print(f'graph memory ({num_edges} edges)')
+    for graph, bytes_per_edge in results.items():
+        print(f'    {graph:<28}{bytes_per_edge:9.1f} bytes per edge')
+
+
+def run_benchmarks() -> None:
+    """Time the link extractors and title counting on the made-up article and on every
+    cached article."""
+    cache = get_page_cache()
+    pages = [(BENCHMARK_URL, make_article_html())]
+    pages += [(url, cache.get(url)) for url in ([] if cache is None else cache.urls())]
+
+    for url, html in pages:
+        print_results(url, len(html.encode()), benchmark_page(url, html))
+    for url, html in pages:
+        print_results(url, len(html.encode()), benchmark_counts(url, html))
+    print_memory(GRAPH_EDGES, benchmark_graph_memory())
+    size, results = benchmark_graph_file()
+    print_results(f'graph file ({GRAPH_EDGES} edges)', size, results)
+    for num_edges in CENTRALITY_EDGES:
+        size, results = benchmark_centrality(num_edges)
+        print_results(f'centrality ({num_edges} edges)', size, results)
+    size, results = benchmark_paths()
+    print_results(f'paths ({GRAPH_EDGES} edges)', size, results)
+
+
+if __name__ == '__main__':
+    run_benchmarks()
+
+    import python_ta.contracts
+
+    python_ta.contracts.check_all_contracts()
+
+    import python_ta
+
+    python_ta.check_all(config={
+        'extra-imports': ['gc', 'os', 'random', 'sys', 'tempfile', 'time', 'tracemalloc',
+                          'article_ids', 'frozen_wikigraph', 'graph_centrality',
+                          'weighted_paths', 'weighted_wikigraph_class', 'wikigraph',
+                          'wikipedia_html_parsers'],
+        'allowed-io': ['print_results', 'print_memory'],
+        'max-line-length': 100,
+        'disable': ['E1136']
+    })
@@ -16,68 +16,219 @@ prohibited.
 
 This file is Copyright (c) 2021 Faizah Sayyid, Tina Zhang, Poorvi Sharma, Courtney Amm.
 """
-from typing import Any
+import contextlib
+import contextvars
+import functools
+import time
+import urllib.error
+import zlib
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, ContextManager, Generator, Iterator, Optional
+from article_ids import get_article_table
+from crawl_budget import LIMIT_DEPTH, CrawlBudget
+from crawl_events import EDGE_ADDED, FINISHED, PROGRESS, VERTEX_ADDED, WEIGHT_UPDATED, \
+    CrawlEvent
+from crawl_frontier import CrawlFrontier, PriorityFrontier
+from crawl_state import DEFAULT_CHECKPOINT_EVERY, CrawlState, load_crawl_state, \
+    save_crawl_state
 from wikigraph import WikiGraph
-from wikipedia_html_parsers import get_adjacent_urls, get_adjacent_urls_weighted, get_title
+from http_transport import DownloadMeter, HTTPTransport, record_download, time_left
+from page_cache import PageCache
+from wikipedia_html_parsers import SCOPE_PAGE, get_adjacent_urls, get_adjacent_urls_weighted, \
+    get_cache_closed_pages, get_link_extractor, get_page_cache, get_title, resolve_url, \
+    set_cache_closed_pages, set_link_extractor, set_page_cache, set_transport
 from weighted_wikigraph_class import WeightedWikiGraph
 
 
-class _Queue:
-    """A first-in-first-out (FIFO) queue of items.
-
-    Stores data in a first-in, first-out order. When removing an item from the
-    queue, the most recently-added item is the one that is removed.
-
-    >>> q = _Queue()
-    >>> q.is_empty()
-    True
-    >>> q.enqueue('hello')
-    >>> q.is_empty()
-    False
-    >>> q.enqueue('goodbye')
-    >>> q.dequeue()
-    'hello'
-    >>> q.dequeue()
-    'goodbye'
-    >>> q.is_empty()
-    True
-    """
-    _items: list
-
-    def __init__(self) -> None:
-        """Initialize a new empty queue."""
-        self._items = []
+class _Prefetcher:
+    """Fetches the neighbours of the articles at the front of a BFS queue concurrently.
 
-    def is_empty(self) -> bool:
-        """Return whether this queue contains no items.
-        """
-        return self._items == []
-
-    def enqueue(self, item: Any) -> None:
-        """Add <item> to the back of this queue.
-        """
-        self._items.append(item)
+    The builders still process the articles one at a time, in queue order, so a concurrent
+    build finds exactly the same graph as a serial one; only the downloads overlap.
 
-    def dequeue(self) -> Any:
-        """Remove and return the item at the front of this queue.
+    Instance Attributes:
+        - max_workers: the maximum number of articles downloaded at the same time
 
-        Raise an EmptyQueueError if this queue is empty.
-        """
-        if self.is_empty():
-            raise EmptyQueueError
+    Representation Invariants:
+        - self.max_workers >= 1
+    """
+    max_workers: int
+
+    # Private Instance Attributes:
+    #     - _fetch:
+    #         the function that returns the neighbours of an article url
+    #     - _executor:
+    #         the worker pool the downloads run in (None when self.max_workers == 1)
+    #     - _pending:
+    #         maps each article url that is being (or has been) downloaded to its future
+    _fetch: Callable[[str], list]
+    _executor: Optional[ThreadPoolExecutor]
+    _pending: dict[str, Future]
+
+    def __init__(self, fetch: Callable[[str], list], max_workers: int = 1) -> None:
+        """Initialize a prefetcher that calls <fetch> in at most <max_workers> threads."""
+        self.max_workers = max(max_workers, 1)
+        self._fetch = fetch
+        self._pending = {}
+        if self.max_workers > 1:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers)
         else:
-            return self._items.pop(0)
+            self._executor = None
 
+    def fetch(self, url: str, upcoming: list[str]) -> list:
+        """Return the neighbours of <url>, and start downloading the <upcoming> articles
+        that will be needed next.
+        """
+        if self._executor is None:
+            return self._fetch(url)
 
-class EmptyQueueError(Exception):
-    """Exception raised when calling dequeue on an empty queue."""
+        for next_url in [url] + upcoming:
+            if next_url not in self._pending:
+                # (the download runs in the context of the build, so its budget counts it)
+                self._pending[next_url] = self._executor.submit(
+                    contextvars.copy_context().run, self._fetch_whole, next_url)
 
-    def __str__(self) -> str:
-        """Return a string representation of this error."""
-        return 'dequeue may not be called on an empty queue'
+        return self._pending.pop(url).result()
 
+    def _fetch_whole(self, url: str) -> list:
+        """Return the neighbours of <url>, with the whole article read in this worker thread.
 
-def build_wikigraph(starting_url: str, num_sources: int, sources_per_page: int) -> WikiGraph:
+        (A LinkStream reads its article when its links are used, which would be in the
+        builder's thread instead, one download at a time; len() makes it read everything.
+        A build with worker threads therefore trades the downloads a stream stopped early
+        would save for downloading several articles at once.)
+        """
+        neighbours = self._fetch(url)
+        len(neighbours)
+        return neighbours
+
+    def shutdown(self) -> None:
+        """Stop the worker pool, cancelling the downloads that haven't started yet."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._pending = {}
+
+
+class _ShardedFetcher:
+    """Fetches and parses the articles at the front of a BFS queue in several worker
+    processes, so parsing isn't limited to the one core the GIL allows.
+
+    Each article url is assigned to a shard by its hash, and each shard is a single worker
+    process, so an article is always parsed by the same process (which keeps its own caches).
+    The workers only send back the list of neighbours of each article (with the redirects
+    they learned while downloading it, which are added to this process's article table),
+    and the builders still process the articles one at a time, in queue order, so the graph
+    found is the same as a serial build's.
+
+    Instance Attributes:
+        - max_workers: the number of articles at the front of the queue that are being
+          fetched (or are waiting to be fetched) at the same time
+        - processes: the number of worker processes (shards)
+
+    Representation Invariants:
+        - self.processes >= 1
+        - self.max_workers >= self.processes
+    """
+    max_workers: int
+    processes: int
+
+    # Private Instance Attributes:
+    #     - _fetch:
+    #         the (picklable) function that returns the neighbours of an article url
+    #     - _shards:
+    #         the single-process pool of each shard
+    #     - _pending:
+    #         maps each article url that is being (or has been) fetched to its future
+    _fetch: Callable[[str], list]
+    _shards: list[ProcessPoolExecutor]
+    _pending: dict[str, Future]
+
+    def __init__(self, fetch: Callable[[str], list], processes: int) -> None:
+        """Initialize a fetcher that calls <fetch> in <processes> worker processes.
+
+        <fetch> must be picklable: a module-level function, or a method of a picklable
+        object like a wikipedia_dump_index.LinkIndex.
+        """
+        self.processes = max(processes, 1)
+        self.max_workers = 2 * self.processes
+        self._fetch = fetch
+        self._pending = {}
+
+        cache = get_page_cache()
+        cache_path = None if cache is None else cache.path
+        settings = (cache_path, get_link_extractor(), get_cache_closed_pages())
+        self._shards = [ProcessPoolExecutor(max_workers=1, initializer=_init_shard_worker,
+                                            initargs=settings)
+                        for _ in range(self.processes)]
+
+    def shard(self, url: str) -> int:
+        """Return the index of the shard <url> belongs to."""
+        return zlib.crc32(url.encode()) % self.processes
+
+    def fetch(self, url: str, upcoming: list[str]) -> list:
+        """Return the neighbours of <url>, and send the <upcoming> articles that will be
+        needed next to their shards.
+        """
+        for next_url in [url] + upcoming:
+            if next_url not in self._pending:
+                self._pending[next_url] = self._shards[self.shard(next_url)].submit(
+                    _fetch_in_shard, self._fetch, next_url, time_left())
+
+        neighbours, redirects, num_bytes = self._pending.pop(url).result()
+        table = get_article_table()
+        for alias, target in redirects.items():
+            table.add_redirect(alias, target)
+        record_download(num_bytes)
+        return neighbours
+
+    def shutdown(self) -> None:
+        """Stop the worker processes, cancelling the articles that haven't started yet."""
+        for shard in self._shards:
+            shard.shutdown(wait=True, cancel_futures=True)
+        self._pending = {}
+
+
+# The redirects a shard worker process has already sent back to the builder
+_sent_redirects: set[tuple[str, str]] = set()
+
+
+def _init_shard_worker(cache_path: Optional[str], link_extractor: str,
+                       cache_closed_pages: bool) -> None:
+    """Give a new worker process its own connection to the page cache at <cache_path> (if
+    any) and its own HTTP connections, instead of the ones copied from the parent process,
+    and make it parse pages with the parent's <link_extractor> and <cache_closed_pages>
+    setting (which a process that is spawned rather than forked doesn't inherit)."""
+    set_page_cache(None if cache_path is None else PageCache(cache_path))
+    set_transport(HTTPTransport())
+    set_link_extractor(link_extractor)
+    set_cache_closed_pages(cache_closed_pages)
+    _sent_redirects.clear()
+
+
+def _fetch_in_shard(fetch: Callable[[str], list], url: str, seconds_left: Optional[float]) \
+        -> tuple[list, dict[str, str], int]:
+    """Return the neighbours <fetch> finds for <url> in a shard worker process, with the
+    redirects this process has learned since its last result and the number of bytes it
+    downloaded for <url>.
+
+    The downloads give up after <seconds_left> seconds, if it isn't None.
+    """
+    meter = DownloadMeter(None if seconds_left is None else time.monotonic() + seconds_left)
+    with meter.active():
+        neighbours = list(fetch(url))
+    redirects = {alias: target for alias, target in get_article_table().redirects().items()
+                 if (alias, target) not in _sent_redirects}
+    _sent_redirects.update(redirects.items())
+    return neighbours, redirects, meter.bytes_received
+
+
+def build_wikigraph(starting_url: str, num_sources: int, sources_per_page: int,
+                    max_workers: int = 1, backend: Optional[Any] = None,
+                    frontier: Optional[CrawlFrontier] = None,
+                    checkpoint_path: Optional[str] = None,
+                    checkpoint_every: int = DEFAULT_CHECKPOINT_EVERY,
+                    processes: int = 0, fetcher: Optional[Any] = None,
+                    budget: Optional[CrawlBudget] = None, scope: str = SCOPE_PAGE) -> WikiGraph:
     """ Return a Graph with all the sources and the <starting_url> as its vertex.
 
     Find <num_sources> number of sources from the <starting_url> Wikipedia article.
@@ -89,87 +240,448 @@ def build_wikigraph(starting_url: str, num_sources: int, sources_per_page: int)
     deleted pages but not updated the links on its pages, or there just aren't that many
     links surrounding the <starting_url>.
 
+    If <max_workers> is greater than 1, the next <max_workers> articles in the queue are
+    downloaded concurrently. The graph returned is the same as with a single worker.
+
+    If a <backend> is given (for example a wikipedia_dump_index.LinkIndex), the links of each
+    article are looked up with its get_adjacent_urls and get_adjacent_urls_weighted methods
+    instead of being downloaded from Wikipedia.
+
+    If <processes> is greater than 1, the articles are instead fetched and parsed in that many
+    worker processes, each handling the articles whose url hashes to it. The graph returned
+    is still the same as with a single worker. (A <backend> must then be picklable, like a
+    wikipedia_dump_index.LinkIndex.)
+
+    If a <fetcher> is given (for example a crawl_pipeline.CrawlPipeline), the articles are
+    downloaded and parsed by it instead, and it is shut down once the crawl finishes.
+
+    If an empty <frontier> is given, the crawl queues and records the articles it finds in it
+    (for example, a frontier recording visited articles in a BloomFilter for huge crawls), so
+    its statistics can be inspected afterwards.
+
+    If a <checkpoint_path> is given, the whole state of the crawl is saved to that file every
+    <checkpoint_every> expanded articles (and once more when the crawl finishes), so an
+    interrupted build can be continued with resume_wikigraph.
+
+    If a <budget> is given, the build also stops (returning the graph built so far) as soon as
+    it runs out of its depth, fetch, byte or time budget, and budget.limit_hit tells which.
+
+    If <scope> is SCOPE_CONTENT, only the links in the main content container of each
+    article are followed (see wikipedia_html_parsers.get_article_document).
+
     (Implemented with the Breadth-First-Search Algorithm)
     """
-    # tells us which vertex we should next add to the graph
-    q = _Queue()
+    state = start_crawl(starting_url, num_sources, sources_per_page, False, frontier, scope)
+    return run_crawl(state, max_workers, backend, checkpoint_path, checkpoint_every, processes,
+                     fetcher, budget)
+
+
+def iter_wikigraph(starting_url: str, num_sources: int, sources_per_page: int,
+                   weighted: bool = False, max_workers: int = 1,
+                   backend: Optional[Any] = None, frontier: Optional[CrawlFrontier] = None,
+                   best_first: bool = False, processes: int = 0,
+                   fetcher: Optional[Any] = None, budget: Optional[CrawlBudget] = None,
+                   scope: str = SCOPE_PAGE) -> Iterator[CrawlEvent]:
+    """Build the same graph as build_wikigraph (or build_weighted_wikigraph, if <weighted>),
+    yielding the changes made to it as the crawl goes (see iter_crawl).
+
+    The first event adds the vertex of <starting_url>, and the last one is a FINISHED event
+    whose graph attribute is the finished graph.
+
+    >>> events = iter_wikigraph('https://en.wikipedia.org/wiki/Cat', 0, 0)
+    >>> next(events)
+    CrawlEvent('vertex added', 'Cat', url='https://en.wikipedia.org/wiki/Cat')
+    >>> next(events).graph.get_all_vertices()
+    {'Cat'}
+    """
+    if frontier is None and best_first:
+        frontier = PriorityFrontier()
+
+    state = start_crawl(starting_url, num_sources, sources_per_page, weighted, frontier, scope)
+    yield CrawlEvent(VERTEX_ADDED, get_title(state.starting_url), url=state.starting_url)
+    yield from iter_crawl(state, max_workers, backend, processes=processes, fetcher=fetcher,
+                          budget=budget)
+
+
+def start_crawl(starting_url: str, num_sources: int, sources_per_page: int,
+                weighted: bool = False, frontier: Optional[CrawlFrontier] = None,
+                scope: str = SCOPE_PAGE) -> CrawlState:
+    """Return the state of a new crawl from <starting_url>, which hasn't expanded any
+    articles yet. Run it with run_crawl.
+
+    The crawl builds a WeightedWikiGraph if <weighted> is True, and a WikiGraph otherwise. The
+    articles it finds are queued in <frontier> (a new CrawlFrontier if none is given), by
+    their canonical urls (see resolve_url), so every article is only queued once. The links
+    of each article are taken from the part of it called <scope> (see build_wikigraph).
+    """
+    starting_url = resolve_url(starting_url)
+
+    # tells us which vertex we should next add to the graph, and keeps track of the
+    # vertices we have already visited to make sure we don't enter an infinite loop
+    if frontier is None:
+        frontier = CrawlFrontier()
+
+    # ACCUMULATOR state builds up our wikigraph, keeps track of the sources found, and
+    # (for a weighted graph) stores the edges to add to graph mapped to a list of frequencies
+    # (collects the frequency of one articles name on the other article html code,
+    # as well as the frequency of other articles name on that one article html code)
+    state = CrawlState(starting_url, num_sources, sources_per_page, weighted, frontier, scope)
+
+    # Add initial article to the frontier and our wikigraph
+    frontier.add(starting_url)
+    state.graph.add_vertex(get_title(starting_url), starting_url)
+
+    return state
+
+
+def run_crawl(state: CrawlState, max_workers: int = 1, backend: Optional[Any] = None,
+              checkpoint_path: Optional[str] = None,
+              checkpoint_every: int = DEFAULT_CHECKPOINT_EVERY, processes: int = 0,
+              fetcher: Optional[Any] = None, budget: Optional[CrawlBudget] = None) -> WikiGraph:
+    """Expand articles from the frontier of <state> until the crawl has found
+    state.num_sources sources (or run out of articles), and return the graph built.
+
+    The arguments are the same as for build_wikigraph. <state> is updated as the crawl goes,
+    so it can be extended later with expand_wikigraph or expand_vertex.
+    """
+    for _ in _crawl_articles(state, None, max_workers, backend, checkpoint_path,
+                             checkpoint_every, processes, fetcher, budget):
+        pass
 
-    curr_url = starting_url
+    return state.graph
 
-    # ACCUMULATOR visited keeps track of the vertices we have already visited to make
-    # sure we don't enter an infinite loop
-    visited = []
 
-    # ACCUMULATOR wiki_graph_so_far builds up our wikigraph
-    wiki_graph_so_far = WikiGraph()
+def iter_crawl(state: CrawlState, max_workers: int = 1, backend: Optional[Any] = None,
+               checkpoint_path: Optional[str] = None,
+               checkpoint_every: int = DEFAULT_CHECKPOINT_EVERY, processes: int = 0,
+               fetcher: Optional[Any] = None,
+               budget: Optional[CrawlBudget] = None) -> Iterator[CrawlEvent]:
+    """Run the crawl <state> like run_crawl, yielding the changes it makes to the graph as
+    they happen.
 
-    # ACCUMULATOR sources_found keeps track of the number of sources found
-    sources_found = 0
+    After the VERTEX_ADDED, EDGE_ADDED and WEIGHT_UPDATED events of each expanded article
+    comes a PROGRESS event, and the last event is a FINISHED event holding the finished
+    graph. The crawl stops where it is if the caller stops asking for events (the workers
+    are shut down once the generator is closed).
+    """
+    events = []
+    for _ in _crawl_articles(state, events, max_workers, backend, checkpoint_path,
+                             checkpoint_every, processes, fetcher, budget):
+        yield from events
+        events.clear()
+        yield _counters_event(PROGRESS, state)
+
+    finished = _counters_event(FINISHED, state)
+    finished.graph = state.graph
+    yield finished
+
+
+def _counters_event(kind: str, state: CrawlState) -> CrawlEvent:
+    """Return an event of the given kind holding the counters of the crawl <state>."""
+    event = CrawlEvent(kind)
+    event.sources_found = state.sources_found
+    event.pages_expanded = state.pages_expanded
+    return event
+
+
+def _crawl_articles(state: CrawlState, events: Optional[list[CrawlEvent]], max_workers: int,
+                    backend: Optional[Any], checkpoint_path: Optional[str],
+                    checkpoint_every: int, processes: int, fetcher: Optional[Any],
+                    budget: Optional[CrawlBudget]) -> Iterator[None]:
+    """Run the crawl <state> (see run_crawl), yielding after each article it expands.
+
+    If <events> is not None, the changes made to the graph are appended to it.
+    """
+    # downloads (and parses) the articles at the front of the queue, in worker threads,
+    # worker processes or the stages of a pipeline
+    fetch = _link_fetcher(backend, state.weighted, state.scope)
+    if fetcher is not None:
+        prefetcher = fetcher
+    elif processes > 1:
+        prefetcher = _ShardedFetcher(fetch, processes)
+    else:
+        prefetcher = _Prefetcher(fetch, max_workers)
+
+    steps = _crawl_steps(state, events, prefetcher.max_workers - 1, budget)
+    try:
+        # answer each request of the crawl for the neighbours of an article (or hand it the
+        # error the download raised), until it finishes
+        neighbours, error = None, None
+        while True:
+            try:
+                request = steps.send(neighbours) if error is None else steps.throw(error)
+            except StopIteration:
+                break
+            neighbours, error = None, None
+
+            if request is not None:
+                try:
+                    neighbours = prefetcher.fetch(*request)
+                except Exception as fetch_error:
+                    error = fetch_error
+                continue
+
+            if checkpoint_path is not None and state.pages_expanded % checkpoint_every == 0:
+                save_crawl_state(state, checkpoint_path)
+
+            yield None
+    finally:
+        steps.close()
+        prefetcher.shutdown()
+
+    if checkpoint_path is not None:
+        save_crawl_state(state, checkpoint_path)
+
+    # add all the edges and weights to the weighted graph
+    if state.weighted:
+        _add_edges_weights_to_graph(state.edges_to_weights, state.graph)
+
+
+def _crawl_steps(state: CrawlState, events: Optional[list[CrawlEvent]], window: int,
+                 budget: Optional[CrawlBudget]) \
+        -> Generator[Optional[tuple[str, list[str]]], Optional[list], None]:
+    """Run the crawl <state> (see run_crawl), without downloading anything itself.
+
+    Whenever the crawl needs the neighbours of an article, this generator yields
+    (url of the article, urls of the (at most) <window> articles it will need next) and
+    expects the neighbours to be sent back, or the error raised while fetching them to be
+    thrown into it. It yields None after each article it expands. This is the crawl loop of
+    both the builders in this module and the ones in async_build_wikigraph, which only
+    differ in how they fetch the neighbours.
+
+    If <events> is not None, the changes made to the graph are appended to it.
+    """
+    if budget is not None:
+        budget.start(state)
+    _requeue_too_deep(state)
+
+    try:
+        # we will either stop when the queue is empty, when we have found the
+        # desired number of sources, or when the budget runs out
+        while not state.is_finished():
+            if budget is not None and state.unfinished is None and budget.is_exhausted(state):
+                break
+
+            with _downloading(budget):
+                if state.unfinished is not None:
+                    # finish adding the links of the article the crawl stopped in the middle of
+                    curr_url, neighbours, page_progress = state.unfinished
+                    state.unfinished = None
+                else:
+                    # Reassign curr_url to the next item in the queue
+                    curr_url = state.frontier.pop()
+
+                    # articles too far from the starting article stay leaves of the graph (and
+                    # are set aside until the build stops, for a build with a larger budget)
+                    if budget is not None and not budget.allows_depth(state, curr_url):
+                        budget.limit_hit = LIMIT_DEPTH
+                        state.too_deep.append((curr_url, state.frontier.popped_priority()))
+                        continue
+
+                    # find the neighbouring links on the article for curr_url
+                    upcoming = [url for url in state.frontier.front(window)
+                                if budget is None or budget.allows_depth(state, url)]
+                    try:
+                        neighbours = yield curr_url, upcoming
+                    except urllib.error.URLError:
+                        # a download cut short by the deadline of the budget stops the build
+                        # (the article is queued again, so the build can be continued)
+                        if budget is None or not budget.is_exhausted(state):
+                            raise
+                        state.frontier.requeue(curr_url)
+                        break
+                    page_progress = [0, 0]
+                    state.pages_expanded += 1
+
+                _expand_article(state, curr_url, neighbours, page_progress, events)
+
+            yield None
+    finally:
+        _requeue_too_deep(state)
+
+
+def _requeue_too_deep(state: CrawlState) -> None:
+    """Put the articles set aside for being too deep back at the front of the frontier of
+    <state>, in the order they were taken off it and with the priorities they were queued
+    with."""
+    for url, priority in reversed(state.too_deep):
+        state.frontier.requeue(url, priority)
+    state.too_deep = []
+
+
+def _downloading(budget: Optional[CrawlBudget]) -> ContextManager[None]:
+    """Return a context manager that counts the downloads made inside it towards <budget>
+    (see CrawlBudget.downloading), or does nothing if there is no budget."""
+    return contextlib.nullcontext() if budget is None else budget.downloading()
+
+
+def _expand_article(state: CrawlState, curr_url: str, neighbours: list,
+                    page_progress: list[int], events: Optional[list[CrawlEvent]] = None,
+                    priority: Optional[float] = None) -> None:
+    """Add the <neighbours> of the article at <curr_url> to the crawl <state>, continuing
+    from <page_progress> (see _update_wikigraph), and append the changes made to the graph
+    to <events> if it is given.
+
+    <priority> is the accumulated weight of the article in a best-first crawl (by default,
+    the priority of the article popped last from the frontier).
+    """
+    curr_name = state.graph.vertex_name(get_title(curr_url))
+    first_neighbour = page_progress[0]
+    sources_info = (state.sources_found, state.num_sources, state.sources_per_page)
+    if state.weighted:
+        graph_info = (curr_name, state.edges_to_weights)
+        new_sources_found = _update_weighted_wikigraph(neighbours, state.frontier, sources_info,
+                                                       state.graph, graph_info, page_progress,
+                                                       events, priority)
+    else:
+        new_sources_found = _update_wikigraph(neighbours, state.frontier, sources_info,
+                                              state.graph, curr_name, page_progress, events)
+    state.sources_found += new_sources_found
+
+    # record how far the newly seen articles are from the starting article
+    depth = state.depths.get(curr_url, 0) + 1
+    for neighbour in neighbours[first_neighbour:page_progress[0]]:
+        state.depths.setdefault(neighbour[0][0] if state.weighted else neighbour, depth)
+
+    # remember the rest of the links if the crawl found its last source on this article
+    # (checking the sources of the page first, so a page that is done isn't read any further)
+    if page_progress[1] < state.sources_per_page and page_progress[0] < len(neighbours):
+        state.unfinished = (curr_url, neighbours, page_progress)
+
+
+def resume_wikigraph(checkpoint_path: str, max_workers: int = 1, backend: Optional[Any] = None,
+                     checkpoint_every: int = DEFAULT_CHECKPOINT_EVERY) -> WikiGraph:
+    """Continue the build saved in the checkpoint file at <checkpoint_path> by
+    build_wikigraph or build_weighted_wikigraph, and return the graph it builds.
+
+    The crawl carries on exactly where the checkpoint was taken (articles expanded before it
+    are not downloaded again), and keeps saving checkpoints to the same file.
+    """
+    state = load_crawl_state(checkpoint_path)
+    return run_crawl(state, max_workers, backend, checkpoint_path, checkpoint_every)
+
+
+def expand_wikigraph(state: CrawlState, extra_sources: int, max_workers: int = 1,
+                     backend: Optional[Any] = None,
+                     budget: Optional[CrawlBudget] = None) -> WikiGraph:
+    """Grow the graph of the finished crawl <state> by <extra_sources> more sources, and
+    return it.
+
+    Only articles that were never expanded are downloaded, and the graph is the same as if
+    the crawl had been run with state.num_sources + <extra_sources> sources to begin with.
+    The growth stops early if it runs out of <budget>.
+    """
+    state.num_sources += extra_sources
+    return run_crawl(state, max_workers, backend, budget=budget)
+
+
+def expand_vertex(state: CrawlState, name: str, backend: Optional[Any] = None) -> WikiGraph:
+    """Add (up to state.sources_per_page) sources linked from the vertex called <name> to the
+    graph of the crawl <state>, and return the graph.
+
+    Nothing is downloaded if the vertex's article has already been expanded. Raise a
+    ValueError if there is no vertex called <name> in the graph.
+    """
+    if not state.graph.is_vertex_in_graph(name):
+        raise ValueError(f'{name} is not a vertex of the graph')
 
-    # Add initial article to queue, visited, and our wikigraph
-    q.enqueue(curr_url)
-    visited.append(curr_url)
-    curr_name = get_title(curr_url)
-    wiki_graph_so_far.add_vertex(curr_name, curr_url)
+    url = state.graph.get_vertex(name).url
+    priority = state.frontier.priority(url)
+    if state.frontier.remove(url):
+        num_sources, unfinished = state.num_sources, state.unfinished
 
-    # we will either stop when the queue is empty or, when we have found the
-    # desired number of sources
-    while not (q.is_empty() or sources_found >= num_sources):
+        # let this article add a full page of sources, and nothing else
+        state.num_sources = state.sources_found + state.sources_per_page
+        fetch = _link_fetcher(backend, state.weighted, state.scope)
+        _expand_article(state, url, fetch(url), [0, 0], priority=priority)
+        state.pages_expanded += 1
 
-        # Reassign curr_url to the next item in the queue
-        curr_url = q.dequeue()
-        curr_name = get_title(curr_url)
+        state.num_sources = max(num_sources, state.sources_found)
+        state.unfinished = unfinished
 
-        # find the neighbouring links on the article for curr_url
-        neighbours = get_adjacent_urls(curr_url)
+        if state.weighted:
+            _add_edges_weights_to_graph(state.edges_to_weights, state.graph)
 
-        bfs_objects = (visited, q)
-        sources_info = (sources_found, num_sources, sources_per_page)
-        new_sources_found = _update_wikigraph(neighbours, bfs_objects, sources_info,
-                                              wiki_graph_so_far, curr_name)
-        sources_found += new_sources_found
+    return state.graph
 
-    return wiki_graph_so_far
 
+def _link_fetcher(backend: Optional[Any], weighted: bool,
+                  scope: str) -> Callable[[str], list]:
+    """Return the (picklable) function that finds the (weighted, if <weighted>) neighbours
+    of an article in the part of it called <scope>, looking them up in <backend> if one is
+    given (a link index ignores <scope>)."""
+    if backend is None:
+        fetch = get_adjacent_urls_weighted if weighted else get_adjacent_urls
+        return fetch if scope == SCOPE_PAGE else functools.partial(fetch, scope=scope)
+    else:
+        return backend.get_adjacent_urls_weighted if weighted else backend.get_adjacent_urls
 
-def _update_wikigraph(neighbours: list[str], bfs_objects: tuple[list, _Queue],
+
+def _update_wikigraph(neighbours: list[str], frontier: CrawlFrontier,
                       sources_info: tuple[int, int, int],
-                      wikigraph: WikiGraph, curr_name: str) -> int:
-    """Add neighbours to wikigraph, update bfs_objects, and return the number
-    of resources found"""
+                      wikigraph: WikiGraph, curr_name: str,
+                      page_progress: Optional[list[int]] = None,
+                      events: Optional[list[CrawlEvent]] = None) -> int:
+    """Add neighbours to wikigraph, update frontier, and return the number
+    of resources found
+
+    If <page_progress> is given, it is [number of neighbours already added, number of sources
+    already found on this page] and is updated to match when this function returns. If
+    <events> is given, the vertices and edges added are appended to it.
+    """
     # Reset the counter the following while loop
-    i = 0
-    sources_found_per_page = 0
+    i, sources_found_per_page = (0, 0) if page_progress is None else page_progress
     new_sources_found = 0
     curr_sources_found, num_sources, sources_per_page = sources_info
-    visited, q = bfs_objects
 
     # stop loop either when we've added all the neighbours or curr_url
     # or we found our desired number of sources
-    while not (i >= len(neighbours)
-               or (new_sources_found + curr_sources_found) >= num_sources
+    # (the neighbours may be a LinkStream still being downloaded, so they are only read as
+    # far as they are needed, and running out of them shows up as an IndexError)
+    while not ((new_sources_found + curr_sources_found) >= num_sources
                or sources_found_per_page >= sources_per_page):
-        v_link = neighbours[i]
+        try:
+            v_link = neighbours[i]
+        except IndexError:
+            break
         v_name = get_title(v_link)
         i += 1
 
-        # if the neighbour is not in visited, add it to the graph
-        if v_link not in visited:
-            q.enqueue(v_link)
-            visited.append(v_link)
-
-            if not wikigraph.is_vertex_in_graph(v_name):
-                wikigraph.add_vertex(v_name, v_link)
+        # if the neighbour has not been visited, queue it and add it to the graph (unless it
+        # is an article already in the graph under another name, which v_name then stands for)
+        if frontier.add(v_link) and not wikigraph.is_vertex_in_graph(v_name):
+            wikigraph.add_vertex(v_name, v_link)
+            if wikigraph.vertex_name(v_name) == v_name:
                 sources_found_per_page += 1
                 new_sources_found += 1
+                if events is not None:
+                    events.append(CrawlEvent(VERTEX_ADDED, v_name, url=v_link))
 
-        wikigraph.add_edge(curr_name, v_name)
+        # (a probabilistic frontier may wrongly report a new neighbour as visited, in which
+        # case it was never added to the graph, and a link through another name of the
+        # current article leads back to it)
+        v_name = wikigraph.vertex_name(v_name)
+        if wikigraph.is_vertex_in_graph(v_name) and v_name != curr_name:
+            if events is not None and not wikigraph.adjacent(curr_name, v_name):
+                events.append(CrawlEvent(EDGE_ADDED, curr_name, v_name))
+            wikigraph.add_edge(curr_name, v_name)
+
+    if page_progress is not None:
+        page_progress[:] = [i, sources_found_per_page]
 
     return new_sources_found
 
 
 def build_weighted_wikigraph(starting_url: str, num_sources: int,
-                             sources_per_page: int) -> WeightedWikiGraph:
+                             sources_per_page: int, max_workers: int = 1,
+                             backend: Optional[Any] = None,
+                             frontier: Optional[CrawlFrontier] = None,
+                             best_first: bool = False,
+                             checkpoint_path: Optional[str] = None,
+                             checkpoint_every: int = DEFAULT_CHECKPOINT_EVERY,
+                             processes: int = 0, fetcher: Optional[Any] = None,
+                             budget: Optional[CrawlBudget] = None,
+                             scope: str = SCOPE_PAGE) -> WeightedWikiGraph:
     """ Return a Weighted Graph with all the sources and the <starting_url> as its vertex.
 
     Find <num_sources> number of sources from the <starting_url> Wikipedia article.
@@ -181,72 +693,79 @@ def build_weighted_wikigraph(starting_url: str, num_sources: int,
     deleted pages but not updated the links on its pages, or there just aren't that many
     links surrounding the <starting_url>.
 
-    (Implemented with the Breadth-First-Search Algorithm)
-    """
-    # tells us which vertex we should next add to the graph
-    q = _Queue()
-
-    curr_url = starting_url
+    If <max_workers> is greater than 1, the next <max_workers> articles in the queue are
+    downloaded concurrently. The graph returned is the same as with a single worker.
 
-    # ACCUMULATOR visited keeps track of the vertices we have already visited to make
-    # sure we don't enter an infinite loop
-    visited = []
+    If a <backend> is given (for example a wikipedia_dump_index.LinkIndex), the links of each
+    article are looked up with its get_adjacent_urls and get_adjacent_urls_weighted methods
+    instead of being downloaded from Wikipedia.
 
-    # ACCUMULATOR stores the edges to add to graph mapped to a list of frequencies
-    # (collects the frequency of one articles name on the other article html code,
-    # as well as the frequency of other articles name on that one article html code)
-    edges_to_weights = {}
-
-    # ACCUMULATOR wiki_graph_so_far builds up our wikigraph
-    wiki_graph_so_far = WeightedWikiGraph()
+    If <processes> is greater than 1, the articles are instead fetched and parsed in that many
+    worker processes, each handling the articles whose url hashes to it. The graph returned
+    is still the same as with a single worker. (A <backend> must then be picklable, like a
+    wikipedia_dump_index.LinkIndex.)
 
-    # ACCUMULATOR sources_found keeps track of the number of sources found
-    sources_found = 0
+    If a <fetcher> is given (for example a crawl_pipeline.CrawlPipeline), the articles are
+    downloaded and parsed by it instead, and it is shut down once the crawl finishes.
 
-    # Add initial article to queue, visited, and our wikigraph
-    q.enqueue(curr_url)
-    visited.append(curr_url)
-    curr_name = get_title(curr_url)
-    wiki_graph_so_far.add_vertex(curr_name, curr_url)
+    If an empty <frontier> is given, the crawl queues and records the articles it finds in it
+    (for example, a frontier recording visited articles in a BloomFilter for huge crawls), so
+    its statistics can be inspected afterwards.
 
-    # we will either stop when the queue is empty or, when we have found the
-    # desired number of sources
-    while not (q.is_empty() or sources_found >= num_sources):
+    If <best_first> is True (and no <frontier> is given), the articles are expanded in order
+    of their accumulated weight instead: the sum of the weights of the links followed from
+    <starting_url> to reach them. The most strongly linked articles are then expanded first,
+    which usually finds the relevant sources with far fewer downloads.
 
-        # Reassign curr_url to the next item in the queue
-        curr_url = q.dequeue()
-        curr_name = get_title(curr_url)
+    If a <checkpoint_path> is given, the whole state of the crawl is saved to that file every
+    <checkpoint_every> expanded articles (and once more when the crawl finishes), so an
+    interrupted build can be continued with resume_wikigraph.
 
-        # find the neighbouring links on the article for curr_url
-        neighbours = get_adjacent_urls_weighted(curr_url)
+    If a <budget> is given, the build also stops (returning the graph built so far) as soon as
+    it runs out of its depth, fetch, byte or time budget, and budget.limit_hit tells which.
 
-        sources_info = (sources_found, num_sources, sources_per_page)
-        bfs_objects = (visited, q)
-        graph_info = (curr_name, edges_to_weights)
-        new_sources_found = _update_weighted_wikigraph(neighbours, bfs_objects, sources_info,
-                                                       wiki_graph_so_far, graph_info)
-        sources_found += new_sources_found
+    If <scope> is SCOPE_CONTENT, only the links in the main content container of each
+    article are followed (see wikipedia_html_parsers.get_article_document).
 
-    # add all the edges and weights to wiki_graph_so_far
-    _add_edges_weights_to_graph(edges_to_weights, wiki_graph_so_far)
+    (Implemented with the Breadth-First-Search Algorithm, or a Best-First-Search with
+    <best_first>)
+    """
+    if frontier is None and best_first:
+        frontier = PriorityFrontier()
 
-    return wiki_graph_so_far
+    state = start_crawl(starting_url, num_sources, sources_per_page, True, frontier, scope)
+    return run_crawl(state, max_workers, backend, checkpoint_path, checkpoint_every, processes,
+                     fetcher, budget)
 
 
-def _update_weighted_wikigraph(neighbours: list[tuple], bfs_objects: tuple[list, _Queue],
+def _update_weighted_wikigraph(neighbours: list[tuple], frontier: CrawlFrontier,
                                sources_info: tuple[int, int, int],
                                wikigraph: WeightedWikiGraph,
-                               graph_info: tuple[str, dict]) -> int:
-    """Add neighbours to wikigraph, update bfs_objects, update graph_info, and return the
-    number of resources found"""
+                               graph_info: tuple[str, dict],
+                               page_progress: Optional[list[int]] = None,
+                               events: Optional[list[CrawlEvent]] = None,
+                               curr_priority: Optional[float] = None) -> int:
+    """Add neighbours to wikigraph, update frontier, update graph_info, and return the
+    number of resources found
+
+    If <page_progress> is given, it is [number of neighbours already added, number of sources
+    already found on this page] and is updated to match when this function returns. If
+    <events> is given, the vertices added and the edge weights collected are appended to it
+    (with the weight each edge will have if no more links between its articles are found).
+    The neighbours are queued with <curr_priority> (the accumulated weight of the current
+    article) plus the weight of their links.
+    """
     # Reset the counter the following while loop
-    i = 0
-    sources_found_per_page = 0
+    i, sources_found_per_page = (0, 0) if page_progress is None else page_progress
     curr_sources_found, num_sources, sources_per_page = sources_info
-    visited, q = bfs_objects
     curr_name, edges_to_weights = graph_info
     new_sources_found = 0
 
+    # the accumulated weight of the current article, by default the one popped last (always
+    # 0.0 in a breadth-first crawl)
+    if curr_priority is None:
+        curr_priority = frontier.popped_priority()
+
     # stop loop either when we've added all the neighbours or curr_url
     # or we found our desired number of sources
     while not (i >= len(neighbours)
@@ -256,21 +775,35 @@ def _update_weighted_wikigraph(neighbours: list[tuple], bfs_objects: tuple[list,
         v_link, v_name = v
         i += 1
 
-        # if the neighbour is not in visited, add it to the graph
-        if v_link not in visited:
-            q.enqueue(v_link)
-            visited.append(v_link)
-
-            if not wikigraph.is_vertex_in_graph(v_name):
-                wikigraph.add_vertex(v_name, v_link)
+        # if the neighbour has not been visited, queue it and add it to the graph (unless it
+        # is an article already in the graph under another name, which v_name then stands for)
+        if frontier.add(v_link, curr_priority + partial_weight) \
+                and not wikigraph.is_vertex_in_graph(v_name):
+            wikigraph.add_vertex(v_name, v_link)
+            if wikigraph.vertex_name(v_name) == v_name:
                 sources_found_per_page += 1
                 new_sources_found += 1
-
-        # add the edge and weight to edges_to_weights
-        if (v_name, curr_name) in edges_to_weights:
-            edges_to_weights[(v_name, curr_name)].append(partial_weight)
-        else:
-            edges_to_weights[(curr_name, v_name)] = [partial_weight]
+                if events is not None:
+                    events.append(CrawlEvent(VERTEX_ADDED, v_name, url=v_link))
+
+        # add the edge and weight to edges_to_weights (unless the neighbour was wrongly
+        # reported as visited by a probabilistic frontier, and so is not in the graph, or is
+        # the current article under another name)
+        v_name = wikigraph.vertex_name(v_name)
+        if wikigraph.is_vertex_in_graph(v_name) and v_name != curr_name:
+            if (v_name, curr_name) in edges_to_weights:
+                edge, kind = (v_name, curr_name), WEIGHT_UPDATED
+                edges_to_weights[edge].append(partial_weight)
+            else:
+                edge, kind = (curr_name, v_name), EDGE_ADDED
+                edges_to_weights[edge] = [partial_weight]
+
+            if events is not None:
+                events.append(CrawlEvent(kind, edge[0], edge[1],
+                                         weight=sum(edges_to_weights[edge]) / 2))
+
+    if page_progress is not None:
+        page_progress[:] = [i, sources_found_per_page]
 
     return new_sources_found
 
@@ -295,7 +828,10 @@ if __name__ == '__main__':
     import python_ta
 
     python_ta.check_all(config={
-        'extra-imports': ['wikigraph', 'wikipedia_html_parsers',
+        'extra-imports': ['contextlib', 'contextvars', 'functools', 'time', 'urllib.error',
+                          'zlib', 'concurrent.futures', 'article_ids', 'crawl_budget',
+                          'crawl_events', 'crawl_frontier', 'crawl_state', 'http_transport',
+                          'page_cache', 'wikigraph', 'wikipedia_html_parsers',
                           'weighted_wikigraph_class'],
         'allowed-io': [],
         'max-line-length': 100,
@@ -0,0 +1,32 @@
+"""CSC111 Winter 2021 Final Project: Shared Test Fixtures
+
+Module Description
+===============================
+
+This module contains the fixtures every test suite uses. Tests never read or write the
+page cache in the user's cache directory: each test that uses the default page cache gets
+a new one in a temporary directory.
+
+Copyright and Usage Information
+===============================
+
+This file is provided solely for the personal and private use of Faizah Sayyid, Tina Zhang,
+Poorvi Sharma, and Courtney Amm (students at the University of Toronto St. George campus).
+All forms of distribution of this code, whether as given or with any changes, are expressly
+prohibited.
+
+This file is Copyright (c) 2021 Faizah Sayyid, Tina Zhang, Poorvi Sharma, Courtney Amm.
+"""
+import pytest
+
+import wikipedia_html_parsers
+
+
+@pytest.fixture(autouse=True)
+def temporary_page_cache(monkeypatch, tmp_path):
+    """Make the default page cache a new file in a temporary directory."""
+    monkeypatch.setattr(wikipedia_html_parsers, 'DEFAULT_CACHE_PATH',
+                        str(tmp_path / 'cache' / 'pages.sqlite3'))
+    monkeypatch.setattr(wikipedia_html_parsers, '_page_cache', None)
+    monkeypatch.setattr(wikipedia_html_parsers, '_page_cache_set', False)
+    monkeypatch.setattr(wikipedia_html_parsers, '_redirects_loaded_from', None)
@@ -0,0 +1,149 @@
+"""CSC111 Winter 2021 Final Project: Crawl Budget
+
+Module Description
+===============================
+
+This module contains the CrawlBudget class, which bounds how much work a graph build may do
+besides finding its sources: how deep the crawl may go from the starting article, how many
+articles it may expand, how many bytes it may download and how long it may run.
+
+A build that runs out of any part of its budget stops between two articles and returns the
+graph it has built so far (the budget records which limit was hit), so a slow or sparse
+neighbourhood of Wikipedia can't keep a request running for a long time.
+
+Copyright and Usage Information
+===============================
+
+This file is provided solely for the personal and private use of Faizah Sayyid, Tina Zhang,
+Poorvi Sharma, and Courtney Amm (students at the University of Toronto St. George campus).
+All forms of distribution of this code, whether as given or with any changes, are expressly
+prohibited.
+
+This file is Copyright (c) 2021 Faizah Sayyid, Tina Zhang, Poorvi Sharma, Courtney Amm.
+"""
+from __future__ import annotations
+import time
+from typing import ContextManager, Optional
+from crawl_state import CrawlState
+from http_transport import DownloadMeter
+
+# The values of CrawlBudget.limit_hit
+LIMIT_TIME = 'time'
+LIMIT_FETCHES = 'fetches'
+LIMIT_BYTES = 'bytes'
+LIMIT_DEPTH = 'depth'
+
+
+class CrawlBudget:
+    """The limits of a single run of a graph build (None means no limit).
+
+    Instance Attributes:
+        - max_depth: the largest number of links between the starting article and an article
+          in the graph (articles that far away are added to the graph, but not expanded)
+        - max_fetches: the largest number of articles that may be expanded
+        - max_bytes: the largest number of bytes that may be downloaded (pages read from the
+          page cache, or looked up in a link index, are free)
+        - timeout: the number of seconds the build may run for (downloads still running at
+          the deadline give up)
+        - deadline: the time.monotonic() time the build must stop at (set when the build
+          starts), or None
+        - limit_hit: which limit stopped the last build (one of LIMIT_TIME, LIMIT_FETCHES,
+          LIMIT_BYTES and LIMIT_DEPTH), or None if it stopped for the usual reasons
+
+    Representation Invariants:
+        - self.max_depth is None or self.max_depth >= 0
+        - self.max_fetches is None or self.max_fetches >= 0
+        - self.max_bytes is None or self.max_bytes >= 0
+        - self.timeout is None or self.timeout >= 0
+
+    >>> budget = CrawlBudget(max_fetches=10)
+    >>> budget.limit_hit is None
+    True
+    """
+    max_depth: Optional[int]
+    max_fetches: Optional[int]
+    max_bytes: Optional[int]
+    timeout: Optional[float]
+    deadline: Optional[float]
+    limit_hit: Optional[str]
+
+    # Private Instance Attributes:
+    #     - _start_fetches:
+    #         the number of articles the crawl had expanded when the build started
+    #     - _meter:
+    #         counts the bytes downloaded by the current build (and by no other build
+    #         running at the same time), and holds its deadline
+    _start_fetches: int
+    _meter: DownloadMeter
+
+    def __init__(self, max_depth: Optional[int] = None, max_fetches: Optional[int] = None,
+                 max_bytes: Optional[int] = None, timeout: Optional[float] = None) -> None:
+        """Initialize a budget with the given limits."""
+        self.max_depth = max_depth
+        self.max_fetches = max_fetches
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self.deadline = None
+        self.limit_hit = None
+        self._start_fetches = 0
+        self._meter = DownloadMeter()
+
+    def start(self, state: CrawlState) -> None:
+        """Start counting the work done by a build of the crawl <state> from now on."""
+        self.deadline = None if self.timeout is None else time.monotonic() + self.timeout
+        self.limit_hit = None
+        self._start_fetches = state.pages_expanded
+        self._meter = DownloadMeter(self.deadline)
+
+    def downloading(self) -> ContextManager[None]:
+        """Return a context manager that counts the downloads made inside it towards this
+        build, and makes them give up at its deadline (see http_transport.DownloadMeter)."""
+        return self._meter.active()
+
+    def fetches_used(self, state: CrawlState) -> int:
+        """Return the number of articles the build of <state> has expanded since it started."""
+        return state.pages_expanded - self._start_fetches
+
+    def bytes_used(self) -> int:
+        """Return the number of bytes the build has downloaded since it started."""
+        return self._meter.bytes_received
+
+    def allows_depth(self, state: CrawlState, url: str) -> bool:
+        """Return whether the build of <state> may expand the article at <url>, given how
+        far it is from the starting article."""
+        return self.max_depth is None or state.depths.get(url, 0) < self.max_depth
+
+    def is_exhausted(self, state: CrawlState) -> bool:
+        """Return whether the build of <state> must stop before expanding its next article,
+        and record the limit it hit in self.limit_hit.
+
+        (The depth of each article is checked by allows_depth once it has been taken off
+        the queue instead: the articles of a best-first crawl aren't queued in order of
+        depth, so the next one being too deep doesn't mean that every other one is.)
+        """
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            self.limit_hit = LIMIT_TIME
+        elif self.max_fetches is not None and self.fetches_used(state) >= self.max_fetches:
+            self.limit_hit = LIMIT_FETCHES
+        elif self.max_bytes is not None and self.bytes_used() >= self.max_bytes:
+            self.limit_hit = LIMIT_BYTES
+
+        return self.limit_hit in {LIMIT_TIME, LIMIT_FETCHES, LIMIT_BYTES}
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
+
+    import python_ta.contracts
+
+    python_ta.contracts.check_all_contracts()
+
+    import python_ta
+
+    python_ta.check_all(config={
+        'extra-imports': ['time', 'crawl_state', 'http_transport'],
+        'allowed-io': [],
+        'max-line-length': 100,
+        'disable': ['E1136']
+    })
@@ -0,0 +1,109 @@
+"""CSC111 Winter 2021 Final Project: Crawl Events
+
+Module Description
+===============================
+
+This module contains the CrawlEvent class, which describes a single change made to a graph
+while it is being built (see build_wikigraph.iter_wikigraph and build_wikigraph.iter_crawl).
+
+Instead of waiting minutes for a whole build to finish, a caller can go through these events
+as the crawl makes them, and draw or save the graph a piece at a time. The events of an
+article are handed over as soon as the article has been expanded, so they never pile up.
+
+Copyright and Usage Information
+===============================
+
+This file is provided solely for the personal and private use of Faizah Sayyid, Tina Zhang,
+Poorvi Sharma, and Courtney Amm (students at the University of Toronto St. George campus).
+All forms of distribution of this code, whether as given or with any changes, are expressly
+prohibited.
+
+This file is Copyright (c) 2021 Faizah Sayyid, Tina Zhang, Poorvi Sharma, Courtney Amm.
+"""
+from __future__ import annotations
+from typing import Any, Optional
+
+# The values of CrawlEvent.kind
+VERTEX_ADDED = 'vertex added'
+EDGE_ADDED = 'edge added'
+WEIGHT_UPDATED = 'weight updated'
+PROGRESS = 'progress'
+FINISHED = 'finished'
+
+
+class CrawlEvent:
+    """A change made to a graph during a build.
+
+    Instance Attributes:
+        - kind: what happened (one of VERTEX_ADDED, EDGE_ADDED, WEIGHT_UPDATED, PROGRESS and
+          FINISHED)
+        - name: the vertex added, or the first vertex of the edge added or updated
+        - other: the second vertex of the edge added or updated
+        - url: the url of the vertex added
+        - weight: the weight of the edge added or updated, in a weighted graph (a weighted
+          edge gets a WEIGHT_UPDATED event each time another link between its articles is
+          found, and the graph itself only gets its edges once the build finishes)
+        - sources_found: for a PROGRESS or FINISHED event, the number of sources found so far
+        - pages_expanded: for a PROGRESS or FINISHED event, the number of articles expanded
+          so far
+        - graph: for a FINISHED event, the finished graph
+
+    Representation Invariants:
+        - self.kind in {VERTEX_ADDED, EDGE_ADDED, WEIGHT_UPDATED, PROGRESS, FINISHED}
+        - (self.kind == FINISHED) == (self.graph is not None)
+
+    >>> event = CrawlEvent(EDGE_ADDED, 'Cat', 'Dog')
+    >>> event
+    CrawlEvent('edge added', 'Cat', 'Dog')
+    """
+    kind: str
+    name: Optional[str]
+    other: Optional[str]
+    url: Optional[str]
+    weight: Optional[float]
+    sources_found: int
+    pages_expanded: int
+    graph: Optional[Any]
+
+    def __init__(self, kind: str, name: Optional[str] = None, other: Optional[str] = None,
+                 url: Optional[str] = None, weight: Optional[float] = None) -> None:
+        """Initialize an event of the given kind."""
+        self.kind = kind
+        self.name = name
+        self.other = other
+        self.url = url
+        self.weight = weight
+        self.sources_found = 0
+        self.pages_expanded = 0
+        self.graph = None
+
+    def __repr__(self) -> str:
+        """Return a string representation of this event."""
+        if self.kind == VERTEX_ADDED:
+            return f'CrawlEvent({self.kind!r}, {self.name!r}, url={self.url!r})'
+        elif self.kind in {EDGE_ADDED, WEIGHT_UPDATED} and self.weight is None:
+            return f'CrawlEvent({self.kind!r}, {self.name!r}, {self.other!r})'
+        elif self.kind in {EDGE_ADDED, WEIGHT_UPDATED}:
+            return f'CrawlEvent({self.kind!r}, {self.name!r}, {self.other!r}, ' \
+                   f'weight={self.weight!r})'
+        else:
+            return f'CrawlEvent({self.kind!r}, sources_found={self.sources_found}, ' \
+                   f'pages_expanded={self.pages_expanded})'
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
+
+    import python_ta.contracts
+
+    python_ta.contracts.check_all_contracts()
+
+    import python_ta
+
+    python_ta.check_all(config={
+        'extra-imports': [],
+        'allowed-io': [],
+        'max-line-length': 100,
+        'disable': ['E1136']
+    })
@@ -0,0 +1,522 @@
+"""CSC111 Winter 2021 Final Project: Crawl Frontier
+
+Module Description
+===============================
+
+This module contains the frontier used by the graph builders: the queue of article urls that
+still have to be expanded, together with the set of article urls that have already been seen.
+
+Both operations the breadth-first search does for every link it finds (checking whether the
+link was seen before, and queueing it) take constant time. For very large crawls, the exact
+set of seen urls can be replaced by a BloomFilter, which uses a small fixed amount of memory
+at the cost of occasionally (with a chosen probability) treating a new url as already seen.
+
+The PriorityFrontier replaces the first-in-first-out queue with a heap, for best-first crawls
+that expand the most strongly linked articles first.
+
+Copyright and Usage Information
+===============================
+
+This file is provided solely for the personal and private use of Faizah Sayyid, Tina Zhang,
+Poorvi Sharma, and Courtney Amm (students at the University of Toronto St. George campus).
+All forms of distribution of this code, whether as given or with any changes, are expressly
+prohibited.
+
+This file is Copyright (c) 2021 Faizah Sayyid, Tina Zhang, Poorvi Sharma, Courtney Amm.
+"""
+from __future__ import annotations
+import base64
+import hashlib
+import heapq
+import math
+import sys
+from collections import deque
+from itertools import islice
+from typing import Any, Optional
+
+
+class EmptyQueueError(Exception):
+    """Exception raised when calling dequeue on an empty queue."""
+
+    def __str__(self) -> str:
+        """Return a string representation of this error."""
+        return 'dequeue may not be called on an empty queue'
+
+
+class VisitedSet:
+    """The exact set of urls a crawl has seen, stored in a hash set.
+
+    >>> visited = VisitedSet()
+    >>> visited.add('https://en.wikipedia.org/wiki/Rebecca_Sugar')
+    >>> 'https://en.wikipedia.org/wiki/Rebecca_Sugar' in visited
+    True
+    >>> len(visited)
+    1
+    """
+    # Private Instance Attributes:
+    #     - _urls:
+    #         the urls that have been seen
+    _urls: set[str]
+
+    def __init__(self) -> None:
+        """Initialize an empty set of seen urls."""
+        self._urls = set()
+
+    def add(self, url: str) -> None:
+        """Record that <url> has been seen."""
+        self._urls.add(url)
+
+    def __contains__(self, url: str) -> bool:
+        """Return whether <url> has been seen."""
+        return url in self._urls
+
+    def __len__(self) -> int:
+        """Return the number of urls that have been seen."""
+        return len(self._urls)
+
+    def memory_bytes(self) -> int:
+        """Return the approximate number of bytes used to store the seen urls."""
+        return sys.getsizeof(self._urls) + sum(sys.getsizeof(url) for url in self._urls)
+
+    def to_dict(self) -> dict:
+        """Return the seen urls as a JSON-compatible dictionary (see visited_from_dict)."""
+        return {'kind': 'set', 'urls': sorted(self._urls)}
+
+
+class BloomFilter:
+    """A compact, probabilistic set of the urls a crawl has seen.
+
+    A url that was added is always reported as seen. A url that wasn't added is wrongly
+    reported as seen with a probability of about self.error_rate, as long as no more than
+    self.capacity urls have been added.
+
+    Instance Attributes:
+        - capacity: the number of urls the filter was sized for
+        - error_rate: the target probability of reporting an unseen url as seen
+        - num_bits: the number of bits in the filter
+        - num_hashes: the number of bits set for each url
+
+    Representation Invariants:
+        - self.capacity > 0
+        - 0 < self.error_rate < 1
+        - self.num_bits > 0 and self.num_hashes > 0
+
+    >>> visited = BloomFilter(1000, 0.001)
+    >>> visited.add('https://en.wikipedia.org/wiki/Rebecca_Sugar')
+    >>> 'https://en.wikipedia.org/wiki/Rebecca_Sugar' in visited
+    True
+    >>> visited.memory_bytes() < 2000
+    True
+    """
+    capacity: int
+    error_rate: float
+    num_bits: int
+    num_hashes: int
+
+    # Private Instance Attributes:
+    #     - _bits:
+    #         the bits of the filter
+    #     - _count:
+    #         the number of urls that have been added
+    _bits: bytearray
+    _count: int
+
+    def __init__(self, capacity: int, error_rate: float = 0.001) -> None:
+        """Initialize an empty filter sized for <capacity> urls at the given <error_rate>."""
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self._bits = bytearray((self.num_bits + 7) // 8)
+        self._count = 0
+
+    def _positions(self, url: str) -> list[int]:
+        """Return the positions of the bits set for <url> (using double hashing)."""
+        digest = hashlib.blake2b(url.encode(), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], 'little'), int.from_bytes(digest[8:], 'little')
+        return [(first + i * second) % self.num_bits for i in range(self.num_hashes)]
+
+    def add(self, url: str) -> None:
+        """Record that <url> has been seen."""
+        for position in self._positions(url):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self._count += 1
+
+    def __contains__(self, url: str) -> bool:
+        """Return whether <url> has (probably) been seen."""
+        return all(self._bits[position >> 3] & (1 << (position & 7))
+                   for position in self._positions(url))
+
+    def __len__(self) -> int:
+        """Return the number of urls that have been added."""
+        return self._count
+
+    def memory_bytes(self) -> int:
+        """Return the number of bytes used by the filter."""
+        return sys.getsizeof(self._bits)
+
+    def to_dict(self) -> dict:
+        """Return the filter as a JSON-compatible dictionary (see visited_from_dict)."""
+        return {'kind': 'bloom', 'capacity': self.capacity, 'error_rate': self.error_rate,
+                'count': self._count, 'bits': base64.b64encode(self._bits).decode('ascii')}
+
+
+class CrawlFrontier:
+    """The first-in-first-out queue of urls a breadth-first crawl still has to expand, and
+    the urls it has already seen.
+
+    Instance Attributes:
+        - visited: the urls that have been seen (a VisitedSet or a BloomFilter)
+        - peak_size: the largest number of urls that have been queued at the same time
+        - total_added: the number of urls that have been queued
+        - total_popped: the number of urls that have been removed from the queue
+
+    Representation Invariants:
+        - self.total_popped <= self.total_added
+        - self.peak_size <= self.total_added
+
+    >>> frontier = CrawlFrontier()
+    >>> frontier.add('hello')
+    True
+    >>> frontier.add('goodbye')
+    True
+    >>> frontier.add('hello')
+    False
+    >>> frontier.pop()
+    'hello'
+    >>> frontier.pop()
+    'goodbye'
+    >>> frontier.is_empty()
+    True
+    """
+    visited: Any
+    peak_size: int
+    total_added: int
+    total_popped: int
+
+    # Private Instance Attributes:
+    #     - _queue:
+    #         the urls waiting to be expanded, from first to last
+    _queue: deque[str]
+
+    def __init__(self, visited: Optional[Any] = None) -> None:
+        """Initialize an empty frontier, which records seen urls in <visited> (an empty
+        VisitedSet if no <visited> is given).
+        """
+        self.visited = VisitedSet() if visited is None else visited
+        self.peak_size = 0
+        self.total_added = 0
+        self.total_popped = 0
+        self._queue = deque()
+
+    def add(self, url: str, priority: float = 0.0) -> bool:
+        """Queue <url> and mark it as seen, unless it has been seen before.
+
+        Return whether <url> was queued. (<priority> is ignored, since this queue is
+        first-in-first-out; see PriorityFrontier.)
+        """
+        if url in self.visited:
+            return False
+        self.visited.add(url)
+        self._queue.append(url)
+        self.total_added += 1
+        self.peak_size = max(self.peak_size, len(self._queue))
+        return True
+
+    def is_visited(self, url: str) -> bool:
+        """Return whether <url> has been seen by this frontier."""
+        return url in self.visited
+
+    def priority(self, url: str) -> float:
+        """Return the priority <url> was queued with (always 0.0 in a first-in-first-out
+        frontier)."""
+        return 0.0
+
+    def popped_priority(self) -> float:
+        """Return the priority the url popped last was queued with (always 0.0 in a
+        first-in-first-out frontier)."""
+        return 0.0
+
+    def is_empty(self) -> bool:
+        """Return whether no urls are waiting to be expanded."""
+        return not self._queue
+
+    def pop(self) -> str:
+        """Remove and return the url at the front of the queue.
+
+        Raise an EmptyQueueError if no urls are waiting to be expanded.
+        """
+        if not self._queue:
+            raise EmptyQueueError
+        self.total_popped += 1
+        return self._queue.popleft()
+
+    def requeue(self, url: str, priority: Optional[float] = None) -> None:
+        """Put <url>, which was popped, back at the front of the queue (<priority> is
+        ignored)."""
+        self._queue.appendleft(url)
+        self.total_popped -= 1
+
+    def front(self, n: int) -> list[str]:
+        """Return the (at most) <n> urls at the front of the queue, without removing them."""
+        return list(islice(self._queue, n))
+
+    def remove(self, url: str) -> bool:
+        """Remove <url> from the queue (it stays seen), and return whether it was queued."""
+        try:
+            self._queue.remove(url)
+        except ValueError:
+            return False
+        self.total_popped += 1
+        return True
+
+    def __len__(self) -> int:
+        """Return the number of urls waiting to be expanded."""
+        return len(self._queue)
+
+    def memory_bytes(self) -> int:
+        """Return the approximate number of bytes used by the queue and the seen urls.
+
+        (Urls that are both queued and seen are only counted once, as part of the seen urls,
+        unless they are only recorded by a BloomFilter.)
+        """
+        queue_bytes = sys.getsizeof(self._queue)
+        if not isinstance(self.visited, VisitedSet):
+            queue_bytes += sum(sys.getsizeof(url) for url in self._queue)
+        return queue_bytes + self.visited.memory_bytes()
+
+    def to_dict(self) -> dict:
+        """Return the queue, the seen urls and the statistics of this frontier as a
+        JSON-compatible dictionary (see frontier_from_dict)."""
+        return {'kind': 'fifo',
+                'queue': list(self._queue),
+                'visited': self.visited.to_dict(),
+                'peak_size': self.peak_size,
+                'total_added': self.total_added,
+                'total_popped': self.total_popped}
+
+    def stats(self) -> dict[str, int]:
+        """Return the size and memory statistics of this frontier."""
+        return {'queued': len(self._queue),
+                'visited': len(self.visited),
+                'peak_queued': self.peak_size,
+                'total_added': self.total_added,
+                'total_popped': self.total_popped,
+                'memory_bytes': self.memory_bytes()}
+
+
+class PriorityFrontier(CrawlFrontier):
+    """A frontier for best-first crawls: the url queued with the highest priority is expanded
+    first (urls with the same priority are expanded in the order they were queued).
+
+    >>> frontier = PriorityFrontier()
+    >>> frontier.add('weak', 1.0)
+    True
+    >>> frontier.add('strong', 5.0)
+    True
+    >>> frontier.add('also weak', 1.0)
+    True
+    >>> frontier.priority('strong')
+    5.0
+    >>> frontier.pop()
+    'strong'
+    >>> frontier.popped_priority()
+    5.0
+    >>> [frontier.pop() for _ in range(2)]
+    ['weak', 'also weak']
+    """
+    # Private Instance Attributes:
+    #     - _heap:
+    #         the queued urls as (-priority, insertion number, url), in heap order
+    #     - _priorities:
+    #         maps every queued url to the priority it was queued with
+    #     - _popped_priority:
+    #         the priority the url popped last was queued with (0.0 if none was popped)
+    #     - _requeued:
+    #         the insertion number of the next requeued url (requeued urls are numbered
+    #         -1, -2, ..., so the one requeued last is expanded first among its priority)
+    _heap: list[tuple[float, int, str]]
+    _priorities: dict[str, float]
+    _popped_priority: float
+    _requeued: int
+
+    def __init__(self, visited: Optional[Any] = None) -> None:
+        """Initialize an empty frontier, which records seen urls in <visited> (an empty
+        VisitedSet if no <visited> is given).
+        """
+        CrawlFrontier.__init__(self, visited)
+        self._heap = []
+        self._priorities = {}
+        self._popped_priority = 0.0
+        self._requeued = -1
+
+    def add(self, url: str, priority: float = 0.0) -> bool:
+        """Queue <url> with the given <priority> and mark it as seen, unless it has been seen
+        before.
+
+        Return whether <url> was queued.
+        """
+        if url in self.visited:
+            return False
+        self.visited.add(url)
+        heapq.heappush(self._heap, (-priority, self.total_added, url))
+        self._priorities[url] = priority
+        self.total_added += 1
+        self.peak_size = max(self.peak_size, len(self._heap))
+        return True
+
+    def priority(self, url: str) -> float:
+        """Return the priority <url> is queued with (0.0 if it isn't queued)."""
+        return self._priorities.get(url, 0.0)
+
+    def popped_priority(self) -> float:
+        """Return the priority the url popped last was queued with (0.0 if none was popped).
+        """
+        return self._popped_priority
+
+    def is_empty(self) -> bool:
+        """Return whether no urls are waiting to be expanded."""
+        return not self._heap
+
+    def pop(self) -> str:
+        """Remove and return the queued url with the highest priority.
+
+        Raise an EmptyQueueError if no urls are waiting to be expanded.
+        """
+        if not self._heap:
+            raise EmptyQueueError
+        self.total_popped += 1
+        url = heapq.heappop(self._heap)[2]
+        self._popped_priority = self._priorities.pop(url)
+        return url
+
+    def requeue(self, url: str, priority: Optional[float] = None) -> None:
+        """Put <url>, which was popped, back in the queue with <priority> (by default, the
+        priority of the url popped last), ahead of the other urls with the same priority."""
+        if priority is None:
+            priority = self._popped_priority
+        heapq.heappush(self._heap, (-priority, self._requeued, url))
+        self._requeued -= 1
+        self._priorities[url] = priority
+        self.total_popped -= 1
+
+    def front(self, n: int) -> list[str]:
+        """Return the (at most) <n> urls with the highest priorities, without removing them.
+
+        (Urls queued later with higher priorities will be expanded before these.)
+        """
+        # the i-th best entry is a child of one of the i - 1 better ones, so only the entries
+        # near the top of the heap are looked at
+        front = []
+        candidates = [(self._heap[0], 0)] if self._heap else []
+        while candidates and len(front) < n:
+            entry, i = heapq.heappop(candidates)
+            front.append(entry[2])
+            for child in (2 * i + 1, 2 * i + 2):
+                if child < len(self._heap):
+                    heapq.heappush(candidates, (self._heap[child], child))
+        return front
+
+    def remove(self, url: str) -> bool:
+        """Remove <url> from the queue (it stays seen), and return whether it was queued."""
+        for i in range(len(self._heap)):
+            if self._heap[i][2] == url:
+                self._heap[i] = self._heap[-1]
+                self._heap.pop()
+                heapq.heapify(self._heap)
+                del self._priorities[url]
+                self.total_popped += 1
+                return True
+        return False
+
+    def __len__(self) -> int:
+        """Return the number of urls waiting to be expanded."""
+        return len(self._heap)
+
+    def memory_bytes(self) -> int:
+        """Return the approximate number of bytes used by the queue, the priorities and the
+        seen urls."""
+        return sys.getsizeof(self._heap) + sys.getsizeof(self._priorities) \
+            + len(self._heap) * sys.getsizeof((0.0, 0, '')) + self.visited.memory_bytes()
+
+    def to_dict(self) -> dict:
+        """Return the queue, the priorities, the seen urls and the statistics of this frontier
+        as a JSON-compatible dictionary (see frontier_from_dict)."""
+        data = CrawlFrontier.to_dict(self)
+        data['kind'] = 'priority'
+        data['queue'] = [list(entry) for entry in self._heap]
+        data['priorities'] = self._priorities
+        data['popped_priority'] = self._popped_priority
+        data['requeued'] = self._requeued
+        return data
+
+
+def visited_from_dict(data: dict) -> Any:
+    """Return the VisitedSet or BloomFilter saved in <data> by its to_dict method.
+
+    >>> visited = BloomFilter(100)
+    >>> visited.add('hello')
+    >>> 'hello' in visited_from_dict(visited.to_dict())
+    True
+    """
+    if data['kind'] == 'set':
+        visited = VisitedSet()
+        for url in data['urls']:
+            visited.add(url)
+        return visited
+    elif data['kind'] == 'bloom':
+        bloom_filter = BloomFilter(data['capacity'], data['error_rate'])
+        bloom_filter._bits = bytearray(base64.b64decode(data['bits']))
+        bloom_filter._count = data['count']
+        return bloom_filter
+    else:
+        raise ValueError(f"unknown kind of visited set: {data['kind']}")
+
+
+def frontier_from_dict(data: dict) -> CrawlFrontier:
+    """Return the frontier saved in <data> by its to_dict method.
+
+    >>> frontier = PriorityFrontier()
+    >>> frontier.add('a', 1.0) and frontier.add('b', 2.0)
+    True
+    >>> copy = frontier_from_dict(frontier.to_dict())
+    >>> [copy.pop(), copy.pop()]
+    ['b', 'a']
+    >>> copy.add('a')
+    False
+    """
+    visited = visited_from_dict(data['visited'])
+    if data['kind'] == 'fifo':
+        frontier = CrawlFrontier(visited)
+        frontier._queue.extend(data['queue'])
+    elif data['kind'] == 'priority':
+        frontier = PriorityFrontier(visited)
+        frontier._heap = [(priority, number, url) for priority, number, url in data['queue']]
+        frontier._priorities = dict(data['priorities'])
+        frontier._popped_priority = data.get('popped_priority', 0.0)
+        frontier._requeued = data.get('requeued', -1)
+    else:
+        raise ValueError(f"unknown kind of frontier: {data['kind']}")
+
+    frontier.peak_size = data['peak_size']
+    frontier.total_added = data['total_added']
+    frontier.total_popped = data['total_popped']
+    return frontier
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
+
+    import python_ta.contracts
+
+    python_ta.contracts.check_all_contracts()
+
+    import python_ta
+
+    python_ta.check_all(config={
+        'extra-imports': ['base64', 'hashlib', 'heapq', 'math', 'sys', 'collections', 'itertools'],
+        'allowed-io': [],
+        'max-line-length': 100,
+        'disable': ['E1136']
+    })
@@ -0,0 +1,277 @@
+"""CSC111 Winter 2021 Final Project: Crawl Pipeline
+
+Module Description
+===============================
+
+This module contains the CrawlPipeline class, which splits the work of expanding an article
+into stages that run at the same time:
+
+    fetchers --(html queue)--> parsers --(results)--> graph writer
+
+A pool of fetcher threads downloads the articles at the front of the BFS queue, a pool of
+parser threads turns their html into lists of links, and the graph builder (the single graph
+writer) takes the results in queue order and inserts them into the graph. The queues between
+the stages are bounded, so fast fetchers wait for slow parsers instead of piling up pages in
+memory, and each stage can be sized on its own. Network waits then overlap with parsing,
+instead of adding up.
+
+Copyright and Usage Information
+===============================
+
+This file is provided solely for the personal and private use of Faizah Sayyid, Tina Zhang,
+Poorvi Sharma, and Courtney Amm (students at the University of Toronto St. George campus).
+All forms of distribution of this code, whether as given or with any changes, are expressly
+prohibited.
+
+This file is Copyright (c) 2021 Faizah Sayyid, Tina Zhang, Poorvi Sharma, Courtney Amm.
+"""
+from __future__ import annotations
+import contextvars
+import queue
+import threading
+import urllib.error
+from typing import Any, Callable, Optional
+from wikipedia_html_parsers import SCOPE_PAGE, fetch_html, parse_adjacent_urls, \
+    parse_adjacent_urls_weighted
+
+# The default number of pages waiting between the fetchers and the parsers
+DEFAULT_QUEUE_SIZE = 16
+
+# Put in a queue to tell the thread that takes it to stop
+_STOP = None
+
+
+class CrawlPipeline:
+    """A staged pipeline that downloads and parses the articles at the front of a BFS queue.
+
+    It is used by the graph builders in place of their own downloader (see the <fetcher>
+    argument of build_wikigraph.run_crawl), and hands back the links of each article in the
+    order the builder asks for them, so the graph built is the same as a serial build's.
+
+    Instance Attributes:
+        - weighted: whether the parsers find weighted links (for a WeightedWikiGraph)
+        - scope: the part of each article the parsers find links in (SCOPE_PAGE or
+          SCOPE_CONTENT, see wikipedia_html_parsers.get_article_document)
+        - fetchers: the number of fetcher threads
+        - parsers: the number of parser threads
+        - queue_size: the maximum number of downloaded pages waiting to be parsed
+        - max_workers: the maximum number of articles in the pipeline at the same time
+        - pages_fetched: the number of pages downloaded so far
+        - pages_parsed: the number of pages parsed so far
+        - peak_url_queue: the largest number of articles that waited for a fetcher
+        - peak_html_queue: the largest number of downloaded pages that waited for a parser
+        - peak_results: the largest number of parsed articles that waited for the builder
+
+    Representation Invariants:
+        - self.fetchers >= 1 and self.parsers >= 1 and self.queue_size >= 1
+        - self.pages_parsed <= self.pages_fetched
+    """
+    weighted: bool
+    scope: str
+    fetchers: int
+    parsers: int
+    queue_size: int
+    max_workers: int
+    pages_fetched: int
+    pages_parsed: int
+    peak_url_queue: int
+    peak_html_queue: int
+    peak_results: int
+
+    # Private Instance Attributes:
+    #     - _fetch:
+    #         the function that downloads the html code of an article url
+    #     - _parse:
+    #         the function that returns the links of an article url, given its html code and
+    #         the extraction scope
+    #     - _urls:
+    #         the articles waiting for a fetcher, with the context each was put in the
+    #         pipeline from
+    #     - _pages:
+    #         the (url, html code or error) of the downloaded pages waiting for a parser
+    #     - _results:
+    #         the reorder buffer: maps each parsed article url to its links (or the error
+    #         raised while downloading or parsing it), until the builder asks for it
+    #     - _submitted:
+    #         the urls that have been put in the pipeline and not handed back yet
+    #     - _ready:
+    #         a condition signalled whenever a result is added to self._results
+    #     - _threads:
+    #         the fetcher and parser threads
+    _fetch: Callable[[str], str]
+    _parse: Callable[[str, str, str], list]
+    _urls: queue.Queue
+    _pages: queue.Queue
+    _results: dict[str, Any]
+    _submitted: set[str]
+    _ready: threading.Condition
+    _threads: list[threading.Thread]
+
+    def __init__(self, weighted: bool = False, fetchers: int = 8, parsers: int = 2,
+                 queue_size: int = DEFAULT_QUEUE_SIZE,
+                 fetch: Optional[Callable[[str], str]] = None, scope: str = SCOPE_PAGE) -> None:
+        """Initialize and start a pipeline with the given number of fetcher and parser
+        threads.
+
+        Pages are downloaded with <fetch> (wikipedia_html_parsers.fetch_html, which goes
+        through the page cache, if no <fetch> is given), and their links are found in the part
+        of each page called <scope> (which should match the scope of the crawl).
+        """
+        self.weighted = weighted
+        self.scope = scope
+        self.fetchers = max(fetchers, 1)
+        self.parsers = max(parsers, 1)
+        self.queue_size = max(queue_size, 1)
+        self.max_workers = self.fetchers + self.queue_size + self.parsers
+        self.pages_fetched = 0
+        self.pages_parsed = 0
+        self.peak_url_queue = 0
+        self.peak_html_queue = 0
+        self.peak_results = 0
+
+        self._fetch = fetch_html if fetch is None else fetch
+        self._parse = parse_adjacent_urls_weighted if weighted else parse_adjacent_urls
+        self._urls = queue.Queue()
+        self._pages = queue.Queue(maxsize=self.queue_size)
+        self._results = {}
+        self._submitted = set()
+        self._ready = threading.Condition()
+
+        self._threads = [threading.Thread(target=self._run_fetcher, daemon=True)
+                         for _ in range(self.fetchers)]
+        self._threads += [threading.Thread(target=self._run_parser, daemon=True)
+                          for _ in range(self.parsers)]
+        for thread in self._threads:
+            thread.start()
+
+    def fetch(self, url: str, upcoming: list[str]) -> list:
+        """Return the links of <url>, and put the <upcoming> articles that will be needed
+        next into the pipeline.
+
+        Raise the error raised while downloading or parsing <url>, if there was one (an
+        article that doesn't exist has no links, like with get_adjacent_urls).
+        """
+        for next_url in [url] + upcoming:
+            if next_url not in self._submitted \
+                    and (next_url == url or len(self._submitted) < self.max_workers):
+                self._submitted.add(next_url)
+                # (the article is downloaded in the context of the build, so its budget
+                # counts the download)
+                self._urls.put((next_url, contextvars.copy_context()))
+        self.peak_url_queue = max(self.peak_url_queue, self._urls.qsize())
+
+        with self._ready:
+            while url not in self._results:
+                self._ready.wait()
+            result = self._results.pop(url)
+        self._submitted.discard(url)
+
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def _run_fetcher(self) -> None:
+        """Download the articles put in the pipeline, until told to stop."""
+        while True:
+            item = self._urls.get()
+            if item is _STOP:
+                return
+
+            url, context = item
+            try:
+                page = context.run(self._fetch, url)
+            except urllib.error.HTTPError:
+                page = ''
+            except Exception as error:
+                page = error
+
+            with self._ready:
+                self.pages_fetched += 1
+            self._pages.put((url, page))
+            with self._ready:
+                self.peak_html_queue = max(self.peak_html_queue, self._pages.qsize())
+
+    def _run_parser(self) -> None:
+        """Parse the downloaded pages, until told to stop."""
+        while True:
+            item = self._pages.get()
+            if item is _STOP:
+                return
+
+            url, page = item
+            if isinstance(page, Exception):
+                result = page
+            elif page == '':
+                result = []
+            else:
+                try:
+                    result = self._parse(url, page, self.scope)
+                except Exception as error:
+                    result = error
+
+            with self._ready:
+                self._results[url] = result
+                self.pages_parsed += 1
+                self.peak_results = max(self.peak_results, len(self._results))
+                self._ready.notify_all()
+
+    def queue_depths(self) -> dict[str, int]:
+        """Return the number of articles currently waiting at each stage of the pipeline."""
+        with self._ready:
+            return {'urls': self._urls.qsize(),
+                    'pages': self._pages.qsize(),
+                    'results': len(self._results)}
+
+    def stats(self) -> dict[str, int]:
+        """Return the size and throughput statistics of this pipeline."""
+        return {**self.queue_depths(),
+                'fetchers': self.fetchers,
+                'parsers': self.parsers,
+                'pages_fetched': self.pages_fetched,
+                'pages_parsed': self.pages_parsed,
+                'peak_urls': self.peak_url_queue,
+                'peak_pages': self.peak_html_queue,
+                'peak_results': self.peak_results}
+
+    def shutdown(self) -> None:
+        """Stop every thread of the pipeline, dropping the articles that haven't been
+        downloaded yet."""
+        # drop the articles no fetcher has started on
+        try:
+            while True:
+                self._urls.get_nowait()
+        except queue.Empty:
+            pass
+
+        fetcher_threads, parser_threads = self._threads[:self.fetchers], \
+            self._threads[self.fetchers:]
+        for _ in fetcher_threads:
+            self._urls.put(_STOP)
+        for thread in fetcher_threads:
+            thread.join()
+        for _ in parser_threads:
+            self._pages.put(_STOP)
+        for thread in parser_threads:
+            thread.join()
+
+        self._threads = []
+        self._submitted = set()
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
+
+    import python_ta.contracts
+
+    python_ta.contracts.check_all_contracts()
+
+    import python_ta
+
+    python_ta.check_all(config={
+        'extra-imports': ['contextvars', 'queue', 'threading', 'urllib.error',
+                          'wikipedia_html_parsers'],
+        'allowed-io': [],
+        'max-line-length': 100,
+        'disable': ['E1136']
+    })
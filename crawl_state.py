@@ -0,0 +1,255 @@
+"""CSC111 Winter 2021 Final Project: Crawl State
+
+Module Description
+===============================
+
+This module contains the CrawlState class, which holds everything a graph build knows in the
+middle of a crawl, and the functions that save it to (and load it from) a checkpoint file.
+
+A checkpoint is a single JSON file. It is written to a temporary file first and then moved
+over the previous checkpoint, so a crawl that dies while saving always leaves a complete
+checkpoint behind.
+
+Copyright and Usage Information
+===============================
+
+This file is provided solely for the personal and private use of Faizah Sayyid, Tina Zhang,
+Poorvi Sharma, and Courtney Amm (students at the University of Toronto St. George campus).
+All forms of distribution of this code, whether as given or with any changes, are expressly
+prohibited.
+
+This file is Copyright (c) 2021 Faizah Sayyid, Tina Zhang, Poorvi Sharma, Courtney Amm.
+"""
+from __future__ import annotations
+import json
+import os
+import tempfile
+import time
+from typing import Optional, Union
+from crawl_frontier import CrawlFrontier, frontier_from_dict
+from wikigraph import WikiGraph
+from weighted_wikigraph_class import WeightedWikiGraph
+from wikipedia_html_parsers import SCOPE_PAGE
+
+# The version of the checkpoint file format written by save_crawl_state
+CHECKPOINT_VERSION = 1
+
+# The default number of articles expanded between two checkpoints
+DEFAULT_CHECKPOINT_EVERY = 50
+
+
+class CrawlState:
+    """The state of a graph build between two expanded articles.
+
+    Instance Attributes:
+        - starting_url: the url of the article the crawl started from
+        - num_sources: the number of sources the crawl is looking for
+        - sources_per_page: the maximum number of sources taken from a single article
+        - weighted: whether the crawl builds a WeightedWikiGraph
+        - scope: the part of each article its links are taken from (SCOPE_PAGE or
+          SCOPE_CONTENT, see wikipedia_html_parsers.get_article_document)
+        - frontier: the articles still to be expanded, and the articles already seen
+        - graph: the graph built so far (for a weighted crawl, the edges are only added once
+          the crawl finishes)
+        - edges_to_weights: for a weighted crawl, the edges found so far mapped to the
+          frequencies collected for them
+        - sources_found: the number of sources found so far
+        - pages_expanded: the number of articles expanded so far
+        - depths: maps the url of every article the crawl has seen to the number of links
+          between the starting article and it (when it was first seen)
+        - unfinished: the article whose links were being added when the crawl found its last
+          source, as (url, all its neighbours, [neighbours added, sources found on it]), so
+          the rest of its links can be added if the crawl is extended; None if there is none
+        - too_deep: the articles taken off the frontier during the current build because they
+          were too far from the starting article for its budget, as (url, priority it was
+          queued with) (they are queued again when the build stops, so a later build with a
+          larger budget can expand them)
+
+    Representation Invariants:
+        - self.num_sources >= 0 and self.sources_per_page >= 0
+        - self.weighted == isinstance(self.graph, WeightedWikiGraph)
+        - self.weighted or self.edges_to_weights == {}
+    """
+    starting_url: str
+    num_sources: int
+    sources_per_page: int
+    weighted: bool
+    scope: str
+    frontier: CrawlFrontier
+    graph: Union[WikiGraph, WeightedWikiGraph]
+    edges_to_weights: dict[tuple[str, str], list]
+    sources_found: int
+    pages_expanded: int
+    depths: dict[str, int]
+    unfinished: Optional[tuple[str, list, list[int]]]
+    too_deep: list[tuple[str, float]]
+
+    def __init__(self, starting_url: str, num_sources: int, sources_per_page: int,
+                 weighted: bool, frontier: CrawlFrontier, scope: str = SCOPE_PAGE) -> None:
+        """Initialize the state of a crawl that hasn't expanded any articles or found any
+        vertices yet."""
+        self.starting_url = starting_url
+        self.num_sources = num_sources
+        self.sources_per_page = sources_per_page
+        self.weighted = weighted
+        self.scope = scope
+        self.frontier = frontier
+        self.graph = WeightedWikiGraph() if weighted else WikiGraph()
+        self.edges_to_weights = {}
+        self.sources_found = 0
+        self.pages_expanded = 0
+        self.depths = {starting_url: 0}
+        self.unfinished = None
+        self.too_deep = []
+
+    def is_finished(self) -> bool:
+        """Return whether the crawl has found all its sources or run out of articles."""
+        return (self.frontier.is_empty() and self.unfinished is None) \
+            or self.sources_found >= self.num_sources
+
+    def to_dict(self) -> dict:
+        """Return this state as a JSON-compatible dictionary (see crawl_state_from_dict)."""
+        # the vertices are saved in the order they were added, so the restored graph displays
+        # and freezes exactly like this one
+        vertex_objects = [self.graph.get_vertex(name) for name in self.graph.vertex_names()]
+        vertices = [(v.name, v.url) for v in vertex_objects]
+
+        # ACCUMULATOR edges collects every edge once, as (name1, name2, weight)
+        edges = []
+        for u in vertex_objects:
+            for v in u.neighbours:
+                if u.name < v.name:
+                    edges.append((u.name, v.name, u.neighbours[v] if self.weighted else 1.0))
+
+        return {'version': CHECKPOINT_VERSION,
+                'starting_url': self.starting_url,
+                'num_sources': self.num_sources,
+                'sources_per_page': self.sources_per_page,
+                'weighted': self.weighted,
+                'scope': self.scope,
+                'frontier': self.frontier.to_dict(),
+                'vertices': vertices,
+                'aliases': list(self.graph.aliases().items()),
+                'edges': edges,
+                'edges_to_weights': [[v1, v2, weights] for (v1, v2), weights
+                                     in self.edges_to_weights.items()],
+                'sources_found': self.sources_found,
+                'pages_expanded': self.pages_expanded,
+                'depths': self.depths,
+                'unfinished': None if self.unfinished is None
+                else [self.unfinished[0], list(self.unfinished[1]), self.unfinished[2]],
+                'too_deep': self.too_deep}
+
+
+def crawl_state_from_dict(data: dict) -> CrawlState:
+    """Return the crawl state saved in <data> by CrawlState.to_dict.
+
+    Raise a ValueError if <data> was saved in a different checkpoint format.
+    """
+    if data.get('version') != CHECKPOINT_VERSION:
+        raise ValueError(f"unsupported checkpoint version: {data.get('version')}")
+
+    state = CrawlState(data['starting_url'], data['num_sources'], data['sources_per_page'],
+                       data['weighted'], frontier_from_dict(data['frontier']),
+                       data.get('scope', SCOPE_PAGE))
+
+    for name, url in data['vertices']:
+        state.graph.add_vertex(name, url)
+    for alias, name in data.get('aliases', []):
+        state.graph.add_alias(alias, name)
+    for v1, v2, weight in data['edges']:
+        if state.weighted:
+            state.graph.add_edge(v1, v2, weight)
+        else:
+            state.graph.add_edge(v1, v2)
+
+    state.edges_to_weights = {(v1, v2): weights for v1, v2, weights in data['edges_to_weights']}
+    state.sources_found = data['sources_found']
+    state.pages_expanded = data['pages_expanded']
+    state.depths = data['depths']
+    state.too_deep = [(url, priority) for url, priority in data.get('too_deep', [])]
+
+    if data.get('unfinished') is not None:
+        url, neighbours, progress = data['unfinished']
+        if state.weighted:
+            # JSON turns the ((link, name), weight) tuples into lists
+            neighbours = [((link, name), weight) for (link, name), weight in neighbours]
+        state.unfinished = (url, neighbours, progress)
+
+    return state
+
+
+def save_crawl_state(state: CrawlState, path: str) -> None:
+    """Save <state> to the checkpoint file at <path>, replacing it atomically."""
+    directory = os.path.dirname(os.path.abspath(path))
+    descriptor, temp_path = tempfile.mkstemp(prefix='.checkpoint-', dir=directory)
+    try:
+        with os.fdopen(descriptor, 'w', encoding='utf-8') as file:
+            json.dump(state.to_dict(), file)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+
+
+def load_crawl_state(path: str) -> CrawlState:
+    """Return the crawl state saved in the checkpoint file at <path>."""
+    with open(path, encoding='utf-8') as file:
+        return crawl_state_from_dict(json.load(file))
+
+
+def prune_checkpoints(directory: str, max_files: int, max_age: float,
+                      keep: Optional[str] = None) -> list[str]:
+    """Delete the checkpoint files (the .json files) in <directory> that were last saved more
+    than <max_age> seconds ago, and the least recently saved ones beyond the <max_files> most
+    recent, and return their paths.
+
+    The checkpoint file at <keep> is never deleted, and counts as the most recent one.
+    Files deleted by another process at the same time are skipped.
+    """
+    keep = None if keep is None else os.path.abspath(keep)
+    oldest_allowed = time.time() - max_age
+
+    # ACCUMULATOR checkpoints collects the other checkpoint files as (time saved, path)
+    checkpoints = []
+    for entry in os.scandir(directory):
+        path = os.path.abspath(entry.path)
+        if entry.name.endswith('.json') and entry.is_file() and path != keep:
+            try:
+                checkpoints.append((entry.stat().st_mtime, path))
+            except FileNotFoundError:
+                continue
+    checkpoints.sort(reverse=True)
+
+    # ACCUMULATOR deleted collects the paths of the files deleted so far
+    deleted = []
+    others_allowed = max_files - (keep is not None)
+    for i, (saved, path) in enumerate(checkpoints):
+        if i >= others_allowed or saved < oldest_allowed:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                continue
+            deleted.append(path)
+    return deleted
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
+
+    import python_ta.contracts
+
+    python_ta.contracts.check_all_contracts()
+
+    import python_ta
+
+    python_ta.check_all(config={
+        'extra-imports': ['json', 'os', 'tempfile', 'time', 'crawl_frontier', 'wikigraph',
+                          'weighted_wikigraph_class', 'wikipedia_html_parsers'],
+        'allowed-io': ['save_crawl_state', 'load_crawl_state'],
+        'max-line-length': 100,
+        'disable': ['E1136']
+    })
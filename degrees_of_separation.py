@@ -0,0 +1,245 @@
+"""CSC111 Winter 2021 Final Project: Degrees of Separation
+
+Module Description
+===============================
+
+This module contains find_undirected_path, which finds a shortest chain of links between two
+Wikipedia articles.
+
+Instead of building one huge WikiGraph outwards from the first article until the second one
+shows up, find_undirected_path runs a breadth-first search from both articles at once, always
+expanding the side with the smaller frontier, and stops as soon as the two searches meet. As
+in a WikiGraph, two articles are adjacent if either one links to the other, so the chain
+found is undirected. Both searches only follow the links on the articles they expand (the
+links pointing to an article aren't on it), so the links on the part of the chain found from
+the second article point back towards the first one: the chain can't always be clicked
+through from the first article to the second.
+
+Copyright and Usage Information
+===============================
+
+This file is provided solely for the personal and private use of Faizah Sayyid, Tina Zhang,
+Poorvi Sharma, and Courtney Amm (students at the University of Toronto St. George campus).
+All forms of distribution of this code, whether as given or with any changes, are expressly
+prohibited.
+
+This file is Copyright (c) 2021 Faizah Sayyid, Tina Zhang, Poorvi Sharma, Courtney Amm.
+"""
+from __future__ import annotations
+import time
+from typing import Any, Optional
+from build_wikigraph import _Prefetcher
+from wikipedia_html_parsers import UNWANTED, get_adjacent_urls, get_title, resolve_url
+
+# The default maximum number of articles downloaded by a single search
+DEFAULT_MAX_FETCHES = 2000
+
+
+class SeparationResult:
+    """The outcome of a search for the shortest chain of links between two articles.
+
+    Instance Attributes:
+        - start_url: the url of the article the chain starts at
+        - target_url: the url of the article the chain ends at
+        - path: the urls of the articles on a shortest undirected chain from start_url to
+          target_url (each article links to the next one or is linked from it), or None if
+          no chain was found
+        - forward_fetched: the number of articles expanded by the search from start_url
+        - backward_fetched: the number of articles expanded by the search from target_url
+        - urls_seen: the number of distinct article urls the two searches came across
+        - budget_exhausted: whether the search gave up because it hit its download limit
+        - seconds: how long the search took
+
+    Representation Invariants:
+        - self.path is None or (self.path[0] == self.start_url
+          and self.path[-1] == self.target_url)
+        - self.forward_fetched >= 0 and self.backward_fetched >= 0
+    """
+    start_url: str
+    target_url: str
+    path: Optional[list[str]]
+    forward_fetched: int
+    backward_fetched: int
+    urls_seen: int
+    budget_exhausted: bool
+    seconds: float
+
+    def __init__(self, start_url: str, target_url: str) -> None:
+        """Initialize the result of a search that hasn't found a chain yet."""
+        self.start_url = start_url
+        self.target_url = target_url
+        self.path = None
+        self.forward_fetched = 0
+        self.backward_fetched = 0
+        self.urls_seen = 0
+        self.budget_exhausted = False
+        self.seconds = 0.0
+
+    @property
+    def pages_fetched(self) -> int:
+        """Return the number of articles expanded by both searches together."""
+        return self.forward_fetched + self.backward_fetched
+
+    def degrees(self) -> Optional[int]:
+        """Return the number of links on the chain found, or None if none was found."""
+        return None if self.path is None else len(self.path) - 1
+
+    def titles(self) -> list[str]:
+        """Return the titles of the articles on the chain found (empty if none was found)."""
+        return [] if self.path is None else [get_title(url) for url in self.path]
+
+
+def find_undirected_path(start_url: str, target_url: str,
+                         max_fetches: int = DEFAULT_MAX_FETCHES, max_workers: int = 1,
+                         backend: Optional[Any] = None) -> SeparationResult:
+    """Return the result of searching for the shortest undirected chain of links between
+    the article at <start_url> and the article at <target_url>.
+
+    Every two consecutive articles on the chain are adjacent as in a WikiGraph: the first
+    one links to the second, or the second one links to the first. Both searches follow the
+    links on the articles they expand, so the links on the chain between the meeting point
+    and <target_url> point towards <start_url>, and the chain is the shortest one made of
+    such links.
+
+    At most <max_fetches> articles are expanded; if no chain has been found by then, the
+    result's path is None and its budget_exhausted is True (a chain found while expanding the
+    last level the budget allowed is returned, but may not be a shortest one).
+
+    If <max_workers> is greater than 1, the articles of the level being expanded are
+    downloaded concurrently. If a <backend> is given (for example a
+    wikipedia_dump_index.LinkIndex), links are looked up with its get_adjacent_urls method
+    instead of being downloaded.
+
+    The two urls may lead to their articles in any form a link could (over http, with a
+    fragment, with a lowercase first letter, through a known redirect, ...): the search and
+    the result use the canonical url of each article.
+
+    Preconditions:
+        - 'en.wikipedia.org/wiki/' in start_url
+        - 'en.wikipedia.org/wiki/' in target_url
+        - max_fetches >= 0
+    """
+    start_url, target_url = resolve_url(start_url), resolve_url(target_url)
+    for url in (start_url, target_url):
+        path = url[url.find('/wiki/'):]
+        if any(unwanted in path for unwanted in UNWANTED):
+            raise ValueError(f'{url} is not an article')
+
+    result = SeparationResult(start_url, target_url)
+    start_time = time.perf_counter()
+
+    # maps every url reached by each search to the url it was reached from and its depth
+    forward = {start_url: (None, 0)}
+    backward = {target_url: (None, 0)}
+
+    # the urls each search will expand next
+    forward_level = [start_url]
+    backward_level = [target_url]
+
+    if start_url == target_url:
+        result.path = [start_url]
+
+    if backend is None:
+        prefetcher = _Prefetcher(get_adjacent_urls, max_workers)
+    else:
+        prefetcher = _Prefetcher(backend.get_adjacent_urls, max_workers)
+
+    try:
+        while result.path is None and (forward_level or backward_level) \
+                and not result.budget_exhausted:
+            # expand the side with the smaller frontier (an article with no links of its own
+            # can still be reached from the other side, so keep going until both run out)
+            if backward_level == [] or (forward_level != []
+                                        and len(forward_level) <= len(backward_level)):
+                forward_level, meeting = _expand_level(forward_level, forward, backward,
+                                                       prefetcher, result, max_fetches, True)
+            else:
+                backward_level, meeting = _expand_level(backward_level, backward, forward,
+                                                        prefetcher, result, max_fetches,
+                                                        False)
+                meeting = None if meeting is None else (meeting[1], meeting[0])
+
+            if meeting is not None:
+                result.path = _join_paths(meeting, forward, backward)
+    finally:
+        prefetcher.shutdown()
+
+    result.urls_seen = len(forward.keys() | backward.keys())
+    result.seconds = time.perf_counter() - start_time
+    return result
+
+
+def _expand_level(level: list[str], reached: dict[str, tuple[Optional[str], int]],
+                  other: dict[str, tuple[Optional[str], int]], prefetcher: _Prefetcher,
+                  result: SeparationResult, max_fetches: int, is_forward: bool) \
+        -> tuple[list[str], Optional[tuple[str, str]]]:
+    """Expand every url in <level> (the deepest urls in <reached>), and return the next level
+    together with the link (url in this search, url in <other>) where the two searches meet
+    on a shortest chain, or None if they didn't meet. <is_forward> tells whether this is the
+    search from the start url.
+
+    The whole level is expanded even after the searches first meet, since a later url in the
+    level may meet <other> closer to its own starting url.
+    """
+    next_level = []
+    best_meeting = None
+    best_depth = None
+
+    for i in range(len(level)):
+        if result.pages_fetched >= max_fetches:
+            result.budget_exhausted = True
+            break
+
+        url = level[i]
+        neighbours = prefetcher.fetch(url, level[i + 1:i + prefetcher.max_workers])
+        if is_forward:
+            result.forward_fetched += 1
+        else:
+            result.backward_fetched += 1
+
+        for v in neighbours:
+            if v in other and (best_depth is None or other[v][1] < best_depth):
+                best_meeting, best_depth = (url, v), other[v][1]
+            if v not in reached:
+                reached[v] = (url, reached[url][1] + 1)
+                next_level.append(v)
+
+    return next_level, best_meeting
+
+
+def _join_paths(meeting: tuple[str, str], forward: dict[str, tuple[Optional[str], int]],
+                backward: dict[str, tuple[Optional[str], int]]) -> list[str]:
+    """Return the chain of urls through the link <meeting>, from the starting url of
+    <forward> to the starting url of <backward>."""
+    # ACCUMULATOR path builds up the chain from the meeting link back to the start
+    path = []
+    url = meeting[0]
+    while url is not None:
+        path.append(url)
+        url = forward[url][0]
+    path.reverse()
+
+    url = meeting[1]
+    while url is not None:
+        path.append(url)
+        url = backward[url][0]
+
+    return path
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
+
+    import python_ta.contracts
+
+    python_ta.contracts.check_all_contracts()
+
+    import python_ta
+
+    python_ta.check_all(config={
+        'extra-imports': ['time', 'build_wikigraph', 'wikipedia_html_parsers'],
+        'allowed-io': [],
+        'max-line-length': 100,
+        'disable': ['E1136']
+    })
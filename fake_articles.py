@@ -0,0 +1,80 @@
+"""CSC111 Winter 2021 Final Project: Made-Up Articles for the Test Suites
+
+Module Description
+===============================
+
+This module contains the made-up articles the test suites build graphs from, so the builders
+can be tested without downloading anything: article n links to articles 2n + 1 to 2n + 6
+(so articles are linked from several others). It also contains a summary of a graph that
+two builds can be compared with.
+
+Copyright and Usage Information
+===============================
+
+This file is provided solely for the personal and private use of Faizah Sayyid, Tina Zhang,
+Poorvi Sharma, and Courtney Amm (students at the University of Toronto St. George campus).
+All forms of distribution of this code, whether as given or with any changes, are expressly
+prohibited.
+
+This file is Copyright (c) 2021 Faizah Sayyid, Tina Zhang, Poorvi Sharma, Courtney Amm.
+"""
+import random
+import time
+from functools import partial
+from typing import Callable
+
+WIKI = 'https://en.wikipedia.org/wiki/'
+
+
+def fake_links(url: str) -> list[str]:
+    """Return the links on a made-up article: article n links to articles 2n + 1 to 2n + 6."""
+    n = int(url[len(WIKI + 'A'):])
+    return [WIKI + 'A' + str(2 * n + k) for k in range(1, 7)]
+
+
+def fake_weighted_links(url: str) -> list[tuple]:
+    """Return the weighted links on a made-up article, sorted by weight like
+    get_adjacent_urls_weighted."""
+    weighted = [((link, link[len(WIKI):]), len(link) % 4) for link in fake_links(url)]
+    return sorted(weighted, key=lambda item: item[1], reverse=True)
+
+
+def redirecting_links(url: str) -> list[str]:
+    """Return the links on a made-up article like fake_links, where article n also links
+    to article 2n + 1 through a redirect (which has the links of the article it leads to)."""
+    if url.startswith(WIKI + 'Redirect_to_'):
+        return fake_links(WIKI + url[len(WIKI + 'Redirect_to_'):])
+    links = fake_links(url)
+    return [WIKI + 'Redirect_to_' + links[0][len(WIKI):]] + links
+
+
+def with_random_delay(fetch: Callable[[str], list]) -> Callable[[str], list]:
+    """Return a version of <fetch> that waits a random few milliseconds before each download,
+    so the downloads of a build don't finish in the order they started.
+
+    The version returned can be pickled (if <fetch> can), so it can be sent to the worker
+    processes of a sharded build.
+    """
+    return partial(_delayed_fetch, fetch)
+
+
+def _delayed_fetch(fetch: Callable[[str], list], url: str) -> list:
+    """Return fetch(url), after a random delay of up to 2 milliseconds."""
+    time.sleep(random.random() / 500)
+    return fetch(url)
+
+
+def graph_summary(graph) -> dict:
+    """Return a mapping from each vertex of <graph> to its neighbours."""
+    return {v: graph.get_neighbours(v) for v in graph.get_all_vertices()}
+
+
+if __name__ == '__main__':
+    import python_ta
+
+    python_ta.check_all(config={
+        'extra-imports': ['random', 'time', 'functools'],
+        'allowed-io': [],
+        'max-line-length': 100,
+        'disable': ['E1136']
+    })
@@ -0,0 +1,592 @@
+"""CSC111 Winter 2021 Final Project: Frozen Wikipedia Graph Class
+
+Module Description
+===============================
+
+This module contains the FrozenWikiGraph class, which is an immutable, compact copy of a
+WikiGraph or a WeightedWikiGraph, returned by their freeze methods, and the functions that
+save a graph to (and load it from) a binary graph file.
+
+Instead of a Python object (with its own set or dict of neighbours) per vertex, a frozen
+graph numbers its vertices 0, 1, 2, ... in the order they were added and keeps its edges in
+compressed sparse row form: the neighbours of vertex i are
+neighbours[offsets[i]:offsets[i + 1]], with their edge weights in the same positions of
+weights. The names and urls are interned and kept in tuples, and class ids are only worked
+out when they are asked for, so a frozen graph takes a fraction of the memory of the graph
+it was frozen from (see benchmarks.py) and can be read the same way.
+
+A graph file holds these arrays as they are laid out in memory (little-endian, each section
+starting on a multiple of 8 bytes):
+
+    header      GRAPH_FILE_MAGIC, the format version, flags (1 if the graph is weighted),
+                the number of vertices and the number of entries in neighbours
+    sections    the (offset, length in bytes) of each of the sections below
+    names       the utf-8 names of the vertices, one after the other, with the offset of
+                each name (and of the end of the last one) as 64-bit integers
+    urls        the urls of the vertices, laid out like the names
+    name order  the vertex ids, as 32-bit integers, sorted by the utf-8 bytes of their names
+    offsets     the 64-bit offsets of the neighbours of each vertex
+    neighbours  the 32-bit vertex ids of the neighbours of every vertex
+    weights     the 64-bit float weight of every entry in neighbours (empty if the graph
+                isn't weighted)
+
+load_wikigraph memory-maps the file and reads the graph straight from it: names, urls and
+adjacency are only decoded when they are asked for, and names are looked up by binary search
+through the name order, so opening even a very large graph takes milliseconds and every
+process that opens the same file shares its pages in memory.
+
+Copyright and Usage Information
+===============================
+
+This file is provided solely for the personal and private use of Faizah Sayyid, Tina Zhang,
+Poorvi Sharma, and Courtney Amm (students at the University of Toronto St. George campus).
+All forms of distribution of this code, whether as given or with any changes, are expressly
+prohibited.
+
+This file is Copyright (c) 2021 Faizah Sayyid, Tina Zhang, Poorvi Sharma, Courtney Amm.
+"""
+from __future__ import annotations
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from array import array
+from typing import Any, BinaryIO, Iterable, Optional, Sequence, Union
+
+from article_ids import ArticleTable, get_article_table
+
+# The first bytes of every graph file
+GRAPH_FILE_MAGIC = b'WIKIGRPH'
+
+# The version of the graph file format written by save_wikigraph
+GRAPH_FILE_VERSION = 1
+
+# The layout of the header of a graph file: magic, version, flags, number of vertices and
+# number of entries in neighbours
+_HEADER = struct.Struct('<8sIIqq')
+
+# The names and array type codes of the sections of a graph file, in the order they are
+# stored ('B' for raw bytes)
+_SECTIONS = (('name_offsets', 'q'), ('name_bytes', 'B'), ('url_offsets', 'q'),
+             ('url_bytes', 'B'), ('name_order', 'i'), ('offsets', 'q'), ('neighbours', 'i'),
+             ('weights', 'd'))
+
+# The layout of the table giving the (offset, length) of each section of a graph file
+_SECTION_TABLE = struct.Struct('<' + 'qq' * len(_SECTIONS))
+
+# The flag set in the header of the graph file of a weighted graph
+_WEIGHTED_FLAG = 1
+
+
+class _StringTable(Sequence):
+    """A sequence of the strings stored one after the other in the utf-8 <data>, where
+    string i is data[offsets[i]:offsets[i + 1]], decoded when it is asked for."""
+    # Private Instance Attributes:
+    #     - _offsets:
+    #         the offset of each string in _data, and of the end of the last one
+    #     - _data:
+    #         the utf-8 bytes of the strings
+    _offsets: Sequence[int]
+    _data: memoryview
+
+    def __init__(self, offsets: Sequence[int], data: memoryview) -> None:
+        """Initialize a table of the strings in <data> starting at <offsets>."""
+        self._offsets = offsets
+        self._data = data
+
+    def raw(self, i: int) -> bytes:
+        """Return the utf-8 bytes of string i."""
+        return bytes(self._data[self._offsets[i]:self._offsets[i + 1]])
+
+    def __getitem__(self, i: int) -> str:
+        """Return string i."""
+        if not -len(self) <= i < len(self):
+            raise IndexError(i)
+        return self.raw(i % len(self)).decode()
+
+    def __len__(self) -> int:
+        """Return the number of strings in this table."""
+        return len(self._offsets) - 1
+
+
+class _NameIndex:
+    """A lookup from the names in a _StringTable to their positions, by binary search
+    through the positions sorted by the utf-8 bytes of the names."""
+    # Private Instance Attributes:
+    #     - _names:
+    #         the names looked up
+    #     - _order:
+    #         the positions of the names, sorted by the utf-8 bytes of the names
+    _names: _StringTable
+    _order: Sequence[int]
+
+    def __init__(self, names: _StringTable, order: Sequence[int]) -> None:
+        """Initialize an index of <names> sorted in <order>."""
+        self._names = names
+        self._order = order
+
+    def get(self, name: Any) -> Optional[int]:
+        """Return the position of <name>, or None if it isn't one of the names."""
+        if not isinstance(name, str):
+            return None
+        key = name.encode()
+        low, high = 0, len(self._order)
+        while low < high:
+            middle = (low + high) // 2
+            if self._names.raw(self._order[middle]) < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low < len(self._order) and self._names.raw(self._order[low]) == key:
+            return self._order[low]
+        return None
+
+    def __contains__(self, name: Any) -> bool:
+        """Return whether <name> is one of the names."""
+        return self.get(name) is not None
+
+    def __getitem__(self, name: Any) -> int:
+        """Return the position of <name>, raising a KeyError if it isn't one of the names."""
+        position = self.get(name)
+        if position is None:
+            raise KeyError(name)
+        return position
+
+
+class FrozenWikiGraph:
+    """An immutable graph used to represent a Wikipedia pages network, stored in compact
+    arrays.
+
+    Each vertex in the graph represents a Wikipedia page, and an edge exist between
+    two vertices v1 and v2 if and only if v1 contains a link to v2 or v2 contains a link
+    to v1. Every edge is stored twice, once from each of its endpoints.
+
+    Instance Attributes:
+        - weighted: whether this graph was frozen from a WeightedWikiGraph (if so,
+          get_neighbours returns (name, weight) pairs)
+
+    Representation Invariants:
+        - len(self._names) == len(self._urls) == len(self._offsets) - 1
+        - self._offsets[0] == 0 and self._offsets[-1] == len(self._neighbours)
+        - not self.weighted or len(self._weights) == len(self._neighbours)
+    """
+    weighted: bool
+
+    # Private Instance Attributes:
+    #     - _names:
+    #         the name of every vertex, by vertex id
+    #     - _urls:
+    #         the url of every vertex, by vertex id
+    #     - _ids:
+    #         maps the name of every vertex to its vertex id
+    #     - _offsets:
+    #         the neighbours of vertex i are self._neighbours[self._offsets[i]:self._offsets[i + 1]]
+    #     - _neighbours:
+    #         the vertex ids of the neighbours of every vertex, one vertex after the other
+    #     - _weights:
+    #         the weight of every edge in self._neighbours (empty if self.weighted is False)
+    #     - _articles:
+    #         the table giving the article of every vertex its id (sharing the redirects known
+    #         to this process, see article_ids.get_article_table), or None if it hasn't been
+    #         needed yet
+    #     - _article_vertices:
+    #         the vertex id of each article in _articles, by article id
+    #     - _components:
+    #         the number of the connected component of every vertex, by vertex id, or None
+    #         if the components haven't been needed yet
+    #     - _component_sizes:
+    #         the number of vertices in each connected component, by component number
+    _names: Sequence[str]
+    _urls: Sequence[str]
+    _ids: Union[dict[str, int], _NameIndex]
+    _offsets: Sequence[int]
+    _neighbours: Sequence[int]
+    _weights: Sequence[float]
+    _articles: Optional[ArticleTable]
+    _article_vertices: array
+    _components: Optional[array]
+    _component_sizes: array
+
+    def __init__(self, names: Sequence[str], urls: Sequence[str],
+                 adjacency: tuple[Sequence[int], Sequence[int], Sequence[float]],
+                 weighted: bool, ids: Optional[_NameIndex] = None) -> None:
+        """Initialize a frozen graph whose vertices have the given <names> and <urls>, and
+        whose <adjacency> is (offsets, neighbours, weights), with weights empty if the graph
+        isn't <weighted>.
+
+        <ids> looks up the vertex id of a name; if it isn't given, a dict is made from names.
+        Use freeze_vertices or load_wikigraph rather than calling this directly.
+        """
+        self.weighted = weighted
+        self._names = names
+        self._urls = urls
+        self._ids = {name: i for i, name in enumerate(names)} if ids is None else ids
+        self._offsets, self._neighbours, self._weights = adjacency
+        self._articles = None
+        self._article_vertices = array('i')
+        self._components = None
+        self._component_sizes = array('q')
+
+    def _id(self, name: Any) -> int:
+        """Return the vertex id of the vertex called <name>.
+
+        Raise a ValueError if name does not appear as a vertex in this graph.
+        """
+        if name in self._ids:
+            return self._ids[name]
+        else:
+            raise ValueError
+
+    def _neighbour_ids(self, vertex_id: int) -> array:
+        """Return the vertex ids of the neighbours of the vertex with the given id."""
+        return self._neighbours[self._offsets[vertex_id]:self._offsets[vertex_id + 1]]
+
+    def adjacent(self, name1: Any, name2: Any) -> bool:
+        """Return whether name1 and name2 are adjacent vertices in this graph.
+
+        Return False if name1 or name2 do not appear as vertices in this graph.
+        """
+        if name1 in self._ids and name2 in self._ids:
+            return self._ids[name2] in self._neighbour_ids(self._ids[name1])
+        else:
+            return False
+
+    def get_neighbours(self, name: Any) -> set:
+        """Return a set of the neighbours of the given page name (with their edge weights,
+        as (name, weight) pairs, if this graph is weighted).
+
+        Raise a ValueError if page name does not appear as a vertex in this graph.
+        """
+        vertex_id = self._id(name)
+        start, end = self._offsets[vertex_id], self._offsets[vertex_id + 1]
+        if self.weighted:
+            return {(self._names[self._neighbours[i]], self._weights[i])
+                    for i in range(start, end)}
+        else:
+            return {self._names[u] for u in self._neighbours[start:end]}
+
+    def degree(self, name: Any) -> int:
+        """Return the degree of the vertex called <name>.
+
+        Raise a ValueError if name does not appear as a vertex in this graph.
+        """
+        vertex_id = self._id(name)
+        return self._offsets[vertex_id + 1] - self._offsets[vertex_id]
+
+    def get_all_vertices(self) -> set:
+        """Return a set of all vertex page names in this graph.
+        """
+        return set(self._names)
+
+    def is_vertex_in_graph(self, name: str) -> bool:
+        """Return whether <name> is a vertex in this graph"""
+        return name in self._ids
+
+    def _component_labels(self) -> array:
+        """Return the connected component of every vertex, by vertex id, as the number of
+        the component (components are numbered in order of their first vertex).
+
+        The components are found the first time they are needed, then kept.
+        """
+        if self._components is None:
+            labels = array('i', [-1]) * len(self._names)
+            sizes = array('q')
+            for start in range(len(self._names)):
+                if labels[start] == -1:
+                    label = len(sizes)
+                    labels[start] = label
+                    size = 1
+                    # ACCUMULATOR stack holds the labelled vertices whose neighbours haven't
+                    # been looked at yet
+                    stack = [start]
+                    while stack:
+                        for u in self._neighbour_ids(stack.pop()):
+                            if labels[u] == -1:
+                                labels[u] = label
+                                size += 1
+                                stack.append(u)
+                    sizes.append(size)
+            self._components, self._component_sizes = labels, sizes
+        return self._components
+
+    def connected(self, item1: Any, item2: Any) -> bool:
+        """Return whether item1 and item2 are connected vertices
+        in this graph.
+
+        Return False if item1 or item2 do not appear as vertices
+        in this graph.
+        """
+        if item1 in self._ids and item2 in self._ids:
+            labels = self._component_labels()
+            return labels[self._ids[item1]] == labels[self._ids[item2]]
+        else:
+            return False
+
+    def component(self, name: Any) -> set:
+        """Return the names of the vertices in the connected component of the vertex called
+        <name> (including name itself).
+
+        Raise a ValueError if name does not appear as a vertex in this graph.
+        """
+        labels = self._component_labels()
+        label = labels[self._id(name)]
+        return {self._names[i] for i in range(len(labels)) if labels[i] == label}
+
+    def component_size(self, name: Any) -> int:
+        """Return the number of vertices in the connected component of the vertex called
+        <name>.
+
+        Raise a ValueError if name does not appear as a vertex in this graph.
+        """
+        label = self._component_labels()[self._id(name)]
+        return self._component_sizes[label]
+
+    def num_components(self) -> int:
+        """Return the number of connected components of this graph."""
+        self._component_labels()
+        return len(self._component_sizes)
+
+    def find_vertex(self, url: str) -> Optional[Any]:
+        """Return the name of the vertex of the article at <url> (however the url is written),
+        or None if the article isn't in this graph.
+
+        Article ids only hold within a process, so the vertices are given theirs (in a table of
+        this graph's own) the first time this is called.
+        """
+        if self._articles is None:
+            self._articles = ArticleTable(get_article_table())
+            for i, vertex_url in enumerate(self._urls):
+                if self._articles.article_id(vertex_url) == len(self._article_vertices):
+                    self._article_vertices.append(i)
+
+        if url not in self._articles:
+            return None
+        return self._names[self._article_vertices[self._articles.article_id(url)]]
+
+    def get_url(self, name: Any) -> str:
+        """Return the url of the vertex called <name>.
+
+        Raise a ValueError if name does not appear as a vertex in this graph.
+        """
+        return self._urls[self._id(name)]
+
+    def get_class_id(self, name: Any) -> str:
+        """Returns the class id of a vertex"""
+        return ''.join([str(ord(letter)) for letter in self._names[self._id(name)]])
+
+    def to_cytoscape(self) -> list[dict]:
+        """Returns the list of graph data needed to display the graph in cytoscape, in the
+        same form (and order) as WikiGraph.to_cytoscape returns it for the graph this graph
+        was frozen from.
+        """
+        cyto_elements = []
+
+        for vertex_id, name in enumerate(self._names):
+            url = self._urls[vertex_id]
+            cyto_elements.append({'data': {'id': url, 'label': name},
+                                  'classes': self.get_class_id(name)})
+
+            for u in self._neighbour_ids(vertex_id):
+                cyto_elements.append({'data': {'source': url,
+                                               'target': self._urls[u],
+                                               'label': name + ' to ' + self._names[u]}})
+        return cyto_elements
+
+    def vertex_id(self, name: Any) -> int:
+        """Return the vertex id of the vertex called <name> (its position in vertex_names()).
+
+        Raise a ValueError if name does not appear as a vertex in this graph.
+        """
+        return self._id(name)
+
+    def vertex_names(self) -> Sequence[str]:
+        """Return the names of the vertices of this graph, by vertex id."""
+        return self._names
+
+    def adjacency(self) -> tuple[Sequence[int], Sequence[int], Sequence[float]]:
+        """Return the edges of this graph in compressed sparse row form, as (offsets,
+        neighbours, weights): the vertex ids of the neighbours of vertex i are
+        neighbours[offsets[i]:offsets[i + 1]], and weights holds the weights of those edges
+        in the same positions (it is empty if this graph isn't weighted)."""
+        return self._offsets, self._neighbours, self._weights
+
+    def num_edges(self) -> int:
+        """Return the number of edges in this graph."""
+        return len(self._neighbours) // 2
+
+    def __len__(self) -> int:
+        """Return the number of vertices in this graph."""
+        return len(self._names)
+
+    def write(self, file: BinaryIO) -> None:
+        """Write this graph to the binary <file> in the graph file format (see the module
+        description)."""
+        names = [name.encode() for name in self._names]
+        urls = [url.encode() for url in self._urls]
+        sections = {'name_offsets': _string_offsets(names), 'name_bytes': b''.join(names),
+                    'url_offsets': _string_offsets(urls), 'url_bytes': b''.join(urls),
+                    'name_order': array('i', sorted(range(len(names)), key=names.__getitem__)),
+                    'offsets': array('q', self._offsets),
+                    'neighbours': array('i', self._neighbours),
+                    'weights': array('d', self._weights)}
+
+        position = _HEADER.size + _SECTION_TABLE.size
+        # ACCUMULATOR layout collects the (offset, length) of each section
+        layout = []
+        for section, _ in _SECTIONS:
+            length = len(_little_endian(sections[section]))
+            layout.extend([position, length])
+            position += length + _padding(length)
+
+        file.write(_HEADER.pack(GRAPH_FILE_MAGIC, GRAPH_FILE_VERSION,
+                                _WEIGHTED_FLAG if self.weighted else 0,
+                                len(names), len(self._neighbours)))
+        file.write(_SECTION_TABLE.pack(*layout))
+        for section, _ in _SECTIONS:
+            data = _little_endian(sections[section])
+            file.write(data)
+            file.write(bytes(_padding(len(data))))
+
+
+def freeze_vertices(vertices: Iterable, weighted: bool) -> FrozenWikiGraph:
+    """Return a frozen graph holding <vertices> (the _Vertex or _WeightedVertex objects of a
+    graph) and the edges between them.
+
+    Neighbours are kept in the order they are found in each vertex, so the frozen graph
+    reads (and displays) exactly like the graph it was frozen from.
+    """
+    vertices = list(vertices)
+    ids = {v: i for i, v in enumerate(vertices)}
+    offsets = array('q', [0])
+    neighbours = array('i')
+    weights = array('d')
+    for v in vertices:
+        neighbours.extend(ids[u] for u in v.neighbours)
+        if weighted:
+            weights.extend(v.neighbours.values())
+        offsets.append(len(neighbours))
+
+    return FrozenWikiGraph(tuple(sys.intern(v.name) for v in vertices),
+                           tuple(sys.intern(v.url) for v in vertices),
+                           (offsets, neighbours, weights), weighted)
+
+
+def _string_offsets(strings: list[bytes]) -> array:
+    """Return the offset of each of the <strings> when they are stored one after the other,
+    and of the end of the last one."""
+    offsets = array('q', [0])
+    for string in strings:
+        offsets.append(offsets[-1] + len(string))
+    return offsets
+
+
+def _padding(length: int) -> int:
+    """Return the number of bytes needed after <length> bytes to reach a multiple of 8."""
+    return -length % 8
+
+
+def _little_endian(data: Union[array, bytes]) -> bytes:
+    """Return the bytes of <data> in little-endian order."""
+    if isinstance(data, array) and sys.byteorder != 'little':
+        data = array(data.typecode, data)
+        data.byteswap()
+    return bytes(data)
+
+
+def save_wikigraph(graph: Any, path: str) -> None:
+    """Save <graph> (a FrozenWikiGraph, or a WikiGraph or WeightedWikiGraph, which is frozen
+    first) to the graph file at <path>, replacing it atomically."""
+    if not isinstance(graph, FrozenWikiGraph):
+        graph = graph.freeze()
+
+    directory = os.path.dirname(os.path.abspath(path))
+    descriptor, temp_path = tempfile.mkstemp(prefix='.graph-', dir=directory)
+    try:
+        with os.fdopen(descriptor, 'wb') as file:
+            graph.write(file)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+
+
+def load_wikigraph(path: str, memory_map: bool = True) -> FrozenWikiGraph:
+    """Return the graph saved in the graph file at <path>.
+
+    If <memory_map> is True, the graph is read straight from the memory-mapped file (which
+    stays open as long as the graph is used); otherwise the file is read into memory.
+
+    Raise a ValueError if <path> isn't a graph file or was saved in a different version of
+    the format.
+    """
+    with open(path, 'rb') as file:
+        if memory_map and os.path.getsize(path) > 0:
+            data = memoryview(mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ))
+        else:
+            data = memoryview(file.read())
+
+    if len(data) < _HEADER.size + _SECTION_TABLE.size:
+        raise ValueError(f'not a graph file: {path}')
+    magic, version, flags, num_vertices, num_entries = _HEADER.unpack_from(data)
+    if magic != GRAPH_FILE_MAGIC:
+        raise ValueError(f'not a graph file: {path}')
+    if version != GRAPH_FILE_VERSION:
+        raise ValueError(f'unsupported graph file version: {version}')
+
+    layout = _SECTION_TABLE.unpack_from(data, _HEADER.size)
+    sections = {}
+    for i, (section, typecode) in enumerate(_SECTIONS):
+        offset, length = layout[2 * i], layout[2 * i + 1]
+        if offset < 0 or length < 0 or offset + length > len(data) \
+                or length % array(typecode).itemsize != 0:
+            raise ValueError(f'corrupt graph file: {path}')
+        sections[section] = _read_section(data[offset:offset + length], typecode)
+
+    weighted = bool(flags & _WEIGHTED_FLAG)
+    if len(sections['offsets']) != num_vertices + 1 \
+            or len(sections['name_order']) != num_vertices \
+            or len(sections['neighbours']) != num_entries \
+            or len(sections['weights']) != (num_entries if weighted else 0):
+        raise ValueError(f'corrupt graph file: {path}')
+
+    names = _StringTable(sections['name_offsets'], sections['name_bytes'])
+    urls = _StringTable(sections['url_offsets'], sections['url_bytes'])
+    adjacency = (sections['offsets'], sections['neighbours'], sections['weights'])
+    return FrozenWikiGraph(names, urls, adjacency, weighted,
+                           _NameIndex(names, sections['name_order']))
+
+
+def _read_section(data: memoryview, typecode: str) -> Sequence:
+    """Return the little-endian section <data> as a sequence of the type <typecode>, without
+    copying it unless this machine is big-endian."""
+    if typecode == 'B':
+        return data
+    elif sys.byteorder == 'little':
+        return data.cast(typecode)
+    else:
+        values = array(typecode, bytes(data))
+        values.byteswap()
+        return values
+
+
+if __name__ == '__main__':
+    import python_ta.contracts
+
+    python_ta.contracts.check_all_contracts()
+
+    import doctest
+
+    doctest.testmod()
+
+    import python_ta
+
+    python_ta.check_all(config={
+        'extra-imports': ['mmap', 'os', 'struct', 'sys', 'tempfile', 'array',
+                          'article_ids'],
+        'allowed-io': ['save_wikigraph', 'load_wikigraph'],
+        'max-line-length': 100,
+        'disable': ['E1136']
+    })
@@ -0,0 +1,369 @@
+"""CSC111 Winter 2021 Final Project: Graph Centrality
+
+Module Description
+===============================
+
+This module contains the GraphMatrix class, which holds the adjacency matrix of a WikiGraph,
+WeightedWikiGraph or FrozenWikiGraph as NumPy arrays, and the functions that rank the
+articles of a graph by importance with it: PageRank, degree centrality, eigenvector
+centrality and (approximate) betweenness centrality.
+
+The matrix is kept in the compressed sparse row form of the frozen graph (see
+frozen_wikigraph), so every step of an iteration is a handful of vectorized NumPy
+operations over all the edges at once instead of a Python loop over the neighbours of every
+vertex. PageRank and eigenvector centrality iterate until the total change of the scores
+falls below a tolerance, and raise a ConvergenceError if that takes more than a maximum
+number of iterations. Betweenness centrality follows Brandes' algorithm, searching from one
+whole level of the breadth-first search at a time, and can be estimated from a random
+sample of source articles.
+
+All the functions take a graph or a GraphMatrix (build the matrix once to compute several
+centralities of the same graph) and return a dict mapping the name of every vertex to its
+score; rank_articles sorts such a dict from the most to the least important article.
+
+Copyright and Usage Information
+===============================
+
+This file is provided solely for the personal and private use of Faizah Sayyid, Tina Zhang,
+Poorvi Sharma, and Courtney Amm (students at the University of Toronto St. George campus).
+All forms of distribution of this code, whether as given or with any changes, are expressly
+prohibited.
+
+This file is Copyright (c) 2021 Faizah Sayyid, Tina Zhang, Poorvi Sharma, Courtney Amm.
+"""
+from __future__ import annotations
+from typing import Any, Optional, Sequence
+
+import numpy as np
+
+from frozen_wikigraph import FrozenWikiGraph
+
+# The default probability that a random surfer follows a link rather than jumping to a
+# random article
+DEFAULT_DAMPING = 0.85
+
+# The default tolerance of the iterative centralities: they stop once the scores change by
+# less than this much per vertex (in total, over all the vertices)
+DEFAULT_TOLERANCE = 1e-9
+
+# The default maximum number of iterations of the iterative centralities
+DEFAULT_MAX_ITERATIONS = 200
+
+
+class ConvergenceError(Exception):
+    """Exception raised when an iterative centrality doesn't converge within its maximum
+    number of iterations.
+
+    Instance Attributes:
+        - method: the name of the centrality
+        - iterations: the number of iterations that were run
+    """
+    method: str
+    iterations: int
+
+    def __init__(self, method: str, iterations: int) -> None:
+        """Initialize the error of <method>, which didn't converge in <iterations>
+        iterations."""
+        Exception.__init__(self, method, iterations)
+        self.method = method
+        self.iterations = iterations
+
+    def __str__(self) -> str:
+        """Return a string representation of this error."""
+        return f'{self.method} did not converge in {self.iterations} iterations'
+
+
+class GraphMatrix:
+    """The (symmetric) adjacency matrix of a graph, in compressed sparse row form.
+
+    Instance Attributes:
+        - names: the name of the vertex of every row and column
+        - offsets: the entries of row i are in positions offsets[i] to offsets[i + 1] of
+          columns and weights
+        - rows: the row of every entry
+        - columns: the column of every entry
+        - weights: the weight of every entry (all 1.0 if the matrix isn't weighted)
+
+    Representation Invariants:
+        - len(self.offsets) == len(self.names) + 1
+        - len(self.rows) == len(self.columns) == len(self.weights) == self.offsets[-1]
+    """
+    names: Sequence[str]
+    offsets: np.ndarray
+    rows: np.ndarray
+    columns: np.ndarray
+    weights: np.ndarray
+
+    def __init__(self, graph: Any, weighted: bool = True) -> None:
+        """Initialize the adjacency matrix of <graph> (a WikiGraph, WeightedWikiGraph or
+        FrozenWikiGraph), with the weights of its edges if it is weighted and <weighted> is
+        True, and with every edge weighing 1.0 otherwise.
+
+        >>> from weighted_wikigraph_class import WeightedWikiGraph
+        >>> g = WeightedWikiGraph()
+        >>> g.add_vertex('Cade (horse)', 'https://en.wikipedia.org/wiki/Cade_(horse)')
+        >>> g.add_vertex('Matchem', 'https://en.wikipedia.org/wiki/Matchem')
+        >>> g.add_edge('Cade (horse)', 'Matchem', 3.0)
+        >>> matrix = GraphMatrix(g)
+        >>> matrix.multiply(np.array([1.0, 2.0])).tolist()
+        [6.0, 3.0]
+        """
+        frozen = graph if isinstance(graph, FrozenWikiGraph) else graph.freeze()
+        offsets, neighbours, weights = frozen.adjacency()
+        self.names = frozen.vertex_names()
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.columns = np.asarray(neighbours, dtype=np.int64)
+        if weighted and frozen.weighted:
+            self.weights = np.asarray(weights, dtype=np.float64)
+        else:
+            self.weights = np.ones(len(self.columns))
+        self.rows = np.repeat(np.arange(len(self.names)), np.diff(self.offsets))
+
+    def size(self) -> int:
+        """Return the number of rows (and columns) of this matrix."""
+        return len(self.names)
+
+    def multiply(self, vector: np.ndarray) -> np.ndarray:
+        """Return the product of this matrix and <vector>."""
+        return np.bincount(self.rows, weights=self.weights * vector[self.columns],
+                           minlength=self.size())
+
+    def row_sums(self) -> np.ndarray:
+        """Return the sum of the weights of every row (the weighted degree of every vertex)."""
+        return np.bincount(self.rows, weights=self.weights, minlength=self.size())
+
+    def entries_of(self, vertices: np.ndarray) -> np.ndarray:
+        """Return the positions of all the entries of the rows <vertices>, one row after the
+        other."""
+        starts = self.offsets[vertices]
+        counts = self.offsets[vertices + 1] - starts
+        first = np.cumsum(counts) - counts
+        return np.arange(counts.sum()) + np.repeat(starts - first, counts)
+
+    def to_dict(self, scores: np.ndarray) -> dict[str, float]:
+        """Return a dict mapping the name of every vertex to its score in <scores>."""
+        return dict(zip(self.names, scores.tolist()))
+
+
+def _matrix(graph: Any, weighted: bool) -> GraphMatrix:
+    """Return <graph> if it is a GraphMatrix, and its adjacency matrix otherwise."""
+    return graph if isinstance(graph, GraphMatrix) else GraphMatrix(graph, weighted)
+
+
+def pagerank(graph: Any, damping: float = DEFAULT_DAMPING,
+             tolerance: float = DEFAULT_TOLERANCE,
+             max_iterations: int = DEFAULT_MAX_ITERATIONS,
+             weighted: bool = True) -> dict[str, float]:
+    """Return the PageRank of every vertex of <graph> (a graph or a GraphMatrix).
+
+    A random surfer follows a link with probability <damping>, choosing it in proportion to
+    the weights of the edges (if <weighted> is True and the graph is weighted), and
+    otherwise jumps to an article chosen uniformly at random, as it also does from articles
+    without any links. The scores add up to 1.
+
+    Raise a ConvergenceError if the scores haven't converged after <max_iterations>.
+
+    >>> from wikigraph import WikiGraph
+    >>> g = WikiGraph()
+    >>> for name in ['Hub', 'A', 'B']:
+    ...     g.add_vertex(name, 'https://en.wikipedia.org/wiki/' + name)
+    >>> g.add_edge('Hub', 'A')
+    >>> g.add_edge('Hub', 'B')
+    >>> {name: round(score, 3) for name, score in pagerank(g).items()}
+    {'Hub': 0.486, 'A': 0.257, 'B': 0.257}
+    """
+    matrix = _matrix(graph, weighted)
+    n = matrix.size()
+    if n == 0:
+        return {}
+
+    strengths = matrix.row_sums()
+    dangling = strengths == 0
+    inverse_strengths = np.divide(1.0, strengths, out=np.zeros(n), where=~dangling)
+    scores = np.full(n, 1.0 / n)
+    for _ in range(max_iterations):
+        jumps = damping * scores[dangling].sum() / n + (1.0 - damping) / n
+        new_scores = damping * matrix.multiply(scores * inverse_strengths) + jumps
+        change = np.abs(new_scores - scores).sum()
+        scores = new_scores
+        if change < n * tolerance:
+            return matrix.to_dict(scores)
+
+    raise ConvergenceError('pagerank', max_iterations)
+
+
+def degree_centrality(graph: Any, weighted: bool = False) -> dict[str, float]:
+    """Return the degree centrality of every vertex of <graph> (a graph or a GraphMatrix):
+    its degree (or, if <weighted> is True, the total weight of its edges) divided by the
+    number of other vertices.
+
+    >>> from wikigraph import WikiGraph
+    >>> g = WikiGraph()
+    >>> for name in ['Hub', 'A', 'B']:
+    ...     g.add_vertex(name, 'https://en.wikipedia.org/wiki/' + name)
+    >>> g.add_edge('Hub', 'A')
+    >>> g.add_edge('Hub', 'B')
+    >>> degree_centrality(g)
+    {'Hub': 1.0, 'A': 0.5, 'B': 0.5}
+    """
+    matrix = _matrix(graph, weighted)
+    if matrix.size() <= 1:
+        return matrix.to_dict(np.ones(matrix.size()))
+    return matrix.to_dict(matrix.row_sums() / (matrix.size() - 1))
+
+
+def eigenvector_centrality(graph: Any, tolerance: float = DEFAULT_TOLERANCE,
+                           max_iterations: int = DEFAULT_MAX_ITERATIONS,
+                           weighted: bool = True) -> dict[str, float]:
+    """Return the eigenvector centrality of every vertex of <graph> (a graph or a
+    GraphMatrix): the entries of the principal eigenvector of its adjacency matrix (with
+    the weights of its edges if <weighted> is True), scaled to a length of 1.
+
+    The eigenvector is found by power iteration on the adjacency matrix plus the identity,
+    which has the same eigenvectors but doesn't oscillate on bipartite graphs.
+
+    Raise a ConvergenceError if the scores haven't converged after <max_iterations>.
+
+    >>> from wikigraph import WikiGraph
+    >>> g = WikiGraph()
+    >>> for name in ['Hub', 'A', 'B', 'C', 'D']:
+    ...     g.add_vertex(name, 'https://en.wikipedia.org/wiki/' + name)
+    >>> for name in ['A', 'B', 'C', 'D']:
+    ...     g.add_edge('Hub', name)
+    >>> {name: round(score, 4) for name, score in eigenvector_centrality(g).items()}
+    {'Hub': 0.7071, 'A': 0.3536, 'B': 0.3536, 'C': 0.3536, 'D': 0.3536}
+    """
+    matrix = _matrix(graph, weighted)
+    n = matrix.size()
+    if n == 0:
+        return {}
+
+    scores = np.full(n, 1.0 / np.sqrt(n))
+    for _ in range(max_iterations):
+        new_scores = scores + matrix.multiply(scores)
+        new_scores /= np.linalg.norm(new_scores)
+        change = np.abs(new_scores - scores).sum()
+        scores = new_scores
+        if change < n * tolerance:
+            return matrix.to_dict(scores)
+
+    raise ConvergenceError('eigenvector centrality', max_iterations)
+
+
+def betweenness_centrality(graph: Any, samples: Optional[int] = None,
+                           seed: Optional[int] = None,
+                           normalized: bool = True) -> dict[str, float]:
+    """Return the betweenness centrality of every vertex of <graph> (a graph or a
+    GraphMatrix): the fraction of the shortest paths (by number of links) between every
+    pair of other vertices that pass through it.
+
+    If <samples> is given (and is less than the number of vertices), the shortest paths
+    are only followed from that many source vertices, chosen at random (with <seed>), and
+    the result is scaled up to estimate the exact centrality. If <normalized> is True, the
+    scores are divided by the number of pairs of other vertices, (n - 1)(n - 2); otherwise
+    every pair of vertices is counted once.
+
+    >>> from wikigraph import WikiGraph
+    >>> g = WikiGraph()
+    >>> for name in ['A', 'B', 'C', 'D']:
+    ...     g.add_vertex(name, 'https://en.wikipedia.org/wiki/' + name)
+    >>> for name1, name2 in [('A', 'B'), ('B', 'C'), ('C', 'D')]:
+    ...     g.add_edge(name1, name2)
+    >>> betweenness_centrality(g, normalized=False)
+    {'A': 0.0, 'B': 2.0, 'C': 2.0, 'D': 0.0}
+    """
+    matrix = _matrix(graph, weighted=False)
+    n = matrix.size()
+    if samples is None or samples >= n:
+        sources = np.arange(n)
+    else:
+        sources = np.random.default_rng(seed).choice(n, size=samples, replace=False)
+
+    scores = np.zeros(n)
+    for source in sources:
+        scores += _dependencies(matrix, int(source))
+
+    if normalized:
+        scale = 1.0 / ((n - 1) * (n - 2)) if n > 2 else 1.0
+    else:
+        scale = 0.5
+    if len(sources) < n:
+        scale *= n / len(sources)
+    return matrix.to_dict(scores * scale)
+
+
+def _dependencies(matrix: GraphMatrix, source: int) -> np.ndarray:
+    """Return how much every vertex depends on the shortest paths from <source> (Brandes'
+    dependencies), with the source's own dependency set to 0.
+
+    The breadth-first search from the source, and the accumulation of the dependencies back
+    towards it, each handle a whole level of the search at once.
+    """
+    n = matrix.size()
+    distances = np.full(n, -1, dtype=np.int64)
+    paths = np.zeros(n)
+    distances[source] = 0
+    paths[source] = 1.0
+
+    # ACCUMULATOR levels collects the vertices at each distance from the source
+    levels = [np.array([source])]
+    while True:
+        frontier = levels[-1]
+        entries = matrix.entries_of(frontier)
+        parents = matrix.rows[entries]
+        children = matrix.columns[entries]
+        distance = len(levels)
+
+        unseen = distances[children] == -1
+        distances[children[unseen]] = distance
+        shortest = distances[children] == distance
+        paths += np.bincount(children[shortest], weights=paths[parents[shortest]],
+                             minlength=n)
+
+        next_level = np.flatnonzero(distances == distance)
+        if len(next_level) == 0:
+            break
+        levels.append(next_level)
+
+    dependencies = np.zeros(n)
+    for distance in range(len(levels) - 1, 0, -1):
+        entries = matrix.entries_of(levels[distance])
+        children = matrix.rows[entries]
+        parents = matrix.columns[entries]
+        on_path = distances[parents] == distance - 1
+        children, parents = children[on_path], parents[on_path]
+        dependencies += np.bincount(parents, weights=paths[parents] / paths[children]
+                                    * (1.0 + dependencies[children]), minlength=n)
+
+    dependencies[source] = 0.0
+    return dependencies
+
+
+def rank_articles(scores: dict[str, float], k: Optional[int] = None) -> list[tuple[str, float]]:
+    """Return the (name, score) pairs of <scores>, from the highest score to the lowest (and
+    by name for equal scores), keeping only the first <k> if k is given.
+
+    >>> rank_articles({'A': 0.2, 'Hub': 0.6, 'B': 0.2}, k=2)
+    [('Hub', 0.6), ('A', 0.2)]
+    """
+    ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+    return ranked if k is None else ranked[:k]
+
+
+if __name__ == '__main__':
+    import python_ta.contracts
+
+    python_ta.contracts.check_all_contracts()
+
+    import doctest
+
+    doctest.testmod()
+
+    import python_ta
+
+    python_ta.check_all(config={
+        'extra-imports': ['numpy', 'frozen_wikigraph'],
+        'allowed-io': [],
+        'max-line-length': 100,
+        'disable': ['E1136']
+    })
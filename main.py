@@ -17,17 +17,42 @@ prohibited.
 This file is Copyright (c) 2021 Faizah Sayyid, Tina Zhang, Poorvi Sharma, Courtney Amm.
 """
 
+import os
+import tempfile
+import uuid
+from typing import Optional
+
 import dash
 import dash_cytoscape as cyto
 import dash_html_components as html
 import dash_core_components as dcc
 from dash.dependencies import Input, Output, State
 import build_wikigraph
+from crawl_budget import CrawlBudget
+from crawl_state import load_crawl_state, prune_checkpoints, save_crawl_state
 import wikipedia_html_parsers
 import make_txt_file
 
 cyto.load_extra_layouts()
 
+# The number of articles downloaded at the same time while building a graph
+BUILD_WORKERS = 8
+
+# The number of seconds a single click may spend building a graph (a graph that isn't finished
+# by then is shown as it is, and the next click with the same settings carries on with it)
+BUILD_TIMEOUT = 60
+
+# The directory holding the crawl state of the last graph each browser session built, so the
+# session can extend it: one checkpoint file per session, named after the session's id
+CRAWL_DIRECTORY = os.path.join(tempfile.gettempdir(), 'wikipedia-article-network-crawls')
+
+# The server can't tell when a browser session ends, so the checkpoints of sessions that
+# haven't built a graph for CRAWL_MAX_AGE seconds are deleted, and only the CRAWL_MAX_FILES
+# most recently used ones are kept (a session whose checkpoint was deleted crawls from the
+# start again)
+CRAWL_MAX_AGE = 24 * 60 * 60
+CRAWL_MAX_FILES = 100
+
 css_stylesheet = [{'body': {
     'font-size': '4em',
     'font-family': "'Open Sans', 'Arial'",
@@ -115,6 +140,7 @@ app.layout = html.Div(children=[
                             children='Press to download a txt file '
                                      'of all nodes in the graph!'),
                 dcc.Download(id='txt_download', children='Pls Work'),
+                dcc.Store(id='crawl_session', storage_type='session'),
                 dcc.Loading(id="loading_file",
                             type="circle",
                             children=html.Div(id="loading_file_output"),
@@ -191,32 +217,62 @@ app.layout = html.Div(children=[
 )
 
 
+def session_checkpoint(session_id: Optional[str]) -> tuple[str, str]:
+    """Return the id of the browser session with id <session_id> (a new id if it doesn't
+    have a valid one yet), and the checkpoint file the session's last crawl is kept in.
+
+    The checkpoints of the other sessions that are too old or too many are deleted.
+    """
+    try:
+        session_id = uuid.UUID(session_id).hex
+    except (TypeError, ValueError):
+        session_id = uuid.uuid4().hex
+    os.makedirs(CRAWL_DIRECTORY, exist_ok=True)
+    checkpoint_path = os.path.join(CRAWL_DIRECTORY, session_id + '.json')
+    prune_checkpoints(CRAWL_DIRECTORY, CRAWL_MAX_FILES, CRAWL_MAX_AGE, keep=checkpoint_path)
+    return session_id, checkpoint_path
+
+
 # Callback functions to make the graph interactive:
 
 @app.callback(
     Output('cytoscape_wiki_graph', 'elements'),
     Output('cytoscape_wiki_graph', 'stylesheet'),
     Output("loading_graph_output", "children"),
+    Output('crawl_session', 'data'),
     Input('update_graph_button', 'n_clicks'),
     State('images_selection', 'value'),
     State('graph_type_selection', 'value'),
     State('wiki_url_input', 'value'),
     State('wiki_num_sources_input', 'value'),
     State('wiki_num_sources_per_page_input', 'value'),
-    State('cytoscape_wiki_graph', 'stylesheet'))
+    State('cytoscape_wiki_graph', 'stylesheet'),
+    State('crawl_session', 'data'))
 def update_cytoscape_display(n_clicks: int, images: str, weighting: str, url: str, num_sources: str,
-                             sources_per_page: str, style_sheet: list) \
-        -> (list[dict], list[dict], None):
+                             sources_per_page: str, style_sheet: list,
+                             session_id: Optional[str]) -> (list[dict], list[dict], None, str):
     """This function builds the cytoscape graph and transforms that graph in to the correct
     cytoscape format. It also adds styling to the graph as it is built"""
     # Initially builds the graph,
     # with an if statement determining whether to use a weighted graph or an unweighted graph
-    if n_clicks > -1 and weighting == 'weighted':
-        new_graph = build_wikigraph.build_weighted_wikigraph(url, int(num_sources), max(
-            int(sources_per_page), 0))
+    weighted = n_clicks > -1 and weighting == 'weighted'
+    num_sources, sources_per_page = int(num_sources), max(int(sources_per_page), 0)
+    url = wikipedia_html_parsers.resolve_url(url)
+
+    # If only the number of sources went up since the last graph this session built, extend
+    # that graph instead of crawling everything again
+    session_id, checkpoint_path = session_checkpoint(session_id)
+    state = load_crawl_state(checkpoint_path) if os.path.exists(checkpoint_path) else None
+    budget = CrawlBudget(timeout=BUILD_TIMEOUT)
+    if state is not None and num_sources >= state.num_sources \
+            and (state.starting_url, state.weighted, state.sources_per_page) \
+            == (url, weighted, sources_per_page):
+        new_graph = build_wikigraph.expand_wikigraph(state, num_sources - state.num_sources,
+                                                     BUILD_WORKERS, budget=budget)
     else:
-        new_graph = build_wikigraph.build_wikigraph(url, int(num_sources), max(
-            int(sources_per_page), 0))
+        state = build_wikigraph.start_crawl(url, num_sources, sources_per_page, weighted)
+        new_graph = build_wikigraph.run_crawl(state, BUILD_WORKERS, budget=budget)
+    save_crawl_state(state, checkpoint_path)
 
     # Converts the graph to a cytoscape graph
     graph_elements = new_graph.to_cytoscape()
@@ -272,7 +328,7 @@ def update_cytoscape_display(n_clicks: int, images: str, weighting: str, url: st
                 }
             })
 
-    return graph_elements, style_sheet, None
+    return graph_elements, style_sheet, None, session_id
 
 
 @app.callback(Output('cytoscape_article', 'children'),
@@ -345,7 +401,8 @@ if __name__ == '__main__':
     #     'extra-imports': ['dash', 'dash_cytoscape', 'dash_html_components',
     #                       'dash_core_components',
     #                       'dash.dependencies', 'build_wikigraph', 'wikipedia_html_parsers',
-    #                       'make_txt_file'],
+    #                       'make_txt_file', 'crawl_budget', 'crawl_state', 'os',
+    #                       'tempfile', 'uuid'],
     #     'disable': ['E9997', 'R0913'],
     #     'max-nested-blocks': 4
     # })
@@ -0,0 +1,265 @@
+"""CSC111 Winter 2021 Final Project: Persistent Page Cache
+
+Module Description
+===============================
+
+This module contains the PageCache class, which is a persistent on-disk cache of the html
+code of downloaded Wikipedia articles.
+
+Every page is stored compressed and keyed by its canonical url, so building a graph, tapping
+on its nodes for summaries and exporting it to a txt file only downloads each article once.
+Pages expire after a time-to-live, and the least recently used pages are evicted once the
+cache grows past its size limit.
+
+The cache also keeps the redirects seen while downloading (an alias article url mapped to the
+url of the article it leads to), so an alias is never downloaded again once it is known.
+
+Copyright and Usage Information
+===============================
+
+This file is provided solely for the personal and private use of Faizah Sayyid, Tina Zhang,
+Poorvi Sharma, and Courtney Amm (students at the University of Toronto St. George campus).
+All forms of distribution of this code, whether as given or with any changes, are expressly
+prohibited.
+
+This file is Copyright (c) 2021 Faizah Sayyid, Tina Zhang, Poorvi Sharma, Courtney Amm.
+"""
+from __future__ import annotations
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Optional
+from urllib.parse import urldefrag
+
+# The default maximum number of (compressed) bytes stored in a cache
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+# The default number of seconds a page stays fresh in a cache (one week)
+DEFAULT_TTL = 7 * 24 * 60 * 60
+
+# The number of seconds a cache waits for another process to finish writing to its file
+BUSY_TIMEOUT = 30.0
+
+
+def cache_key(url: str) -> str:
+    """Return the canonical form of <url> used to key cached pages.
+
+    >>> cache_key('http://en.wikipedia.org/wiki/Rebecca_Sugar#Career')
+    'https://en.wikipedia.org/wiki/Rebecca_Sugar'
+    """
+    url, _ = urldefrag(url)
+    if url.startswith('http://'):
+        url = 'https://' + url[len('http://'):]
+    return url
+
+
+class PageCache:
+    """A persistent cache of the html code of Wikipedia articles, stored in an sqlite file.
+
+    Instance Attributes:
+        - path: the file the cache is stored in (':memory:' for a cache that isn't persisted)
+        - max_bytes: the maximum number of compressed bytes stored before pages are evicted
+        - ttl: the number of seconds a page stays fresh, or None if pages never expire
+        - hits: the number of lookups that were answered by the cache
+        - misses: the number of lookups that were not in the cache (or had expired)
+
+    Representation Invariants:
+        - self.max_bytes > 0
+        - self.ttl is None or self.ttl > 0
+        - self.hits >= 0 and self.misses >= 0
+    """
+    path: str
+    max_bytes: int
+    ttl: Optional[float]
+    hits: int
+    misses: int
+
+    # Private Instance Attributes:
+    #     - _connection:
+    #         the connection to the sqlite file storing the pages
+    #     - _lock:
+    #         a lock so the cache can be shared by the threads of a concurrent build
+    #     - _total_bytes:
+    #         the number of compressed bytes currently stored in the cache
+    _connection: sqlite3.Connection
+    _lock: threading.Lock
+    _total_bytes: int
+
+    def __init__(self, path: str, max_bytes: int = DEFAULT_MAX_BYTES,
+                 ttl: Optional[float] = DEFAULT_TTL) -> None:
+        """Initialize a cache stored in the file <path>, creating the file if needed."""
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, timeout=BUSY_TIMEOUT, check_same_thread=False)
+        if path != ':memory:':
+            # Let the worker processes of a sharded build read the file while another writes
+            self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute('CREATE TABLE IF NOT EXISTS pages ('
+                                 'url TEXT PRIMARY KEY, body BLOB NOT NULL, '
+                                 'size INTEGER NOT NULL, stored_at REAL NOT NULL, '
+                                 'last_used REAL NOT NULL)')
+        self._connection.execute('CREATE INDEX IF NOT EXISTS pages_last_used '
+                                 'ON pages (last_used)')
+        self._connection.execute('CREATE TABLE IF NOT EXISTS redirects ('
+                                 'url TEXT PRIMARY KEY, target TEXT NOT NULL)')
+        self._connection.commit()
+        self._total_bytes = self._connection.execute(
+            'SELECT COALESCE(SUM(size), 0) FROM pages').fetchone()[0]
+
+    def get(self, url: str) -> Optional[str]:
+        """Return the cached html code of <url>, or None if it isn't cached or has expired.
+
+        >>> cache = PageCache(':memory:')
+        >>> cache.get('https://en.wikipedia.org/wiki/Rebecca_Sugar') is None
+        True
+        >>> cache.put('https://en.wikipedia.org/wiki/Rebecca_Sugar', '<p>Hi.</p>')
+        >>> cache.get('https://en.wikipedia.org/wiki/Rebecca_Sugar')
+        '<p>Hi.</p>'
+        >>> (cache.hits, cache.misses)
+        (1, 1)
+        """
+        key = cache_key(url)
+        now = time.time()
+        with self._lock:
+            row = self._connection.execute('SELECT body, size, stored_at FROM pages '
+                                           'WHERE url = ?', (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+
+            body, size, stored_at = row
+            if self.ttl is not None and now - stored_at > self.ttl:
+                self._connection.execute('DELETE FROM pages WHERE url = ?', (key,))
+                self._connection.commit()
+                self._total_bytes -= size
+                self.misses += 1
+                return None
+
+            self._connection.execute('UPDATE pages SET last_used = ? WHERE url = ?', (now, key))
+            self._connection.commit()
+            self.hits += 1
+
+        return zlib.decompress(body).decode()
+
+    def put(self, url: str, html: str) -> None:
+        """Store the html code of <url> in this cache, evicting the least recently used
+        pages if this cache grows past self.max_bytes.
+
+        Do nothing if the compressed page is larger than self.max_bytes on its own.
+        """
+        key = cache_key(url)
+        body = zlib.compress(html.encode())
+        if len(body) > self.max_bytes:
+            return
+
+        now = time.time()
+        with self._lock:
+            old = self._connection.execute('SELECT size FROM pages WHERE url = ?',
+                                           (key,)).fetchone()
+            if old is not None:
+                self._total_bytes -= old[0]
+
+            self._connection.execute('INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?)',
+                                     (key, body, len(body), now, now))
+            self._total_bytes += len(body)
+            self._evict()
+            self._connection.commit()
+
+    def _evict(self) -> None:
+        """Delete the least recently used pages until this cache fits in self.max_bytes.
+
+        The caller must hold self._lock.
+        """
+        while self._total_bytes > self.max_bytes:
+            url, size = self._connection.execute('SELECT url, size FROM pages '
+                                                 'ORDER BY last_used LIMIT 1').fetchone()
+            self._connection.execute('DELETE FROM pages WHERE url = ?', (url,))
+            self._total_bytes -= size
+
+    def __contains__(self, url: str) -> bool:
+        """Return whether a fresh copy of <url> is in this cache, without counting a lookup."""
+        with self._lock:
+            row = self._connection.execute('SELECT stored_at FROM pages WHERE url = ?',
+                                           (cache_key(url),)).fetchone()
+        return row is not None and (self.ttl is None or time.time() - row[0] <= self.ttl)
+
+    def __len__(self) -> int:
+        """Return the number of pages stored in this cache."""
+        with self._lock:
+            return self._connection.execute('SELECT COUNT(*) FROM pages').fetchone()[0]
+
+    def urls(self) -> list[str]:
+        """Return the urls of the pages stored in this cache, from least to most recently
+        used (without counting any lookups).
+
+        >>> cache = PageCache(':memory:')
+        >>> cache.put('https://en.wikipedia.org/wiki/Rebecca_Sugar', '<p>Hi.</p>')
+        >>> cache.urls()
+        ['https://en.wikipedia.org/wiki/Rebecca_Sugar']
+        """
+        with self._lock:
+            return [row[0] for row in self._connection.execute(
+                'SELECT url FROM pages ORDER BY last_used')]
+
+    def put_redirect(self, url: str, target: str) -> None:
+        """Record that the article at <url> redirects to the article at <target>.
+
+        >>> cache = PageCache(':memory:')
+        >>> cache.put_redirect('https://en.wikipedia.org/wiki/Sugar',
+        ...                    'https://en.wikipedia.org/wiki/Rebecca_Sugar')
+        >>> cache.redirects()
+        {'https://en.wikipedia.org/wiki/Sugar': 'https://en.wikipedia.org/wiki/Rebecca_Sugar'}
+        """
+        with self._lock:
+            self._connection.execute('INSERT OR REPLACE INTO redirects VALUES (?, ?)',
+                                     (cache_key(url), cache_key(target)))
+            self._connection.commit()
+
+    def redirects(self) -> dict[str, str]:
+        """Return every redirect recorded in this cache, as a dict mapping each alias url to
+        the url it redirects to."""
+        with self._lock:
+            return dict(self._connection.execute('SELECT url, target FROM redirects'))
+
+    def size_in_bytes(self) -> int:
+        """Return the number of compressed bytes stored in this cache."""
+        return self._total_bytes
+
+    def clear(self) -> None:
+        """Remove every page and redirect from this cache and reset its hit and miss
+        counters."""
+        with self._lock:
+            self._connection.execute('DELETE FROM pages')
+            self._connection.execute('DELETE FROM redirects')
+            self._connection.commit()
+            self._total_bytes = 0
+            self.hits = 0
+            self.misses = 0
+
+    def close(self) -> None:
+        """Close the file this cache is stored in."""
+        with self._lock:
+            self._connection.close()
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
+
+    import python_ta.contracts
+
+    python_ta.contracts.check_all_contracts()
+
+    import python_ta
+
+    python_ta.check_all(config={
+        'extra-imports': ['sqlite3', 'threading', 'time', 'zlib', 'urllib.parse'],
+        'allowed-io': [],
+        'max-line-length': 100,
+        'disable': ['E1136']
+    })
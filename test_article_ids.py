@@ -0,0 +1,240 @@
+"""CSC111 Winter 2021 Final Project: Test Suite for article_ids
+
+Module Description
+===============================
+
+This module contains tests for the canonical article urls and the ArticleTable class, and for
+the way the parsers, the page cache and the graphs use them so an article is only fetched
+and stored once.
+
+Copyright and Usage Information
+===============================
+
+This file is provided solely for the personal and private use of Faizah Sayyid, Tina Zhang,
+Poorvi Sharma, and Courtney Amm (students at the University of Toronto St. George campus).
+All forms of distribution of this code, whether as given or with any changes, are expressly
+prohibited.
+
+This file is Copyright (c) 2021 Faizah Sayyid, Tina Zhang, Poorvi Sharma, Courtney Amm.
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import article_ids
+import wikipedia_html_parsers
+from article_ids import ArticleTable, canonical_url, get_article_table
+from page_cache import PageCache
+from weighted_wikigraph_class import WeightedWikiGraph
+from wikigraph import WikiGraph
+
+WIKI = 'https://en.wikipedia.org/wiki/'
+SIRE_URL = WIKI + 'Leading_sire_in_Great_Britain_%26_Ireland'
+ALIAS_URL = WIKI + 'Leading_sire_in_Great_Britain_and_Ireland'
+SIRE_HTML = '<html><head><link rel="canonical" href="' + SIRE_URL + '"></head>' \
+            '<body><p>The leading sire. It is a list.</p><a href="/wiki/Cade_(horse)">Cade</a>' \
+            '</body></html>'
+CADE_HTML = '<a href="/wiki/Leading_sire_in_Great_Britain_and_Ireland">x</a>' \
+            '<a href="/wiki/Leading_sire_in_Great_Britain_%26_Ireland#1800s">y</a>' \
+            '<a href="/wiki/Matchem">z</a>'
+
+
+class _FakeTransport:
+    """A transport that serves SIRE_HTML for the alias of the leading sire list, and counts
+    the pages it serves."""
+
+    def __init__(self) -> None:
+        """Initialize a transport that hasn't served anything yet."""
+        self.downloads = []
+        self.bytes_received = 0
+
+    def get_text(self, url: str) -> str:
+        """Return the html code of <url>."""
+        self.downloads.append(url)
+        if url != ALIAS_URL:
+            raise AssertionError('unexpected download: ' + url)
+        return SIRE_HTML
+
+    def stream(self, url: str):
+        """Yield the html code of <url> in two pieces."""
+        html = self.get_text(url).encode()
+        yield html[:40]
+        yield html[40:]
+
+
+@pytest.fixture
+def fake_network(monkeypatch):
+    """Run the parsers against an empty in-memory page cache, a fresh article table and a
+    _FakeTransport."""
+    transport = _FakeTransport()
+    monkeypatch.setattr(wikipedia_html_parsers, '_page_cache', PageCache(':memory:'))
+    monkeypatch.setattr(wikipedia_html_parsers, '_page_cache_set', True)
+    monkeypatch.setattr(wikipedia_html_parsers, '_transport', transport)
+    monkeypatch.setattr(wikipedia_html_parsers, '_redirects_loaded_from', None)
+    table = ArticleTable()
+    monkeypatch.setattr(wikipedia_html_parsers, 'get_article_table', lambda: table)
+    wikipedia_html_parsers.clear_document_memo()
+    return transport
+
+
+# ==================================================================================================
+# TEST canonical urls and ArticleTable
+# ==================================================================================================
+
+def test_canonical_url_variants() -> None:
+    """Test that every way of writing the url of an article has the same canonical url"""
+    variants = [SIRE_URL, SIRE_URL + '#Winners',
+                'http://en.wikipedia.org/wiki/Leading_sire_in_Great_Britain_%26_Ireland',
+                WIKI + 'leading_sire_in_Great_Britain_&_Ireland',
+                WIKI + 'Leading sire in Great Britain & Ireland',
+                WIKI + 'Leading__sire_in_Great_Britain_%26_Ireland_']
+
+    assert {canonical_url(url) for url in variants} == {SIRE_URL}
+    assert canonical_url(WIKI + 'Cade_(horse)') == WIKI + 'Cade_(horse)'
+    assert canonical_url('http://127.0.0.1:8000/wiki/cade#x') == 'http://127.0.0.1:8000/wiki/cade'
+
+
+def test_article_table_ids() -> None:
+    """Test that every article gets one id, however it is written or redirected to"""
+    table = ArticleTable()
+    table.add_redirect(ALIAS_URL, SIRE_URL + '#Winners')
+
+    assert table.article_id(WIKI + 'Cade_(horse)') == 0
+    assert table.article_id(SIRE_URL) == table.article_id(ALIAS_URL) == 1
+    assert table.article_id(WIKI + 'leading_sire_in_Great_Britain_&_Ireland') == 1
+    assert table.url(1) == SIRE_URL
+    assert table.title(1) == 'Leading sire in Great Britain & Ireland'
+    assert ALIAS_URL in table and WIKI + 'Matchem' not in table
+    assert len(table) == 2
+
+
+def test_article_table_threads() -> None:
+    """Test that threads interning the same articles never give one article two ids"""
+    table = ArticleTable()
+    urls = [WIKI + f'Article_{i % 50}' for i in range(2000)]
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        ids = list(executor.map(table.article_id, urls))
+
+    assert len(table) == 50
+    assert all(table.url(article_id) == url for article_id, url in zip(ids, urls))
+
+
+# ==================================================================================================
+# TEST redirects through the parsers and the page cache
+# ==================================================================================================
+
+def test_redirect_is_learned_and_cached(fake_network) -> None:
+    """Test that an alias is only downloaded once, and that the article it leads to is then
+    read from the page cache under its own url"""
+    assert wikipedia_html_parsers.get_adjacent_urls(ALIAS_URL) == [WIKI + 'Cade_(horse)']
+    assert wikipedia_html_parsers.resolve_url(ALIAS_URL) == SIRE_URL
+
+    assert wikipedia_html_parsers.get_summary(SIRE_URL) == 'The leading sire. It is a list.'
+    assert wikipedia_html_parsers.fetch_html(ALIAS_URL) == SIRE_HTML
+    assert fake_network.downloads == [ALIAS_URL]
+    assert wikipedia_html_parsers.get_page_cache().redirects() == {ALIAS_URL: SIRE_URL}
+
+
+def test_links_are_deduplicated(fake_network) -> None:
+    """Test that links to the same article written differently, or through a known
+    redirect, are only returned once"""
+    wikipedia_html_parsers.fetch_html(ALIAS_URL)
+    cade_url = WIKI + 'Cade_(horse)'
+
+    expected = [SIRE_URL, WIKI + 'Matchem']
+    assert wikipedia_html_parsers.extract_article_links(cade_url, CADE_HTML) == expected
+    parser = wikipedia_html_parsers.WikipediaArticleParser(cade_url)
+    parser.feed(CADE_HTML)
+    assert parser.articles == expected
+
+
+def test_redirects_persist(fake_network) -> None:
+    """Test that the redirects kept in a page cache (by an earlier run) are followed without
+    downloading the alias again"""
+    cache = wikipedia_html_parsers.get_page_cache()
+    cache.put_redirect(ALIAS_URL, SIRE_URL)
+    cache.put(SIRE_URL, SIRE_HTML)
+
+    assert wikipedia_html_parsers.resolve_url(ALIAS_URL + '#Winners') == SIRE_URL
+    assert wikipedia_html_parsers.get_adjacent_urls(ALIAS_URL) == [WIKI + 'Cade_(horse)']
+    assert fake_network.downloads == []
+
+
+# ==================================================================================================
+# TEST graphs
+# ==================================================================================================
+
+@pytest.mark.parametrize('graph_class', [WikiGraph, WeightedWikiGraph])
+def test_graph_stores_article_once(graph_class) -> None:
+    """Test that a graph never stores the same article twice, accepts every name the article
+    was added under, and finds its vertex from any url of the article"""
+    graph = graph_class()
+    sire = 'Leading sire in Great Britain & Ireland'
+    graph.add_vertex(sire, SIRE_URL)
+    graph.add_vertex('Leading sire', SIRE_URL + '#Winners')
+    graph.add_vertex('Matchem', WIKI + 'Matchem')
+    graph.add_edge('Leading sire', 'Matchem')
+
+    assert graph.get_all_vertices() == {sire, 'Matchem'}
+    assert graph.vertex_name('Leading sire') == sire
+    assert graph.is_vertex_in_graph('Leading sire')
+    assert graph.adjacent('Matchem', 'Leading sire') and graph.connected('Leading sire', sire)
+    assert graph.get_neighbours('Leading sire') == graph.get_neighbours(sire)
+    assert graph.get_vertex('Leading sire') is graph.get_vertex(sire)
+    assert graph.find_vertex(WIKI + 'leading_sire_in_Great_Britain_&_Ireland') == sire
+    assert graph.find_vertex(WIKI + 'Cade_(horse)') is None
+
+
+@pytest.mark.parametrize('graph_class', [WikiGraph, WeightedWikiGraph])
+def test_graph_never_links_vertex_to_itself(graph_class) -> None:
+    """Test that pages that aren't articles are never merged, and that an edge between two
+    names of the same vertex isn't added"""
+    graph = graph_class()
+    for name, url in [('A', 'u'), ('B', 'u'), ('C', ''), ('D', '')]:
+        graph.add_vertex(name, url)
+    graph.add_edge('A', 'B')
+    assert graph.get_all_vertices() == {'A', 'B', 'C', 'D'}
+    assert graph.adjacent('A', 'B') and not graph.adjacent('C', 'D')
+
+    graph.add_vertex('Leading sire in Great Britain & Ireland', SIRE_URL)
+    graph.add_vertex('Leading sire', SIRE_URL + '#Winners')
+    graph.add_edge('Leading sire', 'Leading sire in Great Britain & Ireland')
+    assert graph.get_neighbours('Leading sire') == set()
+    assert graph.get_vertex('A') not in graph.get_vertex('A').neighbours
+
+
+def test_graphs_have_their_own_article_tables(monkeypatch) -> None:
+    """Test that every graph numbers its own articles, and follows the redirects this
+    process learns after the graph was made"""
+    monkeypatch.setattr(article_ids, '_article_table', ArticleTable())
+    graph, weighted_graph = WikiGraph(), WeightedWikiGraph()
+    graph.add_vertex('Cade (horse)', WIKI + 'Cade_(horse)')
+    weighted_graph.add_vertex('Matchem', WIKI + 'Matchem')
+    assert graph.get_vertex('Cade (horse)').article_id == 0
+    assert weighted_graph.get_vertex('Matchem').article_id == 0
+
+    graph.add_vertex('Leading sire in Great Britain & Ireland', SIRE_URL)
+    get_article_table().add_redirect(ALIAS_URL, SIRE_URL)
+    graph.add_vertex('Leading sire in Great Britain and Ireland', ALIAS_URL)
+    assert len(graph.get_all_vertices()) == 2
+    for searched in [graph, graph.freeze()]:
+        assert searched.find_vertex(ALIAS_URL) == 'Leading sire in Great Britain & Ireland'
+    assert len(get_article_table()) == 0
+
+
+if __name__ == '__main__':
+    pytest.main(['test_article_ids.py', '-v'])
+
+    import python_ta.contracts
+
+    python_ta.contracts.check_all_contracts()
+
+    import python_ta
+
+    python_ta.check_all(config={
+        'extra-imports': ['concurrent.futures', 'wikipedia_html_parsers', 'article_ids',
+                          'page_cache', 'weighted_wikigraph_class', 'wikigraph'],
+        'allowed-io': [],
+        'max-line-length': 100,
+        'disable': ['E1136']
+    })
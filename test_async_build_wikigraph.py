@@ -0,0 +1,299 @@
+"""CSC111 Winter 2021 Final Project: Test Suite for async_build_wikigraph
+
+Module Description
+===============================
+
+This module contains tests for the asyncio graph builders and their non-blocking HTTP
+downloads, using made-up articles and a local HTTP server instead of Wikipedia.
+
+Copyright and Usage Information
+===============================
+
+This file is provided solely for the personal and private use of Faizah Sayyid, Tina Zhang,
+Poorvi Sharma, and Courtney Amm (students at the University of Toronto St. George campus).
+All forms of distribution of this code, whether as given or with any changes, are expressly
+prohibited.
+
+This file is Copyright (c) 2021 Faizah Sayyid, Tina Zhang, Poorvi Sharma, Courtney Amm.
+"""
+import asyncio
+import threading
+import urllib.error
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import article_ids
+import async_build_wikigraph as abw
+import build_wikigraph as bw
+import wikipedia_html_parsers
+from article_ids import ArticleTable, get_article_table
+from fake_articles import WIKI, fake_links, fake_weighted_links, graph_summary
+from http_transport import HTTPTransport
+
+
+async def _async_fake_links(url: str) -> list[str]:
+    """Return fake_links(url), after yielding to the event loop."""
+    await asyncio.sleep(0.001)
+    return fake_links(url)
+
+
+async def _async_fake_weighted_links(url: str) -> list[tuple]:
+    """Return fake_weighted_links(url), after yielding to the event loop."""
+    await asyncio.sleep(0.001)
+    return fake_weighted_links(url)
+
+
+class _PageHandler(BaseHTTPRequestHandler):
+    """Serves a small page with a fixed length, a chunked page, a page with links outside its
+    content, a redirect and 404s, keeping the connections open."""
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self) -> None:
+        """Answer a GET request."""
+        if self.path == '/wiki/Scoped':
+            body = b'<a href="/wiki/Outside">x</a><div id="mw-content-text">' \
+                   b'<a href="/wiki/Inside">x</a></div>'
+            self.send_response(200)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        elif self.path == '/wiki/Fixed':
+            body = b'<a href="/wiki/Chunked">chunked</a>'
+            self.send_response(200)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        elif self.path == '/wiki/Chunked':
+            self.send_response(200)
+            self.send_header('Transfer-Encoding', 'chunked')
+            self.end_headers()
+            for part in [b'<p>Caf\xc3\xa9 ', b'au lait.</p>']:
+                self.wfile.write(hex(len(part))[2:].encode() + b'\r\n' + part + b'\r\n')
+            self.wfile.write(b'0\r\n\r\n')
+        elif self.path == '/wiki/Moved':
+            self.send_response(301)
+            self.send_header('Location', '/wiki/Fixed')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+        else:
+            self.send_error(404)
+
+    def log_message(self, *args) -> None:
+        """Don't print every request."""
+
+
+@pytest.fixture
+def server_url(monkeypatch):
+    """Run _PageHandler on a local port, with the page cache disabled."""
+    monkeypatch.setattr(wikipedia_html_parsers, '_page_cache', None)
+    monkeypatch.setattr(wikipedia_html_parsers, '_page_cache_set', True)
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _PageHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield 'http://127.0.0.1:' + str(server.server_address[1])
+    server.shutdown()
+    server.server_close()
+
+
+# ==================================================================================================
+# TEST async_fetch_html
+# ==================================================================================================
+
+def test_fetch_content_length(server_url) -> None:
+    """Test downloading a page sent with a Content-Length header"""
+    html = asyncio.run(abw.async_fetch_html(server_url + '/wiki/Fixed'))
+
+    assert html == '<a href="/wiki/Chunked">chunked</a>'
+
+
+def test_fetch_chunked(server_url) -> None:
+    """Test downloading a page sent with chunked transfer encoding"""
+    html = asyncio.run(abw.async_fetch_html(server_url + '/wiki/Chunked'))
+
+    assert html == '<p>Café au lait.</p>'
+
+
+def test_fetch_redirect(server_url) -> None:
+    """Test that redirects are followed"""
+    html = asyncio.run(abw.async_fetch_html(server_url + '/wiki/Moved'))
+
+    assert html == '<a href="/wiki/Chunked">chunked</a>'
+
+
+def test_fetch_missing_page(server_url) -> None:
+    """Test that a missing page raises an HTTPError, and has no adjacent urls"""
+    with pytest.raises(urllib.error.HTTPError):
+        asyncio.run(abw.async_fetch_html(server_url + '/wiki/Missing'))
+
+    assert asyncio.run(abw.async_get_adjacent_urls(server_url + '/wiki/Missing')) == []
+
+
+# ==================================================================================================
+# TEST async builders
+# ==================================================================================================
+
+def test_async_build_matches_sync(monkeypatch) -> None:
+    """Test that async_build_wikigraph finds the same graph as build_wikigraph"""
+    monkeypatch.setattr(bw, 'get_adjacent_urls', fake_links)
+    monkeypatch.setattr(abw, 'async_get_adjacent_urls', _async_fake_links)
+
+    expected = bw.build_wikigraph(WIKI + 'A0', 40, 4)
+    actual = asyncio.run(abw.async_build_wikigraph(WIKI + 'A0', 40, 4, max_in_flight=5))
+
+    assert graph_summary(expected) == graph_summary(actual)
+
+
+def test_async_weighted_build_matches_sync(monkeypatch) -> None:
+    """Test that async_build_weighted_wikigraph finds the same graph as
+    build_weighted_wikigraph"""
+    monkeypatch.setattr(bw, 'get_adjacent_urls_weighted', fake_weighted_links)
+    monkeypatch.setattr(abw, 'async_get_adjacent_urls_weighted', _async_fake_weighted_links)
+
+    expected = bw.build_weighted_wikigraph(WIKI + 'A0', 30, 3)
+    actual = asyncio.run(abw.async_build_weighted_wikigraph(WIKI + 'A0', 30, 3))
+
+    assert graph_summary(expected) == graph_summary(actual)
+
+
+def _weighted_redirecting_links(url: str) -> list[tuple]:
+    """Return the weighted links on a made-up article like fake_weighted_links, where
+    article n also links to article 2n + 1 through a redirect (which has the links of the
+    article it leads to), and back to article 0."""
+    if url.startswith(WIKI + 'Redirect_to_'):
+        return _weighted_redirecting_links(WIKI + url[len(WIKI + 'Redirect_to_'):])
+    n = int(url[len(WIKI + 'A'):])
+    redirect = ((WIKI + f'Redirect_to_A{2 * n + 1}', f'Redirect to A{2 * n + 1}'), 3)
+    return [redirect] + fake_weighted_links(url) + [((WIKI + 'A0', 'A0'), 2)]
+
+
+async def _async_weighted_redirecting_links(url: str) -> list[tuple]:
+    """Return _weighted_redirecting_links(url), after yielding to the event loop."""
+    await asyncio.sleep(0.001)
+    return _weighted_redirecting_links(url)
+
+
+def test_async_build_through_redirects_matches_sync(monkeypatch) -> None:
+    """Test that the async builder names the articles linked under two names the way the
+    sync builder does"""
+    monkeypatch.setattr(article_ids, '_article_table', ArticleTable())
+    for n in range(100):
+        get_article_table().add_redirect(WIKI + 'Redirect_to_A' + str(n), WIKI + 'A' + str(n))
+    monkeypatch.setattr(bw, 'get_adjacent_urls_weighted', _weighted_redirecting_links)
+    monkeypatch.setattr(abw, 'async_get_adjacent_urls_weighted', _async_weighted_redirecting_links)
+
+    expected = bw.build_weighted_wikigraph(WIKI + 'A0', 30, 3)
+    actual = asyncio.run(abw.async_build_weighted_wikigraph(WIKI + 'A0', 30, 3))
+
+    assert actual.vertex_name('A1') == 'Redirect to A1'
+    assert graph_summary(expected) == graph_summary(actual)
+
+
+def test_parsing_off_the_event_loop(server_url, monkeypatch) -> None:
+    """Test that pages are parsed outside the thread running the event loop"""
+    parsing_threads = []
+
+    def recording_parse(url: str, html: str, scope: str) -> list[str]:
+        """Record the thread <url> is parsed in."""
+        parsing_threads.append(threading.get_ident())
+        return []
+
+    monkeypatch.setattr(abw, 'parse_adjacent_urls', recording_parse)
+
+    async def crawl() -> int:
+        """Parse a page, and return the id of the event loop's thread."""
+        await abw.async_get_adjacent_urls(server_url + '/wiki/Fixed')
+        return threading.get_ident()
+
+    loop_thread = asyncio.run(crawl())
+    assert parsing_threads != [] and loop_thread not in parsing_threads
+
+
+def test_parse_like_sync(server_url) -> None:
+    """Test that pages are parsed with the same extractor and in the same scope as
+    get_adjacent_urls"""
+    url = server_url + '/wiki/Scoped'
+    for scope in (wikipedia_html_parsers.SCOPE_PAGE, wikipedia_html_parsers.SCOPE_CONTENT):
+        expected = list(wikipedia_html_parsers.get_adjacent_urls(url, scope))
+        assert asyncio.run(abw.async_get_adjacent_urls(url, scope)) == expected
+
+    assert asyncio.run(abw.async_get_adjacent_urls(url, wikipedia_html_parsers.SCOPE_CONTENT)) \
+        == [WIKI + 'Inside']
+
+
+def test_crawls_leave_connections_open(server_url, monkeypatch) -> None:
+    """Test that a finished crawl leaves its connections open in the pool, for the other
+    crawls on the same event loop"""
+    transport = HTTPTransport()
+    monkeypatch.setattr(wikipedia_html_parsers, '_transport', transport)
+
+    async def downloading_links(url: str) -> list[str]:
+        await abw.async_fetch_html(server_url + '/wiki/Fixed')
+        return fake_links(url)
+
+    monkeypatch.setattr(abw, 'async_get_adjacent_urls', downloading_links)
+
+    async def crawl() -> int:
+        """Run a crawl, and return the number of connections it left open."""
+        await abw.async_build_wikigraph(WIKI + 'A0', 10, 3)
+        open_connections = transport.idle_connections()
+        await transport.async_close()
+        return open_connections
+
+    assert asyncio.run(crawl()) > 0
+    assert transport.idle_connections() == 0
+
+
+def test_many_crawls_share_semaphore(monkeypatch) -> None:
+    """Test that crawls sharing a semaphore never have more downloads in flight than it
+    allows"""
+    in_flight = [0, 0]
+
+    async def counting_links(url: str) -> list[str]:
+        in_flight[0] += 1
+        in_flight[1] = max(in_flight)
+        try:
+            await asyncio.sleep(0.002)
+        finally:
+            in_flight[0] -= 1
+        return fake_links(url)
+
+    monkeypatch.setattr(abw, 'async_get_adjacent_urls', counting_links)
+
+    async def crawl_all() -> list:
+        semaphore = asyncio.Semaphore(3)
+        return await asyncio.gather(*[abw.async_build_wikigraph(WIKI + 'A' + str(i), 20, 3,
+                                                                semaphore=semaphore)
+                                      for i in range(4)])
+
+    graphs = asyncio.run(crawl_all())
+
+    assert all(len(g.get_all_vertices()) == 21 for g in graphs)
+    assert in_flight[1] <= 3
+
+
+def test_stop_and_cancel(monkeypatch) -> None:
+    """Test that setting the stop event returns a partial graph, and that cancelling a crawl
+    leaves no downloads running"""
+    monkeypatch.setattr(abw, 'async_get_adjacent_urls', _async_fake_links)
+
+    async def stop_early() -> tuple:
+        stop = asyncio.Event()
+        stop.set()
+        partial = await abw.async_build_wikigraph(WIKI + 'A0', 1000, 3, stop=stop)
+
+        task = asyncio.ensure_future(abw.async_build_wikigraph(WIKI + 'A0', 1000, 3))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        await asyncio.sleep(0)
+        return partial, [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+
+    partial, leftover = asyncio.run(stop_early())
+
+    assert partial.get_all_vertices() == {'A0'}
+    assert leftover == []
+
+
+if __name__ == '__main__':
+    pytest.main(['test_async_build_wikigraph.py', '-v'])
@@ -16,10 +16,25 @@ prohibited.
 This file is Copyright (c) 2021 Faizah Sayyid, Tina Zhang, Poorvi Sharma, Courtney Amm.
 """
 
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import article_ids
+import build_wikigraph as bw
+import wikipedia_html_parsers
+from article_ids import ArticleTable, get_article_table
 from build_wikigraph import build_wikigraph, build_weighted_wikigraph
+from fake_articles import WIKI, fake_links, fake_weighted_links, graph_summary, \
+    redirecting_links, with_random_delay
 from weighted_wikigraph_class import WeightedWikiGraph
 from wikigraph import WikiGraph
 
+# the made-up articles, downloaded after a random delay so the threads of a build finish
+# their downloads in a random order
+_fake_links = with_random_delay(fake_links)
+_fake_weighted_links = with_random_delay(fake_weighted_links)
+
 
 # ==================================================================================================
 # TEST BUILD_WIKIGRAPH
@@ -99,6 +114,46 @@ def test_build_wikigraph() -> None:
     assert expected_graph.get_neighbours('Kingdom of Great Britain') == wikigraph.get_neighbours(
         'Kingdom of Great Britain')
 
+
+def test_concurrent_build_matches_serial(monkeypatch) -> None:
+    """Test that building with several workers finds the same vertices and edges as building
+    with one worker"""
+    monkeypatch.setattr(bw, 'get_adjacent_urls', _fake_links)
+
+    serial = build_wikigraph(WIKI + 'A0', 40, 4)
+    concurrent = build_wikigraph(WIKI + 'A0', 40, 4, max_workers=8)
+
+    assert len(serial.get_all_vertices()) == 41
+    assert graph_summary(serial) == graph_summary(concurrent)
+
+
+def test_concurrent_build_stops_workers_on_error(monkeypatch) -> None:
+    """Test that the worker threads of a concurrent build are shut down when a download
+    fails"""
+    stopped = []
+
+    class _RecordingExecutor(ThreadPoolExecutor):
+        """A thread pool that records when it is shut down."""
+
+        def shutdown(self, wait: bool = True, *, cancel_futures: bool = False) -> None:
+            """Record the shutdown, then shut the pool down."""
+            stopped.append(self)
+            super().shutdown(wait, cancel_futures=cancel_futures)
+
+    def failing_links(url: str) -> list[str]:
+        """Return the links of a made-up article, failing on article 5."""
+        if url == WIKI + 'A5':
+            raise RuntimeError('download failed')
+        return _fake_links(url)
+
+    monkeypatch.setattr(bw, 'ThreadPoolExecutor', _RecordingExecutor)
+    monkeypatch.setattr(bw, 'get_adjacent_urls', failing_links)
+
+    with pytest.raises(RuntimeError):
+        build_wikigraph(WIKI + 'A0', 40, 4, max_workers=8)
+    assert len(stopped) == 1
+
+
 # ==================================================================================================
 # TEST BUILD_WEIGHTED_WIKIGRAPH
 # ==================================================================================================
@@ -153,8 +208,273 @@ def test_build_weighted_wikigraph() -> None:
     assert expected_graph.get_neighbours('Matchem') == wikigraph.get_neighbours('Matchem')
 
 
+def test_concurrent_weighted_build_matches_serial(monkeypatch) -> None:
+    """Test that building a weighted graph with several workers finds the same vertices, edges
+    and weights as building with one worker"""
+    monkeypatch.setattr(bw, 'get_adjacent_urls_weighted', _fake_weighted_links)
+
+    serial = build_weighted_wikigraph(WIKI + 'A0', 30, 3)
+    concurrent = build_weighted_wikigraph(WIKI + 'A0', 30, 3, max_workers=8)
+
+    assert len(serial.get_all_vertices()) == 31
+    assert graph_summary(serial) == graph_summary(concurrent)
+
+
+def test_sharded_build(monkeypatch) -> None:
+    """Test that building with several worker processes gives the same graphs as a serial
+    build"""
+    monkeypatch.setattr(wikipedia_html_parsers, '_page_cache', None)
+    monkeypatch.setattr(wikipedia_html_parsers, '_page_cache_set', True)
+    monkeypatch.setattr(bw, 'get_adjacent_urls', _fake_links)
+    monkeypatch.setattr(bw, 'get_adjacent_urls_weighted', _fake_weighted_links)
+
+    serial = build_wikigraph(WIKI + 'A0', 40, 3)
+    sharded = build_wikigraph(WIKI + 'A0', 40, 3, processes=3)
+    serial_weighted = build_weighted_wikigraph(WIKI + 'A0', 40, 3)
+    sharded_weighted = build_weighted_wikigraph(WIKI + 'A0', 40, 3, processes=3)
+
+    assert graph_summary(sharded) == graph_summary(serial)
+    assert graph_summary(sharded_weighted) == graph_summary(serial_weighted)
+
+
+def test_shards_are_stable() -> None:
+    """Test that an article is always sent to the same shard"""
+    fetcher = bw._ShardedFetcher(_fake_links, 4)
+    try:
+        shards = [fetcher.shard(WIKI + 'A' + str(n)) for n in range(100)]
+        assert shards == [fetcher.shard(WIKI + 'A' + str(n)) for n in range(100)]
+        assert set(shards) == {0, 1, 2, 3}
+    finally:
+        fetcher.shutdown()
+
+
+def _shard_settings(url: str) -> list:
+    """Return the link extractor of the process <url> is fetched in, recording that an alias
+    of <url> redirects to it."""
+    get_article_table().add_redirect(url + '_alias', url)
+    return [wikipedia_html_parsers.get_link_extractor()]
+
+
+def test_shards_share_settings_and_redirects(monkeypatch) -> None:
+    """Test that worker processes parse with the builder's link extractor, and that the
+    redirects they learn are added to the builder's article table"""
+    monkeypatch.setattr(wikipedia_html_parsers, '_page_cache', None)
+    monkeypatch.setattr(wikipedia_html_parsers, '_page_cache_set', True)
+    monkeypatch.setattr(wikipedia_html_parsers, '_link_extractor',
+                        wikipedia_html_parsers.EXTRACTOR_HTML_PARSER)
+
+    fetcher = bw._ShardedFetcher(_shard_settings, 2)
+    try:
+        urls = [WIKI + 'Shard_settings_' + str(n) for n in range(6)]
+        for url in urls:
+            assert fetcher.fetch(url, []) == [wikipedia_html_parsers.EXTRACTOR_HTML_PARSER]
+            assert get_article_table().resolve(url + '_alias') == url
+    finally:
+        fetcher.shutdown()
+
+
+def _scoped_links(url: str, scope: str = wikipedia_html_parsers.SCOPE_PAGE) -> list[str]:
+    """Return the links on a made-up article like _fake_links, with a link to article 1000
+    outside its main content container."""
+    links = _fake_links(url)
+    return links if scope == wikipedia_html_parsers.SCOPE_CONTENT else [WIKI + 'A1000'] + links
+
+
+def test_build_in_content_scope(monkeypatch) -> None:
+    """Test that a build in the content scope only follows the links in the main content
+    container of each article, in this process and in worker processes"""
+    monkeypatch.setattr(wikipedia_html_parsers, '_page_cache', None)
+    monkeypatch.setattr(wikipedia_html_parsers, '_page_cache_set', True)
+    monkeypatch.setattr(bw, 'get_adjacent_urls', _scoped_links)
+    content = wikipedia_html_parsers.SCOPE_CONTENT
+
+    assert 'A1000' in build_wikigraph(WIKI + 'A0', 20, 3).get_all_vertices()
+    graph = build_wikigraph(WIKI + 'A0', 20, 3, scope=content)
+    assert 'A1000' not in graph.get_all_vertices()
+    sharded = build_wikigraph(WIKI + 'A0', 20, 3, processes=2, scope=content)
+    assert graph_summary(sharded) == graph_summary(graph)
+
+
+# ==================================================================================================
+# TEST EXPAND_WIKIGRAPH AND EXPAND_VERTEX
+# ==================================================================================================
+
+
+# the made-up articles where article n also links to article 2n + 1 through a redirect,
+# downloaded after a random delay
+_redirecting_links = with_random_delay(redirecting_links)
+
+
+def test_build_through_redirects(monkeypatch) -> None:
+    """Test that an article linked under two names is one vertex, counted as one source,
+    and that the links to it under either name become edges"""
+    monkeypatch.setattr(article_ids, '_article_table', ArticleTable())
+    for n in range(100):
+        get_article_table().add_redirect(WIKI + 'Redirect_to_A' + str(n), WIKI + 'A' + str(n))
+    monkeypatch.setattr(bw, 'get_adjacent_urls', _redirecting_links)
+    monkeypatch.setattr(bw, 'get_adjacent_urls_weighted',
+                        lambda url: [((link, link.replace(WIKI, '').replace('_', ' ')), 1)
+                                     for link in _redirecting_links(url)])
+
+    graphs = [build_wikigraph(WIKI + 'A0', 20, 3), build_weighted_wikigraph(WIKI + 'A0', 20, 3)]
+    for graph in graphs:
+        assert len(graph.get_all_vertices()) == 21
+        assert graph.vertex_name('A1') == 'Redirect to A1'
+        assert graph.adjacent('A0', 'A1') and graph.adjacent('A0', 'Redirect to A1')
+        assert all(graph.connected(v, 'A0') for v in graph.get_all_vertices())
+
+
+def _recording(fetch, fetched: list):
+    """Return a version of <fetch> that records each url it is called with in <fetched>."""
+    def recording_fetch(url: str) -> list:
+        fetched.append(url)
+        return fetch(url)
+    return recording_fetch
+
+
+def test_expand_wikigraph(monkeypatch) -> None:
+    """Test that growing a graph by more sources gives the same graph as building it with
+    all the sources at once, downloading only articles that weren't expanded before"""
+    monkeypatch.setattr(bw, 'get_adjacent_urls', _fake_links)
+    expected = build_wikigraph(WIKI + 'A0', 61, 4)
+
+    first_fetches, extra_fetches = [], []
+    monkeypatch.setattr(bw, 'get_adjacent_urls', _recording(_fake_links, first_fetches))
+    state = bw.start_crawl(WIKI + 'A0', 30, 4)
+    bw.run_crawl(state)
+    monkeypatch.setattr(bw, 'get_adjacent_urls', _recording(_fake_links, extra_fetches))
+    actual = bw.expand_wikigraph(state, 31)
+
+    assert graph_summary(actual) == graph_summary(expected)
+    assert set(first_fetches).isdisjoint(extra_fetches)
+    assert len(first_fetches) + len(extra_fetches) == state.pages_expanded
+
+
+def test_expand_weighted_wikigraph(monkeypatch) -> None:
+    """Test growing a weighted graph built with a best-first crawl"""
+    monkeypatch.setattr(bw, 'get_adjacent_urls_weighted', _fake_weighted_links)
+    expected = build_weighted_wikigraph(WIKI + 'A0', 45, 4, best_first=True)
+
+    frontier = bw.PriorityFrontier()
+    state = bw.start_crawl(WIKI + 'A0', 15, 4, weighted=True, frontier=frontier)
+    bw.run_crawl(state)
+    bw.expand_wikigraph(state, 20)
+    actual = bw.expand_wikigraph(state, 10)
+
+    assert isinstance(actual, WeightedWikiGraph)
+    assert graph_summary(actual) == graph_summary(expected)
+
+
+def test_expand_vertex(monkeypatch) -> None:
+    """Test that expanding a vertex adds a page of its sources, downloading it only once"""
+    fetched = []
+    monkeypatch.setattr(bw, 'get_adjacent_urls', _recording(_fake_links, fetched))
+    state = bw.start_crawl(WIKI + 'A0', 6, 3)
+    graph = bw.run_crawl(state)
+    assert fetched == [WIKI + 'A0', WIKI + 'A1']
+
+    bw.expand_vertex(state, 'A5')
+    bw.expand_vertex(state, 'A5')
+    bw.expand_vertex(state, 'A0')
+
+    assert fetched == [WIKI + 'A0', WIKI + 'A1', WIKI + 'A5']
+    assert graph.get_neighbours('A5') == {'A1', 'A11', 'A12', 'A13'}
+    assert (state.sources_found, state.num_sources) == (9, 9)
+    with pytest.raises(ValueError):
+        bw.expand_vertex(state, 'A1000')
+
+
+def test_expand_vertex_best_first(monkeypatch) -> None:
+    """Test that the sources added by expanding a vertex of a best-first crawl are queued
+    with the accumulated weight of that vertex, not of the article popped last"""
+    monkeypatch.setattr(bw, 'get_adjacent_urls_weighted', _fake_weighted_links)
+    state = bw.start_crawl(WIKI + 'A0', 10, 3, weighted=True, frontier=bw.PriorityFrontier())
+    bw.run_crawl(state)
+    url = next(url for url in state.frontier.front(len(state.frontier))
+               if state.frontier.priority(url) != state.frontier.popped_priority())
+    priority = state.frontier.priority(url)
+
+    bw.expand_vertex(state, state.graph.find_vertex(url))
+
+    children = [(link, weight) for (link, _), weight in _fake_weighted_links(url)
+                if state.depths.get(link) == state.depths.get(url, 0) + 1]
+    assert children
+    assert all(state.frontier.priority(link) == priority + weight
+               for link, weight in children)
+
+
+def _replay(events) -> tuple[dict, dict, list]:
+    """Return the vertices (mapped to their urls) and the edges (mapped to their weights)
+    described by <events>, and the kinds of events seen, checking that the finished graph
+    comes last."""
+    vertices, edges, kinds = {}, {}, []
+    for event in events:
+        kinds.append(event.kind)
+        if event.kind == bw.VERTEX_ADDED:
+            assert event.name not in vertices
+            vertices[event.name] = event.url
+        elif event.kind == bw.EDGE_ADDED:
+            assert frozenset((event.name, event.other)) not in edges
+            edges[frozenset((event.name, event.other))] = event.weight
+        elif event.kind == bw.WEIGHT_UPDATED:
+            edges[frozenset((event.name, event.other))] = event.weight
+    assert kinds[-1] == bw.FINISHED and bw.FINISHED not in kinds[:-1]
+    return vertices, edges, kinds
+
+
+def test_iter_wikigraph(monkeypatch) -> None:
+    """Test that the events of a streamed build describe the graph a normal build makes"""
+    monkeypatch.setattr(bw, 'get_adjacent_urls', _fake_links)
+    expected = build_wikigraph(WIKI + 'A0', 40, 4)
+
+    events = list(bw.iter_wikigraph(WIKI + 'A0', 40, 4, max_workers=4))
+    vertices, edges, kinds = _replay(events)
+
+    assert graph_summary(events[-1].graph) == graph_summary(expected)
+    assert vertices == {v: expected.get_vertex(v).url for v in expected.get_all_vertices()}
+    assert edges.keys() == {frozenset((u, v)) for u in expected.get_all_vertices()
+                            for v in expected.get_neighbours(u)}
+    assert kinds.count(bw.PROGRESS) == events[-1].pages_expanded
+    assert events[-1].sources_found == 40
+
+
+def test_iter_weighted_wikigraph(monkeypatch) -> None:
+    """Test that the weights in the events of a streamed weighted build end up as the weights
+    of the finished graph"""
+    def links_back(url: str) -> list[tuple]:
+        # every other article also links back to A0, so the weights of A0's edges get updated
+        back = [] if url == WIKI + 'A0' else [((WIKI + 'A0', 'A0'), 3)]
+        return _fake_weighted_links(url) + back
+
+    monkeypatch.setattr(bw, 'get_adjacent_urls_weighted', links_back)
+
+    events = list(bw.iter_wikigraph(WIKI + 'A0', 40, 4, weighted=True))
+    vertices, edges, kinds = _replay(events)
+    graph = events[-1].graph
+
+    assert isinstance(graph, WeightedWikiGraph)
+    assert vertices.keys() == graph.get_all_vertices()
+    assert bw.WEIGHT_UPDATED in kinds
+    for edge, weight in edges.items():
+        u, v = tuple(edge)
+        assert (v, weight) in graph.get_neighbours(u)
+
+
+def test_iter_wikigraph_stops_early(monkeypatch) -> None:
+    """Test that a streamed build stops downloading once the caller stops reading events"""
+    fetched = []
+    monkeypatch.setattr(bw, 'get_adjacent_urls', _recording(_fake_links, fetched))
+    events = bw.iter_wikigraph(WIKI + 'A0', 1000, 6)
+
+    for event in events:
+        if event.kind == bw.PROGRESS and event.pages_expanded == 3:
+            break
+    events.close()
+
+    assert fetched == [WIKI + 'A0', WIKI + 'A1', WIKI + 'A2']
+
+
 if __name__ == '__main__':
-    import pytest
     pytest.main(['test_build_wikigraph.py', '-v'])
 
     import python_ta.contracts
@@ -164,7 +484,8 @@ if __name__ == '__main__':
     import python_ta
 
     python_ta.check_all(config={
-        'extra-imports': ['build_wikigraph', 'weighted_wikigraph_class', 'wikigraph'],
+        'extra-imports': ['random', 'time', 'article_ids', 'build_wikigraph',
+                          'weighted_wikigraph_class', 'wikigraph'],
         'allowed-io': [],
         'max-line-length': 100,
         'disable': ['E1136']
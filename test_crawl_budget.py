@@ -0,0 +1,185 @@
+"""CSC111 Winter 2021 Final Project: Test Suite for crawl_budget
+
+Module Description
+===============================
+
+This module contains tests for bounding graph builds with a CrawlBudget.
+
+Copyright and Usage Information
+===============================
+
+This file is provided solely for the personal and private use of Faizah Sayyid, Tina Zhang,
+Poorvi Sharma, and Courtney Amm (students at the University of Toronto St. George campus).
+All forms of distribution of this code, whether as given or with any changes, are expressly
+prohibited.
+
+This file is Copyright (c) 2021 Faizah Sayyid, Tina Zhang, Poorvi Sharma, Courtney Amm.
+"""
+import time
+import urllib.error
+
+import pytest
+
+import build_wikigraph as bw
+import wikipedia_html_parsers
+from crawl_budget import LIMIT_BYTES, LIMIT_DEPTH, LIMIT_FETCHES, LIMIT_TIME, CrawlBudget
+from crawl_frontier import PriorityFrontier
+from http_transport import HTTPTransport, record_download
+
+WIKI = 'https://en.wikipedia.org/wiki/'
+
+
+def _fake_links(url: str) -> list[str]:
+    """Return the links on a made-up article: article n links to articles 2n + 1 to 2n + 6.
+
+    Each call counts as downloading 1000 bytes.
+    """
+    record_download(1000)
+    n = int(url[len(WIKI + 'A'):])
+    return [WIKI + 'A' + str(2 * n + k) for k in range(1, 7)]
+
+
+@pytest.fixture(autouse=True)
+def fake_downloads(monkeypatch) -> None:
+    """Build graphs from the made-up articles, with a transport of our own."""
+    monkeypatch.setattr(bw, 'get_adjacent_urls', _fake_links)
+    monkeypatch.setattr(bw, 'get_adjacent_urls_weighted',
+                        lambda url: [((link, link[len(WIKI):]), 1) for link in _fake_links(url)])
+    monkeypatch.setattr(wikipedia_html_parsers, '_transport', HTTPTransport())
+
+
+def test_no_limit_hit() -> None:
+    """Test that a build that finds its sources within its budget records no limit"""
+    budget = CrawlBudget(max_depth=10, max_fetches=100, max_bytes=10 ** 6, timeout=60)
+
+    graph = bw.build_wikigraph(WIKI + 'A0', 20, 3, budget=budget)
+
+    assert len(graph.get_all_vertices()) == 21
+    assert budget.limit_hit is None
+
+
+def test_fetch_limit() -> None:
+    """Test that a build stops after expanding max_fetches articles"""
+    budget = CrawlBudget(max_fetches=3)
+    state = bw.start_crawl(WIKI + 'A0', 50, 2)
+
+    graph = bw.run_crawl(state, budget=budget)
+
+    assert budget.limit_hit == LIMIT_FETCHES
+    assert state.pages_expanded == 3 and budget.fetches_used(state) == 3
+    assert len(graph.get_all_vertices()) == 7
+
+    # the partial graph can be extended with a new budget
+    bw.expand_wikigraph(state, 0, budget=budget)
+    assert state.pages_expanded == 6
+
+
+def test_byte_limit() -> None:
+    """Test that a build stops once it has downloaded max_bytes bytes"""
+    budget = CrawlBudget(max_bytes=2500)
+
+    graph = bw.build_weighted_wikigraph(WIKI + 'A0', 50, 2, budget=budget)
+
+    assert budget.limit_hit == LIMIT_BYTES
+    assert budget.bytes_used() == 3000
+    assert len(graph.get_all_vertices()) == 7
+
+
+def test_bytes_counted_per_build() -> None:
+    """Test that each build only counts its own downloads, even when several builds run at
+    the same time or its articles are downloaded in worker threads"""
+    budgets = [CrawlBudget(), CrawlBudget()]
+    states = [bw.start_crawl(WIKI + 'A0', 30, 2), bw.start_crawl(WIKI + 'A0', 30, 2)]
+    builds = [bw.iter_crawl(states[0], budget=budgets[0]),
+              bw.iter_crawl(states[1], max_workers=4, budget=budgets[1])]
+    while states[1].pages_expanded < 5:
+        for build in builds:
+            next(build)
+    record_download(10 ** 6)
+
+    assert budgets[0].bytes_used() == 1000 * states[0].pages_expanded
+    assert 1000 * states[1].pages_expanded <= budgets[1].bytes_used() < 10 ** 6
+    for build in builds:
+        build.close()
+
+
+def test_depth_limit() -> None:
+    """Test that a build doesn't expand articles max_depth links away from the start"""
+    budget = CrawlBudget(max_depth=2)
+    state = bw.start_crawl(WIKI + 'A0', 1000, 6)
+
+    graph = bw.run_crawl(state, budget=budget)
+
+    assert budget.limit_hit == LIMIT_DEPTH
+    assert state.pages_expanded == 1 + 6
+    # A1 to A6 are one link away, and A7 to A18 are two links away
+    assert len(graph.get_all_vertices()) == 19
+    assert max(state.depths.values()) == 2
+
+    # the articles that were too deep are still queued, for a build with a larger budget
+    assert not state.is_finished()
+    bw.expand_wikigraph(state, 0, budget=CrawlBudget(max_depth=3))
+    assert state.pages_expanded == 1 + 6 + 12
+    assert max(state.depths.values()) == 3
+
+
+def test_depth_limit_best_first() -> None:
+    """Test that a best-first build skips the articles that are too deep, and still expands
+    the shallower articles queued behind them"""
+    budget = CrawlBudget(max_depth=2)
+    state = bw.start_crawl(WIKI + 'A0', 1000, 6, weighted=True, frontier=PriorityFrontier())
+
+    bw.run_crawl(state, budget=budget)
+
+    assert budget.limit_hit == LIMIT_DEPTH
+    assert state.pages_expanded == 1 + 6
+
+    # the articles that were too deep are queued again with their priorities (every link
+    # weighs 1, so an article's priority is its depth), and can be expanded by a later build
+    queued = state.frontier.front(len(state.frontier))
+    assert all(state.frontier.priority(url) == state.depths[url] for url in queued)
+    bw.expand_wikigraph(state, 0, budget=CrawlBudget(max_depth=3))
+    assert state.pages_expanded == 1 + 6 + 12
+
+
+def test_time_limit(monkeypatch) -> None:
+    """Test that a build stops once it has run for timeout seconds"""
+    def slow_links(url: str) -> list[str]:
+        time.sleep(0.05)
+        return _fake_links(url)
+
+    monkeypatch.setattr(bw, 'get_adjacent_urls', slow_links)
+    budget = CrawlBudget(timeout=0.12)
+    state = bw.start_crawl(WIKI + 'A0', 1000, 2)
+
+    bw.run_crawl(state, budget=budget)
+
+    assert budget.limit_hit == LIMIT_TIME
+    assert 2 <= state.pages_expanded <= 4
+
+
+def test_deadline_cuts_download(monkeypatch) -> None:
+    """Test that a download that gives up at the deadline stops the build, and that its
+    article is expanded when the build is continued"""
+    def timing_out_links(url: str) -> list[str]:
+        if url == WIKI + 'A2':
+            time.sleep(0.1)
+            raise urllib.error.URLError(TimeoutError('timed out'))
+        return _fake_links(url)
+
+    monkeypatch.setattr(bw, 'get_adjacent_urls', timing_out_links)
+    budget = CrawlBudget(timeout=0.05)
+    state = bw.start_crawl(WIKI + 'A0', 1000, 2)
+
+    bw.run_crawl(state, budget=budget)
+
+    assert budget.limit_hit == LIMIT_TIME
+    assert state.pages_expanded == 2 and state.frontier.front(1) == [WIKI + 'A2']
+
+    monkeypatch.setattr(bw, 'get_adjacent_urls', _fake_links)
+    bw.expand_wikigraph(state, 0, budget=CrawlBudget(max_fetches=1))
+    assert state.graph.adjacent('A2', 'A5')
+
+
+if __name__ == '__main__':
+    pytest.main(['test_crawl_budget.py', '-v'])
@@ -0,0 +1,169 @@
+"""CSC111 Winter 2021 Final Project: Test Suite for crawl_frontier
+
+Module Description
+===============================
+
+This module contains tests for the CrawlFrontier, VisitedSet and BloomFilter classes, and for
+building graphs with a frontier that records visited articles in a BloomFilter.
+
+Copyright and Usage Information
+===============================
+
+This file is provided solely for the personal and private use of Faizah Sayyid, Tina Zhang,
+Poorvi Sharma, and Courtney Amm (students at the University of Toronto St. George campus).
+All forms of distribution of this code, whether as given or with any changes, are expressly
+prohibited.
+
+This file is Copyright (c) 2021 Faizah Sayyid, Tina Zhang, Poorvi Sharma, Courtney Amm.
+"""
+import random
+
+import pytest
+
+import build_wikigraph as bw
+from crawl_frontier import BloomFilter, CrawlFrontier, EmptyQueueError, PriorityFrontier, \
+    VisitedSet, frontier_from_dict
+from fake_articles import WIKI, fake_links
+
+
+def test_frontier_fifo_and_dedupe() -> None:
+    """Test that urls come out in the order they were first added, only once each"""
+    frontier = CrawlFrontier()
+    added = [frontier.add(url) for url in ['a', 'b', 'a', 'c', 'b']]
+
+    assert added == [True, True, False, True, False]
+    assert frontier.front(2) == ['a', 'b']
+    assert [frontier.pop() for _ in range(3)] == ['a', 'b', 'c']
+    assert not frontier.add('a')
+    with pytest.raises(EmptyQueueError):
+        frontier.pop()
+
+
+def test_frontier_stats() -> None:
+    """Test the size statistics of a frontier"""
+    frontier = CrawlFrontier()
+    for url in ['a', 'b', 'c']:
+        frontier.add(url)
+    frontier.pop()
+    frontier.add('d')
+
+    stats = frontier.stats()
+
+    assert (stats['queued'], stats['visited'], stats['peak_queued']) == (3, 4, 3)
+    assert (stats['total_added'], stats['total_popped']) == (4, 1)
+    assert stats['memory_bytes'] > 0
+
+
+def test_priority_frontier_order() -> None:
+    """Test that urls come out highest priority first, in insertion order on ties, only
+    once each"""
+    frontier = PriorityFrontier()
+    for url, priority in [('a', 1.0), ('b', 3.0), ('c', 1.0), ('b', 9.0), ('d', 2.0)]:
+        frontier.add(url, priority)
+
+    assert frontier.front(2) == ['b', 'd']
+    assert frontier.priority('b') == 3.0
+    assert [frontier.pop() for _ in range(4)] == ['b', 'd', 'a', 'c']
+    assert frontier.stats()['total_added'] == 4
+    with pytest.raises(EmptyQueueError):
+        frontier.pop()
+
+
+def test_priority_frontier_forgets_popped_urls() -> None:
+    """Test that a priority frontier only keeps the priorities of the queued urls, and that a
+    popped url is queued again with its priority"""
+    frontier = PriorityFrontier()
+    for i in range(100):
+        frontier.add(str(i), float(i % 7))
+    popped = [frontier.pop() for _ in range(60)]
+
+    assert len(frontier._priorities) == len(frontier) == 40
+    assert frontier.priority(popped[0]) == 0.0
+    assert frontier.popped_priority() == float(int(popped[-1]) % 7)
+
+    frontier.requeue(popped[-1])
+    frontier.requeue(popped[0], 6.0)
+    assert frontier.front(2) == [popped[0], popped[-1]]
+    assert [frontier.pop() for _ in range(2)] == [popped[0], popped[-1]]
+    assert frontier.remove(frontier.front(1)[0])
+    assert len(frontier._priorities) == len(frontier) == 39
+
+
+def test_priority_frontier_requeue_order() -> None:
+    """Test that urls requeued with the same priority come back last requeued first,
+    whatever their names"""
+    frontier = PriorityFrontier()
+    for url in ['c', 'a', 'b', 'd']:
+        frontier.add(url, 1.0)
+    popped = [frontier.pop() for _ in range(3)]
+
+    for url in reversed(popped):
+        frontier.requeue(url, 1.0)
+    copy = frontier_from_dict(frontier.to_dict())
+    copy.requeue(copy.pop(), 1.0)
+
+    assert [frontier.pop() for _ in range(4)] == ['c', 'a', 'b', 'd']
+    assert [copy.pop() for _ in range(4)] == ['c', 'a', 'b', 'd']
+
+
+def test_priority_frontier_front() -> None:
+    """Test that the front of a priority frontier is the urls it pops next"""
+    frontier = PriorityFrontier()
+    priorities = random.Random(111).choices(range(10), k=200)
+    for i, priority in enumerate(priorities):
+        frontier.add(str(i), priority)
+
+    for n in (0, 1, 5, 50):
+        assert frontier.front(n) == [frontier.pop() for _ in range(n)]
+    assert frontier.front(1000) == [frontier.pop() for _ in range(200 - 56)]
+
+
+def test_best_first_build_order(monkeypatch) -> None:
+    """Test that a best-first build expands articles in order of their accumulated weight"""
+    links = {'S': [('A', 5), ('B', 1)], 'A': [('C', 4)], 'B': [('D', 1)], 'C': [], 'D': []}
+    expanded = []
+
+    def fake_weighted_links(url: str) -> list[tuple]:
+        expanded.append(url[len(WIKI):])
+        return [((WIKI + name, name), weight) for name, weight in links[url[len(WIKI):]]]
+
+    monkeypatch.setattr(bw, 'get_adjacent_urls_weighted', fake_weighted_links)
+
+    breadth_first = bw.build_weighted_wikigraph(WIKI + 'S', 10, 10)
+    assert expanded == ['S', 'A', 'B', 'C', 'D']
+
+    expanded.clear()
+    best_first = bw.build_weighted_wikigraph(WIKI + 'S', 10, 10, best_first=True)
+    assert expanded == ['S', 'A', 'C', 'B', 'D']
+    assert best_first.get_all_vertices() == breadth_first.get_all_vertices()
+
+
+def test_bloom_filter_no_false_negatives() -> None:
+    """Test that every url added to a BloomFilter is reported as seen, and that the false
+    positive rate stays close to the target"""
+    visited = BloomFilter(5000, 0.01)
+    for i in range(5000):
+        visited.add(WIKI + 'Seen_' + str(i))
+
+    assert all(WIKI + 'Seen_' + str(i) in visited for i in range(5000))
+    false_positives = sum(WIKI + 'Unseen_' + str(i) in visited for i in range(5000))
+    assert false_positives < 5000 * 0.03
+    assert visited.memory_bytes() < VisitedSet().memory_bytes() + 5000 * 2
+
+
+def test_build_with_bloom_frontier(monkeypatch) -> None:
+    """Test that a frontier using a BloomFilter builds the same graph as the default one, and
+    records the crawl in its statistics"""
+    monkeypatch.setattr(bw, 'get_adjacent_urls', fake_links)
+    frontier = CrawlFrontier(BloomFilter(10000, 0.0001))
+
+    expected = bw.build_wikigraph(WIKI + 'A0', 60, 4)
+    actual = bw.build_wikigraph(WIKI + 'A0', 60, 4, frontier=frontier)
+
+    assert {v: actual.get_neighbours(v) for v in actual.get_all_vertices()} == \
+        {v: expected.get_neighbours(v) for v in expected.get_all_vertices()}
+    assert frontier.total_added == 61
+
+
+if __name__ == '__main__':
+    pytest.main(['test_crawl_frontier.py', '-v'])
@@ -0,0 +1,99 @@
+"""CSC111 Winter 2021 Final Project: Test Suite for crawl_pipeline
+
+Module Description
+===============================
+
+This module contains tests for building graphs through a CrawlPipeline of fetcher threads,
+parser threads and bounded queues.
+
+Copyright and Usage Information
+===============================
+
+This file is provided solely for the personal and private use of Faizah Sayyid, Tina Zhang,
+Poorvi Sharma, and Courtney Amm (students at the University of Toronto St. George campus).
+All forms of distribution of this code, whether as given or with any changes, are expressly
+prohibited.
+
+This file is Copyright (c) 2021 Faizah Sayyid, Tina Zhang, Poorvi Sharma, Courtney Amm.
+"""
+import random
+import time
+import urllib.error
+
+import pytest
+
+import build_wikigraph as bw
+from crawl_pipeline import CrawlPipeline
+from fake_articles import WIKI, graph_summary
+from wikipedia_html_parsers import clear_document_memo, parse_adjacent_urls, \
+    parse_adjacent_urls_weighted
+
+
+def _fake_html(url: str) -> str:
+    """Return the html code of a made-up article, after a random delay: article n links to
+    articles 2n + 1 to 2n + 6, and mentions the titles of the first few more than once."""
+    n = int(url[len(WIKI + 'A'):])
+    time.sleep(random.random() / 500)
+    links = ''.join(f'<p>A{2 * n + k} <a href="/wiki/A{2 * n + k}">A{2 * n + k}</a></p>'
+                    for k in range(1, 7))
+    return f'<html><body><h1>A{n}</h1>{links}<p>A{2 * n + 6}</p></body></html>'
+
+
+@pytest.fixture(autouse=True)
+def fake_serial_downloads(monkeypatch) -> None:
+    """Make the serial builders parse the made-up articles too."""
+    monkeypatch.setattr(bw, 'get_adjacent_urls',
+                        lambda url: parse_adjacent_urls(url, _fake_html(url)))
+    monkeypatch.setattr(bw, 'get_adjacent_urls_weighted',
+                        lambda url: parse_adjacent_urls_weighted(url, _fake_html(url)))
+    yield
+    clear_document_memo()
+
+
+def test_pipeline_build() -> None:
+    """Test that a pipelined build gives the same graph as a serial build, and that the
+    queue between the fetchers and the parsers stays bounded"""
+    pipeline = CrawlPipeline(fetchers=6, parsers=2, queue_size=3, fetch=_fake_html)
+
+    expected = bw.build_wikigraph(WIKI + 'A0', 50, 4)
+    actual = bw.build_wikigraph(WIKI + 'A0', 50, 4, fetcher=pipeline)
+
+    assert graph_summary(actual) == graph_summary(expected)
+    stats = pipeline.stats()
+    assert stats['peak_pages'] <= 3
+    assert stats['pages_parsed'] == stats['pages_fetched'] >= 13
+    assert (stats['fetchers'], stats['parsers']) == (6, 2)
+
+
+def test_pipeline_weighted_build() -> None:
+    """Test a pipelined build of a weighted graph"""
+    pipeline = CrawlPipeline(weighted=True, fetchers=4, parsers=3, fetch=_fake_html)
+
+    expected = bw.build_weighted_wikigraph(WIKI + 'A0', 40, 5)
+    actual = bw.build_weighted_wikigraph(WIKI + 'A0', 40, 5, fetcher=pipeline)
+
+    assert graph_summary(actual) == graph_summary(expected)
+
+
+def test_pipeline_errors() -> None:
+    """Test that missing articles have no links, and that other errors reach the builder"""
+    def fetch(url: str) -> str:
+        if url.endswith('Missing'):
+            raise urllib.error.HTTPError(url, 404, 'Not Found', None, None)
+        elif url.endswith('Broken'):
+            raise ConnectionResetError
+        return _fake_html(url)
+
+    pipeline = CrawlPipeline(fetchers=2, parsers=1, fetch=fetch)
+    try:
+        assert pipeline.fetch(WIKI + 'Missing', [WIKI + 'A0', WIKI + 'Broken']) == []
+        assert len(pipeline.fetch(WIKI + 'A0', [])) == 6
+        with pytest.raises(ConnectionResetError):
+            pipeline.fetch(WIKI + 'Broken', [])
+        assert pipeline.queue_depths() == {'urls': 0, 'pages': 0, 'results': 0}
+    finally:
+        pipeline.shutdown()
+
+
+if __name__ == '__main__':
+    pytest.main(['test_crawl_pipeline.py', '-v'])
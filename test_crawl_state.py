@@ -0,0 +1,201 @@
+"""CSC111 Winter 2021 Final Project: Test Suite for crawl_state
+
+Module Description
+===============================
+
+This module contains tests for saving crawl states to checkpoint files, and for resuming
+interrupted graph builds from those checkpoints.
+
+Copyright and Usage Information
+===============================
+
+This file is provided solely for the personal and private use of Faizah Sayyid, Tina Zhang,
+Poorvi Sharma, and Courtney Amm (students at the University of Toronto St. George campus).
+All forms of distribution of this code, whether as given or with any changes, are expressly
+prohibited.
+
+This file is Copyright (c) 2021 Faizah Sayyid, Tina Zhang, Poorvi Sharma, Courtney Amm.
+"""
+import json
+import os
+import time
+
+import pytest
+
+import article_ids
+import build_wikigraph as bw
+from article_ids import ArticleTable, get_article_table
+from crawl_frontier import BloomFilter, CrawlFrontier
+from crawl_state import CrawlState, crawl_state_from_dict, load_crawl_state, prune_checkpoints, \
+    save_crawl_state
+from fake_articles import WIKI, fake_links, fake_weighted_links, graph_summary, redirecting_links
+from wikipedia_html_parsers import SCOPE_CONTENT
+
+
+class _Crash(Exception):
+    """Raised by a fake download to simulate the process dying in the middle of a crawl."""
+
+
+def _crashing(fetch, fetches_before_crash: int, fetched: list):
+    """Return a version of <fetch> that records each url in <fetched>, and raises _Crash
+    once it has been called <fetches_before_crash> times."""
+    def crashing_fetch(url: str) -> list:
+        if len(fetched) >= fetches_before_crash:
+            raise _Crash
+        fetched.append(url)
+        return fetch(url)
+    return crashing_fetch
+
+
+def test_state_round_trip() -> None:
+    """Test that a state saved with to_dict (through JSON) is restored exactly"""
+    state = CrawlState(WIKI + 'A0', 10, 3, True, CrawlFrontier(BloomFilter(100)), SCOPE_CONTENT)
+    state.frontier.add(WIKI + 'A1')
+    state.graph.add_vertex('A0', WIKI + 'A0')
+    state.graph.add_vertex('A1', WIKI + 'A1')
+    state.edges_to_weights[('A0', 'A1')] = [2, 3]
+    state.sources_found = 1
+
+    copy = crawl_state_from_dict(json.loads(json.dumps(state.to_dict())))
+
+    assert copy.graph.get_all_vertices() == {'A0', 'A1'}
+    assert copy.edges_to_weights == {('A0', 'A1'): [2, 3]}
+    assert copy.frontier.front(5) == [WIKI + 'A1']
+    assert copy.frontier.is_visited(WIKI + 'A1')
+    assert (copy.sources_found, copy.num_sources, copy.weighted) == (1, 10, True)
+    assert copy.scope == SCOPE_CONTENT
+
+
+def test_round_trip_keeps_vertex_order(monkeypatch) -> None:
+    """Test that a restored graph has its vertices in the order they were added to the graph
+    it was saved from"""
+    monkeypatch.setattr(bw, 'get_adjacent_urls_weighted', fake_weighted_links)
+    state = bw.start_crawl(WIKI + 'A0', 20, 4, weighted=True)
+    graph = bw.run_crawl(state)
+
+    copy = crawl_state_from_dict(json.loads(json.dumps(state.to_dict())))
+
+    assert graph.vertex_names() != sorted(graph.vertex_names())
+    assert copy.graph.freeze().vertex_names() == graph.freeze().vertex_names()
+    assert [element['data']['id'] for element in copy.graph.to_cytoscape()
+            if 'id' in element['data']] \
+        == [element['data']['id'] for element in graph.to_cytoscape() if 'id' in element['data']]
+
+
+def test_round_trip_keeps_aliases(monkeypatch) -> None:
+    """Test that the other names of the vertices are restored, so a vertex reached under
+    another name can still be expanded"""
+    monkeypatch.setattr(article_ids, '_article_table', ArticleTable())
+    for n in range(100):
+        get_article_table().add_redirect(WIKI + 'Redirect_to_A' + str(n), WIKI + 'A' + str(n))
+    monkeypatch.setattr(bw, 'get_adjacent_urls', redirecting_links)
+    state = bw.start_crawl(WIKI + 'A0', 20, 3)
+    graph = bw.run_crawl(state)
+    assert graph.vertex_name('Redirect to A3') == 'A3'
+
+    copy = crawl_state_from_dict(json.loads(json.dumps(state.to_dict())))
+    assert copy.graph.aliases() == graph.aliases()
+
+    bw.expand_vertex(copy, 'Redirect to A3')
+    bw.expand_vertex(copy, 'A1')
+    bw.expand_vertex(state, 'Redirect to A3')
+    bw.expand_vertex(state, 'A1')
+    assert graph_summary(copy.graph) == graph_summary(graph)
+
+
+def test_checkpoint_version(tmp_path) -> None:
+    """Test that a checkpoint in an unknown format is rejected"""
+    path = tmp_path / 'crawl.json'
+    path.write_text(json.dumps({'version': 999}))
+
+    with pytest.raises(ValueError):
+        load_crawl_state(str(path))
+
+
+def test_save_replaces_checkpoint(tmp_path) -> None:
+    """Test that saving replaces the previous checkpoint without leaving temporary files"""
+    path = str(tmp_path / 'crawl.json')
+    state = CrawlState(WIKI + 'A0', 10, 3, False, CrawlFrontier())
+
+    save_crawl_state(state, path)
+    state.sources_found = 4
+    save_crawl_state(state, path)
+
+    assert load_crawl_state(path).sources_found == 4
+    assert [p.name for p in tmp_path.iterdir()] == ['crawl.json']
+
+
+def test_prune_checkpoints(tmp_path) -> None:
+    """Test that only the recent checkpoints are kept, and never the one in use"""
+    now = time.time()
+    ages = {'old': 3 * 3600, 'in use': 2 * 3600, 'a': 30, 'b': 20, 'c': 10}
+    for name, age in ages.items():
+        path = tmp_path / (name + '.json')
+        path.write_text('{}')
+        os.utime(path, (now - age, now - age))
+    (tmp_path / 'notes.txt').write_text('')
+
+    deleted = prune_checkpoints(str(tmp_path), 3, 3600, keep=str(tmp_path / 'in use.json'))
+
+    assert sorted(deleted) == [str(tmp_path / 'a.json'), str(tmp_path / 'old.json')]
+    assert sorted(path.name for path in tmp_path.iterdir()) \
+        == ['b.json', 'c.json', 'in use.json', 'notes.txt']
+
+
+def test_resume_unweighted(monkeypatch, tmp_path) -> None:
+    """Test that a crawl that dies is resumed from its last checkpoint and builds the same
+    graph, without downloading the articles expanded before the checkpoint again"""
+    path = str(tmp_path / 'crawl.json')
+    monkeypatch.setattr(bw, 'get_adjacent_urls', fake_links)
+    expected = bw.build_wikigraph(WIKI + 'A0', 80, 3)
+
+    before_crash = []
+    monkeypatch.setattr(bw, 'get_adjacent_urls', _crashing(fake_links, 17, before_crash))
+    with pytest.raises(_Crash):
+        bw.build_wikigraph(WIKI + 'A0', 80, 3, checkpoint_path=path, checkpoint_every=5)
+    assert load_crawl_state(path).pages_expanded == 15
+
+    after_crash = []
+    monkeypatch.setattr(bw, 'get_adjacent_urls', _crashing(fake_links, 1000, after_crash))
+    actual = bw.resume_wikigraph(path)
+
+    assert graph_summary(actual) == graph_summary(expected)
+    assert set(after_crash).isdisjoint(before_crash[:15])
+    assert load_crawl_state(path).is_finished()
+
+
+def test_resume_weighted_best_first(monkeypatch, tmp_path) -> None:
+    """Test resuming a best-first weighted crawl"""
+    path = str(tmp_path / 'crawl.json')
+    monkeypatch.setattr(bw, 'get_adjacent_urls_weighted', fake_weighted_links)
+    expected = bw.build_weighted_wikigraph(WIKI + 'A0', 60, 4, best_first=True)
+
+    monkeypatch.setattr(bw, 'get_adjacent_urls_weighted',
+                        _crashing(fake_weighted_links, 9, []))
+    with pytest.raises(_Crash):
+        bw.build_weighted_wikigraph(WIKI + 'A0', 60, 4, best_first=True,
+                                    checkpoint_path=path, checkpoint_every=4)
+
+    monkeypatch.setattr(bw, 'get_adjacent_urls_weighted', fake_weighted_links)
+    actual = bw.resume_wikigraph(path, max_workers=4)
+
+    assert graph_summary(actual) == graph_summary(expected)
+
+
+def test_expand_from_checkpoint(monkeypatch, tmp_path) -> None:
+    """Test that a finished crawl loaded from its checkpoint can still be extended, including
+    the rest of the links of the article it stopped in the middle of"""
+    path = str(tmp_path / 'crawl.json')
+    monkeypatch.setattr(bw, 'get_adjacent_urls_weighted', fake_weighted_links)
+    expected = bw.build_weighted_wikigraph(WIKI + 'A0', 31, 4)
+
+    bw.build_weighted_wikigraph(WIKI + 'A0', 21, 4, checkpoint_path=path)
+    state = load_crawl_state(path)
+    assert state.unfinished is not None
+    actual = bw.expand_wikigraph(state, 10)
+
+    assert graph_summary(actual) == graph_summary(expected)
+
+
+if __name__ == '__main__':
+    pytest.main(['test_crawl_state.py', '-v'])
@@ -0,0 +1,133 @@
+"""CSC111 Winter 2021 Final Project: Test Suite for degrees_of_separation
+
+Module Description
+===============================
+
+This module contains tests for finding the shortest chain of links between two articles with
+a bidirectional breadth-first search.
+
+Copyright and Usage Information
+===============================
+
+This file is provided solely for the personal and private use of Faizah Sayyid, Tina Zhang,
+Poorvi Sharma, and Courtney Amm (students at the University of Toronto St. George campus).
+All forms of distribution of this code, whether as given or with any changes, are expressly
+prohibited.
+
+This file is Copyright (c) 2021 Faizah Sayyid, Tina Zhang, Poorvi Sharma, Courtney Amm.
+"""
+import pytest
+
+import degrees_of_separation as ds
+
+WIKI = 'https://en.wikipedia.org/wiki/'
+
+# the made-up articles are A0 to A(NUM_ARTICLES - 1)
+NUM_ARTICLES = 3000
+
+
+def _fake_links(url: str) -> list[str]:
+    """Return the links on a made-up article: article n links to articles 3n + 1 to 3n + 3,
+    (n - 1) // 3, n + 1000 and n - 1000 (if those exist)."""
+    n = int(url[len(WIKI + 'A'):])
+    linked = [3 * n + 1, 3 * n + 2, 3 * n + 3, (n - 1) // 3, n + 1000, n - 1000]
+    return [WIKI + 'A' + str(m) for m in linked if 0 <= m < NUM_ARTICLES and m != n]
+
+
+def _distances(start: int) -> dict[int, int]:
+    """Return the number of links between article <start> and every made-up article it is
+    connected to, treating links as going both ways."""
+    adjacent = {n: set() for n in range(NUM_ARTICLES)}
+    for n in range(NUM_ARTICLES):
+        for url in _fake_links(WIKI + 'A' + str(n)):
+            m = int(url[len(WIKI + 'A'):])
+            adjacent[n].add(m)
+            adjacent[m].add(n)
+
+    distances = {start: 0}
+    level = [start]
+    while level:
+        next_level = []
+        for n in level:
+            for m in adjacent[n]:
+                if m not in distances:
+                    distances[m] = distances[n] + 1
+                    next_level.append(m)
+        level = next_level
+    return distances
+
+
+@pytest.mark.parametrize('start, target', [(0, 2500), (7, 1999), (2345, 1122), (5, 5)])
+def test_find_shortest_path(monkeypatch, start: int, target: int) -> None:
+    """Test that the chain found is a valid chain with the fewest links, found by expanding
+    fewer articles than a one-sided breadth-first search"""
+    monkeypatch.setattr(ds, 'get_adjacent_urls', _fake_links)
+    distances = _distances(start)
+
+    result = ds.find_undirected_path(WIKI + 'A' + str(start), WIKI + 'A' + str(target))
+
+    assert result.degrees() == distances[target]
+    assert result.path[0] == WIKI + 'A' + str(start)
+    assert result.path[-1] == WIKI + 'A' + str(target)
+    for u, v in zip(result.path, result.path[1:]):
+        assert v in _fake_links(u) or u in _fake_links(v)
+
+    one_sided = sum(1 for d in distances.values() if d < distances[target])
+    assert result.pages_fetched <= one_sided
+    assert result.forward_fetched + result.backward_fetched == result.pages_fetched
+
+
+def test_concurrent_find_undirected_path(monkeypatch) -> None:
+    """Test that downloading a level concurrently finds a chain of the same length"""
+    monkeypatch.setattr(ds, 'get_adjacent_urls', _fake_links)
+
+    serial = ds.find_undirected_path(WIKI + 'A0', WIKI + 'A2500')
+    concurrent = ds.find_undirected_path(WIKI + 'A0', WIKI + 'A2500', max_workers=4)
+
+    assert concurrent.path == serial.path
+    assert concurrent.pages_fetched == serial.pages_fetched
+
+
+def test_find_undirected_path_budget(monkeypatch) -> None:
+    """Test that the search gives up after expanding max_fetches articles"""
+    monkeypatch.setattr(ds, 'get_adjacent_urls', _fake_links)
+
+    result = ds.find_undirected_path(WIKI + 'A0', WIKI + 'A2500', max_fetches=3)
+
+    assert result.path is None and result.degrees() is None
+    assert result.budget_exhausted
+    assert result.pages_fetched == 3
+
+
+def test_find_undirected_path_no_chain(monkeypatch) -> None:
+    """Test the result when the two articles aren't connected"""
+    monkeypatch.setattr(ds, 'get_adjacent_urls', lambda url: [])
+
+    result = ds.find_undirected_path(WIKI + 'Cade_(horse)', WIKI + 'Rebecca_Sugar')
+
+    assert result.path is None and not result.budget_exhausted
+    assert result.titles() == []
+    assert (result.forward_fetched, result.backward_fetched) == (1, 1)
+
+
+def test_find_undirected_path_canonical_endpoints(monkeypatch) -> None:
+    """Test that the two articles are found however their urls are written"""
+    links = {WIKI + 'Cade_(horse)': [WIKI + 'Fish_%26_chips'], WIKI + 'Fish_%26_chips': []}
+    monkeypatch.setattr(ds, 'get_adjacent_urls', links.get)
+
+    result = ds.find_undirected_path('http://en.wikipedia.org/wiki/cade_(horse)',
+                          WIKI + 'fish_&_chips#History')
+
+    assert result.path == [WIKI + 'Cade_(horse)', WIKI + 'Fish_%26_chips']
+    assert (result.start_url, result.target_url) == tuple(result.path)
+    assert ds.find_undirected_path(WIKI + 'A12', 'http://en.wikipedia.org/wiki/a12#Top').degrees() == 0
+
+
+def test_find_undirected_path_rejects_unwanted() -> None:
+    """Test that special pages can't be used as an end of the chain"""
+    with pytest.raises(ValueError):
+        ds.find_undirected_path(WIKI + 'Help:Contents', WIKI + 'Rebecca_Sugar')
+
+
+if __name__ == '__main__':
+    pytest.main(['test_degrees_of_separation.py', '-v'])
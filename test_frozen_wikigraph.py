@@ -0,0 +1,169 @@
+"""CSC111 Winter 2021 Final Project: Test Suite for frozen_wikigraph
+
+Module Description
+===============================
+
+This module contains tests that check a FrozenWikiGraph reads exactly like the WikiGraph or
+WeightedWikiGraph it was frozen from, and that graph files load back into the same graph.
+
+Copyright and Usage Information
+===============================
+
+This file is provided solely for the personal and private use of Faizah Sayyid, Tina Zhang,
+Poorvi Sharma, and Courtney Amm (students at the University of Toronto St. George campus).
+All forms of distribution of this code, whether as given or with any changes, are expressly
+prohibited.
+
+This file is Copyright (c) 2021 Faizah Sayyid, Tina Zhang, Poorvi Sharma, Courtney Amm.
+"""
+import random
+
+import pytest
+
+from frozen_wikigraph import GRAPH_FILE_MAGIC, load_wikigraph, save_wikigraph
+from weighted_wikigraph_class import WeightedWikiGraph
+from wikigraph import WikiGraph
+
+WIKI = 'https://en.wikipedia.org/wiki/'
+
+
+def _random_graph(graph_class: type, seed: int) -> WikiGraph:
+    """Return a random <graph_class> of 60 articles, with a few isolated vertices and (for a
+    WeightedWikiGraph) random edge weights."""
+    rng = random.Random(seed)
+    graph = graph_class()
+    names = [f'Frozen article {i}' for i in range(57)] + ['Café', 'Zoë', 'Ångström']
+    for name in names:
+        graph.add_vertex(name, WIKI + name.replace(' ', '_'))
+
+    for _ in range(150):
+        name1, name2 = rng.sample(names[:55], 2)
+        if graph_class is WeightedWikiGraph:
+            graph.add_edge(name1, name2, rng.choice([0.5, 1, 2.25, 7]))
+        else:
+            graph.add_edge(name1, name2)
+    return graph
+
+
+def _check_same_graph(frozen, graph: WikiGraph) -> None:
+    """Check that the frozen graph <frozen> answers every read the same way as <graph>."""
+    names = sorted(graph.get_all_vertices())
+
+    assert frozen.weighted == isinstance(graph, WeightedWikiGraph)
+    assert frozen.get_all_vertices() == graph.get_all_vertices()
+    assert frozen.to_cytoscape() == graph.to_cytoscape()
+    assert len(frozen) == len(names)
+    for name in names:
+        assert frozen.get_neighbours(name) == graph.get_neighbours(name)
+        assert frozen.degree(name) == graph.get_vertex(name).degree()
+        assert frozen.get_url(name) == graph.get_vertex(name).url
+        assert frozen.get_class_id(name) == graph.get_class_id(name)
+        assert frozen.find_vertex(frozen.get_url(name) + '#Section') == name
+    for name1, name2 in zip(names, names[1:] + names[:1]):
+        assert frozen.adjacent(name1, name2) == graph.adjacent(name1, name2)
+        assert frozen.connected(name1, name2) == graph.connected(name1, name2)
+    for name in names:
+        assert frozen.component(name) == graph.component(name)
+        assert frozen.component_size(name) == graph.component_size(name)
+    assert frozen.num_components() == graph.num_components()
+    assert frozen.num_edges() == sum(frozen.degree(name) for name in names) // 2
+
+
+@pytest.mark.parametrize('graph_class', [WikiGraph, WeightedWikiGraph])
+@pytest.mark.parametrize('seed', range(5))
+def test_frozen_graph_matches(graph_class, seed) -> None:
+    """Test that a frozen graph answers every read the same way as the graph it was frozen
+    from"""
+    graph = _random_graph(graph_class, seed)
+    _check_same_graph(graph.freeze(), graph)
+
+
+@pytest.mark.parametrize('graph_class', [WikiGraph, WeightedWikiGraph])
+@pytest.mark.parametrize('memory_map', [True, False])
+def test_graph_file_round_trip(graph_class, memory_map, tmp_path) -> None:
+    """Test that a graph saved to a graph file loads back into a graph that answers every
+    read the same way, and saves again into the same file"""
+    graph = _random_graph(graph_class, 3)
+    path = str(tmp_path / 'graph.wikigraph')
+    save_wikigraph(graph, path)
+    loaded = load_wikigraph(path, memory_map=memory_map)
+    _check_same_graph(loaded, graph)
+
+    save_wikigraph(loaded, str(tmp_path / 'again.wikigraph'))
+    assert (tmp_path / 'again.wikigraph').read_bytes() == \
+        (tmp_path / 'graph.wikigraph').read_bytes()
+
+
+@pytest.mark.parametrize('graph_class', [WikiGraph, WeightedWikiGraph])
+def test_graph_file_empty(graph_class, tmp_path) -> None:
+    """Test that graphs without edges or vertices are saved and loaded"""
+    graph = graph_class()
+    path = str(tmp_path / 'empty.wikigraph')
+    save_wikigraph(graph, path)
+    assert load_wikigraph(path).get_all_vertices() == set()
+
+    graph.add_vertex('Matchem', WIKI + 'Matchem')
+    save_wikigraph(graph, path)
+    loaded = load_wikigraph(path)
+    assert loaded.get_neighbours('Matchem') == set()
+    assert loaded.weighted == (graph_class is WeightedWikiGraph)
+
+
+def test_graph_file_rejected(tmp_path) -> None:
+    """Test that files that aren't complete graph files of this version are rejected"""
+    path = str(tmp_path / 'graph.wikigraph')
+    save_wikigraph(_random_graph(WeightedWikiGraph, 0), path)
+    data = (tmp_path / 'graph.wikigraph').read_bytes()
+
+    bad_files = {'not a graph': b'<html></html>',
+                 'empty': b'',
+                 'newer version': GRAPH_FILE_MAGIC + b'\x02' + data[9:],
+                 'truncated': data[:len(data) // 2]}
+    for name, bad_data in bad_files.items():
+        (tmp_path / name).write_bytes(bad_data)
+        with pytest.raises(ValueError):
+            load_wikigraph(str(tmp_path / name))
+
+
+def test_frozen_graph_missing_vertices() -> None:
+    """Test that a frozen graph handles names and urls that aren't in it like a WikiGraph"""
+    frozen = _random_graph(WikiGraph, 0).freeze()
+
+    assert not frozen.is_vertex_in_graph('Matchem')
+    assert not frozen.adjacent('Matchem', 'Frozen article 0')
+    assert not frozen.connected('Frozen article 0', 'Matchem')
+    assert frozen.find_vertex(WIKI + 'Matchem') is None
+    with pytest.raises(ValueError):
+        frozen.get_neighbours('Matchem')
+
+
+def test_frozen_graph_is_a_copy() -> None:
+    """Test that changing a graph after freezing it doesn't change the frozen graph"""
+    graph = WeightedWikiGraph()
+    graph.add_vertex('Cade (horse)', WIKI + 'Cade_(horse)')
+    graph.add_vertex('Matchem', WIKI + 'Matchem')
+    graph.add_edge('Cade (horse)', 'Matchem', 3)
+    frozen = graph.freeze()
+    graph.add_vertex('Bald Galloway', WIKI + 'Bald_Galloway')
+    graph.add_edge('Cade (horse)', 'Bald Galloway', 1)
+
+    assert frozen.get_all_vertices() == {'Cade (horse)', 'Matchem'}
+    assert frozen.get_neighbours('Cade (horse)') == {('Matchem', 3)}
+    assert not hasattr(frozen, 'add_edge')
+
+
+if __name__ == '__main__':
+    pytest.main(['test_frozen_wikigraph.py', '-v'])
+
+    import python_ta.contracts
+
+    python_ta.contracts.check_all_contracts()
+
+    import python_ta
+
+    python_ta.check_all(config={
+        'extra-imports': ['random', 'weighted_wikigraph_class', 'wikigraph'],
+        'allowed-io': [],
+        'max-line-length': 100,
+        'disable': ['E1136']
+    })
@@ -0,0 +1,225 @@
+"""CSC111 Winter 2021 Final Project: Test Suite for graph_centrality
+
+Module Description
+===============================
+
+This module contains tests that check the vectorized centralities of graph_centrality
+against straightforward pure Python versions on small random graphs.
+
+Copyright and Usage Information
+===============================
+
+This file is provided solely for the personal and private use of Faizah Sayyid, Tina Zhang,
+Poorvi Sharma, and Courtney Amm (students at the University of Toronto St. George campus).
+All forms of distribution of this code, whether as given or with any changes, are expressly
+prohibited.
+
+This file is Copyright (c) 2021 Faizah Sayyid, Tina Zhang, Poorvi Sharma, Courtney Amm.
+"""
+import math
+import random
+from collections import deque
+
+import pytest
+
+pytest.importorskip('numpy')
+
+from frozen_wikigraph import load_wikigraph, save_wikigraph
+from graph_centrality import ConvergenceError, GraphMatrix, betweenness_centrality, \
+    degree_centrality, eigenvector_centrality, pagerank, rank_articles
+from weighted_wikigraph_class import WeightedWikiGraph
+from wikigraph import WikiGraph
+
+WIKI = 'https://en.wikipedia.org/wiki/'
+
+
+def _random_graph(seed: int, num_vertices: int = 30) -> WeightedWikiGraph:
+    """Return a random WeightedWikiGraph with a few isolated vertices."""
+    rng = random.Random(seed)
+    graph = WeightedWikiGraph()
+    names = [f'Ranked article {i}' for i in range(num_vertices)]
+    for name in names:
+        graph.add_vertex(name, WIKI + name.replace(' ', '_'))
+    for _ in range(2 * num_vertices):
+        name1, name2 = rng.sample(names[:-3], 2)
+        graph.add_edge(name1, name2, rng.choice([0.5, 1.0, 3.0]))
+    return graph
+
+
+def _neighbours(graph: WeightedWikiGraph, name: str, weighted: bool) -> dict[str, float]:
+    """Return the neighbours of <name> mapped to the weights of their edges (all 1.0 if
+    <weighted> is False)."""
+    return {u: weight if weighted else 1.0 for u, weight in graph.get_neighbours(name)}
+
+
+def _python_pagerank(graph: WeightedWikiGraph, weighted: bool) -> dict[str, float]:
+    """Return the PageRank of every vertex of <graph>, computed one vertex at a time."""
+    names = list(graph.get_all_vertices())
+    n = len(names)
+    scores = {name: 1 / n for name in names}
+    for _ in range(500):
+        dangling = sum(scores[v] for v in names if not _neighbours(graph, v, weighted))
+        new_scores = {v: 0.85 * dangling / n + 0.15 / n for v in names}
+        for v in names:
+            links = _neighbours(graph, v, weighted)
+            for u, weight in links.items():
+                new_scores[u] += 0.85 * scores[v] * weight / sum(links.values())
+        scores = new_scores
+    return scores
+
+
+def _python_betweenness(graph: WeightedWikiGraph) -> dict[str, float]:
+    """Return the betweenness centrality of every vertex of <graph>, unnormalized, by
+    counting the shortest paths between every pair of vertices."""
+    names = sorted(graph.get_all_vertices())
+    distances, paths = {}, {}
+    for s in names:
+        distances[s], paths[s] = {s: 0}, {s: 1}
+        queue = deque([s])
+        while queue:
+            v = queue.popleft()
+            for u in _neighbours(graph, v, False):
+                if u not in distances[s]:
+                    distances[s][u] = distances[s][v] + 1
+                    paths[s][u] = 0
+                    queue.append(u)
+                if distances[s][u] == distances[s][v] + 1:
+                    paths[s][u] += paths[s][v]
+
+    scores = {v: 0.0 for v in names}
+    for i, s in enumerate(names):
+        for t in names[i + 1:]:
+            if t not in distances[s]:
+                continue
+            for v in names:
+                if v not in (s, t) and v in distances[s] \
+                        and distances[s][v] + distances[v][t] == distances[s][t]:
+                    scores[v] += paths[s][v] * paths[v][t] / paths[s][t]
+    return scores
+
+
+@pytest.mark.parametrize('weighted', [True, False])
+@pytest.mark.parametrize('seed', range(3))
+def test_pagerank_matches_python(weighted, seed) -> None:
+    """Test that PageRank matches computing it one vertex at a time, and adds up to 1"""
+    graph = _random_graph(seed)
+    expected = _python_pagerank(graph, weighted)
+    actual = pagerank(graph, tolerance=1e-13, weighted=weighted)
+
+    assert actual.keys() == expected.keys()
+    assert all(math.isclose(actual[v], expected[v], abs_tol=1e-9) for v in expected)
+    assert math.isclose(sum(actual.values()), 1.0)
+
+
+def test_pagerank_convergence() -> None:
+    """Test that PageRank raises a ConvergenceError when it runs out of iterations"""
+    with pytest.raises(ConvergenceError) as error:
+        pagerank(_random_graph(0), max_iterations=2)
+    assert str(error.value) == 'pagerank did not converge in 2 iterations'
+
+    loose = pagerank(_random_graph(0), tolerance=1e-3)
+    tight = pagerank(_random_graph(0), tolerance=1e-12)
+    assert all(abs(loose[v] - tight[v]) < 1e-2 for v in tight)
+
+
+def test_degree_centrality() -> None:
+    """Test that degree centrality is the (weighted) degree over the number of other
+    vertices"""
+    graph = _random_graph(1)
+    unweighted = degree_centrality(graph)
+    weighted = degree_centrality(graph, weighted=True)
+
+    for v in graph.get_all_vertices():
+        assert unweighted[v] == len(graph.get_neighbours(v)) / 29
+        assert math.isclose(weighted[v], sum(_neighbours(graph, v, True).values()) / 29)
+
+
+@pytest.mark.parametrize('weighted', [True, False])
+def test_eigenvector_centrality(weighted) -> None:
+    """Test that eigenvector centrality is a unit eigenvector of the adjacency matrix, for
+    the largest eigenvalue"""
+    graph = _random_graph(2)
+    scores = eigenvector_centrality(graph, weighted=weighted)
+    largest_component = max(graph.components(), key=len)
+
+    assert math.isclose(sum(x * x for x in scores.values()), 1.0)
+    products = {v: sum(weight * scores[u] for u, weight in
+                       _neighbours(graph, v, weighted).items()) for v in largest_component}
+    eigenvalue = products['Ranked article 0'] / scores['Ranked article 0']
+    assert all(math.isclose(products[v], eigenvalue * scores[v], rel_tol=1e-6)
+               for v in largest_component)
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_betweenness_matches_python(seed) -> None:
+    """Test that betweenness centrality matches counting the shortest paths through every
+    vertex"""
+    graph = _random_graph(seed)
+    expected = _python_betweenness(graph)
+    actual = betweenness_centrality(graph, normalized=False)
+    normalized = betweenness_centrality(graph)
+
+    assert all(math.isclose(actual[v], expected[v], abs_tol=1e-9) for v in expected)
+    assert all(math.isclose(normalized[v], 2 * expected[v] / (29 * 28), abs_tol=1e-9)
+               for v in expected)
+
+
+def test_betweenness_samples() -> None:
+    """Test that sampled betweenness is reproducible, and exact when every vertex is
+    sampled"""
+    graph = _random_graph(0, num_vertices=60)
+    exact = betweenness_centrality(graph)
+
+    assert betweenness_centrality(graph, samples=60) == exact
+    assert betweenness_centrality(graph, samples=20, seed=1) == \
+        betweenness_centrality(graph, samples=20, seed=1)
+    estimate = betweenness_centrality(graph, samples=40, seed=1)
+    top = [name for name, _ in rank_articles(exact, k=5)]
+    assert sum(estimate[v] for v in top) > 0.5 * sum(exact[v] for v in top)
+
+
+def test_loaded_graph_and_shared_matrix(tmp_path) -> None:
+    """Test that the centralities of a graph loaded from a graph file, or computed from one
+    GraphMatrix, are the same as those of the graph"""
+    graph = _random_graph(0)
+    path = str(tmp_path / 'graph.wikigraph')
+    save_wikigraph(graph, path)
+    matrix = GraphMatrix(load_wikigraph(path))
+
+    assert pagerank(matrix) == pagerank(graph)
+    assert eigenvector_centrality(matrix) == eigenvector_centrality(graph)
+    assert betweenness_centrality(matrix) == betweenness_centrality(graph)
+
+
+def test_empty_and_unweighted_graphs() -> None:
+    """Test that graphs without vertices or edges, and WikiGraphs, are handled"""
+    assert pagerank(WikiGraph()) == {}
+    assert eigenvector_centrality(WikiGraph()) == {}
+    assert betweenness_centrality(WikiGraph()) == {}
+
+    graph = WikiGraph()
+    graph.add_vertex('Matchem', WIKI + 'Matchem')
+    graph.add_vertex('Cade (horse)', WIKI + 'Cade_(horse)')
+    assert pagerank(graph) == {'Matchem': 0.5, 'Cade (horse)': 0.5}
+    assert degree_centrality(graph) == {'Matchem': 0.0, 'Cade (horse)': 0.0}
+
+    graph.add_edge('Matchem', 'Cade (horse)')
+    assert pagerank(graph, weighted=True) == pagerank(graph, weighted=False)
+
+
+if __name__ == '__main__':
+    pytest.main(['test_graph_centrality.py', '-v'])
+
+    import python_ta.contracts
+
+    python_ta.contracts.check_all_contracts()
+
+    import python_ta
+
+    python_ta.check_all(config={
+        'extra-imports': ['math', 'random', 'collections', 'frozen_wikigraph',
+                          'graph_centrality', 'weighted_wikigraph_class', 'wikigraph'],
+        'allowed-io': [],
+        'max-line-length': 100,
+        'disable': ['E1136']
+    })
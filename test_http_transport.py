@@ -0,0 +1,392 @@
+"""CSC111 Winter 2021 Final Project: Test Suite for http_transport
+
+Module Description
+===============================
+
+This module contains tests for the HTTPTransport class, run against a local HTTP server
+standing in for Wikipedia.
+
+Copyright and Usage Information
+===============================
+
+This file is provided solely for the personal and private use of Faizah Sayyid, Tina Zhang,
+Poorvi Sharma, and Courtney Amm (students at the University of Toronto St. George campus).
+All forms of distribution of this code, whether as given or with any changes, are expressly
+prohibited.
+
+This file is Copyright (c) 2021 Faizah Sayyid, Tina Zhang, Poorvi Sharma, Courtney Amm.
+"""
+import asyncio
+import contextvars
+import gzip
+import socket
+import threading
+import time
+import urllib.error
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import wikipedia_html_parsers
+from async_build_wikigraph import async_fetch_html
+from http_transport import DownloadMeter, HTTPTransport
+from page_cache import PageCache
+
+PAGE = '<p>Cade was a horse. He was a sire.</p><a href="/wiki/Matchem">Matchem</a>' * 20
+LONG_PAGE = ''.join(f'<p>Text.</p><a href="/wiki/Topic_{i}">Topic</a>' for i in range(5000))
+
+
+class _StandInHandler(BaseHTTPRequestHandler):
+    """Serves PAGE compressed the way the client asks, over keep-alive connections, and
+    records which connection every request arrived on."""
+    protocol_version = 'HTTP/1.1'
+    client_ports = []
+
+    def do_GET(self) -> None:
+        """Answer a GET request."""
+        self.client_ports.append(self.client_address[1])
+        if self.path == '/wiki/Slow':
+            time.sleep(1)
+            self._send(200, PAGE.encode(), [])
+        elif self.path == '/wiki/Long':
+            self._send(200, LONG_PAGE.encode(), [])
+        elif self.path == '/wiki/Moved':
+            self._send(301, b'', [('Location', '/wiki/Cade_(horse)')])
+        elif self.path != '/wiki/Cade_(horse)':
+            self._send(404, b'not found', [])
+        elif 'gzip' in self.headers.get('Accept-Encoding', ''):
+            self._send(200, gzip.compress(PAGE.encode()), [('Content-Encoding', 'gzip')])
+        elif 'deflate' in self.headers.get('Accept-Encoding', ''):
+            self._send(200, zlib.compress(PAGE.encode()), [('Content-Encoding', 'deflate')])
+        else:
+            self._send(200, PAGE.encode(), [])
+
+    def _send(self, status: int, body: bytes, headers: list) -> None:
+        """Send a response with a Content-Length, so the connection can be kept alive."""
+        self.send_response(status)
+        for name, value in headers:
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args) -> None:
+        """Don't print every request."""
+
+
+@pytest.fixture
+def base_url():
+    """Run _StandInHandler on a local port."""
+    _StandInHandler.client_ports = []
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _StandInHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield 'http://127.0.0.1:' + str(server.server_address[1])
+    server.shutdown()
+    server.server_close()
+
+
+class _ProxyHandler(BaseHTTPRequestHandler):
+    """Stands in for a proxy: answers every request for a whole url with PAGE, refuses to
+    open tunnels, and records the request lines and proxy credentials it receives."""
+    protocol_version = 'HTTP/1.1'
+    requests = []
+
+    def do_GET(self) -> None:
+        """Answer a GET request for a whole url."""
+        self.requests.append((self.requestline, self.headers.get('Proxy-Authorization')))
+        body = PAGE.encode()
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_CONNECT(self) -> None:
+        """Refuse to open a tunnel."""
+        self.requests.append((self.requestline, self.headers.get('Proxy-Authorization')))
+        self.send_error(403)
+
+    def log_message(self, *args) -> None:
+        """Don't print every request."""
+
+
+@pytest.fixture
+def proxy_address():
+    """Run _ProxyHandler on a local port, and return its host and port."""
+    _ProxyHandler.requests = []
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _ProxyHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield '127.0.0.1:' + str(server.server_address[1])
+    server.shutdown()
+    server.server_close()
+
+
+def test_transport_decompresses(base_url) -> None:
+    """Test that the page is sent compressed and returned decompressed"""
+    transport = HTTPTransport()
+
+    assert transport.get_text(base_url + '/wiki/Cade_(horse)') == PAGE
+    assert transport.bytes_received < len(PAGE)
+
+
+def test_transport_reuses_connection(base_url) -> None:
+    """Test that consecutive downloads from one host share a single connection"""
+    transport = HTTPTransport()
+    for _ in range(5):
+        transport.get(base_url + '/wiki/Cade_(horse)')
+
+    assert transport.requests_sent == 5
+    assert transport.connections_opened == 1
+    assert len(set(_StandInHandler.client_ports)) == 1
+
+
+def test_transport_threads(base_url) -> None:
+    """Test that a transport shared by several threads never opens more connections than
+    there are threads"""
+    transport = HTTPTransport()
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        pages = list(executor.map(transport.get_text, [base_url + '/wiki/Cade_(horse)'] * 20))
+
+    assert pages == [PAGE] * 20
+    assert transport.connections_opened <= 4
+
+
+def test_transport_redirect_and_error(base_url) -> None:
+    """Test that redirects are followed and that error statuses raise an HTTPError"""
+    transport = HTTPTransport()
+
+    assert transport.get_text(base_url + '/wiki/Moved') == PAGE
+    with pytest.raises(urllib.error.HTTPError):
+        transport.get(base_url + '/wiki/Missing')
+    assert transport.get_text(base_url + '/wiki/Cade_(horse)') == PAGE
+    assert transport.connections_opened == 1
+
+
+def test_transport_reconnects(base_url) -> None:
+    """Test that a download still succeeds after the server closed an idle connection"""
+    transport = HTTPTransport()
+    transport.get(base_url + '/wiki/Cade_(horse)')
+    for connections in transport._idle.values():
+        for connection in connections:
+            connection.sock.shutdown(socket.SHUT_RDWR)
+
+    assert transport.get_text(base_url + '/wiki/Cade_(horse)') == PAGE
+
+
+def test_transport_timeout_not_retried(base_url) -> None:
+    """Test that a request timing out over a reused connection isn't sent again"""
+    transport = HTTPTransport(timeout=0.3)
+    transport.get(base_url + '/wiki/Cade_(horse)')
+
+    start = time.monotonic()
+    with pytest.raises(urllib.error.URLError):
+        transport.get(base_url + '/wiki/Slow')
+    assert time.monotonic() - start < 0.55
+    assert transport.connections_opened == 1
+    assert len(_StandInHandler.client_ports) == 2
+
+
+def test_fetches_use_transport(base_url, monkeypatch) -> None:
+    """Test that the fetch functions download through the module's transport"""
+    transport = HTTPTransport()
+    monkeypatch.setattr(wikipedia_html_parsers, '_page_cache', None)
+    monkeypatch.setattr(wikipedia_html_parsers, '_page_cache_set', True)
+    monkeypatch.setattr(wikipedia_html_parsers, '_transport', transport)
+
+    assert wikipedia_html_parsers.get_adjacent_urls(base_url + '/wiki/Cade_(horse)') == \
+        ['https://en.wikipedia.org/wiki/Matchem']
+    assert wikipedia_html_parsers.get_adjacent_urls(base_url + '/wiki/Missing') == []
+    assert transport.connections_opened == 1
+
+
+def test_transport_stream(base_url) -> None:
+    """Test that a streamed body is the same as a downloaded one, with redirects and errors
+    handled like get does"""
+    transport = HTTPTransport()
+
+    assert b''.join(transport.stream(base_url + '/wiki/Cade_(horse)', 16)).decode() == PAGE
+    assert b''.join(transport.stream(base_url + '/wiki/Moved')).decode() == PAGE
+    with pytest.raises(urllib.error.HTTPError):
+        next(transport.stream(base_url + '/wiki/Missing'))
+    assert transport.connections_opened == 1
+
+
+def test_transport_stream_closed_early(base_url) -> None:
+    """Test that closing a stream early stops the download and drops its connection"""
+    transport = HTTPTransport()
+    chunks = transport.stream(base_url + '/wiki/Long', 1024)
+    next(chunks)
+    chunks.close()
+
+    assert transport.bytes_received < len(LONG_PAGE) // 10
+    assert all(connections == [] for connections in transport._idle.values())
+    assert transport.get_text(base_url + '/wiki/Long') == LONG_PAGE
+
+
+def test_download_meter(base_url) -> None:
+    """Test that a meter counts only the downloads made while it is active, including the
+    ones in threads started from its context, and cuts them short at its deadline"""
+    transport = HTTPTransport()
+    meter = DownloadMeter(time.monotonic() + 0.2)
+    transport.get(base_url + '/wiki/Long')
+
+    with meter.active():
+        transport.get(base_url + '/wiki/Long')
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            executor.submit(contextvars.copy_context().run, transport.get,
+                            base_url + '/wiki/Long').result()
+        start = time.monotonic()
+        with pytest.raises(urllib.error.URLError):
+            transport.get(base_url + '/wiki/Slow')
+        assert time.monotonic() - start < 0.5
+
+    assert meter.bytes_received == 2 * len(LONG_PAGE) == transport.bytes_received * 2 // 3
+    assert transport._timeout() == transport.timeout
+
+
+def test_adjacent_urls_stream(base_url, monkeypatch) -> None:
+    """Test that get_adjacent_urls hands back the first links before the page is read to
+    the end, and that a page dropped early is only downloaded to the end when caching such
+    pages is turned on (the default) and there is a page cache to put it in"""
+    transport = HTTPTransport()
+    monkeypatch.setattr(wikipedia_html_parsers, '_page_cache', None)
+    monkeypatch.setattr(wikipedia_html_parsers, '_page_cache_set', True)
+    monkeypatch.setattr(wikipedia_html_parsers, '_transport', transport)
+    wikipedia_html_parsers.clear_document_memo()
+    url = base_url + '/wiki/Long'
+
+    links = wikipedia_html_parsers.get_adjacent_urls(url)
+    assert links[:3] == ['https://en.wikipedia.org/wiki/Topic_' + str(i) for i in range(3)]
+    del links
+    assert transport.bytes_received < len(LONG_PAGE) // 2
+
+    cache = PageCache(':memory:')
+    monkeypatch.setattr(wikipedia_html_parsers, '_page_cache', cache)
+    monkeypatch.setattr(wikipedia_html_parsers, '_cache_closed_pages', False)
+    links = wikipedia_html_parsers.get_adjacent_urls(url)
+    assert links[:3] == ['https://en.wikipedia.org/wiki/Topic_' + str(i) for i in range(3)]
+    del links
+    assert url not in cache and transport.bytes_received < len(LONG_PAGE)
+
+    monkeypatch.setattr(wikipedia_html_parsers, '_cache_closed_pages', True)
+    links = wikipedia_html_parsers.get_adjacent_urls(url)
+    assert links[:3] == ['https://en.wikipedia.org/wiki/Topic_' + str(i) for i in range(3)]
+    del links
+    assert url in cache
+    assert len(wikipedia_html_parsers.get_adjacent_urls(url)) == 5000
+    assert transport.requests_sent == 3
+
+
+def test_transport_async_get(base_url) -> None:
+    """Test that non-blocking downloads reuse their connections, follow redirects, raise on
+    errors and are counted with the blocking ones"""
+    transport = HTTPTransport()
+    transport.get(base_url + '/wiki/Cade_(horse)')
+
+    async def download() -> list:
+        """Download the page several times in a row, then several at the same time."""
+        pages = [await transport.async_get(base_url + '/wiki/Cade_(horse)') for _ in range(3)]
+        pages.append(await transport.async_get(base_url + '/wiki/Moved'))
+        with pytest.raises(urllib.error.HTTPError):
+            await transport.async_get(base_url + '/wiki/Missing')
+        pages += await asyncio.gather(*[transport.async_get(base_url + '/wiki/Cade_(horse)')
+                                        for _ in range(4)])
+        await transport.async_close()
+        return pages
+
+    assert asyncio.run(download()) == [PAGE.encode()] * 8
+    assert transport.requests_sent == 11
+    assert transport.connections_opened <= 1 + 4
+    assert transport.bytes_received < 9 * len(PAGE)
+    assert len(set(_StandInHandler.client_ports[1:7])) == 1
+    assert transport.idle_connections() == 1
+    transport.close()
+
+
+def test_transport_async_reconnects(base_url) -> None:
+    """Test that a non-blocking download still succeeds after the server closed an idle
+    connection"""
+    transport = HTTPTransport()
+
+    async def download_twice() -> bytes:
+        """Download the page, close the idle connection's socket and download it again,
+        then close the connection."""
+        await transport.async_get(base_url + '/wiki/Cade_(horse)')
+        for connections in transport._async_idle.values():
+            for _, _, writer in connections:
+                writer.get_extra_info('socket').shutdown(socket.SHUT_RDWR)
+        page = await transport.async_get(base_url + '/wiki/Cade_(horse)')
+        await transport.async_close()
+        return page
+
+    assert asyncio.run(download_twice()) == PAGE.encode()
+    assert transport.connections_opened == 2
+    assert transport.idle_connections() == 0
+
+
+def test_async_fetches_use_transport(base_url, monkeypatch) -> None:
+    """Test that async_fetch_html downloads through the module's transport and the page
+    cache"""
+    transport = HTTPTransport()
+    cache = PageCache(':memory:')
+    monkeypatch.setattr(wikipedia_html_parsers, '_page_cache', cache)
+    monkeypatch.setattr(wikipedia_html_parsers, '_page_cache_set', True)
+    monkeypatch.setattr(wikipedia_html_parsers, '_transport', transport)
+
+    async def fetch_twice() -> list[str]:
+        """Fetch the page twice."""
+        pages = [await async_fetch_html(base_url + '/wiki/Cade_(horse)') for _ in range(2)]
+        await transport.async_close()
+        return pages
+
+    assert asyncio.run(fetch_twice()) == [PAGE, PAGE]
+    assert transport.requests_sent == 1
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_transport_proxies_from_environment(base_url, proxy_address, monkeypatch) -> None:
+    """Test that the transport goes through the proxies set in the environment, except to
+    the hosts in NO_PROXY"""
+    for name in ['http_proxy', 'https_proxy', 'no_proxy']:
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setenv('HTTP_PROXY', 'http://user:secret@' + proxy_address)
+    monkeypatch.setenv('HTTPS_PROXY', proxy_address)
+    monkeypatch.setenv('NO_PROXY', '127.0.0.1')
+    transport = HTTPTransport()
+
+    assert transport.get_text('http://en.wikipedia.org/wiki/Caf%C3%A9') == PAGE
+    assert transport.get_text(base_url + '/wiki/Cade_(horse)') == PAGE
+    with pytest.raises(urllib.error.URLError):
+        transport.get('https://en.wikipedia.org/wiki/Cade_(horse)')
+
+    # (the HTTP version of CONNECT requests depends on the version of http.client)
+    assert _ProxyHandler.requests[0] == ('GET http://en.wikipedia.org/wiki/Caf%C3%A9 HTTP/1.1',
+                                         'Basic dXNlcjpzZWNyZXQ=')
+    assert _ProxyHandler.requests[1][0].startswith('CONNECT en.wikipedia.org:443 ')
+    assert len(_ProxyHandler.requests) == 2
+    assert len(_StandInHandler.client_ports) == 1
+
+
+def test_transport_async_proxies(proxy_address) -> None:
+    """Test that non-blocking downloads go through the proxies too"""
+    transport = HTTPTransport(proxies={'http': 'http://' + proxy_address,
+                                       'https': 'http://' + proxy_address})
+
+    async def download() -> bytes:
+        """Download a page through the proxy, fail to open a tunnel, and close the
+        connections."""
+        page = await transport.async_get('http://en.wikipedia.org/wiki/Cade_(horse)')
+        with pytest.raises(urllib.error.URLError):
+            await transport.async_get('https://en.wikipedia.org/wiki/Cade_(horse)')
+        await transport.async_close()
+        return page
+
+    assert asyncio.run(download()) == PAGE.encode()
+    requests = [request for request, _ in _ProxyHandler.requests]
+    assert requests[0] == 'GET http://en.wikipedia.org/wiki/Cade_(horse) HTTP/1.1'
+    assert requests[1].startswith('CONNECT en.wikipedia.org:443 ') and len(requests) == 2
+
+
+if __name__ == '__main__':
+    pytest.main(['test_http_transport.py', '-v'])
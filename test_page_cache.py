@@ -0,0 +1,223 @@
+"""CSC111 Winter 2021 Final Project: Test Suite for page_cache
+
+Module Description
+===============================
+
+This module contains tests for the PageCache class, and for the way the fetch functions in
+wikipedia_html_parsers use it.
+
+Copyright and Usage Information
+===============================
+
+This file is provided solely for the personal and private use of Faizah Sayyid, Tina Zhang,
+Poorvi Sharma, and Courtney Amm (students at the University of Toronto St. George campus).
+All forms of distribution of this code, whether as given or with any changes, are expressly
+prohibited.
+
+This file is Copyright (c) 2021 Faizah Sayyid, Tina Zhang, Poorvi Sharma, Courtney Amm.
+"""
+import os
+import time
+from typing import Iterator
+
+import pytest
+
+import wikipedia_html_parsers
+from build_wikigraph import build_wikigraph
+from page_cache import PageCache
+
+SUGAR_URL = 'https://en.wikipedia.org/wiki/Rebecca_Sugar'
+SUGAR_HTML = '<p>Rebecca Sugar is an animator. She created a show.</p>' \
+             '<a href="/wiki/Steven_Universe">Steven Universe</a>'
+
+
+class _NoNetworkTransport:
+    """A transport that fails the test if a page is downloaded."""
+
+    def get_text(self, url: str) -> str:
+        """Fail the test."""
+        raise AssertionError('a page was downloaded: ' + url)
+
+
+class _CountingTransport:
+    """A transport that records every url downloaded, and returns SUGAR_HTML for each."""
+    downloads: list[str]
+
+    def __init__(self) -> None:
+        """Initialize a transport that hasn't downloaded anything yet."""
+        self.downloads = []
+
+    def get_text(self, url: str) -> str:
+        """Record the download of <url>, and return SUGAR_HTML."""
+        self.downloads.append(url)
+        return SUGAR_HTML
+
+
+class _StreamingTransport:
+    """A transport that streams made-up articles a few bytes at a time, and records every
+    url downloaded: article n links to articles 2n + 1 to 2n + 6."""
+    downloads: list[str]
+
+    def __init__(self) -> None:
+        """Initialize a transport that hasn't downloaded anything yet."""
+        self.downloads = []
+
+    def stream(self, url: str) -> Iterator[bytes]:
+        """Record the download of <url>, and yield its page in small pieces."""
+        self.downloads.append(url)
+        n = int(url[len('https://en.wikipedia.org/wiki/A'):])
+        page = ''.join(f'<p>Text.</p><a href="/wiki/A{2 * n + k}">A</a>' for k in range(1, 7))
+        for start in range(0, len(page), 16):
+            yield page[start:start + 16].encode()
+
+
+# ==================================================================================================
+# TEST PageCache
+# ==================================================================================================
+
+def test_cache_round_trip(tmp_path) -> None:
+    """Test that a cached page is returned unchanged, and persists when the cache is reopened"""
+    path = str(tmp_path / 'cache.sqlite3')
+    cache = PageCache(path)
+    cache.put(SUGAR_URL, SUGAR_HTML)
+    cache.close()
+
+    reopened = PageCache(path)
+
+    assert reopened.get(SUGAR_URL) == SUGAR_HTML
+    assert (reopened.hits, reopened.misses) == (1, 0)
+
+
+def test_cache_file_shared_by_processes(tmp_path) -> None:
+    """Test that a cache file can be read while another connection writes to it, as the
+    worker processes of a sharded build do"""
+    path = str(tmp_path / 'cache.sqlite3')
+    writer, reader = PageCache(path), PageCache(path)
+    journal_mode = writer._connection.execute('PRAGMA journal_mode').fetchone()[0]
+    assert journal_mode == 'wal'
+
+    writer.put(SUGAR_URL, SUGAR_HTML)
+    assert reader.get(SUGAR_URL) == SUGAR_HTML
+    writer.close()
+    reader.close()
+
+
+def test_cache_canonical_key() -> None:
+    """Test that urls that only differ by a fragment or by http/https share a cache entry"""
+    cache = PageCache(':memory:')
+    cache.put(SUGAR_URL + '#Career', SUGAR_HTML)
+
+    assert cache.get('http://en.wikipedia.org/wiki/Rebecca_Sugar') == SUGAR_HTML
+    assert len(cache) == 1
+
+
+def test_cache_stores_compressed() -> None:
+    """Test that pages are stored compressed"""
+    cache = PageCache(':memory:')
+    cache.put(SUGAR_URL, SUGAR_HTML * 100)
+
+    assert 0 < cache.size_in_bytes() < len(SUGAR_HTML * 100)
+
+
+def test_cache_ttl() -> None:
+    """Test that expired pages count as misses and are removed"""
+    cache = PageCache(':memory:', ttl=0.01)
+    cache.put(SUGAR_URL, SUGAR_HTML)
+    time.sleep(0.05)
+
+    assert cache.get(SUGAR_URL) is None
+    assert (cache.hits, cache.misses) == (0, 1)
+    assert len(cache) == 0
+
+
+def test_cache_lru_eviction() -> None:
+    """Test that the least recently used page is evicted once the cache is full"""
+    cache = PageCache(':memory:', max_bytes=100)
+    cache.put('https://en.wikipedia.org/wiki/A', 'a')
+    time.sleep(0.01)
+    cache.put('https://en.wikipedia.org/wiki/B', 'b')
+    time.sleep(0.01)
+    cache.get('https://en.wikipedia.org/wiki/A')
+    cache.max_bytes = cache.size_in_bytes()
+    time.sleep(0.01)
+    cache.put('https://en.wikipedia.org/wiki/C', 'c')
+
+    assert 'https://en.wikipedia.org/wiki/A' in cache
+    assert 'https://en.wikipedia.org/wiki/B' not in cache
+    assert 'https://en.wikipedia.org/wiki/C' in cache
+
+
+# ==================================================================================================
+# TEST fetch functions through the cache
+# ==================================================================================================
+
+def test_fetches_use_cache(monkeypatch) -> None:
+    """Test that every fetch function is answered by the cache without downloading"""
+    cache = PageCache(':memory:')
+    cache.put(SUGAR_URL, SUGAR_HTML)
+    monkeypatch.setattr(wikipedia_html_parsers, '_page_cache', cache)
+    monkeypatch.setattr(wikipedia_html_parsers, '_page_cache_set', True)
+    monkeypatch.setattr(wikipedia_html_parsers, '_transport', _NoNetworkTransport())
+    wikipedia_html_parsers.clear_document_memo()
+
+    assert wikipedia_html_parsers.get_adjacent_urls(SUGAR_URL) == \
+        ['https://en.wikipedia.org/wiki/Steven_Universe']
+    assert wikipedia_html_parsers.get_summary(SUGAR_URL) == \
+        'Rebecca Sugar is an animator. She created a show.'
+    assert cache.hits == 2
+    assert cache.misses == 0
+
+
+def test_fetch_without_cache(monkeypatch) -> None:
+    """Test that pages are downloaded every time they are fetched when the cache is disabled,
+    and that nothing is cached"""
+    transport = _CountingTransport()
+    monkeypatch.setattr(wikipedia_html_parsers, '_page_cache', None)
+    monkeypatch.setattr(wikipedia_html_parsers, '_page_cache_set', True)
+    monkeypatch.setattr(wikipedia_html_parsers, '_transport', transport)
+
+    assert wikipedia_html_parsers.fetch_html(SUGAR_URL) == SUGAR_HTML
+    assert wikipedia_html_parsers.fetch_html(SUGAR_URL) == SUGAR_HTML
+    assert transport.downloads == [SUGAR_URL, SUGAR_URL]
+    assert wikipedia_html_parsers.get_page_cache() is None
+    assert not os.path.exists(wikipedia_html_parsers.DEFAULT_CACHE_PATH)
+
+
+def test_repeat_build_uses_cache(monkeypatch) -> None:
+    """Test that building the same graph again downloads nothing, even though the first
+    build only read the start of some pages and summaries"""
+    transport = _StreamingTransport()
+    cache = PageCache(':memory:')
+    monkeypatch.setattr(wikipedia_html_parsers, '_page_cache', cache)
+    monkeypatch.setattr(wikipedia_html_parsers, '_page_cache_set', True)
+    monkeypatch.setattr(wikipedia_html_parsers, '_transport', transport)
+
+    first = build_wikigraph('https://en.wikipedia.org/wiki/A0', 10, 2)
+    for name in first.get_all_vertices():
+        wikipedia_html_parsers.get_summary(first.get_vertex(name).url)
+    downloads = len(transport.downloads)
+    wikipedia_html_parsers.clear_document_memo()
+
+    second = build_wikigraph('https://en.wikipedia.org/wiki/A0', 10, 2)
+    for name in second.get_all_vertices():
+        wikipedia_html_parsers.get_summary(second.get_vertex(name).url)
+
+    assert len(transport.downloads) == downloads == len(set(transport.downloads))
+    assert second.get_all_vertices() == first.get_all_vertices()
+
+
+def test_default_cache_created(monkeypatch) -> None:
+    """Test that the default cache is created in DEFAULT_CACHE_PATH (a temporary file in the
+    tests) the first time it is used, and keeps the pages downloaded"""
+    transport = _CountingTransport()
+    monkeypatch.setattr(wikipedia_html_parsers, '_transport', transport)
+
+    assert wikipedia_html_parsers.fetch_html(SUGAR_URL) == SUGAR_HTML
+    assert wikipedia_html_parsers.fetch_html(SUGAR_URL) == SUGAR_HTML
+    assert transport.downloads == [SUGAR_URL]
+    assert os.path.exists(wikipedia_html_parsers.DEFAULT_CACHE_PATH)
+    assert SUGAR_URL in wikipedia_html_parsers.get_page_cache()
+
+
+if __name__ == '__main__':
+    pytest.main(['test_page_cache.py', '-v'])
@@ -0,0 +1,205 @@
+"""CSC111 Winter 2021 Final Project: Test Suite for weighted_paths
+
+Module Description
+===============================
+
+This module contains tests that check the shortest weighted paths and nearest articles found
+by WeightedWikiGraph and PathFinder against the distances between every pair of vertices,
+computed with the Floyd-Warshall algorithm on small random graphs.
+
+Copyright and Usage Information
+===============================
+
+This file is provided solely for the personal and private use of Faizah Sayyid, Tina Zhang,
+Poorvi Sharma, and Courtney Amm (students at the University of Toronto St. George campus).
+All forms of distribution of this code, whether as given or with any changes, are expressly
+prohibited.
+
+This file is Copyright (c) 2021 Faizah Sayyid, Tina Zhang, Poorvi Sharma, Courtney Amm.
+"""
+import math
+import random
+
+import pytest
+
+from frozen_wikigraph import load_wikigraph, save_wikigraph
+from weighted_paths import PathFinder, dijkstra, edge_length
+from weighted_wikigraph_class import WeightedWikiGraph
+from wikigraph import WikiGraph
+
+WIKI = 'https://en.wikipedia.org/wiki/'
+
+
+def _random_graph(seed: int, num_vertices: int = 40) -> WeightedWikiGraph:
+    """Return a random WeightedWikiGraph with two connected pieces and an isolated vertex."""
+    rng = random.Random(seed)
+    graph = WeightedWikiGraph()
+    names = [f'Weighted article {i}' for i in range(num_vertices)]
+    for name in names:
+        graph.add_vertex(name, WIKI + name.replace(' ', '_'))
+    for _ in range(2 * num_vertices):
+        piece = rng.choice([names[:num_vertices // 2], names[num_vertices // 2:-1]])
+        name1, name2 = rng.sample(piece, 2)
+        graph.add_edge(name1, name2, rng.choice([0, 0.5, 1, 3, 10]))
+    return graph
+
+
+def _all_distances(graph: WeightedWikiGraph) -> dict[str, dict[str, float]]:
+    """Return the weighted distance between every pair of vertices of <graph>."""
+    names = list(graph.get_all_vertices())
+    distances = {v: {u: 0.0 if u == v else math.inf for u in names} for v in names}
+    for v in names:
+        for u, weight in graph.get_neighbours(v):
+            distances[v][u] = edge_length(weight)
+    for w in names:
+        for v in names:
+            for u in names:
+                distances[v][u] = min(distances[v][u], distances[v][w] + distances[w][u])
+    return distances
+
+
+def _path_length(graph: WeightedWikiGraph, path: list) -> float:
+    """Return the total length of <path>, checking that it follows edges of <graph>."""
+    # ACCUMULATOR total keeps track of the length of the path so far
+    total = 0.0
+    for v, u in zip(path, path[1:]):
+        weights = {name: weight for name, weight in graph.get_neighbours(v)}
+        total += edge_length(weights[u])
+    return total
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_shortest_paths_match_floyd_warshall(seed) -> None:
+    """Test that every shortest path is a path of the right length, found with and without
+    landmarks"""
+    graph = _random_graph(seed)
+    expected = _all_distances(graph)
+    finders = [PathFinder(graph), PathFinder(graph, num_landmarks=0)]
+    rng = random.Random(seed)
+
+    for _ in range(150):
+        name1, name2 = rng.sample(sorted(expected), 2)
+        distance = expected[name1][name2]
+        assert math.isclose(graph.weighted_distance(name1, name2), distance)
+        for finder in finders:
+            assert math.isclose(finder.distance(name1, name2), distance)
+
+        paths = [graph.shortest_path(name1, name2)] + \
+            [finder.shortest_path(name1, name2) for finder in finders]
+        for path in paths:
+            if distance == math.inf:
+                assert path is None
+            else:
+                assert path[0] == name1 and path[-1] == name2
+                assert math.isclose(_path_length(graph, path), distance)
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_nearest_match_floyd_warshall(seed) -> None:
+    """Test that the nearest articles are the k closest, from the closest to the farthest"""
+    graph = _random_graph(seed)
+    expected = _all_distances(graph)
+    finder = PathFinder(graph)
+
+    for name in sorted(expected)[::5]:
+        reachable = sorted(d for u, d in expected[name].items() if u != name and d < math.inf)
+        for k in [1, 5, 100]:
+            for nearest in [graph.nearest(name, k), finder.nearest(name, k)]:
+                assert [d for _, d in nearest] == pytest.approx(reachable[:k])
+                assert all(math.isclose(expected[name][u], d) for u, d in nearest)
+
+
+def test_searches_stop_early() -> None:
+    """Test that a search stops once the target or the k nearest vertices are settled"""
+    line = {i: [(j, 1.0) for j in (i - 1, i + 1) if 0 <= j < 1000] for i in range(1000)}
+    expanded = []
+
+    def neighbours(v: int) -> list:
+        """Return the neighbours of v on the line, recording that v was expanded."""
+        expanded.append(v)
+        return line[v]
+
+    settled, _ = dijkstra(500, neighbours, target=503)
+    assert settled[503] == 3.0 and len(expanded) <= 6
+    expanded.clear()
+    settled, _ = dijkstra(500, neighbours, k=4)
+    assert sorted(settled) == [498, 499, 500, 501, 502] and len(expanded) <= 5
+
+
+def test_landmarks_steer_the_search() -> None:
+    """Test that landmarks are spread over every connected piece, and that searching with
+    them settles fewer vertices on a long path"""
+    graph = WeightedWikiGraph()
+    for i in range(200):
+        graph.add_vertex(f'Weighted article {i}', WIKI + f'Weighted_article_{i}')
+    for i in range(199):
+        if i != 99:
+            graph.add_edge(f'Weighted article {i}', f'Weighted article {i + 1}', i % 3)
+
+    finder = PathFinder(graph, num_landmarks=2)
+    assert not graph.connected(*finder.landmarks)
+
+    frozen = finder.graph
+    source, target = frozen.vertex_id('Weighted article 150'), frozen.vertex_id(
+        'Weighted article 120')
+    guided, _ = dijkstra(source, finder._edges, target=target,
+                         heuristic=finder._lower_bound(target))
+    unguided, _ = dijkstra(source, finder._edges, target=target)
+    assert len(guided) < len(unguided)
+    assert guided[target] == unguided[target]
+
+
+def test_loaded_and_unweighted_graphs(tmp_path) -> None:
+    """Test that path finders work on graph files and unweighted graphs, where every edge
+    has the same length"""
+    graph = _random_graph(0)
+    path = str(tmp_path / 'graph.wikigraph')
+    save_wikigraph(graph, path)
+    loaded = PathFinder(load_wikigraph(path))
+    assert loaded.nearest('Weighted article 0', 5) == PathFinder(graph).nearest(
+        'Weighted article 0', 5)
+
+    unweighted = WikiGraph()
+    for name in ['Matchem', 'Cade (horse)', 'Bald Galloway']:
+        unweighted.add_vertex(name, WIKI + name.replace(' ', '_'))
+    unweighted.add_edge('Matchem', 'Cade (horse)')
+    unweighted.add_edge('Cade (horse)', 'Bald Galloway')
+    finder = PathFinder(unweighted)
+    assert finder.shortest_path('Matchem', 'Bald Galloway') == \
+        ['Matchem', 'Cade (horse)', 'Bald Galloway']
+    assert finder.distance('Matchem', 'Bald Galloway') == 2 * edge_length(1.0)
+
+
+def test_missing_vertices_and_empty_graphs() -> None:
+    """Test that names that aren't in the graph raise a ValueError"""
+    graph = _random_graph(0)
+    finder = PathFinder(graph)
+    for search in [graph.shortest_path, graph.weighted_distance, finder.shortest_path,
+                   finder.distance]:
+        with pytest.raises(ValueError):
+            search('Weighted article 0', 'Matchem')
+    with pytest.raises(ValueError):
+        graph.nearest('Matchem', 3)
+    with pytest.raises(ValueError):
+        finder.nearest('Matchem', 3)
+
+    assert PathFinder(WeightedWikiGraph()).landmarks == []
+    assert graph.nearest('Weighted article 39', 3) == []
+
+
+if __name__ == '__main__':
+    pytest.main(['test_weighted_paths.py', '-v'])
+
+    import python_ta.contracts
+
+    python_ta.contracts.check_all_contracts()
+
+    import python_ta
+
+    python_ta.check_all(config={
+        'extra-imports': ['math', 'random', 'frozen_wikigraph', 'weighted_paths',
+                          'weighted_wikigraph_class', 'wikigraph'],
+        'allowed-io': [],
+        'max-line-length': 100,
+        'disable': ['E1136']
+    })
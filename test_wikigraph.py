@@ -0,0 +1,110 @@
+"""CSC111 Winter 2021 Final Project: Test Suite for wikigraph
+
+Module Description
+===============================
+
+This module contains tests for the connected components kept by WikiGraph and
+WeightedWikiGraph as edges are added.
+
+Copyright and Usage Information
+===============================
+
+This file is provided solely for the personal and private use of Faizah Sayyid, Tina Zhang,
+Poorvi Sharma, and Courtney Amm (students at the University of Toronto St. George campus).
+All forms of distribution of this code, whether as given or with any changes, are expressly
+prohibited.
+
+This file is Copyright (c) 2021 Faizah Sayyid, Tina Zhang, Poorvi Sharma, Courtney Amm.
+"""
+import random
+
+import pytest
+
+from weighted_wikigraph_class import WeightedWikiGraph
+from wikigraph import WikiGraph
+
+WIKI = 'https://en.wikipedia.org/wiki/'
+
+
+def _reachable(graph: WikiGraph, name: str) -> set:
+    """Return the names of the vertices of <graph> connected to the vertex called <name>,
+    found by searching its edges."""
+    reached = {name}
+    # ACCUMULATOR queue holds the reached vertices whose neighbours haven't been looked at
+    queue = [name]
+    while queue:
+        for neighbour in WikiGraph.get_neighbours(graph, queue.pop()):
+            if neighbour not in reached:
+                reached.add(neighbour)
+                queue.append(neighbour)
+    return reached
+
+
+def test_connected_long_chain() -> None:
+    """Test that the ends of a very long path are connected (without running out of
+    recursion or time)"""
+    graph = WikiGraph()
+    names = [f'Chain {i}' for i in range(20000)]
+    for name in names:
+        graph.add_vertex(name, WIKI + name.replace(' ', '_'))
+    for name1, name2 in zip(names, names[1:]):
+        graph.add_edge(name1, name2)
+
+    assert graph.connected(names[0], names[-1])
+    assert graph.component_size(names[5000]) == 20000
+    assert graph.num_components() == 1
+
+
+@pytest.mark.parametrize('graph_class', [WikiGraph, WeightedWikiGraph])
+@pytest.mark.parametrize('seed', range(5))
+def test_components_match_search(graph_class, seed) -> None:
+    """Test that the components kept while edges are added match the ones found by
+    searching the finished graph, at every step"""
+    rng = random.Random(seed)
+    graph = graph_class()
+    names = [f'Component article {i}' for i in range(80)]
+    for name in names:
+        graph.add_vertex(name, WIKI + name.replace(' ', '_'))
+
+    for step in range(60):
+        graph.add_edge(*rng.sample(names, 2))
+        if step % 20 == 19:
+            expected = {frozenset(_reachable(graph, name)) for name in names}
+            assert {frozenset(c) for c in graph.components()} == expected
+            assert graph.num_components() == len(expected)
+            for name in rng.sample(names, 10):
+                assert graph.component(name) == _reachable(graph, name)
+                assert graph.component_size(name) == len(_reachable(graph, name))
+                other = rng.choice(names)
+                assert graph.connected(name, other) == (other in _reachable(graph, name))
+
+
+def test_components_missing_vertex() -> None:
+    """Test that the component queries handle names that aren't vertices like the rest of
+    WikiGraph"""
+    graph = WikiGraph()
+    graph.add_vertex('Matchem', WIKI + 'Matchem')
+
+    assert not graph.connected('Matchem', 'Cade (horse)')
+    assert graph.components() == [{'Matchem'}]
+    with pytest.raises(ValueError):
+        graph.component_size('Cade (horse)')
+    with pytest.raises(ValueError):
+        graph.component('Cade (horse)')
+
+
+if __name__ == '__main__':
+    pytest.main(['test_wikigraph.py', '-v'])
+
+    import python_ta.contracts
+
+    python_ta.contracts.check_all_contracts()
+
+    import python_ta
+
+    python_ta.check_all(config={
+        'extra-imports': ['random', 'weighted_wikigraph_class', 'wikigraph'],
+        'allowed-io': [],
+        'max-line-length': 100,
+        'disable': ['E1136']
+    })
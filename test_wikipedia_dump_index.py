@@ -0,0 +1,127 @@
+"""CSC111 Winter 2021 Final Project: Test Suite for wikipedia_dump_index
+
+Module Description
+===============================
+
+This module contains tests for importing a pages-articles dump into a link index, and for
+building graphs from that index instead of from Wikipedia.
+
+Copyright and Usage Information
+===============================
+
+This file is provided solely for the personal and private use of Faizah Sayyid, Tina Zhang,
+Poorvi Sharma, and Courtney Amm (students at the University of Toronto St. George campus).
+All forms of distribution of this code, whether as given or with any changes, are expressly
+prohibited.
+
+This file is Copyright (c) 2021 Faizah Sayyid, Tina Zhang, Poorvi Sharma, Courtney Amm.
+"""
+import bz2
+
+import pytest
+
+import wikipedia_html_parsers
+from build_wikigraph import build_wikigraph, build_weighted_wikigraph
+from wikipedia_dump_index import LinkIndex, import_pages_articles
+
+WIKI = 'https://en.wikipedia.org/wiki/'
+
+PAGES = [
+    ('Cade (horse)', None,
+     "'''Cade''' was sired by the [[Godolphin Arabian]] out of [[Roxana (horse)|Roxana]]. "
+     "The Godolphin Arabian also sired [[Lath (horse)|Lath]]. [[Help:Contents]] "
+     "[[File:Cade.jpg]] [[Leading sire in Great Britain & Ireland]] [[Red link]]"),
+    ('Godolphin Arabian', None,
+     "The Godolphin Arabian sired [[cade (horse)|Cade]] and [[Lath (horse)]]. "
+     "He was a [[Thoroughbred]]. Thoroughbred horses."),
+    ('Roxana (horse)', None, "Roxana was the dam of [[Cade (horse)]] and [[Lath (horse)]]."),
+    ('Lath (horse)', None, "Lath was a [[Thoroughbred]] by the [[The Godolphin]]."),
+    ('The Godolphin', 'Godolphin Arabian', '#REDIRECT [[Godolphin Arabian]]'),
+    ('Thoroughbred', None, "A [[Horse]] breed."),
+    ('Horse', None, "[[Thoroughbred]]"),
+    ('Leading sire in Great Britain & Ireland', None, "[[Cade (horse)]]"),
+]
+
+
+def _page_xml(title: str, redirect, text: str, namespace: int = 0) -> str:
+    """Return the <page> element of a dump."""
+    redirect_xml = '' if redirect is None else f'<redirect title="{redirect}" />'
+    text = text.replace('&', '&amp;').replace('<', '&lt;')
+    title = title.replace('&', '&amp;')
+    return f'<page><title>{title}</title><ns>{namespace}</ns><id>1</id>{redirect_xml}' \
+           f'<revision><id>2</id><text bytes="1">{text}</text></revision></page>'
+
+
+@pytest.fixture
+def index(tmp_path) -> LinkIndex:
+    """Import PAGES (plus a talk page) from a bz2 compressed dump."""
+    xml = '<mediawiki xmlns="http://www.mediawiki.org/xml/export-0.10/"><siteinfo />' \
+          + ''.join(_page_xml(*page) for page in PAGES) \
+          + _page_xml('Talk:Cade (horse)', None, '[[Horse]]', 1) + '</mediawiki>'
+    dump_path = str(tmp_path / 'pages-articles.xml.bz2')
+    with bz2.open(dump_path, 'wt', encoding='utf-8') as dump:
+        dump.write(xml)
+
+    meta = import_pages_articles(dump_path, str(tmp_path / 'index'))
+    assert meta['articles'] == 7
+
+    link_index = LinkIndex(str(tmp_path / 'index'))
+    yield link_index
+    link_index.close()
+
+
+def test_index_titles(index) -> None:
+    """Test looking up articles by title, including through a redirect"""
+    cade = index.article_id('Cade_(horse)')
+
+    assert index.title(cade) == 'Cade (horse)'
+    assert index.article_id('The Godolphin') == index.article_id('Godolphin Arabian')
+    assert index.article_id('Talk:Cade (horse)') is None
+    assert index.article_id('Red link') is None
+
+
+def test_index_adjacent_urls(index) -> None:
+    """Test that links are returned in order, filtered with UNWANTED, with redirects resolved
+    and links to missing pages dropped"""
+    assert index.get_adjacent_urls(WIKI + 'Cade_(horse)') == [
+        WIKI + 'Godolphin_Arabian', WIKI + 'Roxana_(horse)', WIKI + 'Lath_(horse)',
+        WIKI + 'Leading_sire_in_Great_Britain_%26_Ireland']
+    assert index.get_adjacent_urls(WIKI + 'Lath_(horse)') == [
+        WIKI + 'Thoroughbred', WIKI + 'Godolphin_Arabian']
+    assert index.get_adjacent_urls(WIKI + 'Nowhere') == []
+
+
+def test_index_adjacent_urls_weighted(index) -> None:
+    """Test that weights count each title in the wikitext, including where it is written with
+    a lowercase first letter, and are sorted highest first"""
+    assert index.get_adjacent_urls_weighted(WIKI + 'Godolphin_Arabian') == [
+        ((WIKI + 'Thoroughbred', 'Thoroughbred'), 2),
+        ((WIKI + 'Cade_(horse)', 'Cade (horse)'), 1),
+        ((WIKI + 'Lath_(horse)', 'Lath (horse)'), 1)]
+
+
+def test_build_from_index(index) -> None:
+    """Test building both kinds of graph from the index"""
+    graph = build_wikigraph(WIKI + 'Cade_(horse)', 5, 2, backend=index)
+    weighted = build_weighted_wikigraph(WIKI + 'Cade_(horse)', 5, 2, backend=index)
+
+    assert graph.get_neighbours('Cade (horse)') == {'Godolphin Arabian', 'Roxana (horse)'}
+    assert graph.get_neighbours('Godolphin Arabian') == {'Cade (horse)', 'Lath (horse)',
+                                                         'Thoroughbred'}
+    assert len(graph.get_all_vertices()) == 6
+    assert len(weighted.get_all_vertices()) == 6
+
+
+def test_sharded_build_from_index(index, monkeypatch) -> None:
+    """Test that the index can be sent to worker processes, which open it again"""
+    monkeypatch.setattr(wikipedia_html_parsers, '_page_cache', None)
+    monkeypatch.setattr(wikipedia_html_parsers, '_page_cache_set', True)
+    serial = build_wikigraph(WIKI + 'Cade_(horse)', 5, 2, backend=index)
+    sharded = build_wikigraph(WIKI + 'Cade_(horse)', 5, 2, backend=index, processes=2)
+
+    assert {v: sharded.get_neighbours(v) for v in sharded.get_all_vertices()} == \
+        {v: serial.get_neighbours(v) for v in serial.get_all_vertices()}
+
+
+if __name__ == '__main__':
+    pytest.main(['test_wikipedia_dump_index.py', '-v'])
@@ -16,6 +16,11 @@ prohibited.
 
 This file is Copyright (c) 2021 Faizah Sayyid, Tina Zhang, Poorvi Sharma, Courtney Amm.
 """
+import pathlib
+import random
+import time
+
+import pytest
 
 import wikipedia_html_parsers
 
@@ -148,6 +153,48 @@ def test_wsp_strips_tail() -> None:
     assert summary_parser.summary == 'what is life. life is meaningless.'
 
 
+# ==================================================================================================
+# TEST ArticleDocument
+# ==================================================================================================
+
+CADE_URL = 'https://en.wikipedia.org/wiki/Cade_(horse)'
+CADE_HTML = '<html><body><img src="icon.png" height="20">' \
+            '<img src="//upload.wikimedia.org/Cade.jpg" height="220">' \
+            '<p>Cade was a <a href="/wiki/Thoroughbred">Thoroughbred</a> sire.<sup>[1]</sup> ' \
+            'He was sired by the <a href="/wiki/Godolphin_Arabian">Godolphin Arabian</a>. ' \
+            'He was also a Thoroughbred.</p>\n' \
+            '<a href="/wiki/Help:Contents">Help</a><a href="/wiki/Cade_(horse)">Cade</a>' \
+            '<a href="/wiki/Thoroughbred">again</a></body></html>'
+
+
+def test_document_matches_parsers() -> None:
+    """Test that ArticleDocument extracts the same links, summary and image as the separate
+    parsers do"""
+    document = wikipedia_html_parsers.ArticleDocument(CADE_URL, CADE_HTML)
+
+    article_parser = wikipedia_html_parsers.WikipediaArticleParser(CADE_URL)
+    article_parser.feed(CADE_HTML)
+    summary_parser = wikipedia_html_parsers.WikipediaSummaryParser()
+    summary_parser.feed(CADE_HTML)
+    image_parser = wikipedia_html_parsers._WikipediaImageParser()
+    image_parser.feed(CADE_HTML)
+
+    assert document.links == article_parser.articles
+    assert document.summary == summary_parser.summary
+    assert document.image == image_parser.image == '//upload.wikimedia.org/Cade.jpg'
+
+
+def test_document_weighted_links() -> None:
+    """Test that ArticleDocument.weighted_links counts each title on the page and sorts the
+    links from the highest weight to the lowest"""
+    document = wikipedia_html_parsers.ArticleDocument(CADE_URL, CADE_HTML)
+
+    assert document.weighted_links() == [
+        (('https://en.wikipedia.org/wiki/Thoroughbred', 'Thoroughbred'), 4),
+        (('https://en.wikipedia.org/wiki/Godolphin_Arabian', 'Godolphin Arabian'), 1)
+    ]
+
+
 # ==================================================================================================
 # TEST get_adjacent_url and get_adjacent_url_weighted
 # ==================================================================================================
@@ -265,8 +312,362 @@ def test_get_summary_sentence_one() -> None:
     assert expected == actual
 
 
+# ==================================================================================================
+# TEST extract_article_links
+# ==================================================================================================
+
+# Recorded Wikipedia articles, trimmed down, named after their titles
+TEST_PAGES = pathlib.Path(__file__).parent / 'test_pages'
+
+# Pages with the markup extract_article_links has to treat exactly like HTMLParser does
+LINK_CORNER_CASES = [
+    CADE_HTML,
+    '<A HREF="/wiki/Upper_Case">x</A><a\nclass="y"\thref = \'/wiki/Spaced\'>',
+    '<a href=/wiki/Bare_Value title=x>x</a><a title="a > b" href="/wiki/After_Gt">',
+    '<a href="/wiki/AT&amp;T">x</a><a href="/wiki/Caf&eacute;">x</a><a href="&#47;wiki/X">',
+    '<!-- <a href="/wiki/Commented"> --><a href="/wiki/Shown"><!-- x -- ><a href="/wiki/B">',
+    '<script>document.write(\'<a href="/wiki/Scripted">\')</script><a href="/wiki/C">',
+    '<STYLE>a[href="/wiki/Styled"] {}</style ><a href="/wiki/D"><script/><a href="/wiki/E">',
+    '<!DOCTYPE html><?xml version="1.0"?><a href="/wiki/F"><abbr href="/wiki/Not_A_Link">',
+    '<a href="/wiki/G" href="/wiki/H"><a/href="/wiki/I"><a href="/wiki/J"/>',
+    '<a href="/wiki/Help:Contents"><a href="/wiki/Main_Page"><a href="/wiki/Cat.jpg">',
+    '<a id="/wiki/Not_Href"><a href="https://en.wikipedia.org/wiki/Absolute"><a href="/w/x">',
+    '<a href="/wiki/K">x</a><a href="/wiki/Unclosed"',
+    '<a href="/wiki/L"><!-- never closed <a href="/wiki/M">',
+    '<a href="/wiki/Dupe"><a href="/wiki/N"><a href="/wiki/Dupe"><a href="/wiki/Cade_(horse)">',
+    '<a title=don\'t href="/wiki/Apostrophe"><a href="/wiki/Unicode_\u00e9\u6f22">',
+    '</<a href="/wiki/R"><a<a href="/wiki/S"><a  href="/wiki/T" <b>',
+    '<![CDATA[<a href="/wiki/U">]]><a href="/wiki/V"><![if x]><a href="/wiki/W"><![endif]>',
+    '<script>"</script ><a href="/wiki/X"><STYLE>a</style\n><a href="/wiki/Y">',
+    '<a title=\'x href="/wiki/Quoted"\' href="/wiki/Z"><a href><a href=/wiki/Slash/>'
+]
+
+
+def _reference_links(url: str, html: str) -> list[str]:
+    """Return the links WikipediaArticleParser finds in <html>."""
+    parser = wikipedia_html_parsers.WikipediaArticleParser(url)
+    parser.feed(html)
+    return parser.articles
+
+
+def _random_page(rng: random.Random) -> str:
+    """Return a made-up page mixing links with the markup around them."""
+    titles = ['Cat', 'Dog', 'Help:Contents', 'Fish_&amp;_chips', 'Cade_(horse)', 'Q.png',
+              'Main_Page', 'Caf%C3%A9', 'X_(disambiguation)', 'Talk:Dog']
+    pieces = []
+    for _ in range(rng.randint(1, 60)):
+        title = rng.choice(titles)
+        quote = rng.choice(['"', "'", ''])
+        space = rng.choice([' ', '\n', '  ', ' / '])
+        pieces.append(rng.choice([
+            f'<a{space}href={quote}/wiki/{title}{quote}>{title}</a>',
+            f'<A class="mw"{space}HREF{rng.choice(["=", " = "])}"/wiki/{title}">',
+            f'<a title="see /wiki/{title}" href="/w/index.php?title={title}">',
+            f'<!-- <a href="/wiki/{title}"> -->',
+            f'<script>var s = "<a href=\'/wiki/{title}\'>";</script>',
+            f'<p>Text about {title} &amp; more.</p>',
+            f'<img src="/wiki/{title}" height="60">',
+            f'<a href="/wiki/{title}#Section"{space}/>',
+        ]))
+    return ''.join(pieces)
+
+
+def test_fast_extractor_matches_parser() -> None:
+    """Test that extract_article_links finds the same links as WikipediaArticleParser,
+    in the same order, on pages with unusual markup"""
+    for html in LINK_CORNER_CASES:
+        expected = _reference_links(CADE_URL, html)
+
+        assert wikipedia_html_parsers.extract_article_links(CADE_URL, html) == expected
+        assert wikipedia_html_parsers.extract_article_links(CADE_URL,
+                                                            html.encode()) == expected
+
+
+def test_fast_extractor_matches_parser_random() -> None:
+    """Test that extract_article_links finds the same links as WikipediaArticleParser on
+    many made-up pages"""
+    rng = random.Random(111)
+    for _ in range(500):
+        html = _random_page(rng)
+        assert wikipedia_html_parsers.extract_article_links(CADE_URL, html) \
+            == _reference_links(CADE_URL, html)
+
+
+def test_fast_extractor_unterminated_tags() -> None:
+    """Test that extract_article_links doesn't backtrack through the attributes of a tag
+    that never ends"""
+    pages = {'<a ' + 'x=y ' * 20000: [], '<a' + ' b' * 20000: [],
+             '<a ' + 'title="a" ' * 20000 + '<a href="/wiki/Q">':
+                 ['https://en.wikipedia.org/wiki/Q']}
+    start = time.perf_counter()
+    for html, expected in pages.items():
+        assert wikipedia_html_parsers.extract_article_links(CADE_URL, html) == expected
+    assert time.perf_counter() - start < 5
+
+
+def test_fast_extractor_matches_parser_recorded_pages() -> None:
+    """Test that extract_article_links finds the same links as WikipediaArticleParser on
+    the recorded articles in test_pages"""
+    paths = sorted(TEST_PAGES.glob('*.html'))
+    assert paths != []
+
+    for path in paths:
+        url = 'https://en.wikipedia.org/wiki/' + path.stem
+        html = path.read_bytes()
+        expected = _reference_links(url, html.decode())
+
+        assert len(expected) > 10
+        assert wikipedia_html_parsers.extract_article_links(url, html) == expected
+        assert wikipedia_html_parsers.extract_article_links(url, html.decode()) == expected
+
+
+def test_fast_extractor_unknown_marked_section() -> None:
+    """Test that extract_article_links stops at a marked section html.parser doesn't know,
+    like html.parser does before Python 3.10 (later versions raise an error there)"""
+    html = '<a href="/wiki/Before"><![unknown[<a href="/wiki/After">]]>'
+    assert wikipedia_html_parsers.extract_article_links(CADE_URL, html) == \
+        ['https://en.wikipedia.org/wiki/Before']
+
+
+def test_set_link_extractor(monkeypatch) -> None:
+    """Test that parse_adjacent_urls uses the extractor chosen with set_link_extractor"""
+    monkeypatch.setattr(wikipedia_html_parsers, '_link_extractor',
+                        wikipedia_html_parsers.EXTRACTOR_FAST)
+    html = LINK_CORNER_CASES[4]
+    fast = wikipedia_html_parsers.parse_adjacent_urls(CADE_URL, html)
+
+    wikipedia_html_parsers.set_link_extractor(wikipedia_html_parsers.EXTRACTOR_HTML_PARSER)
+    assert wikipedia_html_parsers.parse_adjacent_urls(CADE_URL, html) == fast
+
+    with pytest.raises(ValueError):
+        wikipedia_html_parsers.set_link_extractor('lxml')
+
+
+# ==================================================================================================
+# TEST count_titles and RankedLinks
+# ==================================================================================================
+
+
+def test_count_titles_matches_str_count() -> None:
+    """Test that count_titles counts every title exactly like str.count, including titles
+    that overlap each other or themselves"""
+    rng = random.Random(111)
+    for _ in range(2000):
+        html = ''.join(rng.choice('ab c') for _ in range(rng.randint(0, 80)))
+        titles = [''.join(rng.choice('ab c') for _ in range(rng.randint(0, 5)))
+                  for _ in range(rng.randint(0, 10))]
+
+        assert wikipedia_html_parsers.count_titles(html, titles) \
+            == {title: html.count(title) for title in titles}
+
+
+def test_count_titles_on_article() -> None:
+    """Test that count_titles finds the same counts as str.count for the titles of the links
+    on an article"""
+    titles = [wikipedia_html_parsers.get_title(link)
+              for link in wikipedia_html_parsers.extract_article_links(CADE_URL, CADE_HTML)]
+    titles += ['Great Britain', 'Kingdom of Great Britain', 'Thorough', 'Cade']
+
+    assert wikipedia_html_parsers.count_titles(CADE_HTML, titles) \
+        == {title: CADE_HTML.count(title) for title in titles}
+
+
+def test_link_counts_escaped_title() -> None:
+    """Test that the title of a link is counted even when the html code escapes it, as it
+    does with & in AT&T"""
+    html = '<a href="/wiki/AT%26T" title="AT&amp;T">AT&amp;T</a> AT&amp;T'
+    doc = wikipedia_html_parsers.ArticleDocument(CADE_URL, html)
+
+    assert doc.link_counts == {'https://en.wikipedia.org/wiki/AT%26T': 3}
+
+
+def test_ranked_links_is_lazy() -> None:
+    """Test that RankedLinks ranks links like a stable sort, only as far as they are read"""
+    rng = random.Random(111)
+    weighted = [((f'link{i}', f'name{i}'), rng.randint(0, 20)) for i in range(800)]
+    expected = sorted(weighted, key=lambda item: item[1], reverse=True)
+    ranked = wikipedia_html_parsers.RankedLinks(weighted)
+
+    assert len(ranked) == 800
+    assert [ranked[i] for i in range(5)] == expected[:5]
+    assert ranked[2:4] == expected[2:4]
+    assert ranked.num_ranked == 5
+    assert ranked == expected and list(ranked) == expected
+    assert ranked[-1] == expected[-1]
+    assert ranked.num_ranked == 800
+
+
+# ==================================================================================================
+# TEST streaming extraction
+# ==================================================================================================
+
+def _split_page(rng: random.Random, html: str) -> list[str]:
+    """Return <html> cut into pieces of random (mostly tiny) sizes."""
+    pieces = []
+    start = 0
+    while start < len(html):
+        end = start + rng.choice([1, 2, 3, 7, 20, 100])
+        pieces.append(html[start:end])
+        start = end
+    return pieces
+
+
+def _random_summary_page(rng: random.Random) -> str:
+    """Return a made-up page mixing paragraphs of sentences with the markup around them."""
+    pieces = []
+    for _ in range(rng.randint(1, 30)):
+        pieces.append(rng.choice([
+            '<p>', '</p>', '\n', 'Cade was a horse', '. ', 'He was a sire.', ' &amp; more',
+            '<sup>[1]</sup>', '<b>bold.</b>', '<!-- a. b. -->', '<script>a.b.c</script>',
+            '<a href="/wiki/Cat">Cat.</a>', 'e.g. this', '<br/>', '<h2>Early life</h2>'
+        ]))
+    return ''.join(pieces)
+
+
+def test_link_stream_matches_extractor() -> None:
+    """Test that a LinkStream finds the same links as extract_article_links, however the
+    page is cut into pieces"""
+    rng = random.Random(111)
+    pages = LINK_CORNER_CASES + [_random_page(rng) for _ in range(300)] + \
+        [path.read_text() for path in sorted(TEST_PAGES.glob('*.html'))]
+    for html in pages:
+        expected = wikipedia_html_parsers.extract_article_links(CADE_URL, html)
+        links = wikipedia_html_parsers.LinkStream(CADE_URL, iter(_split_page(rng, html)))
+
+        assert links[:2] == expected[:2]
+        assert links == expected and len(links) == len(expected)
+
+
+def test_link_stream_reads_lazily() -> None:
+    """Test that a LinkStream only reads the page as far as the links asked for"""
+    html = ''.join(f'<p>Text.</p><a href="/wiki/Topic_{i}">Topic</a>' for i in range(1000))
+    pieces = iter(_split_page(random.Random(111), html))
+    links = wikipedia_html_parsers.LinkStream(CADE_URL, pieces)
+
+    assert links[4] == 'https://en.wikipedia.org/wiki/Topic_4'
+    assert links.num_found < 10
+    assert next(pieces, None) is not None
+    with pytest.raises(IndexError):
+        links[1000]
+    assert len(links) == 1000
+
+
+def test_streamed_summary_matches_full_parse() -> None:
+    """Test that feed_summary_parser finds the same summary as feeding the whole page at
+    once, however the page is cut into pieces"""
+    rng = random.Random(111)
+    for _ in range(500):
+        html = _random_summary_page(rng)
+        sentences_wanted = rng.randint(1, 4)
+        expected = wikipedia_html_parsers.WikipediaSummaryParser(sentences_wanted)
+        expected.feed(html)
+        parser = wikipedia_html_parsers.WikipediaSummaryParser(sentences_wanted)
+        wikipedia_html_parsers.feed_summary_parser(parser, iter(_split_page(rng, html)))
+
+        assert parser.summary == expected.summary
+
+
+def test_get_summary_stops_reading(monkeypatch) -> None:
+    """Test that get_summary stops reading the page once the summary is complete"""
+    pieces_read = []
+
+    def fake_iter_html(url: str):
+        """Yield CADE_HTML, followed by a long page that must never be read."""
+        for piece in [CADE_HTML] + ['<p>Never read.</p>'] * 100:
+            pieces_read.append(piece)
+            yield piece
+
+    monkeypatch.setattr(wikipedia_html_parsers, 'iter_html', fake_iter_html)
+    wikipedia_html_parsers.clear_document_memo()
+
+    assert wikipedia_html_parsers.get_summary(CADE_URL) == \
+        wikipedia_html_parsers.ArticleDocument(CADE_URL, CADE_HTML).summary
+    assert len(pieces_read) <= 2
+
+
+# ==================================================================================================
+# TEST content scope
+# ==================================================================================================
+
+BOILERPLATE = '<div id="mw-navigation"><a href="/wiki/Main_Page">Main page</a>' \
+              '<a href="/wiki/Portal:Current_events">News</a><div><p>Menu.</p></div></div>'
+FOOTER = '<div class="navbox"><a href="/wiki/Footer_Link">x</a></div>' \
+         '<div id="p-lang"><a href="https://fr.wikipedia.org/wiki/Cade">Fran\u00e7ais</a></div>'
+
+
+def _random_content(rng: random.Random, depth: int = 0) -> str:
+    """Return a made-up main content container with nested divs and markup that hides
+    div tags."""
+    pieces = []
+    for _ in range(rng.randint(0, 6)):
+        pieces.append(rng.choice([
+            '<p>Cade was a horse.</p>', '<a href="/wiki/Thoroughbred">Thoroughbred</a>',
+            '<!-- </div> -->', '<script>var s = "</div>";</script>', '<br/>',
+            '<style>.x:before { content: "<div>"; }</style>', '<DIV class="hatnote">x</DIV>',
+            '<divider>', '<img src="a.png" alt="&lt;/div&gt;">'
+        ]))
+        if depth < 3 and rng.random() < 0.3:
+            pieces.append(f'<div class="level{depth}">{_random_content(rng, depth + 1)}</div >')
+    return ''.join(pieces)
+
+
+def test_iter_content_finds_container() -> None:
+    """Test that iter_content yields exactly the main content container, however the page
+    is cut into pieces"""
+    rng = random.Random(111)
+    for _ in range(300):
+        content = f'<div id="mw-content-text" class="mw-body">{_random_content(rng)}</div>'
+        html = BOILERPLATE + content + FOOTER
+
+        assert wikipedia_html_parsers.extract_content(html) == content
+        assert ''.join(wikipedia_html_parsers.iter_content(_split_page(rng, html))) == content
+
+
+def test_iter_content_stops_reading() -> None:
+    """Test that iter_content reads no more pieces once the container ends, and yields the
+    whole page if there is no container"""
+    pieces = iter(['<div id="mw-content-text"><p>Text.</p>', '</div>', '<p>Footer.</p>'])
+
+    assert ''.join(wikipedia_html_parsers.iter_content(pieces)) == \
+        '<div id="mw-content-text"><p>Text.</p></div>'
+    assert next(pieces) == '<p>Footer.</p>'
+    assert wikipedia_html_parsers.extract_content(CADE_HTML) == CADE_HTML
+
+
+def test_extraction_scope(monkeypatch) -> None:
+    """Test that the content scope leaves out the links and text outside the main content
+    container, and that the documents parsed in each scope are memoized separately"""
+    html = BOILERPLATE + '<p>Site notice.</p><div id="mw-content-text">' + CADE_HTML \
+        + '</div>' + FOOTER
+    monkeypatch.setattr(wikipedia_html_parsers, 'iter_html',
+                        lambda url: iter(_split_page(random.Random(111), html)))
+    monkeypatch.setattr(wikipedia_html_parsers, 'fetch_html', lambda url: html)
+    wikipedia_html_parsers.clear_document_memo()
+    content = wikipedia_html_parsers.SCOPE_CONTENT
+    footer_link = 'https://en.wikipedia.org/wiki/Footer_Link'
+    document = wikipedia_html_parsers.ArticleDocument(CADE_URL, CADE_HTML)
+
+    assert footer_link in wikipedia_html_parsers.parse_adjacent_urls(CADE_URL, html)
+    assert wikipedia_html_parsers.parse_adjacent_urls(CADE_URL, html, content) == document.links
+    assert wikipedia_html_parsers.parse_adjacent_urls_weighted(CADE_URL, html, content) \
+        == document.weighted_links()
+    assert wikipedia_html_parsers.get_summary(CADE_URL, 1, scope=content) == \
+        wikipedia_html_parsers.ArticleDocument(CADE_URL, CADE_HTML, 1).summary
+
+    # the memoized content document doesn't answer for the whole page, and the other way round
+    assert footer_link in wikipedia_html_parsers.get_adjacent_urls(CADE_URL)
+    assert list(wikipedia_html_parsers.get_adjacent_urls(CADE_URL, scope=content)) == \
+        document.links
+    page_weighted = wikipedia_html_parsers.get_adjacent_urls_weighted(CADE_URL)
+    assert footer_link in [link for (link, _), _ in page_weighted]
+    assert wikipedia_html_parsers.get_adjacent_urls_weighted(CADE_URL, scope=content) == \
+        document.weighted_links()
+
+    with pytest.raises(ValueError):
+        wikipedia_html_parsers.get_adjacent_urls(CADE_URL, scope='body')
+
+
 if __name__ == '__main__':
-    import pytest
     pytest.main(['test_wikipedia_html_parsers.py', '-v'])
 
     import python_ta.contracts
@@ -276,7 +677,7 @@ if __name__ == '__main__':
     import python_ta
 
     python_ta.check_all(config={
-        'extra-imports': ['wikipedia_html_parsers'],
+        'extra-imports': ['random', 'wikipedia_html_parsers'],
         'allowed-io': [],
         'max-line-length': 100,
         'disable': ['E1136']
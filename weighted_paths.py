@@ -0,0 +1,268 @@
+"""CSC111 Winter 2021 Final Project: Weighted Paths
+
+Module Description
+===============================
+
+This module contains the functions that find shortest weighted paths and nearest articles
+in a WeightedWikiGraph, and the PathFinder class, which answers many such queries on the
+same graph quickly.
+
+The weight of an edge grows with how often each of its articles mentions the other, so a
+strongly weighted edge is a short one: an edge of weight w has length 1 / (1 + w) (see
+edge_length), and the distance between two articles is the total length of the shortest
+path between them. Paths are found with Dijkstra's algorithm, which settles articles in order
+of their distance from the start and stops as soon as the target (or the k nearest articles)
+is settled.
+
+A PathFinder freezes the graph once and precomputes the distances from a few landmark
+articles. By the triangle inequality, the difference between the distances of two articles
+from a landmark is a lower bound on the distance between them, which is used to steer the
+search towards the target (the A* algorithm), so far fewer articles are settled per query.
+
+Copyright and Usage Information
+===============================
+
+This file is provided solely for the personal and private use of Faizah Sayyid, Tina Zhang,
+Poorvi Sharma, and Courtney Amm (students at the University of Toronto St. George campus).
+All forms of distribution of this code, whether as given or with any changes, are expressly
+prohibited.
+
+This file is Copyright (c) 2021 Faizah Sayyid, Tina Zhang, Poorvi Sharma, Courtney Amm.
+"""
+from __future__ import annotations
+import heapq
+import itertools
+import math
+from typing import Any, Callable, Iterable, Optional
+
+from frozen_wikigraph import FrozenWikiGraph
+
+# The default number of landmark articles whose distances a PathFinder precomputes
+DEFAULT_LANDMARKS = 4
+
+
+def edge_length(weight: float) -> float:
+    """Return the length of an edge of the given weight: the stronger the weight, the
+    shorter the edge.
+
+    >>> edge_length(0)
+    1.0
+    >>> edge_length(3)
+    0.25
+    """
+    return 1.0 / (1.0 + weight)
+
+
+def dijkstra(source: Any, neighbours: Callable[[Any], Iterable[tuple[Any, float]]],
+             target: Optional[Any] = None, k: Optional[int] = None,
+             heuristic: Optional[Callable[[Any], float]] = None) \
+        -> tuple[dict[Any, float], dict[Any, Any]]:
+    """Search outwards from <source> with Dijkstra's algorithm, where neighbours(v) gives the
+    (neighbour, edge length) pairs of vertex v, and return the distance of every settled
+    vertex (in the order they were settled) and the vertex every reached vertex was reached
+    from (None for the source).
+
+    The search stops as soon as <target> is settled, or once <k> vertices other than the
+    source are settled, if they are given. If a <heuristic> is given, it must never
+    overestimate the distance from a vertex to the target (or return math.inf if the target
+    can't be reached from it), and the search settles vertices in order of their distance
+    plus the heuristic instead (the A* algorithm).
+
+    >>> lengths = {'a': [('b', 1.0), ('c', 4.0)], 'b': [('c', 1.0)], 'c': []}
+    >>> dijkstra('a', lengths.get)
+    ({'a': 0.0, 'b': 1.0, 'c': 2.0}, {'a': None, 'b': 'a', 'c': 'b'})
+    """
+    distances = {source: 0.0}
+    parents = {source: None}
+    # ACCUMULATOR settled collects the final distance of each settled vertex
+    settled = {}
+    # the counter breaks ties between vertices at the same distance (in the order they
+    # were reached), so the vertices themselves never have to be compared
+    counter = itertools.count()
+    heap = [(0.0 if heuristic is None else heuristic(source), next(counter), source)]
+
+    while heap:
+        _, _, v = heapq.heappop(heap)
+        if v in settled:
+            continue
+        settled[v] = distances[v]
+        if v == target or (k is not None and len(settled) > k):
+            break
+
+        for u, length in neighbours(v):
+            distance = distances[v] + length
+            if u not in settled and distance < distances.get(u, math.inf):
+                estimate = distance if heuristic is None else distance + heuristic(u)
+                if estimate < math.inf:
+                    distances[u] = distance
+                    parents[u] = v
+                    heapq.heappush(heap, (estimate, next(counter), u))
+
+    return settled, parents
+
+
+def path_to(parents: dict[Any, Any], target: Any) -> list:
+    """Return the path from the source of a search to <target>, following the <parents>
+    the search returned.
+
+    >>> path_to({'a': None, 'b': 'a', 'c': 'b'}, 'c')
+    ['a', 'b', 'c']
+    """
+    # ACCUMULATOR path builds up the path from the target back to the source
+    path = []
+    while target is not None:
+        path.append(target)
+        target = parents[target]
+    path.reverse()
+    return path
+
+
+class PathFinder:
+    """A frozen copy of a weighted graph that answers shortest path and nearest article
+    queries, steered by the precomputed distances from a few landmark articles.
+
+    Instance Attributes:
+        - graph: the frozen graph the queries are answered on
+        - landmarks: the names of the landmark articles
+
+    Representation Invariants:
+        - len(self.landmarks) == len(self._landmark_distances)
+    """
+    graph: FrozenWikiGraph
+    landmarks: list[str]
+
+    # Private Instance Attributes:
+    #     - _offsets:
+    #         the edges of vertex i are in positions _offsets[i] to _offsets[i + 1] of
+    #         _neighbours and _lengths
+    #     - _neighbours:
+    #         the vertex id at the other end of every edge
+    #     - _lengths:
+    #         the length of every edge
+    #     - _landmark_distances:
+    #         for each landmark, the distance from it to every vertex, by vertex id
+    #         (math.inf for vertices it isn't connected to)
+    _offsets: list[int]
+    _neighbours: list[int]
+    _lengths: list[float]
+    _landmark_distances: list[list[float]]
+
+    def __init__(self, graph: Any, num_landmarks: int = DEFAULT_LANDMARKS) -> None:
+        """Initialize a path finder for <graph> (a WeightedWikiGraph or a FrozenWikiGraph),
+        with up to <num_landmarks> landmarks.
+
+        The first landmark is the article with the most links; every other one is the
+        article farthest from the landmarks chosen so far (or an article none of them is
+        connected to, if there is one), so the landmarks are spread around the graph.
+        """
+        self.graph = graph if isinstance(graph, FrozenWikiGraph) else graph.freeze()
+        offsets, neighbours, weights = self.graph.adjacency()
+        self._offsets = list(offsets)
+        self._neighbours = list(neighbours)
+        if self.graph.weighted:
+            self._lengths = [edge_length(weight) for weight in weights]
+        else:
+            self._lengths = [edge_length(1.0)] * len(self._neighbours)
+
+        self.landmarks = []
+        self._landmark_distances = []
+        n = len(self._offsets) - 1
+        if n == 0:
+            return
+        nearest = [math.inf] * n
+        landmark = max(range(n), key=lambda i: self._offsets[i + 1] - self._offsets[i])
+        while len(self.landmarks) < min(num_landmarks, n):
+            settled, _ = dijkstra(landmark, self._edges)
+            distances = [settled.get(i, math.inf) for i in range(n)]
+            self.landmarks.append(self.graph.vertex_names()[landmark])
+            self._landmark_distances.append(distances)
+
+            nearest = [min(old, new) for old, new in zip(nearest, distances)]
+            landmark = max(range(n), key=lambda i: (nearest[i] == math.inf, nearest[i]))
+            if nearest[landmark] == 0.0:
+                break
+
+    def _edges(self, v: int) -> Iterable[tuple[int, float]]:
+        """Return the (neighbour, edge length) pairs of the vertex with id <v>."""
+        start, end = self._offsets[v], self._offsets[v + 1]
+        return zip(self._neighbours[start:end], self._lengths[start:end])
+
+    def _lower_bound(self, target: int) -> Callable[[int], float]:
+        """Return a function giving a lower bound on the distance from a vertex to <target>,
+        from the distances of the two vertices from every landmark."""
+        from_target = [(distances, distances[target])
+                       for distances in self._landmark_distances]
+
+        def bound(v: int) -> float:
+            """Return a lower bound on the distance from <v> to the target."""
+            best = 0.0
+            for distances, target_distance in from_target:
+                if (distances[v] == math.inf) != (target_distance == math.inf):
+                    return math.inf
+                elif target_distance < math.inf:
+                    best = max(best, abs(target_distance - distances[v]))
+            return best
+
+        return bound
+
+    def _search(self, name1: Any, name2: Any) -> tuple[dict[int, float], dict[int, int], int]:
+        """Search for the shortest path from <name1> to <name2>, and return what dijkstra
+        returns with the vertex id of name2.
+
+        Raise a ValueError if name1 or name2 do not appear as vertices in the graph.
+        """
+        source, target = self.graph.vertex_id(name1), self.graph.vertex_id(name2)
+        settled, parents = dijkstra(source, self._edges, target=target,
+                                    heuristic=self._lower_bound(target))
+        return settled, parents, target
+
+    def shortest_path(self, name1: Any, name2: Any) -> Optional[list]:
+        """Return the names of the vertices on the shortest weighted path from <name1> to
+        <name2>, or None if they aren't connected.
+
+        Raise a ValueError if name1 or name2 do not appear as vertices in the graph.
+        """
+        settled, parents, target = self._search(name1, name2)
+        if target not in settled:
+            return None
+        names = self.graph.vertex_names()
+        return [names[v] for v in path_to(parents, target)]
+
+    def distance(self, name1: Any, name2: Any) -> float:
+        """Return the length of the shortest weighted path from <name1> to <name2>, or
+        math.inf if they aren't connected.
+
+        Raise a ValueError if name1 or name2 do not appear as vertices in the graph.
+        """
+        settled, _, target = self._search(name1, name2)
+        return settled.get(target, math.inf)
+
+    def nearest(self, name: Any, k: int) -> list[tuple[Any, float]]:
+        """Return the (name, distance) pairs of the <k> articles closest to <name> (not
+        counting name itself), from the closest to the farthest.
+
+        Raise a ValueError if name does not appear as a vertex in the graph.
+        """
+        settled, _ = dijkstra(self.graph.vertex_id(name), self._edges, k=k)
+        names = self.graph.vertex_names()
+        closest = itertools.islice(settled.items(), 1, k + 1)
+        return [(names[v], distance) for v, distance in closest]
+
+
+if __name__ == '__main__':
+    import python_ta.contracts
+
+    python_ta.contracts.check_all_contracts()
+
+    import doctest
+
+    doctest.testmod()
+
+    import python_ta
+
+    python_ta.check_all(config={
+        'extra-imports': ['heapq', 'itertools', 'math', 'frozen_wikigraph'],
+        'allowed-io': [],
+        'max-line-length': 100,
+        'disable': ['E1136']
+    })
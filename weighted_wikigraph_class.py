@@ -24,8 +24,12 @@ prohibited.
 This file is Copyright (c) 2021 Faizah Sayyid, Tina Zhang, Poorvi Sharma, Courtney Amm.
 """
 from __future__ import annotations
-from typing import Any
+import math
+from typing import Any, Iterable, Optional
 
+from article_ids import ArticleTable, get_article_table, is_article_url
+from frozen_wikigraph import FrozenWikiGraph, freeze_vertices
+from weighted_paths import dijkstra, edge_length, path_to
 from wikigraph import WikiGraph
 
 
@@ -40,6 +44,7 @@ class _WeightedVertex:
         - name: The data stored in this vertex.
         - url: The URL of this webpage.
         - class_id: A numeric representation of the vertex name to be used as an id for node styling
+        - article_id: The id of this webpage in the article table of its graph.
         - neighbours: The vertices that are adjacent to this vertex, and their corresponding
             edge weights.
 
@@ -50,16 +55,18 @@ class _WeightedVertex:
     name: Any
     url: str
     class_id: str
+    article_id: int
     neighbours: dict[_WeightedVertex, int]
 
-    def __init__(self, name: str, url: str) -> None:
-        """Initialize a new vertex with the given page name and url.
+    def __init__(self, name: str, url: str, article_id: int) -> None:
+        """Initialize a new vertex with the given page name, url and article id.
 
         This vertex is initialized with no neighbours.
         """
         self.name = name
         self.url = url
         self.class_id = ''.join([str(ord(letter)) for letter in name])
+        self.article_id = article_id
         self.neighbours = {}
 
     def degree(self) -> int:
@@ -86,11 +93,33 @@ class WeightedWikiGraph(WikiGraph):
     #     - _vertices:
     #         A collection of the vertices contained in this graph.
     #         Maps item to _WeightedVertex object.
+    #     - _articles:
+    #         The table giving the article of every vertex its id (see WikiGraph).
+    #     - _names:
+    #         Maps the article id of every vertex to its name (to the first vertex added with
+    #         that id, for pages that aren't articles).
+    #     - _aliases:
+    #         Maps every other name a vertex was added under to the name of that vertex.
+    #     - _parents:
+    #         Maps the name of every vertex to the name of another vertex in its connected
+    #         component (see WikiGraph).
+    #     - _members:
+    #         Maps the root of every connected component to the names of its vertices.
     _vertices: dict[Any, _WeightedVertex]
+    _articles: ArticleTable
+    _names: dict[int, Any]
+    _aliases: dict[Any, Any]
+    _parents: dict[Any, Any]
+    _members: dict[Any, list]
 
     def __init__(self) -> None:
         """Initialize an empty graph (no vertices or edges)."""
         self._vertices = {}
+        self._articles = ArticleTable(get_article_table())
+        self._names = {}
+        self._aliases = {}
+        self._parents = {}
+        self._members = {}
 
         # This call isn't necessary, except to satisfy PythonTA.
         WikiGraph.__init__(self)
@@ -99,27 +128,37 @@ class WeightedWikiGraph(WikiGraph):
         """Add a vertex with the given name to this graph.
 
         The new vertex is not adjacent to any other vertices.
-        Do nothing if the given item is already in this graph.
+        Do nothing if the given item is already in this graph under this name, and make
+        <name> another name for its vertex if <url> is a Wikipedia article already in this
+        graph under another one (see WikiGraph.add_vertex).
         """
-        if name not in self._vertices:
-            self._vertices[name] = _WeightedVertex(name, url)
+        if name not in self._vertices and name not in self._aliases:
+            article_id = self._articles.article_id(url)
+            if article_id in self._names and is_article_url(url):
+                self._aliases[name] = self._names[article_id]
+            else:
+                self._vertices[name] = _WeightedVertex(name, url, article_id)
+                self._names.setdefault(article_id, name)
+                self._add_component(name)
 
     def add_edge(self, name1: Any, name2: Any, weight: float = 1.0) -> None:
         """Add an edge between the two vertices with the given items in this graph,
         with the given weight.
 
+        Do nothing if name1 and name2 are names of the same vertex (see add_vertex).
         Raise a ValueError if name1 or name2 do not appear as vertices in this graph.
-
-        Preconditions:
-            - name1 != name2
         """
+        name1, name2 = self.vertex_name(name1), self.vertex_name(name2)
         if name1 in self._vertices and name2 in self._vertices:
+            if name1 == name2:
+                return
             v1 = self._vertices[name1]
             v2 = self._vertices[name2]
 
             # Add the new edge
             v1.neighbours[v2] = weight
             v2.neighbours[v1] = weight
+            self._join_components(name1, name2)
         else:
             # We didn't find an existing vertex for both items.
             raise ValueError
@@ -131,12 +170,80 @@ class WeightedWikiGraph(WikiGraph):
 
         Raise a ValueError if page name does not appear as a vertex in this graph.
         """
+        name = self.vertex_name(name)
         if name in self._vertices:
             v = self._vertices[name]
             return {(neighbour.name, v.neighbours[neighbour]) for neighbour in v.neighbours}
         else:
             raise ValueError
 
+    def _search(self, name1: Any, name2: Any) -> tuple[dict, dict]:
+        """Search for the shortest weighted path from <name1> to <name2>, and return what
+        weighted_paths.dijkstra returns (keyed by _WeightedVertex objects).
+
+        Raise a ValueError if name1 or name2 do not appear as vertices in this graph.
+        """
+        name1, name2 = self.vertex_name(name1), self.vertex_name(name2)
+        if name1 not in self._vertices or name2 not in self._vertices:
+            raise ValueError
+        elif not self.connected(name1, name2):
+            return {}, {}
+        return dijkstra(self._vertices[name1], _edges, target=self._vertices[name2])
+
+    def shortest_path(self, name1: Any, name2: Any) -> Optional[list]:
+        """Return the names of the vertices on the shortest weighted path from <name1> to
+        <name2>, where stronger edges are shorter (see weighted_paths), or None if they
+        aren't connected.
+
+        Raise a ValueError if name1 or name2 do not appear as vertices in this graph.
+
+        >>> g = WeightedWikiGraph()
+        >>> for name in ['Matchem', 'Cade (horse)', 'Bald Galloway']:
+        ...     g.add_vertex(name, 'https://en.wikipedia.org/wiki/' + name.replace(' ', '_'))
+        >>> g.add_edge('Matchem', 'Cade (horse)', 1)
+        >>> g.add_edge('Matchem', 'Bald Galloway', 4)
+        >>> g.add_edge('Bald Galloway', 'Cade (horse)', 4)
+        >>> g.shortest_path('Matchem', 'Cade (horse)')
+        ['Matchem', 'Bald Galloway', 'Cade (horse)']
+        """
+        settled, parents = self._search(name1, name2)
+        target = self._vertices[self.vertex_name(name2)]
+        if target not in settled:
+            return None
+        return [vertex.name for vertex in path_to(parents, target)]
+
+    def weighted_distance(self, name1: Any, name2: Any) -> float:
+        """Return the length of the shortest weighted path from <name1> to <name2>, or
+        math.inf if they aren't connected.
+
+        Raise a ValueError if name1 or name2 do not appear as vertices in this graph.
+        """
+        settled, _ = self._search(name1, name2)
+        return settled.get(self._vertices[self.vertex_name(name2)], math.inf)
+
+    def nearest(self, name: Any, k: int) -> list[tuple[Any, float]]:
+        """Return the (name, distance) pairs of the <k> vertices closest to <name> by
+        weighted distance (not counting name itself), from the closest to the farthest.
+
+        Raise a ValueError if name does not appear as a vertex in this graph.
+        """
+        name = self.vertex_name(name)
+        if name not in self._vertices:
+            raise ValueError
+        settled, _ = dijkstra(self._vertices[name], _edges, k=k)
+        return [(vertex.name, distance) for vertex, distance in settled.items()
+                if vertex.name != name][:k]
+
+    def freeze(self) -> FrozenWikiGraph:
+        """Return an immutable, compact copy of this graph, edge weights included (see
+        frozen_wikigraph)."""
+        return freeze_vertices(self._vertices.values(), weighted=True)
+
+
+def _edges(vertex: _WeightedVertex) -> Iterable[tuple[_WeightedVertex, float]]:
+    """Return the (neighbour, edge length) pairs of <vertex>, for weighted_paths.dijkstra."""
+    return ((u, edge_length(weight)) for u, weight in vertex.neighbours.items())
+
 
 if __name__ == '__main__':
     import python_ta.contracts
@@ -146,7 +253,8 @@ if __name__ == '__main__':
     import python_ta
 
     python_ta.check_all(config={
-        'extra-imports': ['wikigraph'],
+        'extra-imports': ['math', 'article_ids', 'frozen_wikigraph', 'weighted_paths',
+                          'wikigraph'],
         'allowed-io': [],
         'max-line-length': 100,
         'disable': ['E1136', 'W0221']
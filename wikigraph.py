@@ -19,7 +19,10 @@ prohibited.
 This file is Copyright (c) 2021 Faizah Sayyid, Tina Zhang, Poorvi Sharma, Courtney Amm.
 """
 from __future__ import annotations
-from typing import Any
+from typing import Any, Optional
+
+from article_ids import ArticleTable, get_article_table, is_article_url
+from frozen_wikigraph import FrozenWikiGraph, freeze_vertices
 
 
 class _Vertex:
@@ -31,6 +34,7 @@ class _Vertex:
         - name: The data stored in this vertex.
         - url: The URL of this webpage.
         - class_id: A numeric representation of the vertex name to be used as an id for node styling
+        - article_id: The id of this webpage in the article table of its graph.
         - neighbours: The vertices that are adjacent to this vertex.
 
     Representation Invariants:
@@ -40,37 +44,24 @@ class _Vertex:
     name: str
     url: str
     class_id: str
+    article_id: int
     neighbours: set[_Vertex]
 
-    def __init__(self, name: str, url: str) -> None:
-        """Initialize a new vertex with the given page name and url.
+    def __init__(self, name: str, url: str, article_id: int) -> None:
+        """Initialize a new vertex with the given page name, url and article id.
 
         This vertex is initialized with no neighbours.
         """
         self.name = name
         self.url = url
         self.class_id = ''.join([str(ord(letter)) for letter in name])
+        self.article_id = article_id
         self.neighbours = set()
 
     def degree(self) -> int:
         """Return the degree of this vertex."""
         return len(self.neighbours)
 
-    def check_connected(self, target_item: Any, visited: set[_Vertex]) -> bool:
-        """ Return whether this vertex is connected to a vertex corresponding to target_item
-        by a path that DOES NOT use any vertex in visited
-
-        Precondition:
-            - self not in visited
-        """
-        if self.name == target_item:
-            return True
-        else:
-            new_visited = visited.union({self})
-            return any(u.check_connected(target_item, new_visited)
-                       for u in self.neighbours
-                       if u not in visited)
-
 
 class WikiGraph:
     """A graph used to represent a Wikipedia pages network.
@@ -83,35 +74,140 @@ class WikiGraph:
     #     - _vertices:
     #         A collection of the vertices contained in this graph.
     #         Maps item to _Vertex object.
+    #     - _articles:
+    #         The table giving the article of every vertex its id (sharing the redirects
+    #         known to this process, see article_ids.get_article_table).
+    #     - _names:
+    #         Maps the article id of every vertex to its name (to the first vertex added with
+    #         that id, for pages that aren't articles).
+    #     - _aliases:
+    #         Maps every other name a vertex was added under to the name of that vertex.
+    #     - _parents:
+    #         Maps the name of every vertex to the name of another vertex in its connected
+    #         component, so that following parents always leads to the component's root
+    #         (a vertex that is its own parent).
+    #     - _members:
+    #         Maps the root of every connected component to the names of its vertices.
     _vertices: dict[Any, _Vertex]
+    _articles: ArticleTable
+    _names: dict[int, Any]
+    _aliases: dict[Any, Any]
+    _parents: dict[Any, Any]
+    _members: dict[Any, list]
 
     def __init__(self) -> None:
         """Initialize an empty graph (no vertices or edges)."""
         self._vertices = {}
+        self._articles = ArticleTable(get_article_table())
+        self._names = {}
+        self._aliases = {}
+        self._parents = {}
+        self._members = {}
 
     def add_vertex(self, name: str, url: str) -> None:
         """Add a vertex with the given page name and url to this graph.
 
         The new vertex is not adjacent to any other vertices.
-        Do nothing if the given page is already in this graph.
+        Do nothing if the given page is already in this graph under this name. If <url> is
+        a Wikipedia article already in this graph (through another url of the same article)
+        under another name, <name> becomes another name for that vertex: every method taking
+        a vertex name accepts it, and vertex_name translates it. (Pages that aren't articles
+        always get a vertex of their own.)
+
+        >>> g = WikiGraph()
+        >>> g.add_vertex('Cade (horse)', 'https://en.wikipedia.org/wiki/Cade_(horse)')
+        >>> g.add_vertex('Cade', 'https://en.wikipedia.org/wiki/Cade_(horse)#Stud_career')
+        >>> g.get_all_vertices()
+        {'Cade (horse)'}
+        >>> g.vertex_name('Cade')
+        'Cade (horse)'
+        """
+        if name not in self._vertices and name not in self._aliases:
+            article_id = self._articles.article_id(url)
+            if article_id in self._names and is_article_url(url):
+                self._aliases[name] = self._names[article_id]
+            else:
+                self._vertices[name] = _Vertex(name, url, article_id)
+                self._names.setdefault(article_id, name)
+                self._add_component(name)
+
+    def vertex_name(self, name: Any) -> Any:
+        """Return the name of the vertex called <name>: name itself, unless it is another
+        name for a vertex added under a different one (see add_vertex)."""
+        return self._aliases.get(name, name)
+
+    def aliases(self) -> dict:
+        """Return a mapping from every other name a vertex was added under to the name of
+        that vertex (see add_vertex)."""
+        return dict(self._aliases)
+
+    def add_alias(self, name: Any, vertex: Any) -> None:
+        """Make <name> another name for the vertex called <vertex>, as if it had been added
+        under <name> through another url of the same article.
+
+        Do nothing if <name> is already a name in this graph.
+        Raise a ValueError if <vertex> does not appear as a vertex in this graph.
+
+        >>> g = WikiGraph()
+        >>> g.add_vertex('Cade (horse)', 'https://en.wikipedia.org/wiki/Cade_(horse)')
+        >>> g.add_alias('Cade', 'Cade (horse)')
+        >>> g.aliases()
+        {'Cade': 'Cade (horse)'}
         """
-        if name not in self._vertices:
-            self._vertices[name] = _Vertex(name, url)
+        vertex = self.vertex_name(vertex)
+        if vertex not in self._vertices:
+            raise ValueError
+        if name not in self._vertices and name not in self._aliases:
+            self._aliases[name] = vertex
+
+    def _add_component(self, name: Any) -> None:
+        """Record that the new vertex called <name> is in a connected component of its own."""
+        self._parents[name] = name
+        self._members[name] = [name]
+
+    def _find_root(self, name: Any) -> Any:
+        """Return the root of the connected component of the vertex called <name>.
+
+        Every vertex passed on the way is pointed at its grandparent, so later lookups
+        are shorter.
+        """
+        parent = self._parents[name]
+        while parent != name:
+            grandparent = self._parents[parent]
+            self._parents[name] = grandparent
+            name, parent = parent, grandparent
+        return name
+
+    def _join_components(self, name1: Any, name2: Any) -> None:
+        """Merge the connected components of the vertices called <name1> and <name2>, after
+        an edge between them has been added.
+
+        The smaller component is merged into the larger one, so no vertex is ever more
+        than log2(n) parents away from its root.
+        """
+        root1, root2 = self._find_root(name1), self._find_root(name2)
+        if root1 != root2:
+            if len(self._members[root1]) < len(self._members[root2]):
+                root1, root2 = root2, root1
+            self._parents[root2] = root1
+            self._members[root1].extend(self._members.pop(root2))
 
     def add_edge(self, name1: Any, name2: Any) -> None:
         """Add an edge between the two vertices with the given names in this graph.
 
+        Do nothing if name1 and name2 are names of the same vertex (see add_vertex).
         Raise a ValueError if name1 or name2 do not appear as vertices in this graph.
-
-        Preconditions:
-            - name1 != name2
         """
+        name1, name2 = self.vertex_name(name1), self.vertex_name(name2)
         if name1 in self._vertices and name2 in self._vertices:
+            if name1 == name2:
+                return
             v1 = self._vertices[name1]
             v2 = self._vertices[name2]
 
             v1.neighbours.add(v2)
             v2.neighbours.add(v1)
+            self._join_components(name1, name2)
         else:
             raise ValueError
 
@@ -120,6 +216,7 @@ class WikiGraph:
 
         Return False if name1 or name2 do not appear as vertices in this graph.
         """
+        name1, name2 = self.vertex_name(name1), self.vertex_name(name2)
         if name1 in self._vertices and name2 in self._vertices:
             v1 = self._vertices[name1]
             return any(v2.name == name2 for v2 in v1.neighbours)
@@ -134,6 +231,7 @@ class WikiGraph:
 
         Raise a ValueError if page name does not appear as a vertex in this graph.
         """
+        name = self.vertex_name(name)
         if name in self._vertices:
             v = self._vertices[name]
             return {neighbour.name for neighbour in v.neighbours}
@@ -141,10 +239,16 @@ class WikiGraph:
             raise ValueError
 
     def get_all_vertices(self) -> set:
-        """Return a set of all vertex page names in this graph.
+        """Return a set of all vertex page names in this graph (not including the other
+        names vertices were added under).
         """
         return set(self._vertices.keys())
 
+    def vertex_names(self) -> list:
+        """Return the names of the vertices of this graph, in the order they were added (the
+        order of their vertex ids in the graph returned by freeze)."""
+        return list(self._vertices)
+
     def is_vertex_in_graph(self, name: str) -> bool:
         """Return whether <name> is a vertex in this graph
 
@@ -155,7 +259,7 @@ class WikiGraph:
         >>> g.is_vertex_in_graph('Noelle Stevenson')
         False
         """
-        return name in self._vertices
+        return self.vertex_name(name) in self._vertices
 
     def connected(self, item1: Any, item2: Any) -> bool:
         """Return whether item1 and item2 are connected vertices
@@ -164,20 +268,91 @@ class WikiGraph:
         Return False if item1 or item2 do not appear as vertices
         in this graph.
         """
+        item1, item2 = self.vertex_name(item1), self.vertex_name(item2)
         if item1 in self._vertices and item2 in self._vertices:
-            v1 = self._vertices[item1]
-
-            return v1.check_connected(item2, set())
+            return self._find_root(item1) == self._find_root(item2)
         else:
             return False
 
+    def component(self, name: Any) -> set:
+        """Return the names of the vertices in the connected component of the vertex called
+        <name> (including name itself).
+
+        Raise a ValueError if name does not appear as a vertex in this graph.
+
+        >>> g = WikiGraph()
+        >>> g.add_vertex('Cade (horse)', 'https://en.wikipedia.org/wiki/Cade_(horse)')
+        >>> g.add_vertex('Matchem', 'https://en.wikipedia.org/wiki/Matchem')
+        >>> g.add_vertex('Horse', 'https://en.wikipedia.org/wiki/Horse')
+        >>> g.add_edge('Cade (horse)', 'Matchem')
+        >>> g.component('Matchem') == {'Cade (horse)', 'Matchem'}
+        True
+        >>> g.component_size('Horse'), g.num_components()
+        (1, 2)
+        """
+        name = self.vertex_name(name)
+        if name in self._vertices:
+            return set(self._members[self._find_root(name)])
+        else:
+            raise ValueError
+
+    def component_size(self, name: Any) -> int:
+        """Return the number of vertices in the connected component of the vertex called
+        <name>.
+
+        Raise a ValueError if name does not appear as a vertex in this graph.
+        """
+        name = self.vertex_name(name)
+        if name in self._vertices:
+            return len(self._members[self._find_root(name)])
+        else:
+            raise ValueError
+
+    def num_components(self) -> int:
+        """Return the number of connected components of this graph."""
+        return len(self._members)
+
+    def components(self) -> list[set]:
+        """Return the names of the vertices of every connected component of this graph,
+        from the largest component to the smallest."""
+        return sorted((set(members) for members in self._members.values()), key=len,
+                      reverse=True)
+
+    def find_vertex(self, url: str) -> Optional[Any]:
+        """Return the name of the vertex of the article at <url> (however the url is written),
+        or None if the article isn't in this graph.
+
+        >>> g = WikiGraph()
+        >>> g.add_vertex('Rebecca Sugar', 'https://en.wikipedia.org/wiki/Rebecca_Sugar')
+        >>> g.find_vertex('http://en.wikipedia.org/wiki/rebecca_Sugar#Career')
+        'Rebecca Sugar'
+        """
+        if url not in self._articles:
+            return None
+        return self._names.get(self._articles.article_id(url))
+
     def get_vertex(self, name) -> _Vertex:
         """Returns the vertex based on the given key"""
-        return self._vertices[name]
+        return self._vertices[self.vertex_name(name)]
 
     def get_class_id(self, name) -> str:
         """Returns the class id of a vertex"""
-        return self._vertices[name].class_id
+        return self._vertices[self.vertex_name(name)].class_id
+
+    def freeze(self) -> FrozenWikiGraph:
+        """Return an immutable, compact copy of this graph (see frozen_wikigraph).
+
+        >>> g = WikiGraph()
+        >>> g.add_vertex('Cade (horse)', 'https://en.wikipedia.org/wiki/Cade_(horse)')
+        >>> g.add_vertex('Matchem', 'https://en.wikipedia.org/wiki/Matchem')
+        >>> g.add_edge('Cade (horse)', 'Matchem')
+        >>> frozen = g.freeze()
+        >>> frozen.get_neighbours('Matchem')
+        {'Cade (horse)'}
+        >>> frozen.to_cytoscape() == g.to_cytoscape()
+        True
+        """
+        return freeze_vertices(self._vertices.values(), weighted=False)
 
     def to_cytoscape(self) -> list[dict]:
         """Returns the list of graph data needed to display the graph in cytoscape.
@@ -219,7 +394,7 @@ if __name__ == '__main__':
     import python_ta
 
     python_ta.check_all(config={
-        'extra-imports': [],
+        'extra-imports': ['article_ids', 'frozen_wikigraph'],
         'allowed-io': [],
         'max-line-length': 100,
         'disable': ['E1136']
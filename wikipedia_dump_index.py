@@ -0,0 +1,371 @@
+"""CSC111 Winter 2021 Final Project: Offline Link Index from Wikipedia Dumps
+
+Module Description
+===============================
+
+This module contains an importer that streams a Wikipedia pages-articles XML dump and writes a
+compact on-disk link index, and the LinkIndex class, which memory-maps that index so graphs can
+be built from it without any network access.
+
+The index is a directory containing:
+    - titles.bin / title_offsets.bin: the title of each article, by article id
+    - lookup.bin / lookup_offsets.bin / lookup_ids.bin: every title (and redirect title) sorted,
+      with the id of the article it leads to, for binary-searching titles
+    - offsets.bin / targets.bin / weights.bin: the links of each article in CSR form, i.e. the
+      links of article i are targets[offsets[i]:offsets[i + 1]], in the order they first appear
+      on the article, and weights holds the number of times each target's title appears in the
+      article's wikitext
+    - meta.json: the format version and the sizes of the tables
+
+A LinkIndex can be passed as the backend of build_wikigraph and build_weighted_wikigraph: it
+has get_adjacent_urls and get_adjacent_urls_weighted methods that return the same kind of
+results as the functions in wikipedia_html_parsers, filtered with the same UNWANTED list.
+
+Copyright and Usage Information
+===============================
+
+This file is provided solely for the personal and private use of Faizah Sayyid, Tina Zhang,
+Poorvi Sharma, and Courtney Amm (students at the University of Toronto St. George campus).
+All forms of distribution of this code, whether as given or with any changes, are expressly
+prohibited.
+
+This file is Copyright (c) 2021 Faizah Sayyid, Tina Zhang, Poorvi Sharma, Courtney Amm.
+"""
+from __future__ import annotations
+import bz2
+import gzip
+import json
+import mmap
+import os
+import pickle
+import re
+import sys
+import tempfile
+import xml.etree.ElementTree as ElementTree
+from array import array
+from typing import IO, Iterator, Optional
+
+from article_ids import MAX_REDIRECT_HOPS, normalize_title, title_to_url, url_to_title
+from wikipedia_html_parsers import UNWANTED, get_title
+
+# The version of the on-disk index format written by import_pages_articles
+INDEX_VERSION = 1
+
+# A [[wikilink]]: its target title, ignoring any #section and |label
+_WIKILINK = re.compile(r'\[\[\s*([^\[\]|#]+?)\s*(?:#[^\[\]|]*)?(?:\|[^\[\]]*)?\]\]')
+
+
+def _open_dump(path: str) -> IO[bytes]:
+    """Open the dump at <path>, decompressing it on the fly if it is a .bz2 or .gz file."""
+    if path.endswith('.bz2'):
+        return bz2.open(path, 'rb')
+    elif path.endswith('.gz'):
+        return gzip.open(path, 'rb')
+    else:
+        return open(path, 'rb')
+
+
+def _local_name(tag: str) -> str:
+    """Return <tag> without its XML namespace."""
+    return tag.rsplit('}', 1)[-1]
+
+
+def iter_dump_pages(path: str) -> Iterator[tuple[str, Optional[str], str]]:
+    """Yield (title, redirect target or None, wikitext) for every main-namespace page of the
+    pages-articles dump at <path>, keeping only the current page in memory.
+    """
+    with _open_dump(path) as dump:
+        events = ElementTree.iterparse(dump, events=('start', 'end'))
+        _, root = next(events)
+        title, namespace, redirect, text = '', '0', None, ''
+
+        for event, element in events:
+            if event != 'end':
+                continue
+            name = _local_name(element.tag)
+            if name == 'title':
+                title = element.text or ''
+            elif name == 'ns':
+                namespace = (element.text or '').strip()
+            elif name == 'redirect':
+                redirect = element.get('title')
+            elif name == 'text':
+                text = element.text or ''
+            elif name == 'page':
+                if namespace == '0':
+                    yield normalize_title(title), redirect, text
+                title, namespace, redirect, text = '', '0', None, ''
+                root.clear()
+
+
+def _page_links(text: str) -> list[tuple[str, int]]:
+    """Return the (normalized target title, weight) of each wikilink in <text>, in the order
+    they first appear, where the weight is the number of times the title appears in <text>
+    (with its first letter capitalized or not, as links are often written in lowercase).
+
+    A linked title is counted at least once for every link to it, even where the links write
+    it some other way (for example, with underscores), so no linked article weighs 0.
+
+    >>> _page_links('The [[Godolphin Arabian]] sired [[Cade (horse)|Cade]]. '
+    ...             'Godolphin Arabian was a stallion. [[godolphin_Arabian#Life]]')
+    [('Godolphin Arabian', 2), ('Cade (horse)', 1)]
+    >>> _page_links('A [[dog]] chases a [[cat]]. The dog barks at the dog.')
+    [('Dog', 3), ('Cat', 1)]
+    """
+    # ACCUMULATOR times_linked maps each title to the number of links to it, in the order
+    # the titles are first linked
+    times_linked = {}
+    for match in _WIKILINK.finditer(text):
+        target = normalize_title(match.group(1))
+        if target:
+            times_linked[target] = times_linked.get(target, 0) + 1
+
+    links = []
+    for target, times in times_linked.items():
+        count = text.count(target)
+        lowercase = target[0].lower() + target[1:]
+        if lowercase != target:
+            count += text.count(lowercase)
+        links.append((target, max(count, times)))
+    return links
+
+
+def _write_array(path: str, values: array) -> None:
+    """Write the items of <values> to the file at <path>."""
+    with open(path, 'wb') as file:
+        values.tofile(file)
+
+
+def import_pages_articles(dump_path: str, index_dir: str) -> dict:
+    """Stream the pages-articles XML dump at <dump_path> (optionally .bz2 or .gz compressed)
+    and write a link index of its main-namespace articles to the directory <index_dir>.
+
+    Every article's links are spilled to a temporary file while the dump is streamed, so only
+    the table of titles (not the wikitext or the links) is kept in memory. Links to pages that
+    aren't in the dump are dropped, and links to redirects lead to the redirect's target.
+
+    Return the metadata written to meta.json.
+    """
+    os.makedirs(index_dir, exist_ok=True)
+    title_ids = {}
+    redirects = {}
+
+    with tempfile.TemporaryFile() as spill:
+        for title, redirect, text in iter_dump_pages(dump_path):
+            if redirect is not None:
+                redirects[title] = normalize_title(redirect)
+            elif title not in title_ids:
+                title_ids[title] = len(title_ids)
+                pickle.dump(_page_links(text), spill)
+
+        # map every title (and redirect title) to the id of the article it leads to
+        lookup = dict(title_ids)
+        for title in redirects:
+            target = title
+            for _ in range(MAX_REDIRECT_HOPS):
+                target = redirects.get(target, target)
+            if target in title_ids:
+                lookup[title] = title_ids[target]
+
+        offsets, targets, weights = array('Q', [0]), array('I'), array('I')
+        spill.seek(0)
+        for src_id in range(len(title_ids)):
+            for target, weight in pickle.load(spill):
+                if target in lookup and lookup[target] != src_id:
+                    targets.append(lookup[target])
+                    weights.append(weight)
+            offsets.append(len(targets))
+
+    _write_strings(os.path.join(index_dir, 'titles.bin'),
+                   os.path.join(index_dir, 'title_offsets.bin'),
+                   [title.encode() for title in title_ids])
+
+    sorted_lookup = sorted((title.encode(), article_id) for title, article_id in lookup.items())
+    _write_strings(os.path.join(index_dir, 'lookup.bin'),
+                   os.path.join(index_dir, 'lookup_offsets.bin'),
+                   [title for title, _ in sorted_lookup])
+    _write_array(os.path.join(index_dir, 'lookup_ids.bin'),
+                 array('I', [article_id for _, article_id in sorted_lookup]))
+
+    _write_array(os.path.join(index_dir, 'offsets.bin'), offsets)
+    _write_array(os.path.join(index_dir, 'targets.bin'), targets)
+    _write_array(os.path.join(index_dir, 'weights.bin'), weights)
+
+    meta = {'version': INDEX_VERSION, 'byteorder': sys.byteorder,
+            'articles': len(title_ids), 'titles': len(sorted_lookup), 'links': len(targets)}
+    with open(os.path.join(index_dir, 'meta.json'), 'w') as file:
+        json.dump(meta, file)
+
+    return meta
+
+
+def _write_strings(strings_path: str, offsets_path: str, strings: list[bytes]) -> None:
+    """Write <strings> one after the other to <strings_path>, and the offset each one starts
+    at (followed by the total length) to <offsets_path>.
+    """
+    offsets = array('Q', [0])
+    with open(strings_path, 'wb') as file:
+        for string in strings:
+            file.write(string)
+            offsets.append(offsets[-1] + len(string))
+    _write_array(offsets_path, offsets)
+
+
+class LinkIndex:
+    """A memory-mapped link index written by import_pages_articles.
+
+    Opening an index only maps its files into memory, so it takes milliseconds however big the
+    index is, and several processes opening the same index share its pages in RAM.
+
+    Instance Attributes:
+        - index_dir: the directory the index is stored in
+        - num_articles: the number of articles in the index
+        - num_links: the number of links between articles in the index
+    """
+    index_dir: str
+    num_articles: int
+    num_links: int
+
+    # Private Instance Attributes:
+    #     - _maps:
+    #         the memory maps of the index files (kept so they can be closed)
+    #     - _titles, _title_offsets:
+    #         the title of each article id
+    #     - _lookup, _lookup_offsets, _lookup_ids:
+    #         every title in sorted order, with the id of the article it leads to
+    #     - _offsets, _targets, _weights:
+    #         the CSR adjacency of the articles
+    _maps: list[mmap.mmap]
+    _titles: memoryview
+    _title_offsets: memoryview
+    _lookup: memoryview
+    _lookup_offsets: memoryview
+    _lookup_ids: memoryview
+    _offsets: memoryview
+    _targets: memoryview
+    _weights: memoryview
+
+    def __init__(self, index_dir: str) -> None:
+        """Open the index stored in <index_dir>.
+
+        Raise a ValueError if the index was written in a different format or byte order.
+        """
+        with open(os.path.join(index_dir, 'meta.json')) as file:
+            meta = json.load(file)
+        if meta['version'] != INDEX_VERSION or meta['byteorder'] != sys.byteorder:
+            raise ValueError
+
+        self.index_dir = index_dir
+        self.num_articles = meta['articles']
+        self.num_links = meta['links']
+        self._maps = []
+        self._titles = self._map('titles.bin', 'B')
+        self._title_offsets = self._map('title_offsets.bin', 'Q')
+        self._lookup = self._map('lookup.bin', 'B')
+        self._lookup_offsets = self._map('lookup_offsets.bin', 'Q')
+        self._lookup_ids = self._map('lookup_ids.bin', 'I')
+        self._offsets = self._map('offsets.bin', 'Q')
+        self._targets = self._map('targets.bin', 'I')
+        self._weights = self._map('weights.bin', 'I')
+
+    def __reduce__(self) -> tuple:
+        """Return how to pickle this index: by its directory, so a worker process that is
+        sent the index maps the files again itself."""
+        return LinkIndex, (self.index_dir,)
+
+    def _map(self, file_name: str, item_format: str) -> memoryview:
+        """Return the items of the index file <file_name> as a memory-mapped memoryview."""
+        with open(os.path.join(self.index_dir, file_name), 'rb') as file:
+            if os.fstat(file.fileno()).st_size == 0:
+                return memoryview(array(item_format))
+            mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._maps.append(mapped)
+        return memoryview(mapped).cast(item_format)
+
+    def title(self, article_id: int) -> str:
+        """Return the title of the article with the given id."""
+        start, end = self._title_offsets[article_id], self._title_offsets[article_id + 1]
+        return bytes(self._titles[start:end]).decode()
+
+    def article_id(self, title: str) -> Optional[int]:
+        """Return the id of the article <title> is the title of (or redirects to), or None if
+        there is no such article.
+        """
+        key = normalize_title(title).encode()
+        low, high = 0, len(self._lookup_ids)
+        while low < high:
+            middle = (low + high) // 2
+            start, end = self._lookup_offsets[middle], self._lookup_offsets[middle + 1]
+            if bytes(self._lookup[start:end]) < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low < len(self._lookup_ids):
+            start, end = self._lookup_offsets[low], self._lookup_offsets[low + 1]
+            if bytes(self._lookup[start:end]) == key:
+                return self._lookup_ids[low]
+        return None
+
+    def links(self, article_id: int) -> list[tuple[int, int]]:
+        """Return the (target id, weight) of every link on the article with the given id, in
+        the order they first appear on the article."""
+        start, end = self._offsets[article_id], self._offsets[article_id + 1]
+        return list(zip(self._targets[start:end], self._weights[start:end]))
+
+    def _wanted_links(self, url: str) -> list[tuple[str, int]]:
+        """Return the (url, weight) of every link on the article at <url> that the
+        WikipediaArticleParser would keep, in the order they first appear."""
+        article_id = self.article_id(url_to_title(url))
+        if article_id is None:
+            return []
+
+        wanted = []
+        for target_id, weight in self.links(article_id):
+            link = title_to_url(self.title(target_id))
+            href = link.replace('https://en.wikipedia.org', '')
+            if not any((unwanted in href) for unwanted in UNWANTED) and link != url:
+                wanted.append((link, weight))
+        return wanted
+
+    def get_adjacent_urls(self, url: str) -> list[str]:
+        """Return a list of all wikipedia pages that are adjacent to <url> in this index."""
+        return [link for link, _ in self._wanted_links(url)]
+
+    def get_adjacent_urls_weighted(self, url: str) -> list:
+        """Return a list in where each element is in the format ((link, name) weight)
+        for each wikipedia page that is adjacent to <url> in this index, sorted from the
+        highest weight to the lowest.
+        """
+        neighbours_to_weights = [((link, get_title(link)), weight)
+                                 for link, weight in self._wanted_links(url)]
+        return sorted(neighbours_to_weights, key=lambda item: item[1], reverse=True)
+
+    def close(self) -> None:
+        """Unmap the files of this index."""
+        for view in [self._titles, self._title_offsets, self._lookup, self._lookup_offsets,
+                     self._lookup_ids, self._offsets, self._targets, self._weights]:
+            view.release()
+        for mapped in self._maps:
+            mapped.close()
+        self._maps = []
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
+
+    import python_ta.contracts
+
+    python_ta.contracts.check_all_contracts()
+
+    import python_ta
+
+    python_ta.check_all(config={
+        'extra-imports': ['bz2', 'gzip', 'json', 'mmap', 'os', 'pickle', 're', 'sys', 'tempfile',
+                          'xml.etree.ElementTree', 'array', 'article_ids',
+                          'wikipedia_html_parsers'],
+        'allowed-io': ['_open_dump', 'import_pages_articles', '_write_array', '_write_strings',
+                       'LinkIndex.__init__', 'LinkIndex._map'],
+        'max-line-length': 100,
+        'disable': ['E1136']
+    })
@@ -16,14 +16,142 @@ prohibited.
 
 This file is Copyright (c) 2021 Faizah Sayyid, Tina Zhang, Poorvi Sharma, Courtney Amm.
 """
+from __future__ import annotations
+import codecs
+import heapq
+import os
+import re
+import threading
 import urllib.error
-import urllib.request
+from collections import OrderedDict
+from collections.abc import Iterable, Iterator, Sequence
+from html import escape, unescape
 from html.parser import HTMLParser
+from itertools import islice
+from typing import Any, Optional, Union
+
+from article_ids import canonical_url, get_article_table, is_article_url, url_to_title
+from http_transport import HTTPTransport
+from page_cache import PageCache, cache_key
 
 UNWANTED = ['Special:', 'Help:', 'Wikipedia', 'Category:', 'Portal:', 'Book:', '.jpg',
             '.svg', '.png', '.JPG', '.PNG', '.SVG', 'File:', 'Talk:', '(disambiguation)'
             'Module talk:', 'User:', ':', '(disambiguation)', 'Main_Page']
 
+# The file the downloaded pages are cached in, unless set_page_cache is called: in the
+# user's cache directory (XDG_CACHE_HOME or LOCALAPPDATA if they are set, otherwise ~/.cache)
+DEFAULT_CACHE_PATH = os.path.join(os.environ.get('XDG_CACHE_HOME')
+                                  or os.environ.get('LOCALAPPDATA')
+                                  or os.path.join(os.path.expanduser('~'), '.cache'),
+                                  'wikipedia-article-network', 'pages.sqlite3')
+
+# The cache every download goes through (created the first time a page is downloaded)
+_page_cache = None
+
+# Whether set_page_cache has been called (so a disabled cache isn't created again)
+_page_cache_set = False
+
+# The page cache whose redirects have been loaded into the article table
+_redirects_loaded_from = None
+
+# Matches the <link rel="canonical"> tag in the head of an article, which gives the url of the
+# article an alias redirects to
+_CANONICAL_LINK_RE = re.compile(r'<link\s[^>]*?\brel\s*=\s*["\']?canonical["\'\s][^>]*?'
+                                r'\bhref\s*=\s*["\']([^"\'>]+)', re.IGNORECASE)
+
+# The number of characters at the start of a page searched for its canonical link
+MAX_HEAD_CHARACTERS = 256 * 1024
+
+# The pooled connections every download goes through
+_transport = HTTPTransport()
+
+# The maximum number of parsed article documents kept in memory
+MAX_MEMOIZED_DOCUMENTS = 512
+
+# The number of characters of a cached page handed over at a time by iter_html
+HTML_CHUNK_SIZE = 16 * 1024
+
+# The names of the link extractors parse_adjacent_urls can use (see set_link_extractor)
+EXTRACTOR_HTML_PARSER = 'html.parser'
+EXTRACTOR_FAST = 'fast'
+
+# The link extractor parse_adjacent_urls (and so get_adjacent_urls) uses
+_link_extractor = EXTRACTOR_FAST
+
+# Whether iter_html downloads the rest of a page whose stream is closed early, to cache it
+# (see set_cache_closed_pages)
+_cache_closed_pages = True
+
+# The parts of a page links, summaries and images can be extracted from (the scope argument
+# of get_adjacent_urls and the functions like it): the whole page, or only the main content
+# container of the article
+SCOPE_PAGE = 'page'
+SCOPE_CONTENT = 'content'
+
+# Matches the start tag of the main content container of a Wikipedia article (the navigation
+# menus, sidebars, language links and footer of the page are all outside it)
+_CONTENT_START_RE = re.compile(r'<div(?=[\s/>])[^>]*?\sid\s*=\s*["\']?mw-content-text["\'\s/>]',
+                               re.IGNORECASE)
+
+# Matches a <div> or </div> tag, or a comment, script or style (whose divs don't count), or
+# the beginning of one that hasn't been downloaded in full yet
+_CONTENT_MARKUP_RE = re.compile(r'''
+    <!--.*?(?:(?P<comment_end>-->)|\Z)
+  | <(?P<cdata>script|style)(?=[\s/>]).*?(?:(?P<cdata_end></(?P=cdata)\s*>)|\Z)
+  | <(?P<close>/?)div(?=[\s/>])[^>]*(?P<tag_end>>)?
+''', re.DOTALL | re.IGNORECASE | re.VERBOSE)
+
+# The markup extract_article_links steps through, split up exactly the way html.parser's
+# HTMLParser.goahead splits it: comments, marked sections (like <![CDATA[...]]>), end tags,
+# declarations and processing instructions (everything up to the next '>'), and start tags
+# with their attributes (written like html.parser's locatestarttagend_tolerant)
+_LINK_MARKUP = r'''
+    <!--.*?(?:(?P<comment_end>--\s*>)|\Z)
+  | <!\[(?P<section>[a-zA-Z][-_.a-zA-Z0-9]*)\s*
+  | <[/!?][^>]*(?P<markup_end>>)?
+  | <(?P<name>[a-zA-Z][^\t\n\r\f />\x00]*)(?:\s|/(?!>))*
+    (?P<attributes>(?:(?=(?P<attribute>(?<=['"\s/])[^\s/>][^\s/=>]*
+      (?:\s*=+\s*(?:'[^']*'|"[^"]*"|(?!['"])[^>\s]*)\s*)?(?:\s|/(?!>))*
+    ))(?P=attribute))*)
+    \s*(?P<tag_end>/?>)?
+'''
+_LINK_ATTRIBUTE = r'''
+    ((?<=['"\s/])[^\s/>][^\s/=>]*)
+    (\s*=+\s*('[^']*'|"[^"]*"|(?!['"])[^>\s]*))?(?:\s|/(?!>))*
+'''
+
+# (each attribute of a tag is matched atomically, by matching it inside a lookahead and then
+# taking what the lookahead captured, so a tag that never ends can't make the search
+# backtrack through every way of splitting it into attributes; re only supports atomic
+# groups themselves from Python 3.11)
+
+# The characters after an unfinished start tag that make html.parser stop parsing the page
+_START_TAG_STOPS = 'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ=/'
+
+# Matches the end of each kind of marked section, by its (lowercase) keyword
+_SECTION_ENDS = {**dict.fromkeys(['cdata', 'temp', 'ignore', 'include', 'rcdata'], r'\]\s*\]\s*>'),
+                 **dict.fromkeys(['if', 'else', 'endif'], r'\]\s*>')}
+
+# Matches the end tag of each element whose contents html.parser doesn't parse, with the
+# letters of its name in either case (only the ASCII ones, as html.parser compares them)
+_CDATA_ENDS = {name: r'</\s*%s\s*>' % ''.join(f'[{c}{c.upper()}]' for c in name)
+               for name in ('script', 'style')}
+
+# The compiled patterns, for html code given as text and as raw bytes
+_LINK_MARKUP_RE = {str: re.compile(_LINK_MARKUP, re.DOTALL | re.VERBOSE),
+                   bytes: re.compile(_LINK_MARKUP.encode(), re.DOTALL | re.VERBOSE)}
+_LINK_ATTRIBUTE_RE = {str: re.compile(_LINK_ATTRIBUTE, re.VERBOSE),
+                      bytes: re.compile(_LINK_ATTRIBUTE.encode(), re.VERBOSE)}
+_SECTION_END_RE = {str: {name: re.compile(end) for name, end in _SECTION_ENDS.items()},
+                   bytes: {name.encode(): re.compile(end.encode())
+                           for name, end in _SECTION_ENDS.items()}}
+_CDATA_END_RE = {str: {name: re.compile(end) for name, end in _CDATA_ENDS.items()},
+                 bytes: {name.encode(): re.compile(end.encode())
+                         for name, end in _CDATA_ENDS.items()}}
+
+# Matches any link that contains one of the UNWANTED strings
+_UNWANTED_RE = re.compile('|'.join(re.escape(unwanted) for unwanted in UNWANTED))
+
 
 class WikipediaArticleParser(HTMLParser):
     """A Wikipedia article parser, used to extract Wikipedia links from html code.
@@ -50,7 +178,7 @@ class WikipediaArticleParser(HTMLParser):
         super().__init__()
         self.articles = []
         self.reset()
-        self.original_url = original_url
+        self.original_url = resolve_url(original_url)
 
     def error(self, message: str) -> None:
         """Help on function error in module _markupbase
@@ -67,6 +195,9 @@ class WikipediaArticleParser(HTMLParser):
         if tag == "a":
             for attribute in attrs:
                 name, link = attribute
+                if link is None:
+                    # an attribute without a value, like <a href>
+                    continue
                 unwanted_page = any((unwanted in link) for unwanted in UNWANTED)
 
                 self._add_article(name, link, unwanted_page)
@@ -76,7 +207,7 @@ class WikipediaArticleParser(HTMLParser):
         and not different attribute), if <unwanted_page> is false, and if <link> is a
         wikipedia article"""
         if name == "href" and link.startswith('/wiki/') and not unwanted_page:
-            link = 'https://en.wikipedia.org' + link
+            link = resolve_url('https://en.wikipedia.org' + link)
             if link not in self.articles and link != self.original_url:
                 self.articles.append(link)
 
@@ -232,91 +363,1043 @@ class _WikipediaImageParser(HTMLParser):
                         self.image = attrib[1]
 
 
-def get_adjacent_urls(url: str) -> list[str]:
-    """Return a list of all wikipedia pages that are adjacent to <url>"""
-    try:
-        data_to_parse = urllib.request.urlopen(url)
-        html = data_to_parse.read().decode()
-        data_to_parse.close()
+class _ArticleDocumentParser(HTMLParser):
+    """A parser that extracts the links, summary and image of a Wikipedia article in a single
+    pass over its html code, by driving the handlers of the three specialised parsers.
+
+    Instance Attributes:
+        - link_parser: collects the wikipedia links of the article
+        - summary_parser: collects the summary of the article
+        - image_parser: finds the first image of the article
+    """
+    link_parser: WikipediaArticleParser
+    summary_parser: WikipediaSummaryParser
+    image_parser: _WikipediaImageParser
+
+    def __init__(self, original_url: str, sentences_wanted: int = 2) -> None:
+        """Initialize a new document parser for the article at <original_url>."""
+        super().__init__()
+        self.reset()
+        self.link_parser = WikipediaArticleParser(original_url)
+        self.summary_parser = WikipediaSummaryParser(sentences_wanted)
+        self.image_parser = _WikipediaImageParser()
+
+    def error(self, message: str) -> None:
+        """Help on function error in module _markupbase
+
+        (This method needed to be implemented for the abstract super class HTMLParser,
+         but doesn't do anything)
+        """
+
+    def handle_starttag(self, tag: str, attrs: list[tuple]) -> None:
+        """Pass the start tag on to the link, summary and image parsers."""
+        self.link_parser.handle_starttag(tag, attrs)
+        self.summary_parser.handle_starttag(tag, attrs)
+        self.image_parser.handle_starttag(tag, attrs)
+
+    def handle_endtag(self, tag: str) -> None:
+        """Pass the end tag on to the summary parser."""
+        self.summary_parser.handle_endtag(tag)
 
-        parser = WikipediaArticleParser(url)
+    def handle_data(self, data: str) -> None:
+        """Pass the text on to the summary parser."""
+        self.summary_parser.handle_data(data)
+
+
+class ArticleDocument:
+    """Everything we extract from one Wikipedia article, parsed from a single download.
+
+    Instance Attributes:
+        - url: the url of the article
+        - links: the wikipedia links on the article, in the order they first appear
+        - link_counts: maps each link to the number of times its title appears in the
+            html code of the article (where characters like & in the title are escaped)
+        - summary: the first sentences of the article
+        - image: the link to the first large image on the article ('' if there is none)
+
+    Representation Invariants:
+        - set(self.link_counts) == set(self.links)
+        - self.url not in self.links
+    """
+    url: str
+    links: list[str]
+    link_counts: dict[str, int]
+    summary: str
+    image: str
+
+    def __init__(self, url: str, html: str, sentences_wanted: int = 2) -> None:
+        """Initialize the document of the article at <url> by parsing its <html> code.
+
+        >>> doc = ArticleDocument('https://en.wikipedia.org/wiki/Cade_(horse)',
+        ...                       '<p>Cade was sired by Godolphin Arabian. He was a stallion.'
+        ...                       '</p><a href="/wiki/Godolphin_Arabian">Godolphin Arabian</a>')
+        >>> doc.links
+        ['https://en.wikipedia.org/wiki/Godolphin_Arabian']
+        >>> doc.link_counts['https://en.wikipedia.org/wiki/Godolphin_Arabian']
+        2
+        >>> doc.summary
+        'Cade was sired by Godolphin Arabian. He was a stallion.'
+        """
+        parser = _ArticleDocumentParser(url, sentences_wanted)
         parser.feed(html)
 
-        return parser.articles
+        self.url = url
+        self.links = parser.link_parser.articles
+        # the html code escapes characters like & in the titles (AT&T is AT&amp;T in it)
+        escaped = {link: escape(get_title(link), quote=False) for link in self.links}
+        title_counts = count_titles(html, escaped.values())
+        self.link_counts = {link: title_counts[escaped[link]] for link in self.links}
+        self.summary = parser.summary_parser.summary
+        self.image = parser.image_parser.image
+
+    def weighted_links(self) -> RankedLinks:
+        """Return a list in where each element is in the format ((link, name) weight)
+        for each link on this article, sorted from the highest weight to the lowest.
+
+        The links are only sorted as far as they are read (see RankedLinks).
+        """
+        neighbours_to_weights = {(link, get_title(link)): self.link_counts[link]
+                                 for link in self.links}
+        return RankedLinks(list(neighbours_to_weights.items()))
+
+
+class RankedLinks(Sequence):
+    """The weighted links of an article, ((link, name), weight), from the highest weight to
+    the lowest (links with the same weight keep the order they were found in).
+
+    The links are kept in a heap, and only ranked as far as they are read: a graph build
+    that takes the first few sources of a page with hundreds of links never sorts the rest.
+    A RankedLinks compares equal to the list of the same links.
+
+    Instance Attributes:
+        - num_ranked: the number of links ranked so far
+
+    Representation Invariants:
+        - 0 <= self.num_ranked <= len(self)
+
+    >>> links = RankedLinks([(('a', 'A'), 1), (('b', 'B'), 3), (('c', 'C'), 1)])
+    >>> links[0]
+    (('b', 'B'), 3)
+    >>> links.num_ranked
+    1
+    >>> links == [(('b', 'B'), 3), (('a', 'A'), 1), (('c', 'C'), 1)]
+    True
+    """
+    # Private Instance Attributes:
+    #     - _heap:
+    #         the links not ranked yet, as (-weight, position found, (link, name))
+    #     - _ranked:
+    #         the links ranked so far, from the highest weight to the lowest
+    _heap: list[tuple[int, int, tuple[str, str]]]
+    _ranked: list[tuple[tuple[str, str], int]]
+
+    def __init__(self, weighted_links: list[tuple[tuple[str, str], int]]) -> None:
+        """Initialize the ranking of <weighted_links>, given in the order they were found."""
+        self._heap = [(-weight, i, link) for i, (link, weight) in enumerate(weighted_links)]
+        heapq.heapify(self._heap)
+        self._ranked = []
+
+    @property
+    def num_ranked(self) -> int:
+        """Return the number of links ranked so far."""
+        return len(self._ranked)
+
+    def _rank(self, n: int) -> None:
+        """Rank links until at least <n> of them (or all of them) have been ranked."""
+        while len(self._ranked) < n and self._heap:
+            negative_weight, _, link = heapq.heappop(self._heap)
+            self._ranked.append((link, -negative_weight))
+
+    def __len__(self) -> int:
+        """Return the number of links."""
+        return len(self._ranked) + len(self._heap)
+
+    def __getitem__(self, index: Union[int, slice]) -> Any:
+        """Return the link (or the list of links) at <index> in the ranking."""
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            self._rank(max(start + 1, stop) if step < 0 else stop)
+            return self._ranked[index]
+
+        self._rank(index + 1 if index >= 0 else len(self))
+        return self._ranked[index]
+
+    def __eq__(self, other: Any) -> bool:
+        """Return whether <other> holds the same links in the same order."""
+        if isinstance(other, (list, RankedLinks)):
+            return len(self) == len(other) and list(self) == list(other)
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        """Return a string representation of the ranked links."""
+        return f'RankedLinks({list(self)!r})'
+
+
+class LinkStream(Sequence):
+    """The links of a Wikipedia article (the same ones, in the same order, as
+    extract_article_links finds), found while the html code of the article is still being
+    read.
+
+    The page is only read as far as the links asked for: reading an index past the links
+    found so far reads more of it, and len() reads all of it. If the stream is dropped before
+    the whole page has been read, the rest of the page is only downloaded to be put in the
+    page cache, unless set_cache_closed_pages has turned that off (see iter_html).
+
+    Instance Attributes:
+        - url: the url of the article
+
+    >>> links = LinkStream('https://en.wikipedia.org/wiki/Cat',
+    ...                    iter(['<p><a href="/wiki/Dog">Dog</a><a hr', 'ef="/wiki/Cow">']))
+    >>> links[0]
+    'https://en.wikipedia.org/wiki/Dog'
+    >>> links.num_found
+    1
+    >>> links == ['https://en.wikipedia.org/wiki/Dog', 'https://en.wikipedia.org/wiki/Cow']
+    True
+    """
+    url: str
+
+    # Private Instance Attributes:
+    #     - _pieces:
+    #         the pieces of the html code that haven't been read yet, or None once the whole
+    #         page has been read
+    #     - _rest:
+    #         the html code that has been read but not scanned for links yet
+    #     - _seen:
+    #         maps every link found so far to None, in the order they were found
+    #     - _found:
+    #         the links found so far, in the order they were found
+    _pieces: Optional[Iterator[str]]
+    _rest: str
+    _seen: dict[str, None]
+    _found: list[str]
+
+    def __init__(self, url: str, pieces: Iterator[str]) -> None:
+        """Initialize the links of the article at <url>, whose html code is given by
+        <pieces>.
+
+        The first piece is read straight away, so an article that can't be downloaded
+        raises its error here.
+        """
+        self.url = url
+        self._pieces = pieces
+        self._rest = ''
+        self._seen = {}
+        self._found = []
+        self._read_more()
+
+    @property
+    def num_found(self) -> int:
+        """The number of links found so far (without reading any more of the page)."""
+        return len(self._found)
+
+    def _read_more(self) -> bool:
+        """Scan the next piece of the page for links, and return whether there was one."""
+        if self._pieces is None:
+            return False
+
+        piece = next(self._pieces, None)
+        if piece is None:
+            self._pieces = None
+            _scan_links(self.url, self._rest, self._seen, True)
+            self._rest = ''
+        else:
+            self._rest += piece
+            scanned = _scan_links(self.url, self._rest, self._seen, False)
+            self._rest = self._rest[scanned:]
+
+        self._found.extend(islice(self._seen, len(self._found), None))
+        return True
+
+    def _read_until(self, n: Optional[int]) -> None:
+        """Read the page until at least <n> links have been found (or until its end if <n>
+        is None)."""
+        while (n is None or len(self._found) < n) and self._read_more():
+            pass
+
+    def __len__(self) -> int:
+        """Return the number of links on the article, reading the whole page."""
+        self._read_until(None)
+        return len(self._found)
+
+    def __getitem__(self, index: Union[int, slice]) -> Any:
+        """Return the link (or list of links) at <index>, reading only as much of the page
+        as needed."""
+        if isinstance(index, slice):
+            start, stop = index.start or 0, index.stop
+            if stop is None or stop < 0 or start < 0:
+                self._read_until(None)
+            else:
+                self._read_until(max(start, stop))
+        else:
+            self._read_until(None if index < 0 else index + 1)
+        return self._found[index]
+
+    def __eq__(self, other: Any) -> bool:
+        """Return whether <other> is a list (or sequence of links) with the same links."""
+        if isinstance(other, (list, LinkStream)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    __hash__ = None
+
+    def __reduce__(self) -> tuple:
+        """Pickle the stream as the list of all its links (so it can be sent to another
+        process)."""
+        return list, (list(self),)
+
+    def __repr__(self) -> str:
+        """Return a string representation of the links."""
+        return f'LinkStream({list(self)!r})'
+
+
+class _DocumentMemo:
+    """A thread-safe, bounded memo of the most recently parsed article documents.
+
+    Instance Attributes:
+        - max_documents: the number of documents kept before the oldest is forgotten
+    """
+    max_documents: int
+
+    # Private Instance Attributes:
+    #     - _documents:
+    #         maps (url, sentences_wanted, extraction scope) to its document, from least to
+    #         most recently used
+    #     - _lock:
+    #         a lock so the memo can be shared by the threads of a concurrent build
+    _documents: OrderedDict[tuple[str, int, str], ArticleDocument]
+    _lock: threading.Lock
+
+    def __init__(self, max_documents: int) -> None:
+        """Initialize an empty memo holding at most <max_documents> documents."""
+        self.max_documents = max_documents
+        self._documents = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, url: str, sentences_wanted: int, scope: str) -> Optional[ArticleDocument]:
+        """Return the memoized document of <url> parsed in the extraction <scope>, or None
+        if it isn't memoized."""
+        key = (cache_key(url), sentences_wanted, scope)
+        with self._lock:
+            if key in self._documents:
+                self._documents.move_to_end(key)
+                return self._documents[key]
+            return None
+
+    def find(self, url: str, scope: str) -> Optional[ArticleDocument]:
+        """Return a memoized document of <url> parsed in the extraction <scope>, with any
+        number of summary sentences, or None if there isn't one.
+        """
+        url = cache_key(url)
+        with self._lock:
+            for key in reversed(self._documents):
+                if key[0] == url and key[2] == scope:
+                    return self._documents[key]
+            return None
+
+    def put(self, document: ArticleDocument, sentences_wanted: int, scope: str) -> None:
+        """Memoize <document>, parsed in the extraction <scope>, forgetting the least
+        recently used document if needed."""
+        key = (cache_key(document.url), sentences_wanted, scope)
+        with self._lock:
+            self._documents[key] = document
+            self._documents.move_to_end(key)
+            while len(self._documents) > self.max_documents:
+                self._documents.popitem(last=False)
+
+    def clear(self) -> None:
+        """Forget every memoized document."""
+        with self._lock:
+            self._documents.clear()
+
+
+# The documents of the most recently parsed articles
+_document_memo = _DocumentMemo(MAX_MEMOIZED_DOCUMENTS)
+
+
+def clear_document_memo() -> None:
+    """Forget every parsed article document, so articles are parsed again when needed."""
+    _document_memo.clear()
+
+
+def set_page_cache(cache: Optional[PageCache]) -> None:
+    """Make every download in this module go through <cache>.
+
+    If <cache> is None, pages are downloaded every time they are needed.
+    """
+    global _page_cache, _page_cache_set
+    _page_cache = cache
+    _page_cache_set = True
+
+
+def get_page_cache() -> Optional[PageCache]:
+    """Return the cache every download in this module goes through.
+
+    Unless set_page_cache has been called, this is a cache stored in DEFAULT_CACHE_PATH
+    (whose directory is created if needed).
+    """
+    global _page_cache, _page_cache_set
+    if not _page_cache_set:
+        os.makedirs(os.path.dirname(DEFAULT_CACHE_PATH), exist_ok=True)
+        _page_cache = PageCache(DEFAULT_CACHE_PATH)
+        _page_cache_set = True
+    return _page_cache
+
+
+def set_transport(transport: HTTPTransport) -> None:
+    """Make every download in this module go through the connections of <transport>."""
+    global _transport
+    _transport = transport
+
+
+def set_link_extractor(name: str) -> None:
+    """Make parse_adjacent_urls find links with the extractor called <name>:
+    EXTRACTOR_FAST (extract_article_links, the default) or EXTRACTOR_HTML_PARSER
+    (WikipediaArticleParser).
+
+    Raise a ValueError if there is no extractor called <name>.
+    """
+    global _link_extractor
+    if name not in {EXTRACTOR_FAST, EXTRACTOR_HTML_PARSER}:
+        raise ValueError(f'unknown link extractor: {name}')
+    _link_extractor = name
+
+
+def get_link_extractor() -> str:
+    """Return the name of the extractor parse_adjacent_urls finds links with."""
+    return _link_extractor
+
+
+def set_cache_closed_pages(enabled: bool) -> None:
+    """Make iter_html (and so the link streams of get_adjacent_urls) finish downloading the
+    pages whose streams are closed before the end, and put them in the page cache, if
+    <enabled>.
+
+    This is on by default, so a page is never downloaded twice while there is a page cache
+    (a repeat build of the same graph downloads nothing), but nothing is saved by stopping
+    early: the rest of the page is downloaded in the thread that closes the stream (or the
+    one that finalizes it), before the close returns. Turned off, a stream closed early
+    saves the rest of its download, but the page isn't cached, so a later build downloads
+    it again. Without a page cache, the rest of the page is never downloaded.
+    """
+    global _cache_closed_pages
+    _cache_closed_pages = enabled
+
+
+def get_cache_closed_pages() -> bool:
+    """Return whether the pages whose streams are closed early are still downloaded to
+    the end and cached (see set_cache_closed_pages)."""
+    return _cache_closed_pages
+
+
+def _check_scope(scope: str) -> None:
+    """Raise a ValueError if there is no extraction scope called <scope>."""
+    if scope not in {SCOPE_PAGE, SCOPE_CONTENT}:
+        raise ValueError(f'unknown extraction scope: {scope}')
+
+
+def _scoped_html(html: str, scope: str) -> str:
+    """Return the part of <html> the extraction <scope> covers."""
+    _check_scope(scope)
+    return html if scope == SCOPE_PAGE else extract_content(html)
+
+
+def _scoped_pieces(pieces: Iterator[str], scope: str) -> Iterator[str]:
+    """Return the pieces of the part of the html code in <pieces> the extraction <scope>
+    covers."""
+    _check_scope(scope)
+    return pieces if scope == SCOPE_PAGE else iter_content(pieces)
+
+
+def get_transport() -> HTTPTransport:
+    """Return the transport every download in this module goes through."""
+    return _transport
+
+
+def fetch_html(url: str) -> str:
+    """Return the html code of <url>, downloading it only if it isn't in the page cache.
+
+    Raise a urllib.error.HTTPError if the page can't be downloaded.
+    """
+    url = resolve_url(url)
+    cache = get_page_cache()
+    if cache is not None:
+        html = cache.get(url)
+        if html is not None:
+            return html
+
+    html = _transport.get_text(url)
+    store_page(url, html)
+    return html
+
+
+def resolve_url(url: str) -> str:
+    """Return the canonical url of the article <url> leads to, following every redirect
+    seen so far (see article_ids.ArticleTable.resolve).
+
+    The redirects kept in the page cache are loaded the first time the cache is used (this
+    doesn't create the page cache if nothing has been downloaded yet).
+    """
+    global _redirects_loaded_from
+    table = get_article_table()
+    if _page_cache is not None and _page_cache is not _redirects_loaded_from:
+        for alias, target in _page_cache.redirects().items():
+            table.add_redirect(alias, target)
+        _redirects_loaded_from = _page_cache
+    return table.resolve(url)
+
+
+def record_redirect(url: str, html: str) -> Optional[str]:
+    """Record the redirect to another article announced by the canonical link of the
+    beginning of the <html> code of <url>, in the article table and the page cache, and
+    return the url it redirects to (None if it doesn't redirect).
+    """
+    if not is_article_url(url):
+        return None
+
+    canonical_link = _CANONICAL_LINK_RE.search(html, 0, MAX_HEAD_CHARACTERS)
+    if canonical_link is None:
+        return None
+
+    target = canonical_url(unescape(canonical_link.group(1)))
+    if target == canonical_url(url) or not is_article_url(target):
+        return None
+
+    get_article_table().add_redirect(url, target)
+    cache = get_page_cache()
+    if cache is not None:
+        cache.put_redirect(url, target)
+    return target
+
+
+def store_page(url: str, html: str) -> None:
+    """Put the downloaded <html> code of <url> in the page cache, and record the redirect it
+    announces (the page is cached under the url it redirects to as well).
+    """
+    target = record_redirect(url, html)
+    cache = get_page_cache()
+    if cache is not None:
+        cache.put(url, html)
+        if target is not None:
+            cache.put(target, html)
+
+
+def iter_html(url: str) -> Iterator[str]:
+    """Yield the html code of <url> a piece at a time: from the page cache if it's there,
+    otherwise as it is downloaded.
+
+    A page that is downloaded to the end is put in the page cache. If the generator is
+    closed before then and there is a page cache, the rest of the page is downloaded when it
+    is closed so it can be cached, unless set_cache_closed_pages has turned that off (the
+    rest of the page is then not downloaded, and not cached).
+
+    Raise a urllib.error.HTTPError if the page can't be downloaded (when the first piece is
+    asked for).
+    """
+    url = resolve_url(url)
+    cache = get_page_cache()
+    html = None if cache is None else cache.get(url)
+    if html is not None:
+        for start in range(0, len(html), HTML_CHUNK_SIZE):
+            yield html[start:start + HTML_CHUNK_SIZE]
+        return
+
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    chunks = _transport.stream(url)
+
+    # ACCUMULATOR pieces collects the decoded pieces of the page
+    pieces = []
+    head_read = False
+    try:
+        for chunk in chunks:
+            pieces.append(decoder.decode(chunk))
+            if not head_read:
+                # record the redirect as soon as the head is in, even if the page isn't read
+                # to the end
+                head = ''.join(pieces)
+                head_read = '</head' in head or len(head) >= MAX_HEAD_CHARACTERS
+                if head_read:
+                    record_redirect(url, head)
+            yield pieces[-1]
+    except GeneratorExit:
+        if cache is not None and _cache_closed_pages:
+            _finish_page(url, chunks, decoder, pieces)
+        raise
+    finally:
+        chunks.close()
+    pieces.append(decoder.decode(b'', final=True))
+    yield pieces[-1]
+
+    store_page(url, ''.join(pieces))
+
+
+def _finish_page(url: str, chunks: Iterator[bytes], decoder: codecs.IncrementalDecoder,
+                 pieces: list[str]) -> None:
+    """Download the rest of the page at <url> from <chunks>, whose first <pieces> have been
+    decoded by <decoder>, and put the whole page in the page cache.
+
+    If the rest of the page can't be downloaded, nothing is cached.
+    """
+    try:
+        for chunk in chunks:
+            pieces.append(decoder.decode(chunk))
+    except urllib.error.URLError:
+        return
+    pieces.append(decoder.decode(b'', final=True))
+    store_page(url, ''.join(pieces))
+
+
+def get_article_document(url: str, sentences_wanted: int = 2,
+                         scope: str = SCOPE_PAGE) -> ArticleDocument:
+    """Return the document of the given wikipedia article, with a summary of
+    <sentences_wanted> sentences, parsed from the part of the page called <scope>:
+    SCOPE_PAGE (the whole page) or SCOPE_CONTENT (only the main content container of the
+    article, see iter_content).
+
+    Each article is only downloaded and parsed once per scope; later calls for the same
+    article return the memoized document.
+
+    Raise a urllib.error.HTTPError if the article can't be downloaded, and a ValueError if
+    there is no scope called <scope>.
+    """
+    url = resolve_url(url)
+    document = _document_memo.get(url, sentences_wanted, scope)
+    if document is None:
+        document = ArticleDocument(url, _scoped_html(fetch_html(url), scope), sentences_wanted)
+        _document_memo.put(document, sentences_wanted, scope)
+    return document
+
+
+def get_adjacent_urls(url: str, scope: str = SCOPE_PAGE) -> Sequence[str]:
+    """Return a sequence of all wikipedia pages that are adjacent to <url>, linked from the
+    part of its page called <scope> (see get_article_document).
+
+    With the fast link extractor, the links are a LinkStream, so the links at the start of
+    the article can be used before the rest of it has been downloaded.
+    """
+    url = resolve_url(url)
+    try:
+        document = _document_memo.find(url, scope)
+        if document is not None:
+            return list(document.links)
+
+        if _link_extractor == EXTRACTOR_FAST:
+            return LinkStream(url, _scoped_pieces(iter_html(url), scope))
+
+        return parse_adjacent_urls(url, fetch_html(url), scope)
 
     except urllib.error.HTTPError:
         return []
 
 
-def get_adjacent_urls_weighted(url: str) -> list:
+def get_adjacent_urls_weighted(url: str, scope: str = SCOPE_PAGE) -> list:
     """Return a list in where each element is in the format ((link, name) weight)
-    for each wikipedia page that is adjacent to <url>
+    for each wikipedia page that is adjacent to <url>, linked from the part of its page
+    called <scope> (see get_article_document).
     """
 
     try:
-        data_to_parse = urllib.request.urlopen(url)
-        html = data_to_parse.read().decode()
-        data_to_parse.close()
+        return get_article_document(url, scope=scope).weighted_links()
 
-        parser = WikipediaArticleParser(url)
-        parser.feed(html)
+    except urllib.error.HTTPError:
+        return []
 
-        neighbours_to_weights = {}
 
-        for article_link in parser.articles:
-            if article_link != url:
-                article_name = get_title(article_link)
-                weight1 = html.count(article_name)
-                neighbours_to_weights[(article_link, article_name)] = weight1
+def parse_adjacent_urls(url: str, html: str, scope: str = SCOPE_PAGE) -> list[str]:
+    """Return a list of all wikipedia pages that are adjacent to <url>, given its already
+    downloaded <html> code.
 
-        return sorted(list(neighbours_to_weights.items()),
-                      key=lambda item: item[1], reverse=True)
+    The links are found with the extractor chosen with set_link_extractor, in the part of
+    the page called <scope> (see get_article_document).
+    """
+    html = _scoped_html(html, scope)
+    if _link_extractor == EXTRACTOR_FAST:
+        return extract_article_links(url, html)
 
-    except urllib.error.HTTPError:
-        return []
+    parser = WikipediaArticleParser(url)
+    parser.feed(html)
+
+    return parser.articles
+
+
+def parse_adjacent_urls_weighted(url: str, html: str, scope: str = SCOPE_PAGE) -> list:
+    """Return the weighted links of <url> like get_adjacent_urls_weighted, given its already
+    downloaded <html> code.
+
+    The document parsed is memoized, just like one parsed by get_article_document.
+    """
+    document = ArticleDocument(url, _scoped_html(html, scope))
+    _document_memo.put(document, 2, scope)
+    return document.weighted_links()
+
+
+def extract_article_links(url: str, html: Union[str, bytes]) -> list[str]:
+    """Return the same links as parse_adjacent_urls with the html.parser extractor, by
+    searching the <html> code of <url> (as text or as raw utf-8 bytes) for links directly.
+
+    The page is split into markup exactly the way html.parser splits it, but only the
+    attributes of <a> tags are looked at, UNWANTED links are found with a single precompiled
+    pattern, and the links are kept in an ordered dict instead of being checked against a
+    list. Where html.parser itself differs between Python versions, at a marked section it
+    doesn't know (like <![unknown[), the links are found as Python 3.9 finds them: none from
+    there on. Given bytes, only ASCII whitespace counts as whitespace inside tags, so a tag
+    spaced out with other Unicode whitespace (which Wikipedia doesn't write) is split up
+    differently than in the decoded text.
+
+    >>> extract_article_links('https://en.wikipedia.org/wiki/Cat',
+    ...                       b'<a href="/wiki/Dog">Dog</a><!-- <a href="/wiki/Cow"> -->'
+    ...                       b'<A title=x HREF=/wiki/Help:Contents><a href="/wiki/Cat">'
+    ...                       b"<a class='x' href='/wiki/Fish_&amp;_chips'>")
+    ['https://en.wikipedia.org/wiki/Dog', 'https://en.wikipedia.org/wiki/Fish_%26_chips']
+    """
+    # ACCUMULATOR links maps the links found so far to None, in the order they were found
+    links = {}
+    _scan_links(url, html, links, True)
+    return list(links)
 
 
-def get_summary(url: str, sentences_wanted: int = 2) -> str:
+def _scan_links(url: str, html: Union[str, bytes], links: dict[str, None],
+                final: bool) -> int:
+    """Add the links of the article at <url> found in <html> to the end of <links> (see
+    extract_article_links), and return the position in <html> the scan got to.
+
+    If <final> is False, <html> is only the beginning of the rest of the page: the scan
+    stops before any markup that may not have been downloaded in full, and everything
+    from the returned position on has to be scanned again once more of the page is there.
+    """
+    kind = type(html)
+    attribute_re = _LINK_ATTRIBUTE_RE[kind]
+    url = resolve_url(url)
+    a, wiki, href = ('a', 'wiki', 'href') if kind is str else (b'a', b'wiki', b'href')
+    # a quoted attribute value whose closing quote hasn't been downloaded yet is split up
+    # differently once it has, so a start tag holding the last quote read may still change
+    last_quotes = () if final else (html.rfind('"' if kind is str else b'"'),
+                                    html.rfind("'" if kind is str else b"'"))
+
+    markup_re, cdata_ends = _LINK_MARKUP_RE[kind], _CDATA_END_RE[kind]
+    markup = markup_re.search(html)
+    while markup is not None:
+        # the last group matched tells most markup apart without looking any further
+        ending = markup.lastgroup
+        if ending == 'tag_end':
+            name = markup.group('name').lower()
+            end = markup.end() if name not in cdata_ends else _markup_end(html, markup)
+        elif ending == 'markup_end' or ending == 'comment_end':
+            name, end = None, markup.end()
+        else:
+            name, end = markup.group('name'), _markup_end(html, markup)
+        if end is None or last_quotes and name is not None and \
+                any(markup.start() <= quote < end for quote in last_quotes):
+            # html.parser can't get past this markup until more of the page is read
+            return markup.start()
+
+        if ending == 'tag_end' and name == a and html.find(wiki, markup.start(), end) != -1:
+            # go through the attributes like HTMLParser.parse_starttag does
+            attribute = attribute_re.match(html, markup.start('attributes'), end)
+            while attribute is not None:
+                name, value = attribute.group(1, 3)
+                if value is not None and name.lower() == href:
+                    if value[:1] == value[-1:] and value[:1] in ('"', "'", b'"', b"'"):
+                        value = value[1:-1]
+                    if kind is bytes:
+                        value = value.decode('utf-8', 'replace')
+                    value = unescape(value)
+
+                    if value.startswith('/wiki/') and _UNWANTED_RE.search(value) is None:
+                        link = resolve_url('https://en.wikipedia.org' + value)
+                        if link != url:
+                            links[link] = None
+                attribute = attribute_re.match(html, attribute.end(), end)
+
+        markup = markup_re.search(html, end)
+
+    # a '<' at the very end may start a tag that hasn't been downloaded yet
+    return len(html) - 1 if html[-1:] in ('<', b'<') else len(html)
+
+
+def _markup_end(html: Union[str, bytes], markup: re.Match) -> Optional[int]:
+    """Return the position in <html> where the markup that <markup> (a match of
+    _LINK_MARKUP_RE) starts ends, as html.parser finds it, or None if html.parser would stop
+    parsing the page there because the markup doesn't end in <html>.
+
+    The contents of <script> and <style> elements and of marked sections are part of them.
+    """
+    kind = type(html)
+    name, section = markup.group('name', 'section')
+    if section is not None:
+        if markup.end() == len(html):
+            return None
+        section_end = _SECTION_END_RE[kind].get(section.lower())
+        if section_end is None:
+            # (html.parser stops at a marked section it doesn't know, or raises an error
+            # from Python 3.10 on)
+            return None
+        close = section_end.search(html, markup.start() + 3)
+    elif name is None:
+        ended = markup.group('comment_end') is not None or \
+            markup.group('markup_end') is not None
+        return markup.end() if ended else None
+    elif markup.group('tag_end') is None:
+        # html.parser treats the start of a tag that doesn't end with a '>' as text, unless
+        # the page ends (or a letter, '=' or '/' comes) right after its attributes
+        following = html[markup.end():markup.end() + 1]
+        stops = _START_TAG_STOPS if kind is str else _START_TAG_STOPS.encode()
+        return None if not following or following in stops else markup.end()
+    else:
+        cdata_end = _CDATA_END_RE[kind].get(name.lower())
+        if cdata_end is None or len(markup.group('tag_end')) == 2:
+            return markup.end()
+        close = cdata_end.search(html, markup.end())
+
+    return None if close is None else close.end()
+
+
+def extract_content(html: str) -> str:
+    """Return the main content container of the Wikipedia article with the given <html>
+    code (see iter_content).
+
+    >>> extract_content('<a href="/wiki/Main_Page"></a><div id="mw-content-text"><div>'
+    ...                 '<p>Text.</p></div><!-- </div> --></div><div id="footer"></div>')
+    '<div id="mw-content-text"><div><p>Text.</p></div><!-- </div> --></div>'
+    """
+    return ''.join(iter_content([html]))
+
+
+def iter_content(pieces: Iterable[str]) -> Iterator[str]:
+    """Yield the main content container (the <div id="mw-content-text"> element) of the
+    Wikipedia article whose html code is given by <pieces>, a piece at a time.
+
+    Everything before the container is skipped with a single search, and no more pieces are
+    read once it ends. If the page has no such container, the whole page is yielded.
+    """
+    pieces = iter(pieces)
+
+    # ACCUMULATOR skipped collects the pieces read before the container is found
+    skipped = []
+    rest = ''
+    start = None
+    for piece in pieces:
+        skipped.append(piece)
+        # (a start tag that is cut off can only begin at the last '<' of what was read)
+        last_tag = rest.rfind('<')
+        rest = ('' if last_tag == -1 else rest[last_tag:]) + piece
+        start = _CONTENT_START_RE.search(rest)
+        if start is not None:
+            break
+    if start is None:
+        yield ''.join(skipped)
+        return
+
+    rest = rest[start.start():]
+    depth = 0
+    while True:
+        scanned = 0
+        for markup in _CONTENT_MARKUP_RE.finditer(rest):
+            if markup.end() == len(rest) and not _is_markup_complete(markup):
+                break
+            scanned = markup.end()
+            if markup.group('tag_end') is not None:
+                depth += -1 if markup.group('close') else 1
+                if depth == 0:
+                    yield rest[:scanned]
+                    return
+        else:
+            # only the last '<' may start a tag that hasn't been downloaded in full yet
+            last_tag = rest.rfind('<', scanned)
+            scanned = len(rest) if last_tag == -1 else last_tag
+
+        yield rest[:scanned]
+        rest = rest[scanned:]
+        piece = next(pieces, None)
+        if piece is None:
+            yield rest
+            return
+        rest += piece
+
+
+def _is_markup_complete(markup: re.Match) -> bool:
+    """Return whether the comment, script, style or div tag matched by <markup> (a match of
+    _CONTENT_MARKUP_RE) was read to its end."""
+    if markup.group().startswith('<!--'):
+        return markup.group('comment_end') is not None
+    elif markup.group('cdata') is not None:
+        return markup.group('cdata_end') is not None
+    else:
+        return markup.group('tag_end') is not None
+
+
+def count_titles(html: str, titles: Iterable[str]) -> dict[str, int]:
+    """Return a dict mapping each of the <titles> to html.count(title), counting every title
+    in a single pass over <html>.
+
+    The titles are put in a trie, which is compiled into one regular expression that finds
+    the longest title starting at each position of <html>; every title that is a prefix of
+    it starts there too. As with str.count, an occurrence of a title that overlaps the
+    previous occurrence of the same title isn't counted.
+
+    >>> count_titles('Great Britain and the Kingdom of Great Britain; aaa',
+    ...              ['Great Britain', 'Kingdom of Great Britain', 'Great', 'aa', 'x'])
+    {'Great Britain': 2, 'Kingdom of Great Britain': 1, 'Great': 2, 'aa': 1, 'x': 0}
+    """
+    counts = dict.fromkeys(titles, 0)
+    if '' in counts:
+        counts[''] = html.count('')
+
+    # each node of the trie maps the next character to a child node, and '' to the title
+    # that ends at the node (if there is one)
+    trie = {}
+    for title in counts:
+        if title != '':
+            node = trie
+            for char in title:
+                node = node.setdefault(char, {})
+            node[''] = title
+
+    if trie == {}:
+        return counts
+
+    # maps each title to the titles that are prefixes of it (itself included)
+    prefixes = {}
+    for title in counts.keys() - {''}:
+        node = trie
+        prefixes[title] = []
+        for char in title:
+            node = node[char]
+            if '' in node:
+                prefixes[title].append(node[''])
+
+    # maps each title to the position its last counted occurrence ended at
+    last_end = dict.fromkeys(prefixes, 0)
+    for match in re.finditer(f'(?=({_trie_pattern(trie)}))', html):
+        start = match.start()
+        for title in prefixes[match.group(1)]:
+            if start >= last_end[title]:
+                counts[title] += 1
+                last_end[title] = start + len(title)
+
+    return counts
+
+
+def _trie_pattern(trie: dict) -> str:
+    """Return a regular expression matching the longest title in <trie> at a position,
+    built from the bottom of the trie up (so long titles can't hit the recursion limit)."""
+    # the pattern of each node, built after the patterns of its children
+    patterns = {}
+    stack = [(trie, False)]
+    while stack:
+        node, children_done = stack.pop()
+        if not children_done:
+            stack.append((node, True))
+            stack.extend((child, False) for char, child in node.items() if char != '')
+            continue
+
+        branches = [re.escape(char) + patterns.pop(id(child))
+                    for char, child in node.items() if char != '']
+        if '' in node and branches:
+            # try the longer titles first, and end here if none of them match
+            patterns[id(node)] = '(?:' + '|'.join(branches) + ')?'
+        elif len(branches) == 1:
+            patterns[id(node)] = branches[0]
+        else:
+            patterns[id(node)] = '(?:' + '|'.join(branches) + ')' if branches else ''
+
+    return patterns[id(trie)]
+
+
+def get_summary(url: str, sentences_wanted: int = 2, scope: str = SCOPE_PAGE) -> str:
     """Return the summary of the given wikipedia article with <sentences_wanted> being
     the number of sentences in the summary
     (the summary may contain less than <sentences_wanted> sentence if the article
-    corresponding to <url> only has one sentence in it)
+    corresponding to <url> only has one sentence in it), taken from the part of its page
+    called <scope> (see get_article_document)
+
+    The article is only parsed until the summary is complete (unless it has already been
+    parsed), and the summary is the same as if the whole page had been parsed. (The rest of
+    the page is still downloaded to be put in the page cache, if there is one and
+    set_cache_closed_pages hasn't turned that off.)
 
     Precondition
         - 'https://en.wikipedia.org/wiki/' in url
     """
-    data_to_parse = urllib.request.urlopen(url)
-    html = data_to_parse.read().decode()
-    data_to_parse.close()
+    url = resolve_url(url)
+    document = _document_memo.get(url, sentences_wanted, scope)
+    if document is not None:
+        return document.summary
 
     parser = WikipediaSummaryParser(sentences_wanted)
-    parser.feed(html)
-
+    pieces = _scoped_pieces(iter_html(url), scope)
+    try:
+        feed_summary_parser(parser, pieces)
+    finally:
+        pieces.close()
     return parser.summary
 
 
+def feed_summary_parser(parser: WikipediaSummaryParser, pieces: Iterable[str]) -> None:
+    """Feed the pieces of html code in <pieces> to <parser>, stopping as soon as no more of
+    the page could change its summary.
+
+    Each piece of text between two tags is fed to the parser in one go, so the summary is
+    the same as if the whole page had been fed at once.
+
+    >>> parser = WikipediaSummaryParser(2)
+    >>> pieces = iter(['<p>Cats are ', 'small. They purr.</p>', '<p>Never read.</p>'])
+    >>> feed_summary_parser(parser, pieces)
+    >>> parser.summary
+    'Cats are small. They purr.'
+    >>> next(pieces)
+    '<p>Never read.</p>'
+    """
+    rest = ''
+    for piece in pieces:
+        rest += piece
+        end = rest.rfind('<')
+        if end > 0:
+            parser.feed(rest[:end])
+            rest = rest[end:]
+            if _is_summary_complete(parser):
+                return
+    parser.feed(rest)
+
+
+def _is_summary_complete(parser: WikipediaSummaryParser) -> bool:
+    """Return whether no more html code could change the summary of <parser>.
+
+    A summary with more sentences than wanted is only complete once it has been cut down,
+    which WikipediaSummaryParser does the next time it sees any text.
+    """
+    summary, sentences_wanted = parser.summary, parser.sentences_wanted
+    periods = summary.count('.')
+    return periods == sentences_wanted or \
+        (periods > sentences_wanted and '.'.join(summary.split('.')[:2]) + '.' == summary)
+
+
 def get_title(url: str) -> str:
     """Return the title of the given wikipedia article
 
     >>> get_title('https://en.wikipedia.org/wiki/Rebecca_Sugar')
     'Rebecca Sugar'
+    >>> get_title('https://en.wikipedia.org/wiki/Leading_sire_in_Great_Britain_%26_Ireland')
+    'Leading sire in Great Britain & Ireland'
     """
+    if is_article_url(url):
+        return url_to_title(canonical_url(url))
 
     title = url.replace('https://en.wikipedia.org/wiki/', '')
 
     return title.replace('_', ' ')
 
 
-def get_image(url: str):
-    """Returns the first image on the wikipedia page"""
-    data_to_parse = urllib.request.urlopen(url)
-    html = data_to_parse.read().decode()
-    data_to_parse.close()
-
-    parser = _WikipediaImageParser()
-    parser.feed(html)
+def get_image(url: str, scope: str = SCOPE_PAGE):
+    """Returns the first image on the wikipedia page (in the part of it called <scope>, see
+    get_article_document)"""
+    document = _document_memo.find(url, scope)
+    if document is None:
+        document = get_article_document(url, scope=scope)
 
-    return parser.image
+    return document.image
 
 
 if __name__ == '__main__':
@@ -331,7 +1414,9 @@ if __name__ == '__main__':
     import python_ta
 
     python_ta.check_all(config={
-        'extra-imports': ['urllib.error', 'urllib.request', 'html.parser'],
+        'extra-imports': ['codecs', 'heapq', 'os', 're', 'threading', 'urllib.error',
+                          'collections', 'html', 'html.parser', 'itertools', 'article_ids',
+                          'http_transport', 'page_cache'],
         'allowed-io': [],
         'max-line-length': 100,
         'disable': ['E1136']